@@ -34,6 +34,7 @@ from .services import users as users_service
 from .services import jobs as jobs_service
 from .services import payments as payments_service
 from .services import promos as promos_service
+from .services import profiles as profiles_service
 
 logger = logging.getLogger(__name__)
 
@@ -58,10 +59,13 @@ async def admin_health(_: bool = Depends(verify_admin_password)):
 # ==================== Dashboard ====================
 
 @router.get("/stats", response_model=DashboardStats)
-async def get_dashboard_stats(_: bool = Depends(verify_admin_password)):
-    """Get aggregate statistics for admin dashboard."""
+async def get_dashboard_stats(
+    refresh: bool = Query(False, description="Bypass the stats cache"),
+    _: bool = Depends(verify_admin_password),
+):
+    """Get aggregate statistics for admin dashboard (cached briefly)."""
     try:
-        stats = await users_service.get_dashboard_stats()
+        stats = await users_service.get_dashboard_stats(refresh=refresh)
         return stats
     except Exception as e:
         logger.error(f"Failed to get dashboard stats: {e}")
@@ -76,11 +80,14 @@ async def list_users(
     page: int = Query(1, ge=1),
     per_page: int = Query(25, ge=1, le=100),
     search: Optional[str] = Query(None, max_length=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
 ):
-    """List users with pagination and search."""
+    """List users with pagination and ranked search (email, name, uid, Stripe id)."""
     try:
-        result = await users_service.list_users(page=page, per_page=per_page, search=search)
+        result = await users_service.list_users(page=page, per_page=per_page, search=search, cursor=cursor)
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to list users: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch users")
@@ -130,16 +137,20 @@ async def list_jobs(
     per_page: int = Query(25, ge=1, le=100),
     status: Optional[JobStatus] = Query(None),
     user_id: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
 ):
-    """List jobs with pagination and status filter."""
+    """List jobs with pagination and status/user filters."""
     try:
         result = await jobs_service.list_jobs(
             page=page,
             per_page=per_page,
             status=status.value if status else None,
-            user_id=user_id
+            user_id=user_id,
+            cursor=cursor,
         )
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to list jobs: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch jobs")
@@ -171,7 +182,11 @@ async def retry_job(
 ):
     """Retry a failed job (resets to pending, uses already-charged credits)."""
     try:
-        result = await jobs_service.retry_job(job_id, request.note if request else None)
+        result = await jobs_service.retry_job(
+            job_id,
+            request.note if request else None,
+            profile=request.profile if request else False,
+        )
         return result
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -201,6 +216,39 @@ async def replay_webhook(
         raise HTTPException(status_code=500, detail=f"Failed to replay webhook: {e}")
 
 
+# ==================== Profiles ====================
+
+@router.get("/profiles")
+async def list_profiles(
+    _: bool = Depends(verify_admin_password),
+    limit: int = Query(20, ge=1, le=100),
+):
+    """List uploaded job profiles, newest first."""
+    try:
+        return await profiles_service.list_profiles(limit)
+    except Exception as e:
+        logger.error(f"Failed to list profiles: {e}")
+        raise HTTPException(status_code=500, detail="Failed to fetch profiles")
+
+
+@router.get("/profiles/{job_id}")
+async def get_profile(
+    job_id: str,
+    _: bool = Depends(verify_admin_password),
+):
+    """Get a job's profile: Python hot spots, FFmpeg benchmark and pstats download URL."""
+    try:
+        profile = await profiles_service.get_profile(job_id)
+        if not profile:
+            raise HTTPException(status_code=404, detail="Profile not found")
+        return profile
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get profile for job {job_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to fetch profile")
+
+
 # ==================== Payments ====================
 
 @router.get("/payments", response_model=PaymentsResponse)
@@ -28,6 +28,7 @@ class JobType(str, Enum):
     VIDEO_GENERATION = "video_generation"
     SUBTITLES = "subtitles"
     WATERMARK = "watermark"
+    POST_PROCESS_CHAIN = "post_process_chain"
 
 
 class SubscriptionStatus(str, Enum):
@@ -68,6 +69,9 @@ class PaginatedResponse(BaseModel):
     page: int
     pages: int
     per_page: int
+    next_cursor: Optional[str] = None
+    has_more: bool = False
+    took_ms: Optional[float] = None
 
 
 # ==================== Health ====================
@@ -161,6 +165,7 @@ class AdminJobDetail(AdminJobSummary):
 class JobRetryRequest(BaseModel):
     """Request to retry a failed job."""
     note: Optional[str] = Field(None, max_length=500)
+    profile: bool = Field(False, description="Profile the job when it runs again")
 
 
 class JobRetryResponse(BaseModel):
@@ -269,3 +274,4 @@ class DashboardStats(BaseModel):
     jobs: JobStats
     revenue: RevenueStats
     promos: PromoStats
+    generated_at: Optional[datetime] = None
@@ -3,5 +3,6 @@ from . import users
 from . import jobs
 from . import payments
 from . import promos
+from . import profiles
 
-__all__ = ["users", "jobs", "payments", "promos"]
+__all__ = ["users", "jobs", "payments", "promos", "profiles"]
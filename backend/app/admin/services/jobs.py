@@ -2,8 +2,9 @@
 import logging
 import os
 import tempfile
+import time
 from datetime import datetime, timezone
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 
 from google.cloud import firestore, secretmanager
 import httpx
@@ -15,9 +16,16 @@ from ..schemas import (
     WebhookReplayResponse,
     JobStatus,
 )
+from ...jobs.services.pagination import apply_cursor, encode_cursor, count_query
+from ...repository import UserNotFoundError, get_credit_repository
 
 logger = logging.getLogger(__name__)
 
+# uid -> (expires_at monotonic, email) for job list display
+USER_EMAIL_CACHE_TTL_SECONDS = int(os.getenv("ADMIN_EMAIL_CACHE_SECONDS", "300"))
+USER_EMAIL_CACHE_MAX_ENTRIES = 5000
+_email_cache: Dict[str, Tuple[float, str]] = {}
+
 # Firestore client (lazy initialization)
 _db = None
 
@@ -30,44 +38,81 @@ def get_db():
     return _db
 
 
+def get_user_emails(db, uids) -> Dict[str, str]:
+    """Return uid -> email for the given users.
+
+    Cached uids are served from memory; the rest are fetched in a single
+    batched get_all() that only reads the email field.
+    """
+    now = time.monotonic()
+    emails = {}
+    missing = []
+    for uid in set(filter(None, uids)):
+        cached = _email_cache.get(uid)
+        if cached and cached[0] > now:
+            emails[uid] = cached[1]
+        else:
+            missing.append(uid)
+
+    if missing:
+        refs = [db.collection("users").document(uid) for uid in missing]
+        for user_doc in db.get_all(refs, field_paths=["email"]):
+            if not user_doc.exists:
+                continue
+            email = (user_doc.to_dict() or {}).get("email", "Unknown")
+            emails[user_doc.id] = email
+            _email_cache[user_doc.id] = (now + USER_EMAIL_CACHE_TTL_SECONDS, email)
+
+        # Keep the cache bounded; drop the entries closest to expiry
+        if len(_email_cache) > USER_EMAIL_CACHE_MAX_ENTRIES:
+            for uid, _ in sorted(_email_cache.items(), key=lambda item: item[1][0])[:len(_email_cache) // 4]:
+                _email_cache.pop(uid, None)
+
+    return emails
+
+
 async def list_jobs(
     page: int = 1,
     per_page: int = 25,
     status: Optional[str] = None,
     user_id: Optional[str] = None,
+    cursor: Optional[str] = None,
 ) -> Dict[str, Any]:
-    """List jobs with pagination and filters."""
+    """List jobs with pagination and filters.
+
+    Filters are applied before ordering so the (status, user_id,
+    created_at) composite indexes serve the query directly. Pass the
+    returned next_cursor back as ``cursor`` for the next page; ``page``
+    still works via an offset for older clients.
+    """
     db = get_db()
     jobs_ref = db.collection("jobs")
 
-    # Build query
-    query = jobs_ref.order_by("created_at", direction=firestore.Query.DESCENDING)
-
+    # Build query: equality filters first, then the cursor ordering
+    query = jobs_ref
     if status:
-        query = jobs_ref.where("status", "==", status).order_by(
-            "created_at", direction=firestore.Query.DESCENDING
-        )
-
+        query = query.where("status", "==", status)
     if user_id:
         query = query.where("user_id", "==", user_id)
 
-    # Get all matching documents
-    all_docs = list(query.stream())
-    total = len(all_docs)
+    total = count_query(query)
     pages = (total + per_page - 1) // per_page
 
-    # Paginate
-    start = (page - 1) * per_page
-    end = start + per_page
-    paginated_docs = all_docs[start:end]
+    page_query = apply_cursor(query, jobs_ref, cursor)
+    if not cursor and page > 1:
+        page_query = page_query.offset((page - 1) * per_page)
+
+    docs = list(page_query.limit(per_page + 1).stream())
+    has_more = len(docs) > per_page
+    paginated_docs = docs[:per_page]
 
-    # Get user emails for display
-    user_emails = {}
-    user_ids = set(doc.to_dict().get("user_id") for doc in paginated_docs if doc.to_dict().get("user_id"))
-    for uid in user_ids:
-        user_doc = db.collection("users").document(uid).get()
-        if user_doc.exists:
-            user_emails[uid] = user_doc.to_dict().get("email", "Unknown")
+    next_cursor = None
+    if has_more and paginated_docs:
+        last = paginated_docs[-1]
+        next_cursor = encode_cursor(last.to_dict().get("created_at"), last.id)
+
+    # Get user emails for display (one batched read for the whole page)
+    user_emails = get_user_emails(db, [doc.to_dict().get("user_id") for doc in paginated_docs])
 
     # Convert to response
     items = []
@@ -115,6 +160,8 @@ async def list_jobs(
         "page": page,
         "pages": pages,
         "per_page": per_page,
+        "next_cursor": next_cursor,
+        "has_more": has_more,
     }
 
 
@@ -133,11 +180,7 @@ async def get_job_detail(job_id: str) -> Optional[AdminJobDetail]:
     uid = data.get("user_id", "")
 
     # Get user email
-    user_email = None
-    if uid:
-        user_doc = db.collection("users").document(uid).get()
-        if user_doc.exists:
-            user_email = user_doc.to_dict().get("email")
+    user_email = get_user_emails(db, [uid]).get(uid) if uid else None
 
     # Defensive status handling
     status_raw = data.get("status", "pending")
@@ -178,8 +221,12 @@ async def get_job_detail(job_id: str) -> Optional[AdminJobDetail]:
     )
 
 
-async def retry_job(job_id: str, note: Optional[str] = None) -> JobRetryResponse:
-    """Retry a failed job by resetting to pending."""
+async def retry_job(job_id: str, note: Optional[str] = None, profile: bool = False) -> JobRetryResponse:
+    """Retry a failed job by resetting to pending (optionally flagged for profiling).
+
+    ``profile`` sets the job document's flag; the worker profiles the next
+    run and deletes the flag when that run finishes.
+    """
     db = get_db()
 
     # Find the job
@@ -208,6 +255,8 @@ async def retry_job(job_id: str, note: Optional[str] = None) -> JobRetryResponse
         "retry_note": note,
         "retried_at": datetime.now(timezone.utc),
     }
+    if profile:
+        update_data["profile"] = True
     job_ref.update(update_data)
 
     # TODO: Enqueue job to Cloud Tasks for processing
@@ -328,7 +377,7 @@ async def replay_webhook(job_id: str) -> WebhookReplayResponse:
                 "error_message": "WaveSpeed completed but no outputs",
                 "updated_at": firestore.SERVER_TIMESTAMP,
             })
-            _refund_credits(db, user_id, credits_charged, job_id)
+            await _refund_credits(user_id, credits_charged, job_id)
             return WebhookReplayResponse(
                 success=True,
                 job_id=job_id,
@@ -390,7 +439,7 @@ async def replay_webhook(job_id: str) -> WebhookReplayResponse:
             "error_message": error_msg,
             "updated_at": firestore.SERVER_TIMESTAMP,
         })
-        _refund_credits(db, user_id, credits_charged, job_id)
+        await _refund_credits(user_id, credits_charged, job_id)
         return WebhookReplayResponse(
             success=True,
             job_id=job_id,
@@ -404,7 +453,7 @@ async def replay_webhook(job_id: str) -> WebhookReplayResponse:
             "error_message": "WaveSpeed request not found (may have expired)",
             "updated_at": firestore.SERVER_TIMESTAMP,
         })
-        _refund_credits(db, user_id, credits_charged, job_id)
+        await _refund_credits(user_id, credits_charged, job_id)
         return WebhookReplayResponse(
             success=True,
             job_id=job_id,
@@ -422,29 +471,14 @@ async def replay_webhook(job_id: str) -> WebhookReplayResponse:
         )
 
 
-def _refund_credits(db, user_id: str, credits: float, job_id: str) -> None:
+async def _refund_credits(user_id: str, credits: float, job_id: str) -> None:
     """Refund credits to user on job failure."""
     if not credits or credits <= 0:
         return
 
-    user_ref = db.collection("users").document(user_id)
-
-    @firestore.transactional
-    def refund_transaction(transaction, user_ref, credits):
-        user_doc = user_ref.get(transaction=transaction)
-        if not user_doc.exists:
-            logger.error(f"User {user_id} not found for refund")
-            return
-
-        user_data = user_doc.to_dict()
-        current_balance = user_data.get("credits_balance", 0)
-        new_balance = current_balance + credits
-
-        transaction.update(user_ref, {
-            "credits_balance": new_balance,
-            "updated_at": firestore.SERVER_TIMESTAMP,
-        })
-
-    transaction = db.transaction()
-    refund_transaction(transaction, user_ref, credits)
+    try:
+        await get_credit_repository().refund(user_id, credits)
+    except UserNotFoundError:
+        logger.error(f"User {user_id} not found for refund")
+        return
     logger.info(f"[ADMIN] Refunded {credits} credits to user {user_id} for job {job_id}")
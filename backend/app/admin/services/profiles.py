@@ -0,0 +1,85 @@
+"""Job profiles uploaded by the workers.
+
+Workers upload a profile of a job to gs://OUTPUT_BUCKET/temp/profiles/{job_id}/
+when the job is profiled (``profile: true`` on the job document or task
+payload, or sampled; see shared/worker_utils/profiling.py).
+"""
+import asyncio
+import json
+import logging
+import os
+from typing import Any, Dict, Optional
+
+from google.cloud import storage
+
+from ...jobs.services import signer
+
+logger = logging.getLogger(__name__)
+
+OUTPUT_BUCKET = os.getenv("OUTPUT_BUCKET", "nuumee-outputs")
+PROFILE_PREFIX = "temp/profiles"
+
+# Storage client (lazy initialization)
+_client: Optional[storage.Client] = None
+
+
+def get_storage_client() -> storage.Client:
+    """Get Storage client."""
+    global _client
+    if _client is None:
+        _client = storage.Client()
+    return _client
+
+
+def _list_profiles(limit: int) -> Dict[str, Any]:
+    client = get_storage_client()
+    metas = [
+        blob for blob in client.list_blobs(OUTPUT_BUCKET, prefix=f"{PROFILE_PREFIX}/")
+        if blob.name.endswith("/meta.json")
+    ]
+    metas.sort(key=lambda blob: blob.updated, reverse=True)
+
+    profiles = []
+    for blob in metas[:limit]:
+        try:
+            meta = json.loads(blob.download_as_text())
+        except Exception as e:
+            logger.warning(f"Unreadable profile metadata {blob.name}: {e}")
+            meta = {"job_id": blob.name.split("/")[-2]}
+        meta["uploaded_at"] = blob.updated.isoformat() if blob.updated else None
+        profiles.append(meta)
+    return {"profiles": profiles, "total": len(metas)}
+
+
+def _get_profile(job_id: str) -> Optional[Dict[str, Any]]:
+    prefix = f"{PROFILE_PREFIX}/{job_id}/"
+    blobs = {
+        blob.name[len(prefix):]: blob
+        for blob in get_storage_client().list_blobs(OUTPUT_BUCKET, prefix=prefix)
+    }
+    if "meta.json" not in blobs:
+        return None
+
+    def text(name: str) -> Optional[str]:
+        return blobs[name].download_as_text() if name in blobs else None
+
+    pstats_url = None
+    if "python.pstats" in blobs:
+        pstats_url = signer.download_url(OUTPUT_BUCKET, f"{prefix}python.pstats").url
+
+    return {
+        "meta": json.loads(text("meta.json")),
+        "python_summary": text("python.txt"),
+        "ffmpeg_benchmark": text("ffmpeg.txt"),
+        "pstats_url": pstats_url,
+    }
+
+
+async def list_profiles(limit: int = 20) -> Dict[str, Any]:
+    """Metadata of the newest uploaded profiles."""
+    return await asyncio.to_thread(_list_profiles, limit)
+
+
+async def get_profile(job_id: str) -> Optional[Dict[str, Any]]:
+    """A job's profile: metadata, text summaries and a signed URL for the pstats file."""
+    return await asyncio.to_thread(_get_profile, job_id)
@@ -6,6 +6,7 @@ from typing import List, Optional
 from google.cloud import firestore
 
 from ..schemas import PromoCode, CreatePromoRequest
+from ...promo.service import promo_uses_total
 
 logger = logging.getLogger(__name__)
 
@@ -37,7 +38,7 @@ async def list_promos() -> List[PromoCode]:
             code=data.get("code", ""),
             credits=data.get("credits", 0),
             max_uses=data.get("max_uses"),
-            current_uses=data.get("current_uses", 0),
+            current_uses=promo_uses_total(doc.reference, data),
             expires_at=data.get("expires_at"),
             active=data.get("active", True),
             created_at=data.get("created_at", datetime.now(timezone.utc)),
@@ -126,7 +127,7 @@ async def get_promo_by_code(code: str) -> Optional[PromoCode]:
 
         # Check if max uses reached
         max_uses = data.get("max_uses")
-        current_uses = data.get("current_uses", 0)
+        current_uses = promo_uses_total(doc.reference, data)
         if max_uses and current_uses >= max_uses:
             return None
 
@@ -142,73 +143,3 @@ async def get_promo_by_code(code: str) -> Optional[PromoCode]:
         )
 
     return None
-
-
-async def redeem_promo(promo_id: str, user_id: str) -> int:
-    """
-    Redeem a promo code for a user.
-    Returns the number of credits awarded.
-    """
-    db = get_db()
-
-    promo_ref = db.collection("promo_codes").document(promo_id)
-    promo_doc = promo_ref.get()
-
-    if not promo_doc.exists:
-        raise ValueError("Promo code not found")
-
-    data = promo_doc.to_dict()
-
-    if not data.get("active"):
-        raise ValueError("Promo code is inactive")
-
-    # Check expiration
-    expires_at = data.get("expires_at")
-    if expires_at and expires_at < datetime.now(timezone.utc):
-        raise ValueError("Promo code has expired")
-
-    # Check max uses
-    max_uses = data.get("max_uses")
-    current_uses = data.get("current_uses", 0)
-    if max_uses and current_uses >= max_uses:
-        raise ValueError("Promo code has reached maximum uses")
-
-    # Check if user already used this code
-    redemptions_ref = db.collection("promo_redemptions")
-    existing = redemptions_ref.where("promo_id", "==", promo_id).where("user_id", "==", user_id).limit(1).stream()
-    if any(existing):
-        raise ValueError("You have already used this promo code")
-
-    credits = data.get("credits", 0)
-
-    # Increment usage count
-    promo_ref.update({
-        "current_uses": firestore.Increment(1),
-    })
-
-    # Record redemption
-    redemptions_ref.add({
-        "promo_id": promo_id,
-        "user_id": user_id,
-        "credits": credits,
-        "redeemed_at": datetime.now(timezone.utc),
-    })
-
-    # Add credits_balance to user (consistent with rest of codebase)
-    user_ref = db.collection("users").document(user_id)
-    user_ref.update({
-        "credits_balance": firestore.Increment(credits),
-    })
-
-    # Record credit transaction
-    db.collection("credit_transactions").add({
-        "user_id": user_id,
-        "type": "promo",
-        "amount": credits,
-        "description": f"Promo code: {data.get('code')}",
-        "created_at": datetime.now(timezone.utc),
-    })
-
-    logger.info(f"User {user_id} redeemed promo {data.get('code')} for {credits} credits")
-
-    return credits
@@ -1,10 +1,19 @@
 """User management service for admin panel."""
+import asyncio
 import logging
+import os
+import time
 from datetime import datetime, timezone, timedelta
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 
+from fastapi import HTTPException
 from google.cloud import firestore
 
+from ...counters import get_global_stats
+from ...promo.service import aggregate_promo_uses
+from ...jobs.services.pagination import apply_cursor, encode_cursor, count_query
+from ...search import user_search_index
+
 from ..schemas import (
     AdminUserSummary,
     AdminUserDetail,
@@ -24,6 +33,10 @@ from ..schemas import (
 
 logger = logging.getLogger(__name__)
 
+# Dashboard stats cache: (monotonic time, stats)
+DASHBOARD_STATS_TTL_SECONDS = int(os.getenv("ADMIN_DASHBOARD_STATS_TTL_SECONDS", "60"))
+_dashboard_cache: Optional[Tuple[float, DashboardStats]] = None
+
 # Firestore client (lazy initialization)
 _db = None
 
@@ -36,104 +49,145 @@ def get_db():
     return _db
 
 
-async def get_dashboard_stats() -> DashboardStats:
-    """Get aggregate statistics for dashboard."""
+async def get_dashboard_stats(refresh: bool = False) -> DashboardStats:
+    """Get aggregate statistics for dashboard.
+
+    Totals come from the stats/global counters (and their shards); windowed and
+    status counts use count() aggregations (one read per 1000 matches), run
+    concurrently. Results are cached for DASHBOARD_STATS_TTL_SECONDS.
+
+    Args:
+        refresh: Bypass the cache and recompute
+    """
+    global _dashboard_cache
+    if not refresh and _dashboard_cache:
+        cached_at, cached_stats = _dashboard_cache
+        if time.monotonic() - cached_at < DASHBOARD_STATS_TTL_SECONDS:
+            return cached_stats
+
     db = get_db()
     now = datetime.now(timezone.utc)
     today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
     week_ago = now - timedelta(days=7)
 
-    # User stats
     users_ref = db.collection("users")
-    total_users = len(list(users_ref.stream()))
-
-    new_today_query = users_ref.where("created_at", ">=", today_start)
-    new_today = len(list(new_today_query.stream()))
-
-    new_week_query = users_ref.where("created_at", ">=", week_ago)
-    new_this_week = len(list(new_week_query.stream()))
-
-    # Job stats
     jobs_ref = db.collection("jobs")
-    total_jobs = len(list(jobs_ref.stream()))
+    promos_ref = db.collection("promo_codes")
 
-    jobs_today_query = jobs_ref.where("created_at", ">=", today_start)
-    jobs_today = len(list(jobs_today_query.stream()))
+    counts = {
+        "new_today": users_ref.where("created_at", ">=", today_start),
+        "new_this_week": users_ref.where("created_at", ">=", week_ago),
+        "jobs_today": jobs_ref.where("created_at", ">=", today_start),
+        "failed_jobs": jobs_ref.where("status", "==", "failed"),
+        "processing_jobs": jobs_ref.where("status", "==", "processing"),
+        "active_promos": promos_ref.where("active", "==", True),
+    }
 
-    failed_jobs_query = jobs_ref.where("status", "==", "failed")
-    failed_jobs = len(list(failed_jobs_query.stream()))
+    counters = await asyncio.to_thread(get_global_stats, db)
 
-    processing_jobs_query = jobs_ref.where("status", "==", "processing")
-    processing_jobs = len(list(processing_jobs_query.stream()))
+    # Fall back to aggregations until the counters document has been built
+    if "users_total" not in counters:
+        counts["total_users"] = users_ref
+    if "jobs_total" not in counters:
+        counts["total_jobs"] = jobs_ref
 
-    # Promo stats
-    promos_ref = db.collection("promo_codes")
-    active_promos_query = promos_ref.where("active", "==", True)
-    active_promos = len(list(active_promos_query.stream()))
+    names = list(counts)
+    values = await asyncio.gather(*(asyncio.to_thread(count_query, counts[name]) for name in names))
+    results = dict(zip(names, values))
+
+    if "promo_redemptions_total" in counters:
+        total_redemptions = counters["promo_redemptions_total"]
+    else:
+        total_redemptions = await asyncio.to_thread(aggregate_promo_uses, db)
 
-    total_redemptions = 0
-    for promo in promos_ref.stream():
-        data = promo.to_dict()
-        total_redemptions += data.get("current_uses", 0)
+    total_users = counters.get("users_total", results.get("total_users", 0))
+    total_jobs = counters.get("jobs_total", results.get("total_jobs", 0))
 
     # Revenue (placeholder - will be implemented in payments service)
     revenue_this_month = 0.0
     mrr = 0.0
 
-    return DashboardStats(
+    stats = DashboardStats(
         users=UserStats(
-            total=total_users,
-            new_today=new_today,
-            new_this_week=new_this_week,
+            total=int(total_users),
+            new_today=results["new_today"],
+            new_this_week=results["new_this_week"],
         ),
         jobs=JobStats(
-            total=total_jobs,
-            today=jobs_today,
-            failed=failed_jobs,
-            processing=processing_jobs,
+            total=int(total_jobs),
+            today=results["jobs_today"],
+            failed=results["failed_jobs"],
+            processing=results["processing_jobs"],
         ),
         revenue=RevenueStats(
             this_month=revenue_this_month,
             mrr=mrr,
         ),
         promos=PromoStats(
-            active=active_promos,
-            total_redemptions=total_redemptions,
+            active=results["active_promos"],
+            total_redemptions=int(total_redemptions),
         ),
+        generated_at=now,
     )
 
+    _dashboard_cache = (time.monotonic(), stats)
+    return stats
+
 
 async def list_users(
     page: int = 1,
     per_page: int = 25,
-    search: Optional[str] = None
+    search: Optional[str] = None,
+    cursor: Optional[str] = None,
 ) -> Dict[str, Any]:
-    """List users with pagination and optional search."""
+    """List users with pagination and optional search.
+
+    Without a search term, users are paged newest-first with a Firestore
+    cursor and a count() total. With a search term, the in-memory user
+    search index ranks matches on email, display name, uid and Stripe
+    customer id, and only the page's user documents are read (one get_all).
+    """
     db = get_db()
     users_ref = db.collection("users")
+    next_cursor = None
+    took_ms = None
 
-    # Build query
-    query = users_ref.order_by("created_at", direction=firestore.Query.DESCENDING)
-
-    # Search by prefix (email, display_name, or uid)
     if search:
-        search_lower = search.lower()
-        # Firestore doesn't support OR queries well, so we search by email prefix
-        # For a real implementation, consider Algolia or Elasticsearch
-        query = users_ref.where("email", ">=", search_lower).where(
-            "email", "<=", search_lower + "\uf8ff"
-        )
+        start = time.perf_counter()
+        await asyncio.to_thread(user_search_index.ensure_fresh, db)
+        if user_search_index.size == 0:
+            logger.warning("User search index is empty; run scripts/rebuild_user_search_index.py")
+        try:
+            result = user_search_index.search(
+                search,
+                limit=per_page,
+                cursor=cursor,
+                offset=0 if cursor else (page - 1) * per_page,
+            )
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+        total = result["total"]
+        next_cursor = result["next_cursor"]
+        refs = [users_ref.document(uid) for uid in result["uids"]]
+        docs_by_id = {doc.id: doc for doc in db.get_all(refs) if doc.exists} if refs else {}
+        paginated_docs = [docs_by_id[uid] for uid in result["uids"] if uid in docs_by_id]
+        took_ms = round((time.perf_counter() - start) * 1000, 1)
+    else:
+        total = count_query(users_ref)
+
+        page_query = apply_cursor(users_ref, users_ref, cursor)
+        if not cursor and page > 1:
+            page_query = page_query.offset((page - 1) * per_page)
+
+        docs = list(page_query.limit(per_page + 1).stream())
+        paginated_docs = docs[:per_page]
+        if len(docs) > per_page and paginated_docs:
+            last = paginated_docs[-1]
+            next_cursor = encode_cursor(last.to_dict().get("created_at"), last.id)
 
-    # Get all matching documents (for pagination calculation)
-    all_docs = list(query.stream())
-    total = len(all_docs)
     pages = (total + per_page - 1) // per_page
 
-    # Paginate
-    start = (page - 1) * per_page
-    end = start + per_page
-    paginated_docs = all_docs[start:end]
-
     # Convert to response
     items = []
     for doc in paginated_docs:
@@ -180,6 +234,9 @@ async def list_users(
         "page": page,
         "pages": pages,
         "per_page": per_page,
+        "next_cursor": next_cursor,
+        "has_more": next_cursor is not None,
+        "took_ms": took_ms,
     }
 
 
@@ -10,10 +10,14 @@ from firebase_admin import auth as firebase_auth
 import stripe
 
 from .firebase import verify_id_token, get_firestore_client, initialize_firebase
+from .users import create_user
 from .models import TokenRequest, UserProfile, RegisterResponse, LoginResponse, UpdateProfileRequest, UpdateProfileResponse
 from ..middleware.auth import get_current_user_id
 from ..notifications import send as notify
 from ..notifications.utils import build_welcome_payload
+from ..counters import increment_global_stats
+from ..search import index_user, remove_user
+from ..public.lookup import public_video_cache
 
 logger = logging.getLogger(__name__)
 
@@ -190,15 +194,8 @@ async def register(request: TokenRequest):
         "last_login_at": now,
     }
 
-    # Save to Firestore
-    user_ref.set(user_data)
-
-    # Also create referral_codes collection document so the code can be used
-    db.collection("referral_codes").document(referral_code).set({
-        "code": referral_code,
-        "user_id": uid,
-        "created_at": now,
-    })
+    # Save to Firestore (also registers the referral code)
+    create_user(db, uid, user_data)
 
     # Send welcome email (non-blocking)
     try:
@@ -326,6 +323,8 @@ async def update_profile(
 
     # Update in Firestore
     user_ref.update(update_data)
+    if "display_name" in update_data:
+        index_user(db, uid, {"display_name": update_data["display_name"]})
 
     # Get updated user data
     updated_doc = user_ref.get()
@@ -503,6 +502,7 @@ async def delete_account(
     jobs_query = db.collection("jobs").where("user_id", "==", uid).get()
     for job_doc in jobs_query:
         job_doc.reference.delete()
+        public_video_cache.invalidate(job_doc.to_dict().get("short_id"))
         deleted_counts["jobs"] += 1
 
     # Store deletion feedback (if provided) before deleting user
@@ -519,6 +519,8 @@ async def delete_account(
 
     # Delete user profile
     user_ref.delete()
+    increment_global_stats(db, users_total=-1, jobs_total=-deleted_counts["jobs"])
+    remove_user(db, uid)
     deleted_counts["user_profile"] = 1
 
     # 3. Delete from Firebase Auth
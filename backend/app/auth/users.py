@@ -0,0 +1,26 @@
+"""User document creation shared by every signup path."""
+from typing import Dict
+
+from ..counters import increment_global_stats
+from ..search import index_user
+
+
+def create_user(db, uid: str, user_data: Dict) -> None:
+    """Create users/{uid} and everything that has to follow a new user.
+
+    Registers the user's referral code, counts the user in stats/global and
+    adds them to the admin search index. Every code path that creates a user
+    document goes through here so those stay in sync.
+    """
+    db.collection("users").document(uid).set(user_data)
+    increment_global_stats(db, users_total=1)
+    index_user(db, uid, user_data)
+
+    # Referral codes are looked up by document id when applied
+    referral_code = user_data.get("referral_code")
+    if referral_code:
+        db.collection("referral_codes").document(referral_code).set({
+            "code": referral_code,
+            "user_id": uid,
+            "created_at": user_data.get("created_at"),
+        })
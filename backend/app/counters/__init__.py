@@ -0,0 +1,22 @@
+"""Materialized counters kept in Firestore."""
+from .global_stats import (
+    GLOBAL_STATS_COLLECTION,
+    GLOBAL_STATS_DOCUMENT,
+    global_stats_ref,
+    global_stats_shards,
+    increment_global_stats,
+    get_global_stats,
+    aggregate_sum,
+)
+from .sharded import ShardedCounter
+
+__all__ = [
+    "GLOBAL_STATS_COLLECTION",
+    "GLOBAL_STATS_DOCUMENT",
+    "global_stats_ref",
+    "global_stats_shards",
+    "increment_global_stats",
+    "get_global_stats",
+    "aggregate_sum",
+    "ShardedCounter",
+]
@@ -0,0 +1,82 @@
+"""Site-wide totals in the stats/global document.
+
+Writers bump counters with firestore.Increment after their own write has
+succeeded, so the admin dashboard can read totals from one place instead
+of counting whole collections. Counter updates are best-effort: a failed
+increment is logged and never fails the user's request. Run
+scripts/rebuild_global_stats.py to recompute the totals from the source
+collections if they ever drift.
+
+Every signup, job creation and promo redemption bumps a counter, more than
+the ~1 write/s a single document sustains, so increments go to a random
+shard of stats/global (see ShardedCounter). stats/global itself holds the
+totals written by the rebuild script; get_global_stats() adds the shards.
+
+Fields:
+    users_total: Registered users (minus deleted accounts)
+    jobs_total: Jobs ever created (minus jobs removed with their account)
+    promo_redemptions_total: Promo code redemptions
+"""
+import logging
+import os
+import random
+from typing import Dict
+
+from google.cloud import firestore
+
+from .sharded import ShardedCounter
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_STATS_COLLECTION = "stats"
+GLOBAL_STATS_DOCUMENT = "global"
+
+GLOBAL_STATS_SHARDS = int(os.getenv("GLOBAL_STATS_SHARDS", "10"))
+
+# Shards live in stats/global/counters_shards/{0..N-1}, one field per counter
+global_stats_shards = ShardedCounter("counters", num_shards=GLOBAL_STATS_SHARDS)
+
+
+def global_stats_ref(db):
+    return db.collection(GLOBAL_STATS_COLLECTION).document(GLOBAL_STATS_DOCUMENT)
+
+
+def increment_global_stats(db, **deltas: int) -> None:
+    """Add deltas to counters in stats/global, e.g. jobs_total=1.
+
+    Never raises; failures are logged and fixed by the rebuild script.
+    """
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    try:
+        index = random.randrange(global_stats_shards.num_shards)
+        shard_ref = global_stats_shards.shard_ref(global_stats_ref(db), index)
+        shard_ref.set({field: firestore.Increment(delta) for field, delta in deltas.items()}, merge=True)
+    except Exception as e:
+        logger.warning(f"Failed to update global stats {deltas}: {e}")
+
+
+def get_global_stats(db) -> Dict:
+    """Return the stats/global totals plus every shard (empty dict if none).
+
+    Costs one read for the document and one per existing shard.
+    """
+    stats_ref = global_stats_ref(db)
+    doc = stats_ref.get()
+    stats = doc.to_dict() if doc.exists else {}
+    for shard in global_stats_shards.shards(stats_ref).stream():
+        for field, value in (shard.to_dict() or {}).items():
+            if isinstance(value, (int, float)):
+                stats[field] = stats.get(field, 0) + value
+    return stats
+
+
+def aggregate_sum(query, field: str) -> float:
+    """Sum a numeric field with a server-side sum() aggregation."""
+    results = query.sum(field, alias="total").get()
+    for result in results:
+        for aggregation in result:
+            if aggregation.alias == "total":
+                return aggregation.value or 0
+    return 0
@@ -0,0 +1,111 @@
+"""Sharded counters for hot documents.
+
+Firestore sustains roughly one write per second on a single document. A
+sharded counter spreads increments over N shard documents in a subcollection
+of the counted document and sums them on read.
+
+Layout: {document}/{name}_shards/{0..N-1}, each with a single "count" field.
+
+Totals are cached per instance for ``cache_seconds``; a cached total can be
+low by whatever other instances added since, never high, so "limit reached"
+decisions made from it are safe. Limits that must never be exceeded (promo
+max uses) split the limit into per-shard capacities and check one shard
+inside a transaction, see capacity().
+"""
+import logging
+import os
+import random
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from google.cloud import firestore
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SHARDS = 10
+
+# How long a summed total is reused before the shards are read again
+SHARDED_COUNTER_CACHE_SECONDS = float(os.getenv("SHARDED_COUNTER_CACHE_SECONDS", "30"))
+
+
+class ShardedCounter:
+    """A named counter split across shard subdocuments of a parent document."""
+
+    def __init__(self, name: str, num_shards: int = DEFAULT_SHARDS, cache_seconds: float = SHARDED_COUNTER_CACHE_SECONDS):
+        self.name = name
+        self.num_shards = num_shards
+        self.cache_seconds = cache_seconds
+        self._totals: Dict[str, Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def shards_collection(self) -> str:
+        """Shard subcollection id (also usable as a collection group)."""
+        return f"{self.name}_shards"
+
+    def shards(self, doc_ref):
+        """The shard subcollection of ``doc_ref``."""
+        return doc_ref.collection(self.shards_collection)
+
+    def shard_ref(self, doc_ref, index: int):
+        return self.shards(doc_ref).document(str(index))
+
+    def shard_order(self) -> List[int]:
+        """All shard indexes in random order (to spread transactional writers)."""
+        order = list(range(self.num_shards))
+        random.shuffle(order)
+        return order
+
+    def capacity(self, index: int, limit: int) -> int:
+        """Share of ``limit`` that shard ``index`` may hold.
+
+        Shares differ by at most one and sum to ``limit``, so keeping every
+        shard within its share keeps the total within the limit.
+        """
+        limit = max(0, limit)
+        return limit // self.num_shards + (1 if index < limit % self.num_shards else 0)
+
+    def increment(self, doc_ref, by: int = 1, transaction: Optional[firestore.Transaction] = None, index: Optional[int] = None) -> None:
+        """Add ``by`` to a shard (random unless ``index`` is given).
+
+        With ``transaction`` the write joins it; otherwise it is applied now.
+        """
+        if index is None:
+            index = random.randrange(self.num_shards)
+        shard_ref = self.shard_ref(doc_ref, index)
+        update = {"count": firestore.Increment(by)}
+        if transaction is not None:
+            # Cached total is refreshed by the caller after commit (invalidate)
+            transaction.set(shard_ref, update, merge=True)
+        else:
+            shard_ref.set(update, merge=True)
+            self._bump_cached(doc_ref, by)
+
+    def total(self, doc_ref, use_cache: bool = True) -> int:
+        """Sum of all shards (one read per existing shard unless cached)."""
+        key = doc_ref.path
+        now = time.monotonic()
+        if use_cache:
+            with self._lock:
+                cached = self._totals.get(key)
+            if cached is not None and cached[0] > now:
+                return cached[1]
+
+        total = sum(int((shard.to_dict() or {}).get("count", 0)) for shard in self.shards(doc_ref).stream())
+        with self._lock:
+            self._totals[key] = (now + self.cache_seconds, total)
+            if len(self._totals) > 10000:
+                self._totals = {k: v for k, v in self._totals.items() if v[0] > now}
+        return total
+
+    def invalidate(self, doc_ref) -> None:
+        with self._lock:
+            self._totals.pop(doc_ref.path, None)
+
+    def _bump_cached(self, doc_ref, by: int) -> None:
+        # Keep this instance's own writes visible in its cached total
+        with self._lock:
+            cached = self._totals.get(doc_ref.path)
+            if cached is not None:
+                self._totals[doc_ref.path] = (cached[0], cached[1] + by)
@@ -8,6 +8,8 @@ import stripe
 
 from .models import CreditPackage, CheckoutRequest, CheckoutResponse, CreditBalance, AutoRefillSettings, AutoRefillResponse, ReceiptResponse, PaymentMethodsResponse, PaymentMethod, PaymentMethodCard
 from ..auth.firebase import get_firestore_client
+from ..repository import get_user_repository
+from ..search import index_user
 from ..middleware.auth import get_current_user_id
 
 
@@ -102,14 +104,11 @@ async def get_credit_balance(user_id: str = Depends(get_current_user_id)):
 
     Requires authentication via Firebase ID token.
     """
-    db = get_firestore_client()
-    user_ref = db.collection("users").document(user_id)
-    user_doc = user_ref.get()
+    user_data = await get_user_repository().get(user_id)
 
-    if not user_doc.exists:
+    if user_data is None:
         raise HTTPException(status_code=404, detail="User not found")
 
-    user_data = user_doc.to_dict()
     updated_at = user_data.get("updated_at")
 
     # Handle Firestore timestamps
@@ -180,6 +179,7 @@ async def create_checkout_session(
                 "stripe_customer_id": stripe_customer_id,
                 "updated_at": firestore.SERVER_TIMESTAMP
             })
+            index_user(db, user_id, {"stripe_customer_id": stripe_customer_id})
         except stripe.error.StripeError as e:
             raise HTTPException(
                 status_code=500,
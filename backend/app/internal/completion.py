@@ -4,7 +4,7 @@ import json
 import logging
 import os
 import subprocess
-import tempfile
+import time
 from typing import Optional
 
 from fastapi import APIRouter, Request, HTTPException
@@ -15,8 +15,13 @@ from google.auth.transport import requests as google_requests
 import httpx
 
 from ..auth.firebase import get_firestore_client
-from ..metrics import metrics
+from ..jobs.services import JobTimeline
+from ..jobs.services.gcs import SIGNED_URL_BUCKET_SECONDS
+from ..logging_utils import bind_log_fields
+from ..metrics import metrics, error_rates
 from ..notifications import alert_job_failed
+from ..repository import UserNotFoundError, get_credit_repository
+from .staging import staging, StagingBudgetExceeded
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +30,9 @@ router = APIRouter()
 # GCS bucket configuration
 OUTPUT_BUCKET = os.getenv("OUTPUT_BUCKET", "nuumee-outputs")
 ASSETS_BUCKET = os.getenv("ASSETS_BUCKET", "nuumee-assets")
+# Matches worker_utils.gcs_utils.VIDEO_CACHE_CONTROL: private, and no longer
+# than a stable signed URL stays valid
+VIDEO_CACHE_CONTROL = os.getenv("VIDEO_CACHE_CONTROL", f"private, max-age={2 * SIGNED_URL_BUCKET_SECONDS}")
 PROJECT_ID = os.getenv("GCP_PROJECT_ID", "wanapi-prod")
 
 # Pub/Sub push subscription audience (for OIDC verification)
@@ -73,13 +81,13 @@ def verify_pubsub_token(request: Request) -> bool:
             f"nuumee-api@{PROJECT_ID}.iam.gserviceaccount.com",  # Custom SA
         ]
         if not any(email.endswith(issuer) or email == issuer for issuer in allowed_issuers):
-            logger.warning(f"Token not from authorized service account: {email}")
+            logger.warning("Token not from authorized service account: %s", email)
             raise HTTPException(status_code=403, detail="Invalid token issuer")
 
         return True
 
     except Exception as e:
-        logger.error(f"Token verification failed: {e}")
+        logger.error("Token verification failed: %s", e)
         raise HTTPException(status_code=401, detail="Invalid token")
 
 
@@ -98,6 +106,7 @@ def upload_to_gcs(local_path: str, bucket_name: str, blob_path: str) -> str:
     client = get_storage_client()
     bucket = client.bucket(bucket_name)
     blob = bucket.blob(blob_path)
+    blob.cache_control = VIDEO_CACHE_CONTROL
     blob.upload_from_filename(local_path, content_type="video/mp4")
     return blob_path
 
@@ -153,29 +162,36 @@ def is_user_free_tier(db, user_id: str) -> bool:
     return tier == "free" or not tier
 
 
-def refund_credits(db, user_id: str, credits: float, job_id: str) -> None:
+async def refund_credits(user_id: str, credits: float, job_id: str) -> None:
     """Refund credits to user on job failure."""
-    user_ref = db.collection("users").document(user_id)
+    try:
+        await get_credit_repository().refund(user_id, credits)
+    except UserNotFoundError:
+        logger.error("User %s not found for refund", user_id)
+        return
+    logger.info("Refunded %s credits to user %s for job %s", credits, user_id, job_id)
 
-    @firestore.transactional
-    def refund_transaction(transaction, user_ref, credits):
-        user_doc = user_ref.get(transaction=transaction)
-        if not user_doc.exists:
-            logger.error(f"User {user_id} not found for refund")
-            return
 
-        user_data = user_doc.to_dict()
-        current_balance = user_data.get("credits_balance", 0)
-        new_balance = current_balance + credits
+def _float_attribute(attributes: dict, name: str) -> Optional[float]:
+    try:
+        return float(attributes[name])
+    except (KeyError, TypeError, ValueError):
+        return None
 
-        transaction.update(user_ref, {
-            "credits_balance": new_balance,
-            "updated_at": firestore.SERVER_TIMESTAMP,
-        })
 
-    transaction = db.transaction()
-    refund_transaction(transaction, user_ref, credits)
-    logger.info(f"Refunded {credits} credits to user {user_id} for job {job_id}")
+def record_job_stages(job_data: dict, timeline: JobTimeline) -> None:
+    """Publish the stage durations of a finished job to the metrics collector.
+
+    Stages written earlier (api, queue, submit by the API and worker) come
+    from the job document; the completion processor's own are still pending
+    on ``timeline``.
+    """
+    stages = dict(job_data.get("timeline") or {})
+    stages.update(timeline.stages())
+    for stage, entry in stages.items():
+        seconds = entry.get("seconds") if isinstance(entry, dict) else None
+        if seconds is not None:
+            metrics.track_job_stage(stage, seconds)
 
 
 @router.post("/process-completion")
@@ -195,11 +211,13 @@ async def process_completion(request: Request):
     # Verify Pub/Sub OIDC token
     verify_pubsub_token(request)
 
+    processing_started_at = time.time()
+
     # Parse Pub/Sub message
     try:
         envelope = await request.json()
     except Exception as e:
-        logger.error(f"Failed to parse Pub/Sub envelope: {e}")
+        logger.error("Failed to parse Pub/Sub envelope: %s", e)
         raise HTTPException(status_code=400, detail="Invalid envelope")
 
     message = envelope.get("message", {})
@@ -213,7 +231,7 @@ async def process_completion(request: Request):
         data_json = base64.b64decode(data_b64).decode("utf-8")
         payload = json.loads(data_json)
     except Exception as e:
-        logger.error(f"Failed to decode message data: {e}")
+        logger.error("Failed to decode message data: %s", e)
         raise HTTPException(status_code=400, detail="Invalid message data")
 
     # Extract WaveSpeed result fields
@@ -223,10 +241,13 @@ async def process_completion(request: Request):
     error = payload.get("error") or payload.get("message")
 
     if not request_id:
-        logger.error(f"No request_id in payload: {payload}")
+        logger.error("No request_id in payload: %s", payload)
         raise HTTPException(status_code=400, detail="Missing request_id")
 
-    logger.info(f"[COMPLETION] Processing: request_id={request_id}, status={status}")
+    logger.info(
+        f"[COMPLETION] Processing: request_id={request_id}, status={status}, "
+        f"trace_id={(message.get('attributes') or {}).get('trace_id')}"
+    )
 
     # Find job by wavespeed_request_id
     db = get_firestore_client()
@@ -236,7 +257,7 @@ async def process_completion(request: Request):
         .get())
 
     if not jobs:
-        logger.warning(f"Job not found for wavespeed_request_id={request_id}")
+        logger.warning("Job not found for wavespeed_request_id=%s", request_id)
         # Return 200 to prevent Pub/Sub retry - job may have been deleted or never existed
         # This could happen if webhook arrives before request_id is saved (race condition)
         # In that case, Pub/Sub will retry and we'll find it next time
@@ -245,80 +266,109 @@ async def process_completion(request: Request):
     job_doc = jobs[0]
     job_data = job_doc.to_dict()
     job_id = job_doc.id
+
+    # Stage timeline: WaveSpeed ran from the end of the worker's submit until
+    # the webhook received the callback, then the message waited in Pub/Sub
+    attributes = message.get("attributes") or {}
+    received_at = _float_attribute(attributes, "received_at")
+    timeline = JobTimeline(job_id, job_data.get("trace_id") or attributes.get("trace_id"))
+    bind_log_fields(job_id=job_id, trace_id=timeline.trace_id)
+    submit = (job_data.get("timeline") or {}).get("submit") or {}
+    timeline.add_since("wavespeed", submit.get("ended_at"), until=received_at or processing_started_at)
+    timeline.add_since("pubsub", received_at, until=processing_started_at)
     user_id = job_data.get("user_id")
     credits_charged = job_data.get("credits_charged", 0)
     current_status = job_data.get("status")
 
     # Idempotency check - skip if already completed or failed
     if current_status in ("completed", "failed"):
-        logger.info(f"Job {job_id} already {current_status}, skipping")
+        logger.info("Job %s already %s, skipping", job_id, current_status)
         return {"status": "already_processed", "job_id": job_id}
 
     # Handle based on WaveSpeed status
     if status in ("completed", "success"):
         if not outputs:
-            logger.error(f"Job {job_id}: No outputs in completed result")
+            logger.error("Job %s: No outputs in completed result", job_id)
             job_doc.reference.update({
                 "status": "failed",
                 "error_message": "No video output from WaveSpeed",
                 "updated_at": firestore.SERVER_TIMESTAMP,
+                **timeline.fields(),
             })
-            refund_credits(db, user_id, credits_charged, job_id)
+            await refund_credits(user_id, credits_charged, job_id)
+            error_rates.record_job("no_outputs")
             return {"status": "failed", "job_id": job_id, "reason": "no_outputs"}
 
         output_url = outputs[0]
         output_path = f"outputs/{user_id}/{job_id}.mp4"
 
         try:
-            with tempfile.TemporaryDirectory() as tmpdir:
+            with staging.job(job_id) as stage:
                 # Download video from WaveSpeed
-                local_video = os.path.join(tmpdir, "video.mp4")
-                logger.info(f"Job {job_id}: Downloading video from {output_url[:50]}...")
-                download_video_from_url(output_url, local_video)
+                local_video = stage.path("video.mp4")
+                logger.debug("Job %s: Downloading video from %s", job_id, output_url)
+                with timeline.stage("download"):
+                    download_video_from_url(output_url, local_video)
+                stage.track(local_video)
 
                 # Apply watermark for free tier users
                 final_video = local_video
                 if is_user_free_tier(db, user_id):
-                    logger.info(f"Job {job_id}: Applying free tier watermark")
+                    logger.info("Job %s: Applying free tier watermark", job_id)
                     job_doc.reference.update({
                         "status": "watermarking",
                         "updated_at": firestore.SERVER_TIMESTAMP,
                     })
-                    watermarked = os.path.join(tmpdir, "watermarked.mp4")
-                    apply_watermark(local_video, watermarked)
+                    watermarked = stage.path("watermarked.mp4")
+                    with timeline.stage("watermark"):
+                        apply_watermark(local_video, watermarked)
+                    stage.track(watermarked)
+                    stage.release(local_video)
                     final_video = watermarked
 
                 # Upload to GCS
-                logger.info(f"Job {job_id}: Uploading to GCS {output_path}")
-                upload_to_gcs(final_video, OUTPUT_BUCKET, output_path)
+                logger.info("Job %s: Uploading to GCS %s", job_id, output_path)
+                with timeline.stage("upload"):
+                    upload_to_gcs(final_video, OUTPUT_BUCKET, output_path)
 
             # Mark job completed
+            record_job_stages(job_data, timeline)
             job_doc.reference.update({
                 "status": "completed",
                 "output_video_path": output_path,
                 "completed_at": firestore.SERVER_TIMESTAMP,
                 "updated_at": firestore.SERVER_TIMESTAMP,
+                **timeline.fields(),
             })
-            logger.info(f"Job {job_id} completed successfully")
+            logger.info("Job %s completed successfully (trace_id=%s)", job_id, timeline.trace_id)
             metrics.track_job_completed()
+            error_rates.record_job()
             return {"status": "completed", "job_id": job_id}
 
+        except StagingBudgetExceeded as e:
+            # Instance /tmp is full - nack so Pub/Sub redelivers with backoff
+            logger.warning("Job %s: Deferring completion: %s", job_id, e)
+            raise HTTPException(status_code=503, detail=str(e))
+
         except Exception as e:
-            logger.exception(f"Job {job_id}: Error processing completion: {e}")
+            logger.exception("Job %s: Error processing completion: %s", job_id, e)
             # Don't mark as failed - let Pub/Sub retry
             raise HTTPException(status_code=500, detail=f"Processing error: {e}")
 
     elif status == "failed":
         error_msg = error or "WaveSpeed job failed"
-        logger.warning(f"Job {job_id} failed: {error_msg}")
+        logger.warning("Job %s failed: %s", job_id, error_msg)
 
+        record_job_stages(job_data, timeline)
         job_doc.reference.update({
             "status": "failed",
             "error_message": error_msg,
             "updated_at": firestore.SERVER_TIMESTAMP,
+            **timeline.fields(),
         })
-        refund_credits(db, user_id, credits_charged, job_id)
+        await refund_credits(user_id, credits_charged, job_id)
         metrics.track_job_failed("wavespeed_error")
+        error_rates.record_job("wavespeed_error")
 
         # Send alert for job failure
         alert_job_failed(job_id, error_msg, user_id)
@@ -327,5 +377,5 @@ async def process_completion(request: Request):
 
     else:
         # Unknown status - log and skip
-        logger.warning(f"Job {job_id}: Unknown status '{status}', ignoring")
+        logger.warning("Job %s: Unknown status '%s', ignoring", job_id, status)
         return {"status": "ignored", "job_id": job_id, "wavespeed_status": status}
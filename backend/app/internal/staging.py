@@ -0,0 +1,221 @@
+"""Per-job temp storage budget for memory-backed filesystems.
+
+On Cloud Run, /tmp lives in RAM and counts against the instance memory
+limit. Every job stages its files through a StagingManager, which tracks
+bytes on disk per job, refuses new jobs when the instance budget is used
+up, and lets stages delete intermediates as soon as they are no longer
+needed.
+
+Backend copy of shared/worker_utils/staging.py for the Pub/Sub completion
+processor; keep the two in sync.
+"""
+
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# Fraction of the container memory limit that staged files may use
+STAGING_BUDGET_FRACTION = float(os.environ.get("STAGING_BUDGET_FRACTION", "0.5"))
+
+# Explicit budget override in MB (0 = derive from the memory limit)
+STAGING_BUDGET_MB = int(os.environ.get("STAGING_BUDGET_MB", "0"))
+
+# Bytes reserved for a job before its files exist
+STAGING_DEFAULT_RESERVATION_MB = int(os.environ.get("STAGING_DEFAULT_RESERVATION_MB", "200"))
+
+# How long a new job may wait for budget before being rejected
+STAGING_DEFER_SECONDS = float(os.environ.get("STAGING_DEFER_SECONDS", "5"))
+
+# Budget used when no memory limit can be detected
+FALLBACK_BUDGET_BYTES = 1024 * 1024 * 1024
+
+MB = 1024 * 1024
+
+
+class StagingBudgetExceeded(Exception):
+    """Raised when a job cannot get staging space within the defer window."""
+
+
+def container_memory_limit() -> Optional[int]:
+    """Return the cgroup memory limit in bytes, or None if unlimited."""
+    for path in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+        except OSError:
+            continue
+        if value == "max":
+            return None
+        limit = int(value)
+        # cgroup v1 reports a huge sentinel when unlimited
+        if limit < 1 << 60:
+            return limit
+    return None
+
+
+def default_budget_bytes() -> int:
+    """Staging budget from STAGING_BUDGET_MB or a fraction of memory."""
+    if STAGING_BUDGET_MB > 0:
+        return STAGING_BUDGET_MB * MB
+    limit = container_memory_limit()
+    if limit is None:
+        return FALLBACK_BUDGET_BYTES
+    return int(limit * STAGING_BUDGET_FRACTION)
+
+
+class JobStaging:
+    """Staging directory for one job.
+
+    Call track() after writing a file and release() once a later stage no
+    longer needs it; the manager charges the job for the larger of its
+    reservation and the bytes currently tracked.
+    """
+
+    def __init__(self, manager: "StagingManager", job_id: str, directory: str):
+        self.manager = manager
+        self.job_id = job_id
+        self.dir = directory
+        self._files: Dict[str, int] = {}
+
+    def path(self, name: str) -> str:
+        """Return the path of a file inside this job's staging directory."""
+        return os.path.join(self.dir, name)
+
+    @property
+    def bytes_used(self) -> int:
+        return sum(self._files.values())
+
+    def track(self, path: str) -> int:
+        """Record the current size of a staged file. Returns its size."""
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        self._files[path] = size
+        self.manager._update(self.job_id, self.bytes_used)
+        return size
+
+    def release(self, *paths: str) -> None:
+        """Delete staged files that are no longer needed."""
+        for path in paths:
+            if not path:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self._files.pop(path, None)
+        self.manager._update(self.job_id, self.bytes_used)
+
+
+class StagingManager:
+    """Instance-wide staging budget shared by all jobs in the process."""
+
+    def __init__(
+        self,
+        budget_bytes: int,
+        root: Optional[str] = None,
+        default_reservation: int = STAGING_DEFAULT_RESERVATION_MB * MB,
+        defer_seconds: float = STAGING_DEFER_SECONDS,
+    ):
+        self.budget_bytes = budget_bytes
+        self.root = root or tempfile.gettempdir()
+        self.default_reservation = default_reservation
+        self.defer_seconds = defer_seconds
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._reserved: Dict[str, int] = {}
+        self._used: Dict[str, int] = {}
+        self._peak_bytes = 0
+        self._rejected = 0
+
+    def _charged(self, job_id: str) -> int:
+        return max(self._reserved.get(job_id, 0), self._used.get(job_id, 0))
+
+    def _current_locked(self) -> int:
+        return sum(self._charged(job_id) for job_id in self._reserved)
+
+    def _update(self, job_id: str, used: int) -> None:
+        with self._lock:
+            if job_id not in self._reserved:
+                return
+            self._used[job_id] = used
+            current = self._current_locked()
+            self._peak_bytes = max(self._peak_bytes, current)
+            if current > self.budget_bytes:
+                logger.warning(
+                    f"Staging over budget: {current // MB}MB / {self.budget_bytes // MB}MB "
+                    f"(job {job_id} using {used // MB}MB)"
+                )
+            self._changed.notify_all()
+
+    @contextmanager
+    def job(self, job_id: str, reserve_bytes: Optional[int] = None) -> Iterator[JobStaging]:
+        """Reserve budget for a job and yield its staging directory.
+
+        Everything in the directory is deleted when the block exits.
+
+        Args:
+            job_id: Job ID (for accounting and logs)
+            reserve_bytes: Expected peak bytes on disk (default reservation if None)
+
+        Raises:
+            StagingBudgetExceeded: If the reservation doesn't fit within
+                defer_seconds
+        """
+        reserve = self.default_reservation if reserve_bytes is None else reserve_bytes
+        # A single job larger than the budget is allowed to run alone
+        reserve = min(reserve, self.budget_bytes)
+        key = job_id
+        deadline = time.monotonic() + self.defer_seconds
+
+        with self._changed:
+            while key in self._reserved:
+                # Same job retried concurrently on this instance; account separately
+                key = f"{job_id}#{time.monotonic_ns()}"
+            while self._current_locked() + reserve > self.budget_bytes:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._rejected += 1
+                    raise StagingBudgetExceeded(
+                        f"Staging budget exhausted: {self._current_locked() // MB}MB of "
+                        f"{self.budget_bytes // MB}MB in use, job {job_id} needs {reserve // MB}MB"
+                    )
+                self._changed.wait(timeout=remaining)
+            self._reserved[key] = reserve
+            self._used[key] = 0
+            self._peak_bytes = max(self._peak_bytes, self._current_locked())
+
+        directory = tempfile.mkdtemp(prefix=f"{job_id}-", dir=self.root)
+        try:
+            yield JobStaging(self, key, directory)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+            with self._changed:
+                self._reserved.pop(key, None)
+                self._used.pop(key, None)
+                self._changed.notify_all()
+
+    def stats(self) -> Dict:
+        """Return current and peak staging usage."""
+        with self._lock:
+            jobs = {job_id: self._charged(job_id) for job_id in self._reserved}
+            current = sum(jobs.values())
+            return {
+                "budget_bytes": self.budget_bytes,
+                "current_bytes": current,
+                "peak_bytes": self._peak_bytes,
+                "available_bytes": max(self.budget_bytes - current, 0),
+                "active_jobs": len(jobs),
+                "rejected_total": self._rejected,
+                "jobs": jobs,
+            }
+
+
+# Global staging manager. Completion runs inside the event loop, so it never
+# waits for budget: a full instance answers 503 and Pub/Sub redelivers later.
+staging = StagingManager(default_budget_bytes(), defer_seconds=0)
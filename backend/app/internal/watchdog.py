@@ -12,6 +12,7 @@ from google.auth.transport import requests as google_requests
 import httpx
 
 from ..auth.firebase import get_firestore_client
+from ..repository import UserNotFoundError, get_credit_repository
 
 logger = logging.getLogger(__name__)
 
@@ -95,28 +96,13 @@ def get_wavespeed_result(request_id: str) -> dict:
         return response.json()
 
 
-def refund_credits(db, user_id: str, credits: float, job_id: str) -> None:
+async def refund_credits(user_id: str, credits: float, job_id: str) -> None:
     """Refund credits to user on job failure."""
-    user_ref = db.collection("users").document(user_id)
-
-    @firestore.transactional
-    def refund_transaction(transaction, user_ref, credits):
-        user_doc = user_ref.get(transaction=transaction)
-        if not user_doc.exists:
-            logger.error(f"User {user_id} not found for refund")
-            return
-
-        user_data = user_doc.to_dict()
-        current_balance = user_data.get("credits_balance", 0)
-        new_balance = current_balance + credits
-
-        transaction.update(user_ref, {
-            "credits_balance": new_balance,
-            "updated_at": firestore.SERVER_TIMESTAMP,
-        })
-
-    transaction = db.transaction()
-    refund_transaction(transaction, user_ref, credits)
+    try:
+        await get_credit_repository().refund(user_id, credits)
+    except UserNotFoundError:
+        logger.error(f"User {user_id} not found for refund")
+        return
     logger.info(f"[WATCHDOG] Refunded {credits} credits to user {user_id} for job {job_id}")
 
 
@@ -208,7 +194,7 @@ async def run_watchdog(request: Request):
                     "error_message": f"Job timed out after {TIMEOUT_JOB_THRESHOLD_HOURS} hours",
                     "updated_at": firestore.SERVER_TIMESTAMP,
                 })
-                refund_credits(db, user_id, credits_charged, job_id)
+                await refund_credits(user_id, credits_charged, job_id)
                 results["timed_out"] += 1
                 job_result["action"] = "timed_out"
                 results["jobs"].append(job_result)
@@ -222,11 +208,7 @@ async def run_watchdog(request: Request):
                     logger.warning(f"[WATCHDOG] Job {job_id} stuck in {current_status} without wavespeed_request_id, re-queueing")
                     try:
                         from ..tasks.queue import enqueue_job
-                        enqueue_job(
-                            job_id=job_id,
-                            user_id=user_id,
-                            job_type=job_data.get("type", "video_generation"),
-                        )
+                        enqueue_job(job_id=job_id, trace_id=job_data.get("trace_id"))
                         job_doc.reference.update({
                             "status": "queued",
                             "updated_at": firestore.SERVER_TIMESTAMP,
@@ -242,7 +224,7 @@ async def run_watchdog(request: Request):
                             "error_message": f"Job stuck and re-queue failed: {queue_err}",
                             "updated_at": firestore.SERVER_TIMESTAMP,
                         })
-                        refund_credits(db, user_id, credits_charged, job_id)
+                        await refund_credits(user_id, credits_charged, job_id)
                         results["failed"] += 1
                         job_result["action"] = "failed_requeue_error"
                 else:
@@ -253,7 +235,7 @@ async def run_watchdog(request: Request):
                         "error_message": "Job never submitted to WaveSpeed",
                         "updated_at": firestore.SERVER_TIMESTAMP,
                     })
-                    refund_credits(db, user_id, credits_charged, job_id)
+                    await refund_credits(user_id, credits_charged, job_id)
                     results["failed"] += 1
                     job_result["action"] = "failed_no_request_id"
                 results["jobs"].append(job_result)
@@ -314,7 +296,7 @@ async def run_watchdog(request: Request):
                         "error_message": "WaveSpeed completed but no outputs",
                         "updated_at": firestore.SERVER_TIMESTAMP,
                     })
-                    refund_credits(db, user_id, credits_charged, job_id)
+                    await refund_credits(user_id, credits_charged, job_id)
                     results["failed"] += 1
                     job_result["action"] = "failed_no_outputs"
 
@@ -326,7 +308,7 @@ async def run_watchdog(request: Request):
                     "error_message": error_msg,
                     "updated_at": firestore.SERVER_TIMESTAMP,
                 })
-                refund_credits(db, user_id, credits_charged, job_id)
+                await refund_credits(user_id, credits_charged, job_id)
                 results["failed"] += 1
                 job_result["action"] = "failed"
 
@@ -338,7 +320,7 @@ async def run_watchdog(request: Request):
                     "error_message": "WaveSpeed request not found (may have expired)",
                     "updated_at": firestore.SERVER_TIMESTAMP,
                 })
-                refund_credits(db, user_id, credits_charged, job_id)
+                await refund_credits(user_id, credits_charged, job_id)
                 results["failed"] += 1
                 job_result["action"] = "failed_not_found"
 
@@ -22,6 +22,7 @@ class JobType(str, Enum):
     FOLEY = "foley"  # Hunyuan Video Foley (add audio)
     SUBTITLES = "subtitles"  # Auto-generated subtitles (FFmpeg worker)
     WATERMARK = "watermark"  # Watermark overlay (FFmpeg worker)
+    POST_PROCESS_CHAIN = "post_process_chain"  # Ordered subtitles/watermark in one encode (FFmpeg worker)
 
 
 class SubtitleStyle(str, Enum):
@@ -31,6 +32,12 @@ class SubtitleStyle(str, Enum):
     BOLD_SHINE = "bold_shine"  # Yellow text with glow effect
 
 
+class SubtitleMode(str, Enum):
+    """How subtitles are delivered."""
+    BURN = "burn"  # Rendered into the video frames (full re-encode)
+    SOFT = "soft"  # Caption track muxed with stream copy (no re-encode)
+
+
 class Resolution(str, Enum):
     """Supported resolutions."""
     RES_480P = "480p"
@@ -135,6 +142,11 @@ class JobResponse(BaseModel):
     updated_at: datetime = Field(..., description="When job was last updated")
     completed_at: Optional[datetime] = Field(None, description="When job completed")
     view_count: int = Field(default=0, description="Number of video views")
+    # SUBTITLES job fields
+    subtitle_mode: Optional[SubtitleMode] = Field(None, description="Subtitle delivery mode (for SUBTITLES)")
+    subtitle_vtt_path: Optional[str] = Field(None, description="GCS path to WebVTT sidecar (for SUBTITLES)")
+    subtitle_ass_path: Optional[str] = Field(None, description="GCS path to ASS sidecar (for SUBTITLES)")
+    processing_stats: Optional[dict] = Field(None, description="FFmpeg CPU usage and CPU seconds saved")
 
     class Config:
         json_schema_extra = {
@@ -164,9 +176,11 @@ class JobResponse(BaseModel):
 class JobListResponse(BaseModel):
     """Response containing list of jobs."""
     jobs: List[JobResponse] = Field(..., description="List of jobs")
-    total: int = Field(..., description="Total number of jobs")
+    total: Optional[int] = Field(None, description="Total number of jobs (omitted when include_total=false)")
     page: int = Field(..., description="Current page")
     page_size: int = Field(..., description="Items per page")
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page (null on the last page)")
+    has_more: bool = Field(False, description="Whether more jobs exist after this page")
 
     class Config:
         json_schema_extra = {
@@ -174,7 +188,9 @@ class JobListResponse(BaseModel):
                 "jobs": [],
                 "total": 0,
                 "page": 1,
-                "page_size": 20
+                "page_size": 20,
+                "next_cursor": None,
+                "has_more": False
             }
         }
 
@@ -222,6 +238,34 @@ class PostProcessType(str, Enum):
     """Post-processing types for completed videos."""
     SUBTITLES = "subtitles"
     WATERMARK = "watermark"
+    CHAIN = "chain"  # Ordered list of operations, encoded once
+
+
+class PostProcessOperation(BaseModel):
+    """A single step of a post-processing chain."""
+    type: PostProcessType = Field(..., description="Operation type (subtitles or watermark)")
+    subtitle_style: Optional[SubtitleStyle] = Field(
+        default=SubtitleStyle.SIMPLE,
+        description="Subtitle style (only for subtitles)"
+    )
+    subtitle_mode: SubtitleMode = Field(
+        default=SubtitleMode.BURN,
+        description="Subtitle delivery mode (only for subtitles)"
+    )
+    script_content: Optional[str] = Field(
+        default=None,
+        description="Original script text to improve STT accuracy (only for subtitles)"
+    )
+    position: str = Field(
+        default="bottom-right",
+        description="Watermark position (only for watermark)"
+    )
+    opacity: float = Field(
+        default=0.7,
+        ge=0.0,
+        le=1.0,
+        description="Watermark opacity (only for watermark)"
+    )
 
 
 class PostProcessRequest(BaseModel):
@@ -234,6 +278,10 @@ class PostProcessRequest(BaseModel):
         default=SubtitleStyle.SIMPLE,
         description="Subtitle style (only for subtitles type)"
     )
+    subtitle_mode: SubtitleMode = Field(
+        default=SubtitleMode.BURN,
+        description="burn: render into the video; soft: add a caption track without re-encoding (only for subtitles type)"
+    )
     script_content: Optional[str] = Field(
         default=None,
         description="Original script text to improve STT accuracy (only for subtitles type)"
@@ -242,6 +290,10 @@ class PostProcessRequest(BaseModel):
         default=False,
         description="Enable watermark (only for watermark type)"
     )
+    operations: Optional[List[PostProcessOperation]] = Field(
+        default=None,
+        description="Ordered operations applied in a single encode (only for chain type)"
+    )
 
     class Config:
         json_schema_extra = {
@@ -251,10 +303,23 @@ class PostProcessRequest(BaseModel):
                     "post_process_type": "subtitles",
                     "subtitle_style": "rainbow"
                 },
+                {
+                    "title": "Add soft subtitles (caption track, no re-encode)",
+                    "post_process_type": "subtitles",
+                    "subtitle_mode": "soft"
+                },
                 {
                     "title": "Add watermark",
                     "post_process_type": "watermark",
                     "watermark_enabled": True
+                },
+                {
+                    "title": "Subtitles + watermark in one encode",
+                    "post_process_type": "chain",
+                    "operations": [
+                        {"type": "subtitles", "subtitle_style": "bold_shine"},
+                        {"type": "watermark", "position": "top-right"}
+                    ]
                 }
             ]
         }
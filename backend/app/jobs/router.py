@@ -1,12 +1,14 @@
 """Job management routes."""
 
+import asyncio
 import os
+import time
 import uuid
 import logging
 from datetime import datetime, timezone
 from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, Query, File, UploadFile, Form
-from google.cloud import firestore, storage
+from google.cloud import storage
 
 from .models import (
     CreateJobRequest,
@@ -20,8 +22,14 @@ from .models import (
     PostProcessRequest,
     PostProcessResponse,
     PostProcessType,
+    PostProcessOperation,
+    SubtitleMode,
+    SubtitleStyle,
 )
 from ..metrics import metrics
+from ..counters import increment_global_stats
+from ..public.lookup import public_video_cache
+from ..public.views import total_view_count
 from .services import (
     calculate_credits,
     generate_job_id,
@@ -29,7 +37,13 @@ from .services import (
     validate_gcs_path_ownership,
     validate_source_job,
     is_demo_job,
-    generate_signed_download_url,
+    signer,
+    apply_cursor,
+    encode_cursor,
+    count_query,
+    to_datetime,
+    generate_trace_id,
+    JobTimeline,
     DEMO_IMAGE_PATH,
     DEMO_VIDEO_PATH,
     DEMO_OUTPUT_PATH,
@@ -37,6 +51,12 @@ from .services import (
     DEFAULT_DURATION_SECONDS,
 )
 from ..auth.firebase import get_firestore_client
+from ..repository import (
+    InsufficientCreditsError,
+    UserNotFoundError,
+    get_job_repository,
+    get_user_repository,
+)
 from ..middleware.auth import get_current_user_id
 from ..tasks.queue import enqueue_job, enqueue_ffmpeg_job
 
@@ -44,6 +64,17 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/jobs", tags=["Jobs"])
 
+# Fields read by list_jobs (field mask); keep in sync with JobResponse
+JOB_LIST_FIELDS = [
+    "id", "short_id", "user_id", "job_type", "status",
+    "reference_image_path", "motion_video_path", "source_job_id",
+    "input_video_path", "extension_prompt", "resolution", "seed",
+    "credits_charged", "wavespeed_request_id", "output_video_path",
+    "error_message", "created_at", "updated_at", "completed_at",
+    "view_count", "view_count_sharded", "subtitle_mode", "subtitle_vtt_path", "subtitle_ass_path",
+    "processing_stats",
+]
+
 
 @router.post("", response_model=JobResponse)
 async def create_job(
@@ -70,7 +101,11 @@ async def create_job(
     - EXTEND: Fixed 5 credits (480p) or 10 credits (720p)
     - UPSCALE: 100% of source video's base credits
     """
+    started_at = time.time()
+    start = time.monotonic()
     db = get_firestore_client()
+    jobs = get_job_repository()
+    users = get_user_repository()
 
     source_job_data = None
     input_video_path = None
@@ -103,18 +138,16 @@ async def create_job(
                 status_code=400,
                 detail=f"{request.job_type.value.upper()} jobs require source_job_id"
             )
-        source_job_data = await validate_source_job(db, request.source_job_id, user_id)
+        source_job_data = await validate_source_job(jobs, request.source_job_id, user_id)
         input_video_path = source_job_data.get("output_video_path")
         source_base_credits = source_job_data.get("credits_charged", MIN_CREDITS)
 
     # Get user document
-    user_ref = db.collection("users").document(user_id)
-    user_doc = user_ref.get()
+    user_data = await users.get(user_id)
 
-    if not user_doc.exists:
+    if user_data is None:
         raise HTTPException(status_code=404, detail="User not found")
 
-    user_data = user_doc.to_dict()
     current_credits = user_data.get("credits_balance", 0)
 
     # Calculate credit cost - use actual duration from request, fallback to default
@@ -142,6 +175,7 @@ async def create_job(
 
     job_id = generate_job_id()
     short_id = generate_short_id()
+    trace_id = generate_trace_id()
     now = datetime.now(timezone.utc)
 
     ref_image_path = DEMO_IMAGE_PATH if demo_mode else request.reference_image_path
@@ -169,13 +203,15 @@ async def create_job(
         "completed_at": now if demo_mode else None,
         "view_count": 0,
         "is_demo": demo_mode,
+        "is_deleted": False,
+        "trace_id": trace_id,
     }
 
     # Demo jobs: just create, no credit deduction
     if demo_mode:
         try:
-            job_ref = db.collection("jobs").document(job_id)
-            job_ref.set(job_data)
+            await jobs.create(job_id, job_data)
+            await asyncio.to_thread(increment_global_stats, db, jobs_total=1)
             logger.info(f"Demo job {job_id} created for user {user_id}")
 
             return JobResponse(
@@ -204,43 +240,34 @@ async def create_job(
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to create demo job: {str(e)}")
 
-    # Regular jobs: transaction to deduct credits
-    @firestore.transactional
-    def create_job_transaction(transaction, user_ref, job_ref, job_data, credits_to_charge):
-        user_snapshot = user_ref.get(transaction=transaction)
-        user_data = user_snapshot.to_dict()
-        current_balance = user_data.get("credits_balance", 0)
-
-        if current_balance < credits_to_charge:
-            raise HTTPException(
-                status_code=402,
-                detail={
-                    "error": "insufficient_credits",
-                    "message": f"Insufficient credits. Required: {credits_to_charge}, Available: {current_balance}",
-                    "required_credits": credits_to_charge,
-                    "available_credits": current_balance
-                }
-            )
-
-        new_balance = current_balance - credits_to_charge
-        transaction.update(user_ref, {
-            "credits_balance": new_balance,
-            "updated_at": firestore.SERVER_TIMESTAMP
-        })
-        transaction.set(job_ref, job_data)
-        return new_balance
+    # Regular jobs: deduct credits and create the job in one transaction
+    try:
+        await jobs.create_charged(user_id, job_id, job_data, credits_to_charge)
+    except InsufficientCreditsError as e:
+        raise HTTPException(
+            status_code=402,
+            detail={
+                "error": "insufficient_credits",
+                "message": f"Insufficient credits. Required: {e.required}, Available: {e.available}",
+                "required_credits": e.required,
+                "available_credits": e.available
+            }
+        )
+    except UserNotFoundError:
+        raise HTTPException(status_code=404, detail="User not found")
 
     try:
-        job_ref = db.collection("jobs").document(job_id)
-        transaction = db.transaction()
-        create_job_transaction(transaction, user_ref, job_ref, job_data, credits_to_charge)
+        await asyncio.to_thread(increment_global_stats, db, jobs_total=1)
 
         try:
-            task_name = enqueue_job(job_id)
-            logger.info(f"Job {job_id} enqueued: {task_name}")
-            job_ref.update({
+            task_name = await asyncio.to_thread(enqueue_job, job_id, trace_id=trace_id)
+            logger.info(f"Job {job_id} enqueued: {task_name} (trace_id={trace_id})")
+            timeline = JobTimeline(job_id, trace_id)
+            timeline.add("api", started_at, time.monotonic() - start)
+            await jobs.update(job_id, {
                 "status": JobStatus.QUEUED.value,
                 "updated_at": datetime.now(timezone.utc),
+                **timeline.fields(),
             })
             job_status = JobStatus.QUEUED
         except Exception as e:
@@ -283,41 +310,51 @@ async def create_job(
 @router.get("", response_model=JobListResponse)
 async def list_jobs(
     user_id: str = Depends(get_current_user_id),
-    page: int = Query(1, ge=1, description="Page number"),
+    page: int = Query(1, ge=1, description="Page number (ignored when cursor is set)"),
     page_size: int = Query(20, ge=1, le=100, description="Items per page"),
     status: Optional[JobStatus] = Query(None, description="Filter by status"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from next_cursor of the previous page"),
+    include_total: bool = Query(True, description="Include the total count (one count() aggregation)"),
 ):
-    """List all jobs for the authenticated user."""
+    """List jobs for the authenticated user, newest first.
+
+    Prefer cursor pagination: pass next_cursor from the previous response.
+    page/page_size still work, but Firestore bills every skipped document
+    of an offset, so deep pages cost more than cursor pages.
+    """
     db = get_firestore_client()
+    jobs_ref = db.collection("jobs")
 
-    query = db.collection("jobs").where("user_id", "==", user_id)
+    query = jobs_ref.where("user_id", "==", user_id).where("is_deleted", "==", False)
     if status:
         query = query.where("status", "==", status.value)
-    query = query.order_by("created_at", direction=firestore.Query.DESCENDING)
 
-    all_docs = [doc for doc in query.stream() if not doc.to_dict().get("deleted_at")]
-    total = len(all_docs)
+    total = count_query(query) if include_total else None
+
+    page_query = apply_cursor(query, jobs_ref, cursor).select(JOB_LIST_FIELDS)
+    if not cursor and page > 1:
+        page_query = page_query.offset((page - 1) * page_size)
+
+    # One extra document tells us whether another page exists
+    docs = list(page_query.limit(page_size + 1).stream())
+    has_more = len(docs) > page_size
+    docs = docs[:page_size]
 
-    offset = (page - 1) * page_size
-    paginated_docs = all_docs[offset:offset + page_size]
+    next_cursor = None
+    if has_more and docs:
+        last = docs[-1]
+        next_cursor = encode_cursor(last.to_dict().get("created_at"), last.id)
 
     jobs = []
-    for doc in paginated_docs:
+    for doc in docs:
         data = doc.to_dict()
-        created_at = data.get("created_at")
-        updated_at = data.get("updated_at")
-        completed_at = data.get("completed_at")
-
-        if hasattr(created_at, 'timestamp'):
-            created_at = datetime.fromtimestamp(created_at.timestamp(), tz=timezone.utc)
-        if hasattr(updated_at, 'timestamp'):
-            updated_at = datetime.fromtimestamp(updated_at.timestamp(), tz=timezone.utc)
-        if completed_at and hasattr(completed_at, 'timestamp'):
-            completed_at = datetime.fromtimestamp(completed_at.timestamp(), tz=timezone.utc)
+        created_at = to_datetime(data.get("created_at"))
+        updated_at = to_datetime(data.get("updated_at"))
+        completed_at = to_datetime(data.get("completed_at"))
 
         short_id = data.get("short_id")
         jobs.append(JobResponse(
-            id=data.get("id"),
+            id=data.get("id") or doc.id,
             short_id=short_id,
             share_url=f"https://nuumee.ai/v/{short_id}" if short_id else None,
             user_id=data.get("user_id"),
@@ -337,10 +374,21 @@ async def list_jobs(
             created_at=created_at,
             updated_at=updated_at,
             completed_at=completed_at,
-            view_count=data.get("view_count", 0),
+            view_count=total_view_count(data),
+            subtitle_mode=data.get("subtitle_mode"),
+            subtitle_vtt_path=data.get("subtitle_vtt_path"),
+            subtitle_ass_path=data.get("subtitle_ass_path"),
+            processing_stats=data.get("processing_stats"),
         ))
 
-    return JobListResponse(jobs=jobs, total=total, page=page, page_size=page_size)
+    return JobListResponse(
+        jobs=jobs,
+        total=total,
+        page=page,
+        page_size=page_size,
+        next_cursor=next_cursor,
+        has_more=has_more,
+    )
 
 
 @router.get("/cost", response_model=CreditCostResponse)
@@ -365,16 +413,11 @@ async def get_job(
     user_id: str = Depends(get_current_user_id),
 ):
     """Get details of a specific job."""
-    db = get_firestore_client()
-
-    job_ref = db.collection("jobs").document(job_id)
-    job_doc = job_ref.get()
+    data = await get_job_repository().get(job_id)
 
-    if not job_doc.exists:
+    if data is None:
         raise HTTPException(status_code=404, detail="Job not found")
 
-    data = job_doc.to_dict()
-
     if data.get("user_id") != user_id:
         raise HTTPException(status_code=403, detail="Not authorized to view this job")
 
@@ -411,7 +454,11 @@ async def get_job(
         created_at=created_at,
         updated_at=updated_at,
         completed_at=completed_at,
-        view_count=data.get("view_count", 0),
+        view_count=total_view_count(data),
+        subtitle_mode=data.get("subtitle_mode"),
+        subtitle_vtt_path=data.get("subtitle_vtt_path"),
+        subtitle_ass_path=data.get("subtitle_ass_path"),
+        processing_stats=data.get("processing_stats"),
     )
 
 
@@ -466,9 +513,11 @@ async def delete_job(
 
     # Soft delete
     job_ref.update({
+        "is_deleted": True,
         "deleted_at": datetime.now(timezone.utc),
         "updated_at": datetime.now(timezone.utc),
     })
+    public_video_cache.invalidate(data.get("short_id"))
 
     return {"message": "Job deleted successfully", "job_id": job_id}
 
@@ -485,16 +534,11 @@ async def get_job_thumbnails(
     user_id: str = Depends(get_current_user_id),
 ):
     """Get signed URLs for job input files."""
-    db = get_firestore_client()
+    data = await get_job_repository().get(job_id)
 
-    job_ref = db.collection("jobs").document(job_id)
-    job_doc = job_ref.get()
-
-    if not job_doc.exists:
+    if data is None:
         raise HTTPException(status_code=404, detail="Job not found")
 
-    data = job_doc.to_dict()
-
     if data.get("user_id") != user_id:
         raise HTTPException(status_code=403, detail="Not authorized to access this job")
 
@@ -502,45 +546,20 @@ async def get_job_thumbnails(
     video_bucket = os.getenv("GCS_VIDEO_BUCKET", "nuumee-videos")
     output_bucket = os.getenv("OUTPUT_BUCKET", "nuumee-outputs")
 
-    result = {
-        "job_id": job_id,
-        "reference_image_url": None,
-        "motion_video_url": None,
-        "input_video_url": None,
-        "output_video_url": None,
-    }
-
-    if data.get("reference_image_path"):
-        try:
-            result["reference_image_url"] = generate_signed_download_url(
-                image_bucket, data["reference_image_path"], 3600
-            )
-        except Exception as e:
-            logger.warning(f"Failed to generate reference image URL: {e}")
-
-    if data.get("motion_video_path"):
-        try:
-            result["motion_video_url"] = generate_signed_download_url(
-                video_bucket, data["motion_video_path"], 3600
-            )
-        except Exception as e:
-            logger.warning(f"Failed to generate motion video URL: {e}")
-
-    if data.get("input_video_path"):
-        try:
-            result["input_video_url"] = generate_signed_download_url(
-                output_bucket, data["input_video_path"], 3600
-            )
-        except Exception as e:
-            logger.warning(f"Failed to generate input video URL: {e}")
-
-    if data.get("output_video_path"):
-        try:
-            result["output_video_url"] = generate_signed_download_url(
-                output_bucket, data["output_video_path"], 3600
-            )
-        except Exception as e:
-            logger.warning(f"Failed to generate output video URL: {e}")
+    # (result key, bucket, path field), signed concurrently
+    targets = [
+        ("reference_image_url", image_bucket, "reference_image_path"),
+        ("motion_video_url", video_bucket, "motion_video_path"),
+        ("input_video_url", output_bucket, "input_video_path"),
+        ("output_video_url", output_bucket, "output_video_path"),
+    ]
+    present = [(key, bucket, data[field]) for key, bucket, field in targets if data.get(field)]
+    signed = await signer.download_urls([(bucket, path) for _, bucket, path in present], stable=True)
+
+    result = {"job_id": job_id}
+    result.update({key: None for key, _, _ in targets})
+    for (key, _, _), signed_url in zip(present, signed):
+        result[key] = signed_url.url if signed_url else None
 
     return result
 
@@ -551,16 +570,11 @@ async def get_job_output(
     user_id: str = Depends(get_current_user_id),
 ):
     """Get download URL for completed job output video."""
-    db = get_firestore_client()
+    data = await get_job_repository().get(job_id)
 
-    job_ref = db.collection("jobs").document(job_id)
-    job_doc = job_ref.get()
-
-    if not job_doc.exists:
+    if data is None:
         raise HTTPException(status_code=404, detail="Job not found")
 
-    data = job_doc.to_dict()
-
     if data.get("user_id") != user_id:
         raise HTTPException(status_code=403, detail="Not authorized to access this job")
 
@@ -582,13 +596,14 @@ async def get_job_output(
     output_bucket = os.getenv("OUTPUT_BUCKET", "nuumee-outputs")
 
     try:
-        download_url = generate_signed_download_url(output_bucket, output_path, 3600)
+        # Stable URL so repeat downloads/plays can be served from the browser cache
+        signed = await asyncio.to_thread(signer.stable_download_url, output_bucket, output_path)
         filename = output_path.split("/")[-1]
 
         return JobOutputResponse(
             job_id=job_id,
-            download_url=download_url,
-            expires_in_seconds=3600,
+            download_url=signed.url,
+            expires_in_seconds=signed.expires_in,
             filename=filename
         )
     except Exception as e:
@@ -596,6 +611,44 @@ async def get_job_output(
         raise HTTPException(status_code=500, detail=f"Failed to generate download URL: {str(e)}")
 
 
+VALID_WATERMARK_POSITIONS = ["bottom-right", "bottom-left", "top-right", "top-left"]
+
+
+def build_chain_operations(operations, watermark_path: str = "assets/watermark.png") -> list:
+    """Convert chain operations from the request into FFmpeg worker options.
+
+    Raises HTTPException 400 if the chain is empty or invalid.
+    """
+    if not operations:
+        raise HTTPException(status_code=400, detail="Chain post-processing requires at least one operation")
+
+    result = []
+    for op in operations:
+        if op.type == PostProcessType.SUBTITLES:
+            step = {
+                "type": "subtitles",
+                "subtitle_style": op.subtitle_style.value if op.subtitle_style else "simple",
+                "subtitle_mode": op.subtitle_mode.value,
+            }
+            if op.script_content:
+                step["script_content"] = op.script_content
+        elif op.type == PostProcessType.WATERMARK:
+            step = {
+                "type": "watermark",
+                "watermark_path": watermark_path,
+                "position": op.position if op.position in VALID_WATERMARK_POSITIONS else "bottom-right",
+                "opacity": op.opacity,
+            }
+        else:
+            raise HTTPException(status_code=400, detail=f"Unsupported chain operation: {op.type.value}")
+        result.append(step)
+
+    if sum(1 for step in result if step["type"] == "subtitles") > 1:
+        raise HTTPException(status_code=400, detail="A chain can contain at most one subtitles operation")
+
+    return result
+
+
 @router.post("/{job_id}/post-process", response_model=PostProcessResponse)
 async def create_post_process_job(
     job_id: str,
@@ -632,18 +685,32 @@ async def create_post_process_job(
     job_type_map = {
         PostProcessType.SUBTITLES: JobType.SUBTITLES,
         PostProcessType.WATERMARK: JobType.WATERMARK,
+        PostProcessType.CHAIN: JobType.POST_PROCESS_CHAIN,
     }
     new_job_type = job_type_map[request.post_process_type]
 
     options = {}
     if request.post_process_type == PostProcessType.SUBTITLES:
         options["subtitle_style"] = request.subtitle_style.value if request.subtitle_style else "simple"
+        options["subtitle_mode"] = request.subtitle_mode.value
         if request.script_content:
             options["script_content"] = request.script_content
+
+        # Burning a soft-subtitled video: reuse its ASS sidecar (no second STT
+        # pass) and burn onto the original video rather than the muxed copy
+        if (
+            request.subtitle_mode == SubtitleMode.BURN
+            and source_data.get("subtitle_mode") == SubtitleMode.SOFT.value
+            and source_data.get("subtitle_ass_path")
+        ):
+            options["ass_path"] = source_data["subtitle_ass_path"]
+            input_video_path = source_data.get("input_video_path") or input_video_path
     elif request.post_process_type == PostProcessType.WATERMARK:
         options["watermark_path"] = "assets/watermark.png"
         options["position"] = "bottom-right"
         options["opacity"] = 0.7
+    elif request.post_process_type == PostProcessType.CHAIN:
+        options["operations"] = build_chain_operations(request.operations)
 
     job_data = {
         "id": new_job_id,
@@ -660,18 +727,24 @@ async def create_post_process_job(
         "created_at": now,
         "updated_at": now,
         "completed_at": None,
+        "is_deleted": False,
     }
 
     try:
         job_ref = db.collection("jobs").document(new_job_id)
         job_ref.set(job_data)
+        increment_global_stats(db, jobs_total=1)
 
-        output_suffix = "subtitled" if request.post_process_type == PostProcessType.SUBTITLES else "watermarked"
+        output_suffix = {
+            PostProcessType.SUBTITLES: "subtitled",
+            PostProcessType.WATERMARK: "watermarked",
+            PostProcessType.CHAIN: "processed",
+        }[request.post_process_type]
         output_path = f"processed/{new_job_id}/{output_suffix}.mp4"
 
         task_name = enqueue_ffmpeg_job(
             job_id=new_job_id,
-            job_type=request.post_process_type.value,
+            job_type=new_job_type.value,
             input_video_path=input_video_path,
             output_path=output_path,
             options=options
@@ -702,9 +775,16 @@ async def create_watermark_job(
     position: str = Form(default="bottom-right"),
     opacity: str = Form(default="0.7"),
     watermark_image: Optional[UploadFile] = File(default=None),
+    subtitle_style: Optional[SubtitleStyle] = Form(default=None),
+    subtitle_mode: SubtitleMode = Form(default=SubtitleMode.BURN),
+    script_content: Optional[str] = Form(default=None),
     user_id: str = Depends(get_current_user_id),
 ):
-    """Create a watermark job with custom image upload."""
+    """Create a watermark job with custom image upload.
+
+    If subtitle_style is given, subtitles and the watermark are applied as a
+    single post-processing chain (one encode) instead of two separate jobs.
+    """
     db = get_firestore_client()
 
     job_ref = db.collection("jobs").document(job_id)
@@ -733,8 +813,7 @@ async def create_watermark_job(
     except ValueError:
         opacity_float = 0.7
 
-    valid_positions = ["bottom-right", "bottom-left", "top-right", "top-left"]
-    if position not in valid_positions:
+    if position not in VALID_WATERMARK_POSITIONS:
         position = "bottom-right"
 
     watermark_gcs_path = "assets/watermark.png"
@@ -757,16 +836,42 @@ async def create_watermark_job(
             logger.error(f"Failed to upload watermark: {e}")
             raise HTTPException(status_code=500, detail="Failed to upload watermark image")
 
-    options = {
-        "watermark_path": watermark_gcs_path,
-        "position": position,
-        "opacity": opacity_float,
-    }
+    if subtitle_style:
+        new_job_type = JobType.POST_PROCESS_CHAIN
+        post_process_type = PostProcessType.CHAIN
+        output_suffix = "processed"
+        options = {
+            "operations": build_chain_operations(
+                [
+                    PostProcessOperation(
+                        type=PostProcessType.SUBTITLES,
+                        subtitle_style=subtitle_style,
+                        subtitle_mode=subtitle_mode,
+                        script_content=script_content,
+                    ),
+                    PostProcessOperation(
+                        type=PostProcessType.WATERMARK,
+                        position=position,
+                        opacity=opacity_float,
+                    ),
+                ],
+                watermark_path=watermark_gcs_path,
+            ),
+        }
+    else:
+        new_job_type = JobType.WATERMARK
+        post_process_type = PostProcessType.WATERMARK
+        output_suffix = "watermarked"
+        options = {
+            "watermark_path": watermark_gcs_path,
+            "position": position,
+            "opacity": opacity_float,
+        }
 
     job_data = {
         "id": new_job_id,
         "user_id": user_id,
-        "job_type": JobType.WATERMARK.value,
+        "job_type": new_job_type.value,
         "status": JobStatus.PENDING.value,
         "source_job_id": job_id,
         "input_video_path": input_video_path,
@@ -778,17 +883,19 @@ async def create_watermark_job(
         "created_at": now,
         "updated_at": now,
         "completed_at": None,
+        "is_deleted": False,
     }
 
     try:
         job_ref = db.collection("jobs").document(new_job_id)
         job_ref.set(job_data)
+        increment_global_stats(db, jobs_total=1)
 
-        output_path = f"processed/{new_job_id}/watermarked.mp4"
+        output_path = f"processed/{new_job_id}/{output_suffix}.mp4"
 
         task_name = enqueue_ffmpeg_job(
             job_id=new_job_id,
-            job_type="watermark",
+            job_type=new_job_type.value,
             input_video_path=input_video_path,
             output_path=output_path,
             options=options
@@ -803,7 +910,7 @@ async def create_watermark_job(
         return PostProcessResponse(
             job_id=new_job_id,
             source_job_id=job_id,
-            post_process_type=PostProcessType.WATERMARK,
+            post_process_type=post_process_type,
             status=JobStatus.QUEUED,
             credits_charged=0.0
         )
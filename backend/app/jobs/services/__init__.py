@@ -1,4 +1,4 @@
-"""Job services for credit calculation, validation, and GCS operations."""
+"""Job services for credit calculation, validation, GCS operations, pagination and stage timing."""
 
 from .credits import (
     calculate_credits,
@@ -21,7 +21,24 @@ from .validation import (
     DEMO_IMAGE_URI,
     DEMO_VIDEO_URI,
 )
-from .gcs import generate_signed_download_url
+from .gcs import (
+    generate_signed_download_url,
+    seconds_until_next_bucket,
+    signer,
+    SignedUrl,
+    UrlSigner,
+)
+from .pagination import (
+    to_datetime,
+    encode_cursor,
+    decode_cursor,
+    apply_cursor,
+    count_query,
+)
+from .timeline import (
+    generate_trace_id,
+    JobTimeline,
+)
 
 __all__ = [
     # Credits
@@ -45,4 +62,17 @@ __all__ = [
     "DEMO_VIDEO_URI",
     # GCS
     "generate_signed_download_url",
+    "seconds_until_next_bucket",
+    "signer",
+    "SignedUrl",
+    "UrlSigner",
+    # Pagination
+    "to_datetime",
+    "encode_cursor",
+    "decode_cursor",
+    "apply_cursor",
+    "count_query",
+    # Timeline
+    "generate_trace_id",
+    "JobTimeline",
 ]
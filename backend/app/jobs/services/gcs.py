@@ -1,63 +1,299 @@
-"""GCS signed URL generation for job outputs."""
+"""GCS signed URL service shared by the job, public and upload routes.
 
+On Cloud Run the default Compute Engine credentials cannot sign, so every v4
+signature goes through IAM impersonation (a remote signBlob call). The
+signer resolves the service account, default credentials, impersonated
+credentials and storage client once per process, and keeps an LRU of issued
+download URLs that are reused until they get close to expiry.
+
+Stable (time-bucketed) URLs sign with a request time aligned to a fixed
+bucket, so the same object gets the same URL for the whole bucket and
+browsers/CDNs can reuse the bytes they already downloaded.
+"""
+
+import asyncio
+import logging
 import os
-from datetime import timedelta
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Sequence, Tuple
+from urllib.parse import quote
+
 import requests as http_requests
 from google.auth import default
 from google.auth import impersonated_credentials
 from google.cloud import storage
+from google.cloud.storage import _signing
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SERVICE_ACCOUNT = "nuumee-api@wanapi-prod.iam.gserviceaccount.com"
+
+GCS_API_ENDPOINT = "https://storage.googleapis.com"
+
+# Max issued download URLs kept per instance
+SIGNED_URL_CACHE_SIZE = int(os.getenv("SIGNED_URL_CACHE_SIZE", "5000"))
+
+# A cached URL is reused while at least this fraction of its lifetime remains
+SIGNED_URL_REUSE_FRACTION = float(os.getenv("SIGNED_URL_REUSE_FRACTION", "0.5"))
+
+# Length of a stable URL bucket. A stable URL is valid for two buckets from
+# its bucket start, so it always has at least one bucket of lifetime left.
+SIGNED_URL_BUCKET_SECONDS = int(os.getenv("SIGNED_URL_BUCKET_SECONDS", "3600"))
+
+
+@dataclass(frozen=True)
+class SignedUrl:
+    """A signed URL and the moment it stops working."""
+    url: str
+    expires_at: datetime
+
+    @property
+    def expires_in(self) -> int:
+        """Seconds until the URL expires."""
+        return max(0, int((self.expires_at - datetime.now(timezone.utc)).total_seconds()))
+
+
+def _get_service_account_email() -> str:
+    """Service account to sign as: env, then Cloud Run metadata server, then project default."""
+    sa_email = os.getenv("SERVICE_ACCOUNT_EMAIL")
+    if sa_email:
+        return sa_email
+
+    try:
+        response = http_requests.get(
+            "http://metadata.google.internal/computeMetadata/v1/instance/service-accounts/default/email",
+            headers={"Metadata-Flavor": "Google"},
+            timeout=2
+        )
+        if response.status_code == 200:
+            return response.text
+    except Exception:
+        pass
+
+    return DEFAULT_SERVICE_ACCOUNT
+
+
+class UrlSigner:
+    """Process-wide signed URL generator with credential, client and URL caching."""
+
+    def __init__(self, cache_size: int = SIGNED_URL_CACHE_SIZE, reuse_fraction: float = SIGNED_URL_REUSE_FRACTION):
+        self.cache_size = cache_size
+        self.reuse_fraction = reuse_fraction
+        self._init_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._credentials = None
+        self._client: Optional[storage.Client] = None
+        self._cache: "OrderedDict[Tuple, SignedUrl]" = OrderedDict()
+
+        self._signed_total = 0
+        self._sign_errors = 0
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._sign_seconds_total = 0.0
+        self._sign_seconds_max = 0.0
+
+    def _ensure_initialized(self):
+        """Resolve signing credentials and the storage client once."""
+        if self._client is not None:
+            return
+        with self._init_lock:
+            if self._client is not None:
+                return
+            source_credentials, project = default()
+            sa_email = _get_service_account_email()
+            # Impersonated credentials refresh their own token; signing uses
+            # the IAM signBlob API, so they can live for the whole process.
+            self._credentials = impersonated_credentials.Credentials(
+                source_credentials=source_credentials,
+                target_principal=sa_email,
+                target_scopes=['https://www.googleapis.com/auth/cloud-platform'],
+                lifetime=3600,
+            )
+            self._client = storage.Client(project=project)
+            logger.info(f"URL signer initialized for {sa_email}")
+
+    def sign(
+        self,
+        bucket_name: str,
+        blob_path: str,
+        expiration: int = 3600,
+        method: str = "GET",
+        content_type: Optional[str] = None,
+    ) -> SignedUrl:
+        """Sign a URL without consulting the cache (one signBlob round trip)."""
+        self._ensure_initialized()
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=expiration)
+        blob = self._client.bucket(bucket_name).blob(blob_path)
+
+        start = time.monotonic()
+        try:
+            url = blob.generate_signed_url(
+                version="v4",
+                expiration=expires_at,
+                method=method,
+                content_type=content_type,
+                credentials=self._credentials,
+            )
+        except Exception:
+            with self._lock:
+                self._sign_errors += 1
+            raise
+        self._record_latency(time.monotonic() - start)
+        return SignedUrl(url=url, expires_at=expires_at)
+
+    def _record_latency(self, elapsed: float) -> None:
+        with self._lock:
+            self._signed_total += 1
+            self._sign_seconds_total += elapsed
+            self._sign_seconds_max = max(self._sign_seconds_max, elapsed)
+
+    def _store(self, key: Tuple, signed: SignedUrl) -> None:
+        with self._lock:
+            self._cache[key] = signed
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def download_url(self, bucket_name: str, blob_path: str, expiration: int = 3600) -> SignedUrl:
+        """Signed GET URL, reused from the cache while enough lifetime remains."""
+        key = ("download", bucket_name, blob_path, expiration)
+        min_remaining = expiration * self.reuse_fraction
+
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached.expires_in >= min_remaining:
+                self._cache.move_to_end(key)
+                self._cache_hits += 1
+                return cached
+            self._cache_misses += 1
+
+        signed = self.sign(bucket_name, blob_path, expiration)
+        self._store(key, signed)
+        return signed
+
+    def stable_download_url(
+        self,
+        bucket_name: str,
+        blob_path: str,
+        bucket_seconds: int = SIGNED_URL_BUCKET_SECONDS,
+    ) -> SignedUrl:
+        """Signed GET URL that stays identical for the current time bucket.
+
+        The signature's request time is the bucket start and its lifetime is
+        two buckets. V4 signing is deterministic for a given signing key, so
+        every call in the bucket (on any instance signing with the same key)
+        produces the same URL.
+        """
+        now = time.time()
+        bucket_start = int(now // bucket_seconds) * bucket_seconds
+        key = ("stable", bucket_name, blob_path, bucket_seconds, bucket_start)
+
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self._cache_hits += 1
+                return cached
+            self._cache_misses += 1
+
+        self._ensure_initialized()
+        signed_at = datetime.fromtimestamp(bucket_start, tz=timezone.utc)
+        lifetime = 2 * bucket_seconds
+        resource = f"/{quote(bucket_name)}/{quote(blob_path, safe='/~')}"
+
+        start = time.monotonic()
+        try:
+            # Blob.generate_signed_url always signs at "now"; the helper it
+            # wraps accepts an explicit request timestamp.
+            url = _signing.generate_signed_url_v4(
+                self._credentials,
+                resource=resource,
+                expiration=timedelta(seconds=lifetime),
+                api_access_endpoint=GCS_API_ENDPOINT,
+                method="GET",
+                _request_timestamp=signed_at.strftime("%Y%m%dT%H%M%SZ"),
+            )
+        except Exception:
+            with self._lock:
+                self._sign_errors += 1
+            raise
+        self._record_latency(time.monotonic() - start)
+
+        signed = SignedUrl(url=url, expires_at=signed_at + timedelta(seconds=lifetime))
+        self._store(key, signed)
+        return signed
+
+    async def download_urls(
+        self,
+        items: Sequence[Tuple[str, str]],
+        expiration: int = 3600,
+        stable: bool = False,
+    ) -> List[Optional[SignedUrl]]:
+        """Sign several (bucket, blob_path) pairs concurrently.
+
+        With ``stable=True`` the URLs are time-bucketed (``expiration`` is
+        ignored). Returns one entry per item, in order; entries that failed
+        to sign are None (the error is logged).
+        """
+        if stable:
+            calls = (asyncio.to_thread(self.stable_download_url, bucket, path) for bucket, path in items)
+        else:
+            calls = (asyncio.to_thread(self.download_url, bucket, path, expiration) for bucket, path in items)
+        results = await asyncio.gather(*calls, return_exceptions=True)
+        signed = []
+        for (bucket, path), result in zip(items, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Failed to sign gs://{bucket}/{path}: {result}")
+                signed.append(None)
+            else:
+                signed.append(result)
+        return signed
+
+    def stats(self) -> dict:
+        """Signing counters and latency of this instance."""
+        with self._lock:
+            lookups = self._cache_hits + self._cache_misses
+            return {
+                "signed_total": self._signed_total,
+                "sign_errors": self._sign_errors,
+                "cache_hits": self._cache_hits,
+                "cache_misses": self._cache_misses,
+                "cache_hit_rate_percent": round(self._cache_hits / lookups * 100, 2) if lookups else 0,
+                "cache_size": len(self._cache),
+                "sign_seconds_total": round(self._sign_seconds_total, 6),
+                "sign_avg_ms": round(self._sign_seconds_total / self._signed_total * 1000, 2) if self._signed_total else 0,
+                "sign_max_ms": round(self._sign_seconds_max * 1000, 2),
+            }
+
+
+# Process-wide signer
+signer = UrlSigner()
+
+
+def seconds_until_next_bucket(bucket_seconds: int = SIGNED_URL_BUCKET_SECONDS) -> int:
+    """Seconds until stable URLs roll over to the next bucket.
+
+    Responses that embed a stable URL can be cached this long; the URL they
+    carry is then still valid for at least one more bucket.
+    """
+    return max(1, bucket_seconds - int(time.time()) % bucket_seconds)
 
 
 def generate_signed_download_url(bucket_name: str, blob_path: str, expiration: int = 3600) -> str:
     """
     Generate a signed URL for downloading a file from GCS.
 
-    Uses IAM impersonation to get signing credentials on Cloud Run,
-    since the default Compute Engine credentials cannot sign URLs.
-
     Args:
         bucket_name: GCS bucket name
         blob_path: Path to blob within bucket
         expiration: URL expiration in seconds (default 1 hour)
 
     Returns:
-        Signed URL string
+        Signed URL string (possibly a cached one with at least
+        SIGNED_URL_REUSE_FRACTION of its lifetime left)
     """
-    # Get service account email from metadata server or environment
-    sa_email = os.getenv("SERVICE_ACCOUNT_EMAIL")
-    if not sa_email:
-        try:
-            response = http_requests.get(
-                "http://metadata.google.internal/computeMetadata/v1/instance/service-accounts/default/email",
-                headers={"Metadata-Flavor": "Google"},
-                timeout=2
-            )
-            if response.status_code == 200:
-                sa_email = response.text
-        except Exception:
-            pass
-
-    if not sa_email:
-        sa_email = "nuumee-api@wanapi-prod.iam.gserviceaccount.com"
-
-    # Get default credentials and create impersonated credentials with signing capability
-    source_credentials, project = default()
-    signing_credentials = impersonated_credentials.Credentials(
-        source_credentials=source_credentials,
-        target_principal=sa_email,
-        target_scopes=['https://www.googleapis.com/auth/cloud-platform'],
-        lifetime=3600,
-    )
-
-    # Create storage client and generate signed URL
-    client = storage.Client(project=project)
-    bucket = client.bucket(bucket_name)
-    blob = bucket.blob(blob_path)
-
-    url = blob.generate_signed_url(
-        version="v4",
-        expiration=timedelta(seconds=expiration),
-        method="GET",
-        credentials=signing_credentials,
-    )
-    return url
+    return signer.download_url(bucket_name, blob_path, expiration).url
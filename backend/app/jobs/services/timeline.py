@@ -0,0 +1,71 @@
+"""Job stage timeline (API side).
+
+Stages are stored on the job document as
+``timeline.<stage> = {"started_at", "ended_at", "seconds"}`` and written
+together with the job update that ends the stage, so timing adds no
+Firestore writes. Workers record their stages with the same layout
+(shared/worker_utils/timeline.py).
+
+Stages, in order: api (create_job), queue (Cloud Tasks wait), submit
+(WaveSpeed submit call), wavespeed (submit until webhook), pubsub (webhook
+until completion processing), download, watermark, upload.
+
+Durations inside one process use the monotonic clock; stages that span
+services use wall-clock epoch seconds from both ends.
+"""
+
+import logging
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def generate_trace_id() -> str:
+    """Trace id carried from job creation through the worker and webhook."""
+    return uuid.uuid4().hex
+
+
+class JobTimeline:
+    """Stage timings of one job, pending until the next job document write."""
+
+    def __init__(self, job_id: str, trace_id: Optional[str] = None):
+        self.job_id = job_id
+        self.trace_id = trace_id
+        self._pending: Dict[str, dict] = {}
+
+    def add(self, stage: str, started_at: float, seconds: float) -> None:
+        """Record a stage that started at epoch ``started_at``."""
+        seconds = max(0.0, seconds)
+        self._pending[stage] = {
+            "started_at": round(started_at, 3),
+            "ended_at": round(started_at + seconds, 3),
+            "seconds": round(seconds, 3),
+        }
+        logger.info(f"Job {self.job_id} stage {stage}: {seconds:.2f}s (trace_id={self.trace_id})")
+
+    def add_since(self, stage: str, started_at: Optional[float], until: Optional[float] = None) -> None:
+        """Record a stage from epoch ``started_at`` until ``until`` (default now)."""
+        if started_at:
+            self.add(stage, started_at, (until or time.time()) - started_at)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time the block as stage ``name``."""
+        started_at = time.time()
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add(name, started_at, time.monotonic() - start)
+
+    def stages(self) -> Dict[str, dict]:
+        """Pending stages by name (not cleared)."""
+        return dict(self._pending)
+
+    def fields(self) -> Dict[str, dict]:
+        """Pending stages as job document update fields; clears them."""
+        pending, self._pending = self._pending, {}
+        return {f"timeline.{stage}": entry for stage, entry in pending.items()}
@@ -82,12 +82,12 @@ def validate_gcs_path_ownership(path: str, user_id: str, field_name: str) -> Non
         )
 
 
-async def validate_source_job(db, source_job_id: str, user_id: str) -> dict:
+async def validate_source_job(jobs, source_job_id: str, user_id: str) -> dict:
     """
     Validate that a source job exists, belongs to the user, and has completed output.
 
     Args:
-        db: Firestore client
+        jobs: JobRepository (async reads)
         source_job_id: ID of the source job
         user_id: Current user's ID
 
@@ -99,17 +99,14 @@ async def validate_source_job(db, source_job_id: str, user_id: str) -> dict:
         HTTPException 403 if job belongs to different user
         HTTPException 400 if job not completed or has no output
     """
-    job_ref = db.collection("jobs").document(source_job_id)
-    job_doc = job_ref.get()
+    job_data = await jobs.get(source_job_id)
 
-    if not job_doc.exists:
+    if job_data is None:
         raise HTTPException(
             status_code=404,
             detail=f"Source job {source_job_id} not found"
         )
 
-    job_data = job_doc.to_dict()
-
     if job_data.get("user_id") != user_id:
         logger.warning(
             f"User {user_id} attempted to use job {source_job_id} belonging to {job_data.get('user_id')}"
@@ -0,0 +1,182 @@
+"""Structured, sampled logging.
+
+setup_logging() replaces the default plain-text setup with one JSON object
+per line, which Cloud Logging ingests as a structured entry
+(``severity``, ``message`` and any extra fields), and adds:
+
+- Context fields: job_id and trace_id of the job being processed (set with
+  log_context() / bind_log_fields()) on every line, so one job's lines can
+  be found across services without repeating the ids in each message.
+  Each request runs in its own context, so fields bound in a handler end
+  with the request.
+- Sampling: INFO and DEBUG lines of high-frequency loggers are kept one in
+  N per call site (LOG_SAMPLING="app.public=10", or the defaults passed
+  by the service); kept lines carry ``sampled_1_in``. Warnings and errors
+  are never sampled.
+- Lazy formatting: pass arguments instead of f-strings
+  (``logger.debug("Burning subtitles: %s", lazy(" ".join, cmd))``) so
+  dropped lines cost no formatting.
+
+LOG_FORMAT=text keeps the old human-readable format for local runs;
+LOG_LEVEL sets the root level (default INFO).
+"""
+
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Attributes every LogRecord has; anything else was passed with extra=
+_RECORD_ATTRS = set(logging.LogRecord("", 0, "", 0, "", (), None).__dict__) | {"message", "asctime"}
+
+_context: ContextVar[Dict[str, Any]] = ContextVar("log_context", default={})
+
+
+@contextmanager
+def log_context(**fields: Any) -> Iterator[None]:
+    """Add ``fields`` (e.g. job_id, trace_id) to every log line in the block."""
+    token = _context.set({**_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+def bind_log_fields(**fields: Any) -> None:
+    """Add fields to the current log_context() (e.g. once the trace id is known).
+
+    Outside log_context() the fields stay set for the rest of the current
+    thread or task (in a request handler: the request).
+    """
+    _context.set({**_context.get(), **fields})
+
+
+class lazy:
+    """Log argument computed only if the line is emitted: lazy(" ".join, cmd)."""
+
+    __slots__ = ("func", "args")
+
+    def __init__(self, func: Callable[..., Any], *args: Any):
+        self.func = func
+        self.args = args
+
+    def __str__(self) -> str:
+        return str(self.func(*self.args))
+
+
+class ContextFilter(logging.Filter):
+    """Copies the log_context() fields onto each record."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for key, value in _context.get().items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps one in N INFO/DEBUG records of configured loggers.
+
+    A rate applies to the logger and its children; the longest matching
+    name wins. Each call site (file and line) is counted on its own, so
+    lines a request logs in sequence don't share one counter and always
+    drop the same line. Counting (not random) keeps the kept share exact.
+    """
+
+    def __init__(self, rates: Dict[str, int]):
+        super().__init__()
+        self.rates = {name: n for name, n in rates.items() if n > 1}
+        self._seen: Dict[Tuple[str, int], int] = {}
+        self._lock = threading.Lock()
+
+    def _rate(self, name: str) -> Optional[str]:
+        while name:
+            if name in self.rates:
+                return name
+            name = name.rpartition(".")[0]
+        return None
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        matched = self._rate(record.name)
+        if matched is None:
+            return True
+        every = self.rates[matched]
+        site = (record.pathname, record.lineno)
+        with self._lock:
+            seen = self._seen.get(site, 0)
+            self._seen[site] = seen + 1
+        if seen % every:
+            return False
+        record.sampled_1_in = every
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, in Cloud Logging's structured layout."""
+
+    def __init__(self, project_id: Optional[str] = None):
+        super().__init__()
+        self.project_id = project_id
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "severity": record.levelname,
+            "message": record.getMessage(),
+            "logger": record.name,
+            "time": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        trace_id = entry.get("trace_id")
+        if trace_id and self.project_id:
+            # Groups the lines under the trace in the Logs Explorer
+            entry["logging.googleapis.com/trace"] = f"projects/{self.project_id}/traces/{trace_id}"
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def parse_sampling(spec: str) -> Dict[str, int]:
+    """Parse "name=N,name=N" into {name: N}; malformed entries are ignored."""
+    rates = {}
+    for item in spec.split(","):
+        name, _, every = item.strip().partition("=")
+        try:
+            rates[name.strip()] = int(every)
+        except ValueError:
+            continue
+    return rates
+
+
+def setup_logging(sampling: Optional[Dict[str, int]] = None) -> None:
+    """Configure the root logger (call once at startup).
+
+    Args:
+        sampling: Default keep-one-in-N rates by logger name; LOG_SAMPLING
+            entries override them
+    """
+    rates = dict(sampling or {})
+    rates.update(parse_sampling(os.getenv("LOG_SAMPLING", "")))
+
+    handler = logging.StreamHandler()
+    if os.getenv("LOG_FORMAT", "json") == "text":
+        handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+    else:
+        handler.setFormatter(JsonFormatter(os.getenv("GCP_PROJECT_ID", "wanapi-prod")))
+    handler.addFilter(SamplingFilter(rates))
+    handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
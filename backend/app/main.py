@@ -3,6 +3,7 @@ import os
 import sys
 import subprocess
 import logging
+import time
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
@@ -10,6 +11,10 @@ from fastapi.responses import JSONResponse
 from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 
+from .logging_utils import setup_logging
+
+# JSON lines with job_id/trace_id (see logging_utils.py)
+setup_logging()
 logger = logging.getLogger(__name__)
 
 from .auth.router import router as auth_router
@@ -25,11 +30,21 @@ from .status.router import router as status_router
 from .transactions.router import router as transactions_router
 from .billing.router import router as billing_router
 from .public.router import router as public_router
+from .public.views import view_buffer
 from .support.router import router as support_router
 from .admin.router import router as admin_router
 from .promo.router import router as promo_router
 from .internal import router as internal_router
-from .metrics import router as metrics_router, metrics
+from .metrics import (
+    router as metrics_router,
+    metrics,
+    error_rates,
+    instrument_firestore,
+    operation_scope,
+    rollup_flusher,
+)
+from .notifications import flush_alerts
+from .repository import read_scope
 
 
 # =============================================================================
@@ -124,9 +139,13 @@ async def lifespan(app: FastAPI):
     # Startup
     startup_results = run_startup_checks()
     app.state.startup_checks = startup_results
+    rollup_flusher.start()
     yield
     # Shutdown
     logger.info("Shutting down NuuMee API...")
+    view_buffer.stop()
+    rollup_flusher.stop()
+    flush_alerts()
 
 
 app = FastAPI(
@@ -190,13 +209,48 @@ app.include_router(metrics_router, prefix="/api/v1")
 # REQUEST TRACKING MIDDLEWARE
 # =============================================================================
 
+# Count Firestore reads/writes per route (see /api/v1/metrics/prometheus)
+instrument_firestore()
+
+# Per-request Firestore read count header, for debugging outside production
+FIRESTORE_READS_HEADER = os.getenv(
+    "FIRESTORE_READS_HEADER",
+    "false" if os.getenv("ENVIRONMENT", "production") == "production" else "true",
+).lower() == "true"
+
+
+def route_template(request: Request) -> str:
+    """Matched route template (e.g. /api/v1/jobs/{job_id}), for metric labels.
+
+    Unmatched paths share one label so scanners can't blow up cardinality.
+    """
+    route = request.scope.get("route")
+    return getattr(route, "path", "unmatched")
+
+
+@app.middleware("http")
+async def scope_document_reads(request: Request, call_next):
+    """Memoize repository document reads and count Firestore operations per request."""
+    with read_scope(request.url.path) as cache, operation_scope(request.url.path) as ops:
+        response = await call_next(request)
+        # Aggregate by route template, not by concrete path
+        cache.scope = ops.name = f"{request.method} {route_template(request)}"
+        if FIRESTORE_READS_HEADER:
+            response.headers["X-Firestore-Reads"] = str(ops.reads)
+    return response
+
+
 @app.middleware("http")
 async def track_requests(request: Request, call_next):
     """Track all requests for metrics."""
+    start = time.perf_counter()
     response = await call_next(request)
     # Track the request
     is_error = response.status_code >= 400
     metrics.track_request(error=is_error, status_code=response.status_code)
+    route = route_template(request)
+    metrics.track_latency(request.method, route, response.status_code, time.perf_counter() - start)
+    error_rates.record_request(f"{request.method} {route}", response.status_code)
     return response
 
 
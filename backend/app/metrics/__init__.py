@@ -1,5 +1,17 @@
 """Metrics collection and monitoring."""
 from .collector import metrics
+from .error_rates import error_rates
+from .firestore import firestore_ops, instrument_firestore, operation_scope
+from .rollup import cluster_metrics, rollup_flusher
 from .router import router
 
-__all__ = ["metrics", "router"]
+__all__ = [
+    "metrics",
+    "error_rates",
+    "firestore_ops",
+    "instrument_firestore",
+    "operation_scope",
+    "cluster_metrics",
+    "rollup_flusher",
+    "router",
+]
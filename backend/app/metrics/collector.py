@@ -1,14 +1,33 @@
 """Simple in-memory metrics collector for error tracking."""
+import bisect
+import os
 import time
 import logging
 from collections import defaultdict
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from threading import Lock
-from typing import Optional
+from typing import Optional, Sequence
 
 logger = logging.getLogger(__name__)
 
+# Upper bounds (seconds) of the request latency buckets; +Inf is implicit
+LATENCY_BUCKETS = tuple(
+    float(b) for b in os.getenv(
+        "LATENCY_BUCKETS",
+        "0.005,0.01,0.025,0.05,0.075,0.1,0.15,0.2,0.3,0.5,0.75,1,1.5,2.5,5,10,30",
+    ).split(",")
+)
+
+# Upper bounds (seconds) of the job stage buckets (api .. upload, see
+# jobs/services/timeline.py)
+STAGE_BUCKETS = tuple(
+    float(b) for b in os.getenv(
+        "STAGE_BUCKETS",
+        "0.1,0.5,1,2.5,5,10,30,60,120,300,600,1200,1800,3600",
+    ).split(",")
+)
+
 
 @dataclass
 class Counter:
@@ -28,6 +47,71 @@ class Counter:
             return self.value
 
 
+class LatencyHistogram:
+    """Fixed-bucket latency histogram.
+
+    Each histogram has its own lock, held only for a bucket increment, so
+    requests on different routes never contend.
+    """
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        # One count per bucket plus the +Inf overflow bucket
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = Lock()
+
+    def observe(self, seconds: float) -> None:
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += seconds
+            self._count += 1
+
+    def snapshot(self) -> dict:
+        """Cumulative bucket counts (Prometheus style), sum and count."""
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+        cumulative = []
+        running = 0
+        for n in counts:
+            running += n
+            cumulative.append(running)
+        return {"buckets": list(self.buckets), "cumulative": cumulative, "sum": total, "count": count}
+
+    def state(self) -> dict:
+        """Per-bucket (non-cumulative) counts, sum and count."""
+        with self._lock:
+            return {
+                "buckets": list(self.buckets),
+                "counts": list(self._counts),
+                "sum": self._sum,
+                "count": self._count,
+            }
+
+    def percentile(self, pct: float, snapshot: Optional[dict] = None) -> Optional[float]:
+        """Estimate a percentile (seconds) by interpolating inside its bucket.
+
+        Observations above the last bound are reported as the last bound.
+        """
+        snap = snapshot or self.snapshot()
+        count = snap["count"]
+        if not count:
+            return None
+        rank = pct / 100 * count
+        lower = 0.0
+        previous = 0
+        for bound, cumulative in zip(snap["buckets"], snap["cumulative"]):
+            if cumulative >= rank:
+                in_bucket = cumulative - previous
+                fraction = (rank - previous) / in_bucket if in_bucket else 1.0
+                return lower + (bound - lower) * fraction
+            lower, previous = bound, cumulative
+        return snap["buckets"][-1] if snap["buckets"] else None
+
+
 class MetricsCollector:
     """
     Simple in-memory metrics collector.
@@ -42,14 +126,21 @@ class MetricsCollector:
     def __init__(self):
         self._lock = Lock()
         self._counters: dict[str, Counter] = defaultdict(Counter)
+        self._latency: dict[tuple, LatencyHistogram] = {}
+        self._stages: dict[str, LatencyHistogram] = {}
         self._start_time = time.time()
 
     def increment(self, metric: str, by: int = 1) -> int:
-        """Increment a counter metric."""
-        with self._lock:
-            if metric not in self._counters:
-                self._counters[metric] = Counter()
-        return self._counters[metric].increment(by)
+        """Increment a counter metric.
+
+        Only the first increment of a metric takes the collector lock; after
+        that only the counter's own lock is held.
+        """
+        counter = self._counters.get(metric)
+        if counter is None:
+            with self._lock:
+                counter = self._counters.setdefault(metric, Counter())
+        return counter.increment(by)
 
     def get(self, metric: str) -> int:
         """Get current value of a counter."""
@@ -121,6 +212,95 @@ class MetricsCollector:
         minutes = int((seconds % 3600) // 60)
         return f"{hours}h {minutes}m"
 
+    def track_latency(self, method: str, route: str, status_code: int, seconds: float) -> None:
+        """Record a request duration by route template and status class."""
+        key = (method, route, f"{status_code // 100}xx")
+        histogram = self._latency.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._latency.setdefault(key, LatencyHistogram())
+        histogram.observe(seconds)
+
+    def get_latency_histograms(self) -> list:
+        """Snapshot of every latency histogram with its labels."""
+        with self._lock:
+            items = list(self._latency.items())
+        return [
+            {"method": method, "route": route, "status_class": status_class, **histogram.snapshot()}
+            for (method, route, status_class), histogram in sorted(items)
+        ]
+
+    def get_latency_summary(self) -> dict:
+        """Count, mean and p50/p95/p99 (ms) per "METHOD route" and status class."""
+        with self._lock:
+            items = list(self._latency.items())
+        summary: dict = {}
+        for (method, route, status_class), histogram in sorted(items):
+            snap = histogram.snapshot()
+            if not snap["count"]:
+                continue
+
+            def ms(pct):
+                return round(histogram.percentile(pct, snap) * 1000, 2)
+
+            summary.setdefault(f"{method} {route}", {})[status_class] = {
+                "count": snap["count"],
+                "avg_ms": round(snap["sum"] / snap["count"] * 1000, 2),
+                "p50_ms": ms(50),
+                "p95_ms": ms(95),
+                "p99_ms": ms(99),
+            }
+        return summary
+
+    def track_job_stage(self, stage: str, seconds: float) -> None:
+        """Record the duration of one job stage (queue, wavespeed, upload...)."""
+        histogram = self._stages.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self._stages.setdefault(stage, LatencyHistogram(STAGE_BUCKETS))
+        histogram.observe(seconds)
+
+    def get_job_stage_histograms(self) -> list:
+        """Snapshot of every job stage histogram."""
+        with self._lock:
+            items = list(self._stages.items())
+        return [{"stage": stage, **histogram.snapshot()} for stage, histogram in sorted(items)]
+
+    def get_job_stage_summary(self) -> dict:
+        """Count, mean and p50/p95/p99 (seconds) per job stage."""
+        with self._lock:
+            items = list(self._stages.items())
+        summary = {}
+        for stage, histogram in sorted(items):
+            snap = histogram.snapshot()
+            if not snap["count"]:
+                continue
+            summary[stage] = {
+                "count": snap["count"],
+                "avg_seconds": round(snap["sum"] / snap["count"], 3),
+                "p50_seconds": round(histogram.percentile(50, snap), 3),
+                "p95_seconds": round(histogram.percentile(95, snap), 3),
+                "p99_seconds": round(histogram.percentile(99, snap), 3),
+            }
+        return summary
+
+    def snapshot(self) -> dict:
+        """Raw cumulative state of every counter and histogram (see rollup.py).
+
+        Histogram keys are "latency|METHOD|route|status_class" and
+        "job_stage|stage".
+        """
+        with self._lock:
+            counters = list(self._counters.items())
+            latency = list(self._latency.items())
+            stages = list(self._stages.items())
+        histograms = {"|".join(("latency",) + key): histogram.state() for key, histogram in latency}
+        histograms.update({f"job_stage|{stage}": histogram.state() for stage, histogram in stages})
+        return {
+            "counters": {name: counter.value for name, counter in counters},
+            "histograms": histograms,
+        }
+
     # Convenience methods for common metrics
     def track_request(self, error: bool = False, status_code: int = 200):
         """Track an API request."""
@@ -0,0 +1,179 @@
+"""Sliding-window error rates with threshold alerts.
+
+The collector's counters are lifetime totals, which cannot show that the
+error rate of the last few minutes is high. Each key here (a route, or a
+job failure type) has a ring buffer of ERROR_RATE_SLOTS slots covering
+ERROR_RATE_WINDOW_SECONDS; recording an outcome touches one slot, reading
+the rate sums the slots still inside the window.
+
+Thresholds are evaluated at most every ERROR_RATE_EVAL_SECONDS, from the
+request that happens to record after the interval, and only for windows
+with at least ERROR_RATE_MIN_EVENTS events. Alerts go out on a background
+thread through notifications.alerts, whose cooldown and digest keep a
+sustained breach to one email.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ERROR_RATE_WINDOW_SECONDS = float(os.getenv("ERROR_RATE_WINDOW_SECONDS", "300"))
+ERROR_RATE_SLOTS = int(os.getenv("ERROR_RATE_SLOTS", "30"))
+ERROR_RATE_EVAL_SECONDS = float(os.getenv("ERROR_RATE_EVAL_SECONDS", "10"))
+ERROR_RATE_MIN_EVENTS = int(os.getenv("ERROR_RATE_MIN_EVENTS", "20"))
+# Percent of 5xx responses, per route and over all routes
+ERROR_RATE_THRESHOLD = float(os.getenv("ERROR_RATE_THRESHOLD", "5.0"))
+# Percent of finished jobs failing with one failure type
+JOB_FAILURE_RATE_THRESHOLD = float(os.getenv("JOB_FAILURE_RATE_THRESHOLD", "20.0"))
+
+ALL_ROUTES = "all"
+
+
+class SlidingWindow:
+    """Event and error counts over the last ``window_seconds``, in slots."""
+
+    def __init__(self, window_seconds: float = ERROR_RATE_WINDOW_SECONDS, slots: int = ERROR_RATE_SLOTS):
+        self.slot_seconds = window_seconds / slots
+        self.slots = slots
+        # Per slot: the absolute slot number it currently holds, events, errors
+        self._epochs = [-1] * slots
+        self._events = [0] * slots
+        self._errors = [0] * slots
+        self._lock = threading.Lock()
+
+    def record(self, error: bool, now: Optional[float] = None) -> None:
+        epoch = int((now if now is not None else time.time()) // self.slot_seconds)
+        index = epoch % self.slots
+        with self._lock:
+            if self._epochs[index] != epoch:
+                # Slot last used a full window ago; start it over
+                self._epochs[index] = epoch
+                self._events[index] = 0
+                self._errors[index] = 0
+            self._events[index] += 1
+            if error:
+                self._errors[index] += 1
+
+    def counts(self, now: Optional[float] = None) -> Tuple[int, int]:
+        """(events, errors) inside the window."""
+        oldest = int((now if now is not None else time.time()) // self.slot_seconds) - self.slots + 1
+        events = errors = 0
+        with self._lock:
+            for index in range(self.slots):
+                if self._epochs[index] >= oldest:
+                    events += self._events[index]
+                    errors += self._errors[index]
+        return events, errors
+
+
+class ErrorRateMonitor:
+    """Sliding-window error rates per route and per job failure type."""
+
+    def __init__(
+        self,
+        window_seconds: float = ERROR_RATE_WINDOW_SECONDS,
+        slots: int = ERROR_RATE_SLOTS,
+        eval_seconds: float = ERROR_RATE_EVAL_SECONDS,
+        min_events: int = ERROR_RATE_MIN_EVENTS,
+    ):
+        self.window_seconds = window_seconds
+        self.slots = slots
+        self.eval_seconds = eval_seconds
+        self.min_events = min_events
+        self._routes: Dict[str, SlidingWindow] = {}
+        # All finished jobs, and failures by type; a type's rate is its
+        # failures over all finished jobs
+        self._jobs = SlidingWindow(window_seconds, slots)
+        self._job_failures: Dict[str, SlidingWindow] = {}
+        self._lock = threading.Lock()
+        self._next_eval = 0.0
+
+    def _window(self, windows: Dict[str, SlidingWindow], key: str) -> SlidingWindow:
+        window = windows.get(key)
+        if window is None:
+            with self._lock:
+                window = windows.setdefault(key, SlidingWindow(self.window_seconds, self.slots))
+        return window
+
+    def record_request(self, route: str, status_code: int) -> None:
+        """Count a response of ``route`` ("METHOD template"); 5xx is an error."""
+        error = status_code >= 500
+        self._window(self._routes, route).record(error)
+        self._window(self._routes, ALL_ROUTES).record(error)
+        self.maybe_evaluate()
+
+    def record_job(self, failure_type: Optional[str] = None) -> None:
+        """Count a finished job; ``failure_type`` is set when it failed."""
+        self._jobs.record(failure_type is not None)
+        if failure_type is not None:
+            self._window(self._job_failures, failure_type).record(True)
+        self.maybe_evaluate()
+
+    def rates(self) -> Dict:
+        """Current windows: events, errors and error rate (percent) per key."""
+        now = time.time()
+        with self._lock:
+            routes = list(self._routes.items())
+            failures = list(self._job_failures.items())
+
+        jobs, _ = self._jobs.counts(now)
+
+        def entry(window, events=None):
+            counted, errors = window.counts(now)
+            events = counted if events is None else events
+            return {
+                "events": events,
+                "errors": errors,
+                "error_rate_percent": round(errors / events * 100, 2) if events else 0,
+            }
+
+        return {
+            "window_seconds": self.window_seconds,
+            "routes": {route: entry(window) for route, window in sorted(routes) if window.counts(now)[0]},
+            "jobs": entry(self._jobs),
+            "job_failures": {name: entry(window, jobs) for name, window in sorted(failures) if window.counts(now)[1]},
+        }
+
+    def breaches(self) -> List[Tuple[str, str, float, float]]:
+        """(kind, key, rate, threshold) of every window over its threshold."""
+        rates = self.rates()
+        found = []
+        for route, entry in rates["routes"].items():
+            if entry["events"] >= self.min_events and entry["error_rate_percent"] > ERROR_RATE_THRESHOLD:
+                found.append(("route", route, entry["error_rate_percent"], ERROR_RATE_THRESHOLD))
+        for name, entry in rates["job_failures"].items():
+            if entry["events"] >= self.min_events and entry["error_rate_percent"] > JOB_FAILURE_RATE_THRESHOLD:
+                found.append(("job_failure", name, entry["error_rate_percent"], JOB_FAILURE_RATE_THRESHOLD))
+        return found
+
+    def maybe_evaluate(self) -> None:
+        """Check thresholds if ERROR_RATE_EVAL_SECONDS passed since the last check."""
+        now = time.monotonic()
+        if now < self._next_eval:
+            return
+        with self._lock:
+            if now < self._next_eval:
+                return
+            self._next_eval = now + self.eval_seconds
+        found = self.breaches()
+        if found:
+            threading.Thread(target=self._alert, args=(found,), name="error-rate-alert", daemon=True).start()
+
+    def _alert(self, found: List[Tuple[str, str, float, float]]) -> None:
+        from ..notifications.alerts import alert_high_error_rate, alert_high_job_failure_rate
+
+        for kind, key, rate, threshold in found:
+            try:
+                if kind == "route":
+                    alert_high_error_rate(rate, threshold, route=key, window_seconds=self.window_seconds)
+                else:
+                    alert_high_job_failure_rate(key, rate, threshold, window_seconds=self.window_seconds)
+            except Exception as e:
+                logger.error(f"Failed to send error rate alert for {key}: {e}")
+
+
+# Process-wide monitor
+error_rates = ErrorRateMonitor()
@@ -0,0 +1,442 @@
+"""Cluster-wide, restart-safe metrics rollups.
+
+MetricsCollector counts in process memory, so each Cloud Run instance only
+sees its own traffic and loses everything on scale-down. The RollupFlusher
+snapshots the collector every METRICS_FLUSH_SECONDS and adds the delta since
+the previous flush to this instance's minute, hour and day buckets, then
+writes the changed buckets to a RollupStore. An instance only ever writes
+its own bucket documents, and always the whole bucket, so flushes never
+contend and a failed flush is simply repeated by the next one.
+
+cluster_metrics() merges the buckets of all instances:
+
+- 1m: minute buckets of the last minute
+- 1h: minute buckets of the last hour
+- 1d: hour buckets of the last day
+- total: every retained day bucket (METRICS_ROLLUP_RETENTION_DAYS)
+
+Windows include every bucket that overlaps them, so they cover up to one
+bucket more than their nominal length.
+
+Backends (METRICS_ROLLUP_BACKEND):
+
+- firestore: one document per instance and bucket in METRICS_ROLLUP_COLLECTION,
+  with expire_at for a Firestore TTL policy
+- file: one JSON file per instance in METRICS_ROLLUP_DIR (local runs)
+- none: no flushing; cluster_metrics() reports nothing
+"""
+import abc
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from .collector import LatencyHistogram, MetricsCollector, metrics
+
+logger = logging.getLogger(__name__)
+
+METRICS_ROLLUP_BACKEND = os.getenv("METRICS_ROLLUP_BACKEND", "firestore")
+METRICS_ROLLUP_COLLECTION = os.getenv("METRICS_ROLLUP_COLLECTION", "metrics_rollups")
+METRICS_ROLLUP_DIR = os.getenv("METRICS_ROLLUP_DIR", "/tmp/nuumee-metrics")
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "30"))
+METRICS_ROLLUP_RETENTION_DAYS = int(os.getenv("METRICS_ROLLUP_RETENTION_DAYS", "30"))
+# Merged windows are cached this long per instance to bound store reads
+METRICS_MERGE_TTL_SECONDS = float(os.getenv("METRICS_MERGE_TTL_SECONDS", "30"))
+
+# Bucket size (seconds) per resolution; minute and hour buckets are kept two
+# days, day buckets for the retention period
+RESOLUTIONS = {"minute": 60, "hour": 3600, "day": 86400}
+SHORT_RETENTION_SECONDS = 2 * 86400
+
+# Window -> (resolution, length in seconds; None for all retained buckets)
+WINDOWS = {
+    "1m": ("minute", 60),
+    "1h": ("minute", 3600),
+    "1d": ("hour", 86400),
+    "total": ("day", None),
+}
+
+# Unique per process: a restarted instance starts new buckets instead of
+# overwriting the previous process's
+INSTANCE_ID = f"{os.getenv('K_REVISION', 'local')}-{uuid.uuid4().hex[:8]}"
+
+
+def _empty() -> Dict:
+    return {"counters": {}, "histograms": {}}
+
+
+def _add(into: Dict, delta: Dict) -> None:
+    """Add the counters and histograms of ``delta`` to ``into``."""
+    counters = into["counters"]
+    for name, value in delta["counters"].items():
+        counters[name] = counters.get(name, 0) + value
+
+    histograms = into["histograms"]
+    for key, histogram in delta["histograms"].items():
+        current = histograms.get(key)
+        if current is None:
+            histograms[key] = {
+                "buckets": list(histogram["buckets"]),
+                "counts": list(histogram["counts"]),
+                "sum": histogram["sum"],
+                "count": histogram["count"],
+            }
+        elif current["buckets"] != list(histogram["buckets"]):
+            # LATENCY_BUCKETS/STAGE_BUCKETS differ between instances
+            logger.warning(f"Skipping histogram {key} with different bucket bounds")
+        else:
+            current["counts"] = [a + b for a, b in zip(current["counts"], histogram["counts"])]
+            current["sum"] += histogram["sum"]
+            current["count"] += histogram["count"]
+
+
+def _delta(current: Dict, previous: Dict) -> Dict:
+    """What changed between two collector snapshots (zero entries dropped)."""
+    counters = {}
+    for name, value in current["counters"].items():
+        change = value - previous["counters"].get(name, 0)
+        if change:
+            counters[name] = change
+
+    histograms = {}
+    for key, histogram in current["histograms"].items():
+        before = previous["histograms"].get(key)
+        if before is None:
+            change = dict(histogram)
+        else:
+            change = {
+                "buckets": histogram["buckets"],
+                "counts": [a - b for a, b in zip(histogram["counts"], before["counts"])],
+                "sum": histogram["sum"] - before["sum"],
+                "count": histogram["count"] - before["count"],
+            }
+        if change["count"]:
+            histograms[key] = change
+    return {"counters": counters, "histograms": histograms}
+
+
+def _expire_at(resolution: str, bucket_start: int) -> float:
+    if resolution == "day":
+        return bucket_start + METRICS_ROLLUP_RETENTION_DAYS * 86400
+    return bucket_start + SHORT_RETENTION_SECONDS
+
+
+# =============================================================================
+# Stores
+# =============================================================================
+
+class RollupStore(abc.ABC):
+    """Where instances write their buckets and the merger reads them."""
+
+    @abc.abstractmethod
+    def write(self, instance: str, resolution: str, bucket_start: int, data: Dict) -> None:
+        """Replace this instance's bucket with ``data`` (counters, histograms)."""
+
+    @abc.abstractmethod
+    def read(self, resolution: str, since: Optional[int]) -> List[Dict]:
+        """Buckets of all instances starting after ``since`` (None: all)."""
+
+
+class FirestoreRollupStore(RollupStore):
+    """Buckets as documents "<resolution>_<bucket_start>_<instance>"."""
+
+    def __init__(self, collection: str = METRICS_ROLLUP_COLLECTION):
+        self.collection = collection
+
+    def _collection(self):
+        from ..auth.firebase import get_firestore_client
+        return get_firestore_client().collection(self.collection)
+
+    def write(self, instance: str, resolution: str, bucket_start: int, data: Dict) -> None:
+        self._collection().document(f"{resolution}_{bucket_start}_{instance}").set({
+            "instance": instance,
+            "resolution": resolution,
+            "bucket_start": bucket_start,
+            "counters": data["counters"],
+            "histograms": data["histograms"],
+            "updated_at": datetime.now(timezone.utc),
+            "expire_at": datetime.fromtimestamp(_expire_at(resolution, bucket_start), tz=timezone.utc),
+        })
+
+    def read(self, resolution: str, since: Optional[int]) -> List[Dict]:
+        query = self._collection().where("resolution", "==", resolution)
+        if since is not None:
+            query = query.where("bucket_start", ">", since)
+        return [doc.to_dict() for doc in query.stream()]
+
+
+class FileRollupStore(RollupStore):
+    """One JSON file per instance, replaced atomically on every write."""
+
+    def __init__(self, directory: str = METRICS_ROLLUP_DIR):
+        self.directory = directory
+        self._buckets: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, instance: str) -> str:
+        return os.path.join(self.directory, f"{instance}.json")
+
+    def write(self, instance: str, resolution: str, bucket_start: int, data: Dict) -> None:
+        now = time.time()
+        with self._lock:
+            self._buckets[f"{resolution}_{bucket_start}"] = {
+                "instance": instance,
+                "resolution": resolution,
+                "bucket_start": bucket_start,
+                "counters": data["counters"],
+                "histograms": data["histograms"],
+            }
+            for key in [k for k, b in self._buckets.items() if _expire_at(b["resolution"], b["bucket_start"]) < now]:
+                del self._buckets[key]
+
+            os.makedirs(self.directory, exist_ok=True)
+            path = self._path(instance)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(list(self._buckets.values()), f)
+            os.replace(tmp_path, path)
+
+    def read(self, resolution: str, since: Optional[int]) -> List[Dict]:
+        if not os.path.isdir(self.directory):
+            return []
+        cutoff = time.time() - METRICS_ROLLUP_RETENTION_DAYS * 86400
+        buckets = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                # Files of instances gone longer than the retention period
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    continue
+                with open(path) as f:
+                    stored = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping metrics rollup file {path}: {e}")
+                continue
+            buckets.extend(
+                b for b in stored
+                if b["resolution"] == resolution and (since is None or b["bucket_start"] > since)
+            )
+        return buckets
+
+
+def create_store(backend: str = METRICS_ROLLUP_BACKEND) -> Optional[RollupStore]:
+    if backend == "firestore":
+        return FirestoreRollupStore()
+    if backend == "file":
+        return FileRollupStore()
+    if backend != "none":
+        logger.warning(f"Unknown METRICS_ROLLUP_BACKEND={backend!r}, metrics rollups disabled")
+    return None
+
+
+# =============================================================================
+# Flusher
+# =============================================================================
+
+class RollupFlusher:
+    """Background thread adding collector deltas to this instance's buckets."""
+
+    def __init__(
+        self,
+        store: Optional[RollupStore],
+        collector: MetricsCollector = metrics,
+        flush_seconds: float = METRICS_FLUSH_SECONDS,
+        instance: str = INSTANCE_ID,
+    ):
+        self.store = store
+        self.collector = collector
+        self.flush_seconds = flush_seconds
+        self.instance = instance
+        self._previous = _empty()
+        # (resolution, bucket_start) -> aggregate; kept until written and over
+        self._buckets: Dict[Tuple[str, int], Dict] = {}
+        self._dirty: set = set()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._flushes = 0
+        self._flush_errors = 0
+        self._last_flush_at: Optional[float] = None
+
+    def start(self) -> None:
+        if self.store is None or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="metrics-rollup", daemon=True)
+        self._thread.start()
+        logger.info(f"Metrics rollups every {self.flush_seconds}s as instance {self.instance}")
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_seconds):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Metrics rollup flush failed: {e}")
+
+    def flush(self) -> int:
+        """Write changed buckets to the store. Returns buckets written."""
+        if self.store is None:
+            return 0
+        with self._flush_lock:
+            now = time.time()
+            current = self.collector.snapshot()
+            delta = _delta(current, self._previous)
+            self._previous = current
+            if delta["counters"] or delta["histograms"]:
+                for resolution, size in RESOLUTIONS.items():
+                    key = (resolution, int(now // size * size))
+                    _add(self._buckets.setdefault(key, _empty()), delta)
+                    self._dirty.add(key)
+
+            written = 0
+            for key in sorted(self._dirty):
+                resolution, bucket_start = key
+                try:
+                    self.store.write(self.instance, resolution, bucket_start, self._buckets[key])
+                except Exception as e:
+                    # Stays dirty; the next flush writes the whole bucket again
+                    logger.warning(f"Failed to write {resolution} metrics bucket {bucket_start}: {e}")
+                    self._flush_errors += 1
+                    continue
+                self._dirty.discard(key)
+                written += 1
+
+            # Buckets that are over and written are never touched again
+            for key in [k for k in self._buckets if k not in self._dirty and k[1] + RESOLUTIONS[k[0]] <= now]:
+                del self._buckets[key]
+
+            self._flushes += 1
+            self._last_flush_at = now
+            return written
+
+    def stop(self) -> None:
+        """Stop the flusher and write the last delta."""
+        self._stop.set()
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Final metrics rollup flush failed: {e}")
+
+    def stats(self) -> Dict:
+        return {
+            "backend": METRICS_ROLLUP_BACKEND if self.store is not None else "none",
+            "instance": self.instance,
+            "flushes": self._flushes,
+            "flush_errors": self._flush_errors,
+            "unwritten_buckets": len(self._dirty),
+            "last_flush_at": (
+                datetime.fromtimestamp(self._last_flush_at, tz=timezone.utc).isoformat()
+                if self._last_flush_at else None
+            ),
+        }
+
+
+# Process-wide flusher, started by the app lifespan
+rollup_flusher = RollupFlusher(create_store())
+
+
+# =============================================================================
+# Merger
+# =============================================================================
+
+def _histogram_summary(histogram: Dict, scale: float, unit: str, digits: int) -> Dict:
+    cumulative = []
+    running = 0
+    for n in histogram["counts"]:
+        running += n
+        cumulative.append(running)
+    snap = {"buckets": histogram["buckets"], "cumulative": cumulative, "sum": histogram["sum"], "count": histogram["count"]}
+    estimator = LatencyHistogram(histogram["buckets"])
+
+    def value(pct):
+        return round(estimator.percentile(pct, snap) * scale, digits)
+
+    return {
+        "count": histogram["count"],
+        f"avg_{unit}": round(histogram["sum"] / histogram["count"] * scale, digits),
+        f"p50_{unit}": value(50),
+        f"p95_{unit}": value(95),
+        f"p99_{unit}": value(99),
+    }
+
+
+def merge_buckets(buckets: List[Dict]) -> Dict:
+    """Sum buckets into counters, request latency and job stage summaries."""
+    merged = _empty()
+    for bucket in buckets:
+        _add(merged, bucket)
+
+    latency: Dict = {}
+    job_stages: Dict = {}
+    for key, histogram in sorted(merged["histograms"].items()):
+        if not histogram["count"]:
+            continue
+        kind, _, labels = key.partition("|")
+        if kind == "latency":
+            method, route, status_class = labels.split("|")
+            latency.setdefault(f"{method} {route}", {})[status_class] = _histogram_summary(histogram, 1000, "ms", 2)
+        elif kind == "job_stage":
+            job_stages[labels] = _histogram_summary(histogram, 1, "seconds", 3)
+
+    counters = merged["counters"]
+    total_requests = counters.get("requests.total", 0)
+    error_requests = counters.get("requests.errors", 0)
+    return {
+        "instances": len({bucket["instance"] for bucket in buckets}),
+        "requests": {
+            "total": total_requests,
+            "errors": error_requests,
+            "error_rate_percent": round(error_requests / total_requests * 100, 2) if total_requests else 0,
+        },
+        "counters": dict(sorted(counters.items())),
+        "latency": latency,
+        "job_stages": job_stages,
+    }
+
+
+# (store, window) -> (computed at, merged result)
+_merged_cache: Dict[Tuple[Optional[RollupStore], str], Tuple[float, Dict]] = {}
+_merged_lock = threading.Lock()
+
+
+def cluster_metrics(window: str, store: Optional[RollupStore] = None) -> Dict:
+    """Metrics of all instances over ``window`` (a key of WINDOWS).
+
+    Blocking (reads the store); cached per store for
+    METRICS_MERGE_TTL_SECONDS.
+    """
+    resolution, length = WINDOWS[window]
+    store = store or rollup_flusher.store
+    key = (store, window)
+    now = time.time()
+    with _merged_lock:
+        cached = _merged_cache.get(key)
+        if cached is not None and now - cached[0] < METRICS_MERGE_TTL_SECONDS:
+            return cached[1]
+
+    if store is None:
+        buckets = []
+    else:
+        # Buckets ending after the window start overlap it
+        since = int(now - length - RESOLUTIONS[resolution]) if length else None
+        buckets = store.read(resolution, since)
+
+    result = {
+        "window": window,
+        "resolution": resolution,
+        "since": (
+            datetime.fromtimestamp(min(b["bucket_start"] for b in buckets), tz=timezone.utc).isoformat()
+            if buckets else None
+        ),
+        **merge_buckets(buckets),
+        "computed_at": datetime.now(timezone.utc).isoformat(),
+    }
+    with _merged_lock:
+        _merged_cache[key] = (now, result)
+    return result
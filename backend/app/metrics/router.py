@@ -1,12 +1,25 @@
 """Metrics endpoint router."""
+import asyncio
 import os
 from datetime import datetime, timezone
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import PlainTextResponse
 
 from .collector import metrics
+from .error_rates import error_rates
+from .firestore import firestore_ops
+from .rollup import WINDOWS, cluster_metrics, rollup_flusher
+from ..internal.staging import staging
+from ..jobs.services.gcs import signer
+from ..public.lookup import public_video_cache
+from ..public.views import view_buffer
+from ..repository import read_cache_stats
 
 router = APIRouter(prefix="/metrics", tags=["Metrics"])
 
+# Prometheus text exposition format
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4"
+
 
 def verify_metrics_access(api_key: str = None):
     """Simple API key verification for metrics access."""
@@ -32,15 +45,52 @@ async def get_metrics():
     Returns aggregated metrics including:
     - Uptime
     - Request counts and error rates
+    - Request latency percentiles per route and status class
+    - Sliding-window 5xx rates per route and job failure rates per type
     - Job success/failure rates
+    - Job stage duration percentiles (queue, wavespeed, upload...) of jobs
+      completed on this instance
     - Errors grouped by type
+    - Temp staging usage (current/peak bytes) of this instance
+    - URL signing latency and cache hit rate of this instance
+    - Share link lookup cache and buffered view counts of this instance
+    - Document reads and reads saved by the request cache, per endpoint
+    - Firestore reads/writes/queries/transaction retries per endpoint and
+      latency per call site
     """
     return {
         "summary": metrics.get_summary(),
+        "latency": metrics.get_latency_summary(),
+        "error_rates": error_rates.rates(),
+        "job_stages": metrics.get_job_stage_summary(),
+        "staging": staging.stats(),
+        "signing": signer.stats(),
+        "public_videos": {
+            "cache": public_video_cache.stats(),
+            "views": view_buffer.stats(),
+        },
+        "document_reads": read_cache_stats.stats(),
+        "firestore": firestore_ops.stats(),
+        "rollup": rollup_flusher.stats(),
         "timestamp": datetime.now(timezone.utc).isoformat()
     }
 
 
+@router.get("/cluster")
+async def get_cluster_metrics(window: str = Query("1h", description="1m, 1h, 1d or total")):
+    """
+    Get metrics of all instances over a time window.
+
+    Merges the buckets every instance flushes to the rollup store (see
+    metrics/rollup.py), so counts survive scale-down and cover the whole
+    service rather than the instance serving this request. Lags by up to
+    METRICS_FLUSH_SECONDS.
+    """
+    if window not in WINDOWS:
+        raise HTTPException(status_code=400, detail=f"window must be one of {', '.join(WINDOWS)}")
+    return await asyncio.to_thread(cluster_metrics, window)
+
+
 @router.get("/all")
 async def get_all_metrics():
     """
@@ -55,7 +105,7 @@ async def get_all_metrics():
     }
 
 
-@router.get("/prometheus")
+@router.get("/prometheus", response_class=PlainTextResponse)
 async def get_prometheus_metrics():
     """
     Get metrics in Prometheus format.
@@ -90,4 +140,94 @@ async def get_prometheus_metrics():
         safe_name = error_type.replace(".", "_").replace("-", "_")
         lines.append(f'nuumee_errors_total{{type="{safe_name}"}} {count}')
 
-    return "\n".join(lines) + "\n"
+    # Request latency histograms by route template and status class
+    lines.append("# HELP nuumee_request_duration_seconds API request duration")
+    lines.append("# TYPE nuumee_request_duration_seconds histogram")
+    for histogram in metrics.get_latency_histograms():
+        labels = f'method="{histogram["method"]}",route="{histogram["route"]}",status_class="{histogram["status_class"]}"'
+        bounds = [str(b) for b in histogram["buckets"]] + ["+Inf"]
+        for bound, cumulative in zip(bounds, histogram["cumulative"]):
+            lines.append(f'nuumee_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f"nuumee_request_duration_seconds_sum{{{labels}}} {histogram['sum']}")
+        lines.append(f"nuumee_request_duration_seconds_count{{{labels}}} {histogram['count']}")
+
+    # Job stage durations (recorded when a job completes or fails)
+    lines.append("# HELP nuumee_job_stage_seconds Duration of each job stage")
+    lines.append("# TYPE nuumee_job_stage_seconds histogram")
+    for histogram in metrics.get_job_stage_histograms():
+        labels = f'stage="{histogram["stage"]}"'
+        bounds = [str(b) for b in histogram["buckets"]] + ["+Inf"]
+        for bound, cumulative in zip(bounds, histogram["cumulative"]):
+            lines.append(f'nuumee_job_stage_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f"nuumee_job_stage_seconds_sum{{{labels}}} {histogram['sum']}")
+        lines.append(f"nuumee_job_stage_seconds_count{{{labels}}} {histogram['count']}")
+
+    # Temp staging (memory-backed /tmp) usage
+    staging_stats = staging.stats()
+    lines.append("# HELP nuumee_staging_bytes Bytes of temp staging currently charged to jobs")
+    lines.append("# TYPE nuumee_staging_bytes gauge")
+    lines.append(f"nuumee_staging_bytes {staging_stats['current_bytes']}")
+
+    lines.append("# HELP nuumee_staging_peak_bytes Peak temp staging bytes since startup")
+    lines.append("# TYPE nuumee_staging_peak_bytes gauge")
+    lines.append(f"nuumee_staging_peak_bytes {staging_stats['peak_bytes']}")
+
+    lines.append("# HELP nuumee_staging_budget_bytes Temp staging budget of this instance")
+    lines.append("# TYPE nuumee_staging_budget_bytes gauge")
+    lines.append(f"nuumee_staging_budget_bytes {staging_stats['budget_bytes']}")
+
+    lines.append("# HELP nuumee_staging_rejected_total Jobs deferred because the staging budget was full")
+    lines.append("# TYPE nuumee_staging_rejected_total counter")
+    lines.append(f"nuumee_staging_rejected_total {staging_stats['rejected_total']}")
+
+    # Signed URL generation
+    signing_stats = signer.stats()
+    lines.append("# HELP nuumee_signed_urls_total Signed URLs generated (signBlob round trips)")
+    lines.append("# TYPE nuumee_signed_urls_total counter")
+    lines.append(f"nuumee_signed_urls_total {signing_stats['signed_total']}")
+
+    lines.append("# HELP nuumee_signed_url_errors_total Signed URL generation failures")
+    lines.append("# TYPE nuumee_signed_url_errors_total counter")
+    lines.append(f"nuumee_signed_url_errors_total {signing_stats['sign_errors']}")
+
+    lines.append("# HELP nuumee_signed_url_cache_hits_total Download URLs served from the signed URL cache")
+    lines.append("# TYPE nuumee_signed_url_cache_hits_total counter")
+    lines.append(f"nuumee_signed_url_cache_hits_total {signing_stats['cache_hits']}")
+
+    lines.append("# HELP nuumee_signed_url_cache_misses_total Download URL lookups that had to sign")
+    lines.append("# TYPE nuumee_signed_url_cache_misses_total counter")
+    lines.append(f"nuumee_signed_url_cache_misses_total {signing_stats['cache_misses']}")
+
+    lines.append("# HELP nuumee_signing_seconds Time spent signing URLs")
+    lines.append("# TYPE nuumee_signing_seconds summary")
+    lines.append(f"nuumee_signing_seconds_sum {signing_stats['sign_seconds_total']}")
+    lines.append(f"nuumee_signing_seconds_count {signing_stats['signed_total']}")
+
+    # Request-scoped document read cache
+    read_stats = read_cache_stats.stats()
+    lines.append("# HELP nuumee_document_reads_total Repository document reads, by endpoint")
+    lines.append("# TYPE nuumee_document_reads_total counter")
+    for endpoint, entry in read_stats.items():
+        lines.append(f'nuumee_document_reads_total{{endpoint="{endpoint}"}} {entry["reads"]}')
+
+    lines.append("# HELP nuumee_document_reads_saved_total Repository reads served by the request cache, by endpoint")
+    lines.append("# TYPE nuumee_document_reads_saved_total counter")
+    for endpoint, entry in read_stats.items():
+        lines.append(f'nuumee_document_reads_saved_total{{endpoint="{endpoint}"}} {entry["reads_saved"]}')
+
+    # Firestore operations by endpoint, latency by call site
+    firestore_stats = firestore_ops.stats()
+    for kind in ("reads", "writes", "queries", "transaction_retries"):
+        lines.append(f"# HELP nuumee_firestore_{kind}_total Firestore {kind.replace('_', ' ')}, by endpoint or job")
+        lines.append(f"# TYPE nuumee_firestore_{kind}_total counter")
+        for scope, entry in firestore_stats["scopes"].items():
+            lines.append(f'nuumee_firestore_{kind}_total{{scope="{scope}"}} {entry[kind]}')
+
+    lines.append("# HELP nuumee_firestore_call_seconds Firestore call latency by call site and operation")
+    lines.append("# TYPE nuumee_firestore_call_seconds summary")
+    for site in firestore_stats["call_sites"]:
+        labels = f'site="{site["site"]}",op="{site["op"]}"'
+        lines.append(f"nuumee_firestore_call_seconds_sum{{{labels}}} {site['seconds_total']}")
+        lines.append(f"nuumee_firestore_call_seconds_count{{{labels}}} {site['calls']}")
+
+    return PlainTextResponse("\n".join(lines) + "\n", media_type=PROMETHEUS_CONTENT_TYPE)
@@ -5,7 +5,9 @@ from .alerts import (
     alert_job_failed,
     alert_health_check_failed,
     alert_high_error_rate,
+    alert_high_job_failure_rate,
     alert_critical_dependency_missing,
+    flush_alerts,
 )
 
 __all__ = [
@@ -15,5 +17,7 @@ __all__ = [
     "alert_job_failed",
     "alert_health_check_failed",
     "alert_high_error_rate",
+    "alert_high_job_failure_rate",
     "alert_critical_dependency_missing",
+    "flush_alerts",
 ]
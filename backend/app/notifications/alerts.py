@@ -1,10 +1,11 @@
-"""System alerting module with rate limiting."""
+"""System alerting module with rate limiting and digests."""
 import os
 import logging
+import threading
 from datetime import datetime, timezone, timedelta
 from typing import Optional
-from google.cloud import firestore
 
+from ..auth.firebase import get_firestore_client
 from ..email.utils import queue_email
 
 logger = logging.getLogger(__name__)
@@ -19,6 +20,11 @@ ALERT_COOLDOWN = timedelta(hours=1)
 ALERT_EMAIL = os.getenv("ALERT_EMAIL", "mjochinsen@gmail.com")
 ENVIRONMENT = os.getenv("ENVIRONMENT", "production")
 
+# At most one alert email per window; alerts in between are sent as a digest
+ALERT_DIGEST_WINDOW = timedelta(seconds=int(os.getenv("ALERT_DIGEST_SECONDS", "900")))
+
+SEVERITY_ORDER = {"info": 0, "warning": 1, "error": 2, "critical": 3}
+
 
 def should_send_alert(alert_type: str) -> bool:
     """Check if we should send an alert (rate limiting)."""
@@ -44,6 +50,137 @@ def record_alert_sent(alert_type: str):
     _last_alerts[alert_type] = datetime.now(timezone.utc)
 
 
+def _render_alert(alert: dict) -> str:
+    """HTML section of one alert."""
+    # Color coding for severity
+    severity_colors = {
+        "info": "#3B82F6",      # Blue
+        "warning": "#F59E0B",   # Amber
+        "error": "#EF4444",     # Red
+        "critical": "#DC2626",  # Dark red
+    }
+    color = severity_colors.get(alert["severity"], "#6B7280")
+
+    # Build details HTML
+    details_html = ""
+    if alert["details"]:
+        details_html = "<h3>Details:</h3><ul>"
+        for key, value in alert["details"].items():
+            details_html += f"<li><strong>{key}:</strong> {value}</li>"
+        details_html += "</ul>"
+
+    return f"""
+            <div style="background: {color}; color: white; padding: 16px; border-radius: 8px 8px 0 0; margin-top: 16px;">
+                <h1 style="margin: 0; font-size: 20px;">🚨 System Alert: {alert["title"]}</h1>
+            </div>
+            <div style="background: #f8f9fa; padding: 24px; border-radius: 0 0 8px 8px; border: 1px solid #e0e0e0; border-top: none;">
+                <p style="margin-top: 0;"><strong>Severity:</strong> {alert["severity"].upper()}</p>
+                <p><strong>Environment:</strong> {ENVIRONMENT}</p>
+                <p><strong>Time:</strong> {alert["created_at"].strftime('%Y-%m-%d %H:%M:%S UTC')}</p>
+                <hr style="border: none; border-top: 1px solid #e0e0e0; margin: 16px 0;">
+                <p><strong>Message:</strong></p>
+                <p style="background: white; padding: 12px; border-radius: 4px; border: 1px solid #e0e0e0;">{alert["message"]}</p>
+                {details_html}
+                <p style="color: #666; font-size: 12px;">Alert type: {alert["type"]}</p>
+            </div>
+        """
+
+
+def _deliver(alerts: list[dict]) -> bool:
+    """Email ``alerts`` (one email, a digest if several) and log them."""
+    try:
+        db = get_firestore_client()
+
+        # Subject carries the most severe alert
+        worst = max(alerts, key=lambda a: SEVERITY_ORDER.get(a["severity"], 0))
+        if len(alerts) == 1:
+            subject = f"[{ENVIRONMENT.upper()}] [{worst['severity'].upper()}] {worst['title']}"
+        else:
+            titles = ", ".join(dict.fromkeys(a["title"] for a in alerts))
+            subject = f"[{ENVIRONMENT.upper()}] [{worst['severity'].upper()}] {len(alerts)} alerts: {titles}"
+
+        sections = "".join(_render_alert(alert) for alert in alerts)
+        html = f"""
+        <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
+            {sections}
+            <p style="color: #666; font-size: 12px;">
+                This is an automated alert from NuuMee monitoring.
+                <br><a href="https://nuumee.ai/status">View Status Page</a>
+                | <a href="https://api.nuumee.ai/api/v1/status/deep">Deep Health Check</a>
+            </p>
+        </div>
+        """
+
+        queue_email(db, ALERT_EMAIL, subject, html)
+
+        # Also log to Firestore for history
+        batch = db.batch()
+        for alert in alerts:
+            batch.set(db.collection("system_alerts").document(), {
+                **alert,
+                "environment": ENVIRONMENT,
+            })
+        batch.commit()
+
+        logger.info(f"Alert email sent: {subject}")
+        return True
+
+    except Exception as e:
+        logger.exception(f"Failed to send alert: {e}")
+        # Let the next occurrence of these types try again
+        for alert in alerts:
+            _last_alerts.pop(alert["type"], None)
+        return False
+
+
+class AlertDigest:
+    """Batches alerts into at most one email per ALERT_DIGEST_WINDOW.
+
+    The first alert after a quiet window is emailed at once; alerts raised
+    during the window are held and emailed together when it ends. Critical
+    alerts are never held (pending ones go out with them).
+    """
+
+    def __init__(self, window: timedelta = ALERT_DIGEST_WINDOW):
+        self.window = window
+        self._pending: list[dict] = []
+        self._last_email: Optional[datetime] = None
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+
+    def add(self, alert: dict, immediate: bool = False) -> bool:
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            self._pending.append(alert)
+            if not (immediate or self._last_email is None or now - self._last_email >= self.window):
+                if self._timer is None:
+                    delay = (self._last_email + self.window - now).total_seconds()
+                    self._timer = threading.Timer(delay, self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+                logger.info(f"Alert {alert['type']} held for the next digest")
+                return True
+            alerts, self._pending = self._pending, []
+            self._last_email = now
+        return _deliver(alerts)
+
+    def flush(self) -> bool:
+        """Email held alerts now (timer, shutdown)."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending:
+                return False
+            alerts, self._pending = self._pending, []
+            self._last_email = datetime.now(timezone.utc)
+        return _deliver(alerts)
+
+
+# Process-wide digest
+alert_digest = AlertDigest()
+
+
 def send_alert(
     alert_type: str,
     title: str,
@@ -55,86 +192,40 @@ def send_alert(
     """
     Send an alert email to admin(s).
 
+    Alerts of different types raised close together are combined into one
+    digest email (see AlertDigest).
+
     Args:
         alert_type: Unique identifier for this alert type (for rate limiting)
         title: Alert title (will be in email subject)
         message: Alert message body
         severity: "info", "warning", "error", "critical"
         details: Optional dictionary of additional details
-        skip_rate_limit: If True, always send (use sparingly)
+        skip_rate_limit: If True, always send at once (use sparingly)
+
+    Returns:
+        False if rate limited or sending failed
     """
     # Rate limiting check
     if not skip_rate_limit and not should_send_alert(alert_type):
         logger.info(f"Alert {alert_type} skipped (rate limited)")
         return False
+    record_alert_sent(alert_type)
 
-    try:
-        db = firestore.Client()
-        now = datetime.now(timezone.utc)
+    alert = {
+        "type": alert_type,
+        "title": title,
+        "message": message,
+        "severity": severity,
+        "details": details,
+        "created_at": datetime.now(timezone.utc),
+    }
+    return alert_digest.add(alert, immediate=skip_rate_limit or severity == "critical")
 
-        # Color coding for severity
-        severity_colors = {
-            "info": "#3B82F6",      # Blue
-            "warning": "#F59E0B",   # Amber
-            "error": "#EF4444",     # Red
-            "critical": "#DC2626",  # Dark red
-        }
-        color = severity_colors.get(severity, "#6B7280")
-
-        # Build details HTML
-        details_html = ""
-        if details:
-            details_html = "<h3>Details:</h3><ul>"
-            for key, value in details.items():
-                details_html += f"<li><strong>{key}:</strong> {value}</li>"
-            details_html += "</ul>"
-
-        # Build email
-        subject = f"[{ENVIRONMENT.upper()}] [{severity.upper()}] {title}"
-        html = f"""
-        <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
-            <div style="background: {color}; color: white; padding: 16px; border-radius: 8px 8px 0 0;">
-                <h1 style="margin: 0; font-size: 20px;">🚨 System Alert: {title}</h1>
-            </div>
-            <div style="background: #f8f9fa; padding: 24px; border-radius: 0 0 8px 8px; border: 1px solid #e0e0e0; border-top: none;">
-                <p style="margin-top: 0;"><strong>Severity:</strong> {severity.upper()}</p>
-                <p><strong>Environment:</strong> {ENVIRONMENT}</p>
-                <p><strong>Time:</strong> {now.strftime('%Y-%m-%d %H:%M:%S UTC')}</p>
-                <hr style="border: none; border-top: 1px solid #e0e0e0; margin: 16px 0;">
-                <p><strong>Message:</strong></p>
-                <p style="background: white; padding: 12px; border-radius: 4px; border: 1px solid #e0e0e0;">{message}</p>
-                {details_html}
-                <hr style="border: none; border-top: 1px solid #e0e0e0; margin: 16px 0;">
-                <p style="color: #666; font-size: 12px;">
-                    This is an automated alert from NuuMee monitoring.
-                    <br>Alert type: {alert_type}
-                    <br><a href="https://nuumee.ai/status">View Status Page</a>
-                    | <a href="https://api.nuumee.ai/api/v1/status/deep">Deep Health Check</a>
-                </p>
-            </div>
-        </div>
-        """
 
-        queue_email(db, ALERT_EMAIL, subject, html)
-        record_alert_sent(alert_type)
-
-        # Also log to Firestore for history
-        db.collection("system_alerts").add({
-            "type": alert_type,
-            "title": title,
-            "message": message,
-            "severity": severity,
-            "details": details,
-            "environment": ENVIRONMENT,
-            "created_at": now,
-        })
-
-        logger.info(f"Alert sent: [{severity}] {title}")
-        return True
-
-    except Exception as e:
-        logger.exception(f"Failed to send alert: {e}")
-        return False
+def flush_alerts() -> bool:
+    """Email alerts held for the digest (call on shutdown)."""
+    return alert_digest.flush()
 
 
 # Convenience functions for common alerts
@@ -168,17 +259,49 @@ def alert_health_check_failed(check_name: str, error: str):
     )
 
 
-def alert_high_error_rate(error_rate: float, threshold: float = 5.0):
-    """Alert when error rate exceeds threshold."""
+def alert_high_error_rate(
+    error_rate: float,
+    threshold: float = 5.0,
+    route: Optional[str] = None,
+    window_seconds: Optional[float] = None,
+):
+    """Alert when error rate exceeds threshold (of one route if given)."""
+    scope = "API" if route in (None, "all") else route
+    details = {
+        "error_rate": f"{error_rate:.2f}%",
+        "threshold": f"{threshold}%",
+    }
+    if window_seconds:
+        details["window"] = f"last {window_seconds / 60:g} min"
     send_alert(
-        alert_type="high_error_rate",
+        alert_type="high_error_rate" if route in (None, "all") else f"high_error_rate_{route}",
         title="High Error Rate Detected",
-        message=f"API error rate is {error_rate:.1f}%, exceeding threshold of {threshold}%",
+        message=f"{scope} error rate is {error_rate:.1f}%, exceeding threshold of {threshold}%",
         severity="warning",
-        details={
-            "error_rate": f"{error_rate:.2f}%",
-            "threshold": f"{threshold}%",
-        }
+        details=details,
+    )
+
+
+def alert_high_job_failure_rate(
+    failure_type: str,
+    failure_rate: float,
+    threshold: float,
+    window_seconds: Optional[float] = None,
+):
+    """Alert when one job failure type exceeds its share of finished jobs."""
+    details = {
+        "failure_type": failure_type,
+        "failure_rate": f"{failure_rate:.2f}%",
+        "threshold": f"{threshold}%",
+    }
+    if window_seconds:
+        details["window"] = f"last {window_seconds / 60:g} min"
+    send_alert(
+        alert_type=f"high_job_failure_rate_{failure_type}",
+        title="High Job Failure Rate",
+        message=f"{failure_rate:.1f}% of jobs failed with {failure_type}, exceeding threshold of {threshold}%",
+        severity="error",
+        details=details,
     )
 
 
@@ -1,18 +1,42 @@
 """Promo code redemption service with Firestore transactions."""
 import logging
+import os
 from datetime import datetime, timezone
-from typing import Tuple
+from typing import Dict, Tuple
 
 from google.cloud import firestore
 
+from ..counters import ShardedCounter, aggregate_sum, increment_global_stats
+
 logger = logging.getLogger(__name__)
 
+PROMO_USE_SHARDS = int(os.getenv("PROMO_USE_SHARDS", "10"))
+
+# Redemptions per promo: promo_codes/{id}/current_uses_shards/{n}
+promo_uses = ShardedCounter("current_uses", PROMO_USE_SHARDS)
+
 
 class PromoRedemptionError(Exception):
     """Raised when promo redemption fails."""
     pass
 
 
+def promo_uses_total(promo_ref, promo_data: Dict) -> int:
+    """Redemptions of a promo: legacy current_uses plus the sharded counter."""
+    return int(promo_data.get("current_uses") or 0) + promo_uses.total(promo_ref)
+
+
+def aggregate_promo_uses(db) -> int:
+    """Redemptions across all promos, from sum() aggregations (legacy + shards)."""
+    legacy = aggregate_sum(db.collection("promo_codes"), "current_uses")
+    sharded = aggregate_sum(db.collection_group(promo_uses.shards_collection), "count")
+    return int(legacy) + int(sharded)
+
+
+class _ShardFull(Exception):
+    """The chosen use shard has no capacity left; try another shard."""
+
+
 def redeem_promo_code(db: firestore.Client, user_id: str, code: str) -> Tuple[int, int]:
     """
     Redeem a promo code for the authenticated user.
@@ -20,9 +44,15 @@ def redeem_promo_code(db: firestore.Client, user_id: str, code: str) -> Tuple[in
     Uses a Firestore transaction to ensure atomicity:
     1. Validate promo code exists and is valid
     2. Check user hasn't already redeemed
-    3. Update promo code (increment uses, add user to redeemed_by)
+    3. Count the use on one shard of the promo's use counter
     4. Update user credits
 
+    The promo document itself is only read, so concurrent redemptions of a
+    popular code don't contend on it. max_uses stays exact: the uses still
+    available are split into per-shard capacities, and each transaction
+    only increments a shard that is below its capacity. If the chosen shard
+    is full the next one is tried.
+
     Args:
         db: Firestore client
         user_id: Authenticated user's UID
@@ -47,9 +77,16 @@ def redeem_promo_code(db: firestore.Client, user_id: str, code: str) -> Tuple[in
         raise PromoRedemptionError("Invalid or expired promo code")
 
     promo_ref = promo_docs[0].reference
+    redemption_ref = promo_ref.collection("redemptions").document(user_id)
+
+    # Cheap early exit: the cached total can only undercount
+    max_uses = promo_docs[0].to_dict().get("max_uses")
+    if max_uses is not None and promo_uses_total(promo_ref, promo_docs[0].to_dict()) >= max_uses:
+        logger.warning(f"Promo code max uses reached: {code}")
+        raise PromoRedemptionError("Invalid or expired promo code")
 
     @firestore.transactional
-    def redeem_in_transaction(transaction: firestore.Transaction) -> Tuple[int, int]:
+    def redeem_in_transaction(transaction: firestore.Transaction, shard_index: int) -> Tuple[int, int]:
         # Get promo code document (re-read in transaction for consistency)
         promo_doc = promo_ref.get(transaction=transaction)
 
@@ -77,19 +114,23 @@ def redeem_promo_code(db: firestore.Client, user_id: str, code: str) -> Tuple[in
                 logger.warning(f"Promo code expired: {code}")
                 raise PromoRedemptionError("Invalid or expired promo code")
 
-        # Validate: uses remaining
-        max_uses = promo_data.get("max_uses")
-        current_uses = promo_data.get("current_uses", 0)
-        if max_uses is not None and current_uses >= max_uses:
-            logger.warning(f"Promo code max uses reached: {code}")
-            raise PromoRedemptionError("Invalid or expired promo code")
-
-        # Validate: user hasn't already redeemed
+        # Validate: user hasn't already redeemed (legacy array or marker doc)
         redeemed_by = promo_data.get("redeemed_by", [])
-        if user_id in redeemed_by:
+        redemption_doc = redemption_ref.get(transaction=transaction)
+        if user_id in redeemed_by or redemption_doc.exists:
             logger.warning(f"User {user_id} already redeemed: {code}")
             raise PromoRedemptionError("You have already redeemed this code")
 
+        # Validate: uses remaining on this shard. Uses counted before
+        # sharding (current_uses) come off the top of max_uses.
+        max_uses = promo_data.get("max_uses")
+        if max_uses is not None:
+            available = max_uses - int(promo_data.get("current_uses") or 0)
+            shard_doc = promo_uses.shard_ref(promo_ref, shard_index).get(transaction=transaction)
+            shard_count = int((shard_doc.to_dict() or {}).get("count", 0)) if shard_doc.exists else 0
+            if shard_count >= promo_uses.capacity(shard_index, available):
+                raise _ShardFull()
+
         # Get credits to add
         credits_to_add = promo_data.get("credits", 0)
         if credits_to_add <= 0:
@@ -108,10 +149,11 @@ def redeem_promo_code(db: firestore.Client, user_id: str, code: str) -> Tuple[in
         current_credits = user_data.get("credits_balance", 0)
         new_balance = current_credits + credits_to_add
 
-        # Update promo code: increment uses and add user to redeemed_by
-        transaction.update(promo_ref, {
-            "current_uses": firestore.Increment(1),
-            "redeemed_by": firestore.ArrayUnion([user_id])
+        # Count the use on this shard and mark the user as redeemed
+        promo_uses.increment(promo_ref, 1, transaction=transaction, index=shard_index)
+        transaction.set(redemption_ref, {
+            "user_id": user_id,
+            "redeemed_at": firestore.SERVER_TIMESTAMP,
         })
 
         # Update user credits_balance (consistent with rest of codebase)
@@ -122,6 +164,15 @@ def redeem_promo_code(db: firestore.Client, user_id: str, code: str) -> Tuple[in
         logger.info(f"User {user_id} redeemed {code} for {credits_to_add} credits")
         return credits_to_add, new_balance
 
-    # Execute transaction
-    transaction = db.transaction()
-    return redeem_in_transaction(transaction)
+    # Execute transaction, moving on to another shard when one is full
+    for shard_index in promo_uses.shard_order():
+        try:
+            result = redeem_in_transaction(db.transaction(), shard_index)
+        except _ShardFull:
+            continue
+        promo_uses.invalidate(promo_ref)
+        increment_global_stats(db, promo_redemptions_total=1)
+        return result
+
+    logger.warning(f"Promo code max uses reached: {code}")
+    raise PromoRedemptionError("Invalid or expired promo code")
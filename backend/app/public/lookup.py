@@ -0,0 +1,113 @@
+"""In-process cache of short_id -> public video lookups.
+
+Share links resolve through a where("short_id", "==", ...) query. Completed
+videos are cached for PUBLIC_VIDEO_CACHE_SECONDS; videos still processing
+and unknown short_ids only briefly, so a job that just completed (or a
+short_id that was just created) shows up quickly. Deleting a job
+invalidates its entry on this instance; other instances drop it when the
+entry expires.
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Tuple
+
+from ..jobs.services import to_datetime
+from .views import total_view_count
+
+logger = logging.getLogger(__name__)
+
+PUBLIC_VIDEO_CACHE_SECONDS = int(os.getenv("PUBLIC_VIDEO_CACHE_SECONDS", "300"))
+PUBLIC_VIDEO_PENDING_CACHE_SECONDS = int(os.getenv("PUBLIC_VIDEO_PENDING_CACHE_SECONDS", "10"))
+PUBLIC_VIDEO_CACHE_SIZE = int(os.getenv("PUBLIC_VIDEO_CACHE_SIZE", "10000"))
+
+PUBLIC_VIDEO_FIELDS = [
+    "status", "output_video_path", "resolution", "created_at",
+    "deleted_at", "view_count", "view_count_sharded",
+]
+
+
+@dataclass(frozen=True)
+class PublicVideo:
+    """What the share endpoints need from a job document."""
+    job_id: str
+    status: Optional[str]
+    output_path: Optional[str]
+    resolution: str
+    created_at: Optional[datetime]
+    view_count: int
+    deleted: bool
+
+
+class PublicVideoCache:
+    """LRU of short_id lookups with per-entry expiry."""
+
+    def __init__(self, max_size: int = PUBLIC_VIDEO_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[float, Optional[PublicVideo]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def lookup(self, db, short_id: str) -> Optional[PublicVideo]:
+        """Return the video for ``short_id`` (None if no job has it)."""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._entries.get(short_id)
+            if cached is not None and cached[0] > now:
+                self._entries.move_to_end(short_id)
+                self._hits += 1
+                return cached[1]
+            self._misses += 1
+
+        query = db.collection("jobs").where("short_id", "==", short_id).select(PUBLIC_VIDEO_FIELDS).limit(1)
+        docs = list(query.stream())
+
+        video = None
+        if docs:
+            data = docs[0].to_dict()
+            video = PublicVideo(
+                job_id=docs[0].id,
+                status=data.get("status"),
+                output_path=data.get("output_video_path"),
+                resolution=data.get("resolution", "480p"),
+                created_at=to_datetime(data.get("created_at")),
+                view_count=total_view_count(data),
+                deleted=bool(data.get("deleted_at")),
+            )
+
+        if video is not None and video.status == "completed":
+            ttl = PUBLIC_VIDEO_CACHE_SECONDS
+        else:
+            ttl = PUBLIC_VIDEO_PENDING_CACHE_SECONDS
+        with self._lock:
+            self._entries[short_id] = (now + ttl, video)
+            self._entries.move_to_end(short_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return video
+
+    def invalidate(self, short_id: Optional[str]) -> None:
+        """Forget ``short_id`` on this instance (e.g. after its job is deleted)."""
+        if not short_id:
+            return
+        with self._lock:
+            self._entries.pop(short_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate_percent": round(self._hits / lookups * 100, 2) if lookups else 0,
+            }
+
+
+# Process-wide cache
+public_video_cache = PublicVideoCache()
@@ -0,0 +1,143 @@
+"""Buffered view counting for public share links.
+
+Views are counted in memory and flushed every VIEW_FLUSH_SECONDS as one
+increment per job to a random shard of the job's view counter, so serving a
+share link never waits on a write and a viral video never serializes on its
+job document.
+
+The job document's view_count_sharded field is a rollup of the shards,
+refreshed at most every VIEW_ROLLUP_SECONDS per job and instance, so job
+lists can show totals without reading shards. Views recorded before sharding
+stay in view_count; total_view_count() adds both.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from ..auth.firebase import get_firestore_client
+from ..counters import ShardedCounter
+
+logger = logging.getLogger(__name__)
+
+VIEW_FLUSH_SECONDS = float(os.getenv("VIEW_FLUSH_SECONDS", "10"))
+VIEW_ROLLUP_SECONDS = float(os.getenv("VIEW_ROLLUP_SECONDS", "300"))
+VIEW_SHARDS = int(os.getenv("VIEW_SHARDS", "10"))
+
+view_counter = ShardedCounter("view_count", VIEW_SHARDS)
+
+
+def total_view_count(data: Dict) -> int:
+    """Views of a job document: legacy view_count plus the sharded rollup."""
+    return int(data.get("view_count") or 0) + int(data.get("view_count_sharded") or 0)
+
+
+class ViewBuffer:
+    """Per-instance buffer of view increments with a background flusher."""
+
+    def __init__(self, flush_seconds: float = VIEW_FLUSH_SECONDS, rollup_seconds: float = VIEW_ROLLUP_SECONDS):
+        self.flush_seconds = flush_seconds
+        self.rollup_seconds = rollup_seconds
+        self._pending: Dict[str, int] = {}
+        self._rolled_up_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._recorded_total = 0
+        self._flushed_total = 0
+        self._flush_errors = 0
+
+    def record(self, job_id: str, by: int = 1) -> None:
+        """Count a view. Never blocks on Firestore."""
+        with self._lock:
+            self._pending[job_id] = self._pending.get(job_id, 0) + by
+            self._recorded_total += by
+        self._ensure_started()
+
+    def pending(self, job_id: str) -> int:
+        """Views of ``job_id`` recorded here but not flushed yet."""
+        return self._pending.get(job_id, 0)
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="view-flusher", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_seconds):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"View flush failed: {e}")
+
+    def flush(self) -> int:
+        """Write buffered views to the shard counters. Returns views written."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+
+            db = get_firestore_client()
+            written = 0
+            for job_id, count in pending.items():
+                job_ref = db.collection("jobs").document(job_id)
+                try:
+                    view_counter.increment(job_ref, count)
+                except Exception as e:
+                    logger.warning(f"Failed to flush {count} views for job {job_id}: {e}")
+                    with self._lock:
+                        self._pending[job_id] = self._pending.get(job_id, 0) + count
+                        self._flush_errors += 1
+                    continue
+                written += count
+                self._maybe_rollup(job_ref, job_id)
+
+            with self._lock:
+                self._flushed_total += written
+            self._prune_rollups()
+            return written
+
+    def _maybe_rollup(self, job_ref, job_id: str) -> None:
+        now = time.monotonic()
+        last = self._rolled_up_at.get(job_id)
+        if last is not None and now - last < self.rollup_seconds:
+            return
+        self._rolled_up_at[job_id] = now
+        try:
+            job_ref.update({"view_count_sharded": view_counter.total(job_ref, use_cache=False)})
+        except Exception as e:
+            # Job deleted or transient error; the next rollup catches up
+            logger.warning(f"Failed to roll up views for job {job_id}: {e}")
+
+    def _prune_rollups(self) -> None:
+        cutoff = time.monotonic() - self.rollup_seconds
+        for job_id in [job_id for job_id, at in self._rolled_up_at.items() if at < cutoff]:
+            del self._rolled_up_at[job_id]
+
+    def stop(self) -> None:
+        """Stop the flusher and write whatever is still buffered."""
+        self._stop.set()
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Final view flush failed: {e}")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "recorded_total": self._recorded_total,
+                "flushed_total": self._flushed_total,
+                "flush_errors": self._flush_errors,
+                "pending_jobs": len(self._pending),
+                "pending_views": sum(self._pending.values()),
+            }
+
+
+# Process-wide buffer
+view_buffer = ViewBuffer()
@@ -14,6 +14,7 @@ from .models import (
     ReferralStats,
 )
 from ..auth.firebase import get_firestore_client, verify_id_token
+from ..auth.users import create_user
 from ..middleware.auth import get_current_user_id
 from ..notifications import send as notify
 from ..notifications.utils import build_welcome_referral_payload, build_referral_signup_payload
@@ -244,14 +245,8 @@ async def apply_referral_code(
             "updated_at": now,
             "last_login_at": now,
         }
-        user_ref.set(new_user_data)
-
-        # Also create the referral_codes collection document so the code can be used
-        db.collection("referral_codes").document(new_referral_code).set({
-            "code": new_referral_code,
-            "user_id": user_id,
-            "created_at": firestore.SERVER_TIMESTAMP,
-        })
+        # Also registers the referral code, counts and indexes the user
+        create_user(db, user_id, new_user_data)
 
         user_data = new_user_data
         logger.info(f"Created user document for {user_id} with 25 signup credits and referral code {new_referral_code}")
@@ -0,0 +1,31 @@
+"""Async Firestore repositories for async routes.
+
+Routes are async def, but the firebase_admin client is synchronous, so every
+document read used to block the event loop. Repositories wrap the native
+firestore.AsyncClient; routes are moved onto them incrementally.
+
+Reads inside read_scope() (opened per HTTP request in main.py) are memoized
+per document path, see cache.py.
+"""
+from .cache import ReadCache, current_read_cache, read_cache_stats, read_scope
+from .client import get_async_firestore_client
+from .errors import InsufficientCreditsError, UserNotFoundError
+from .users import UserRepository, get_user_repository
+from .jobs import JobRepository, get_job_repository
+from .credits import CreditRepository, get_credit_repository
+
+__all__ = [
+    "ReadCache",
+    "current_read_cache",
+    "read_cache_stats",
+    "read_scope",
+    "get_async_firestore_client",
+    "InsufficientCreditsError",
+    "UserNotFoundError",
+    "UserRepository",
+    "get_user_repository",
+    "JobRepository",
+    "get_job_repository",
+    "CreditRepository",
+    "get_credit_repository",
+]
@@ -0,0 +1,118 @@
+"""Request-scoped read-through cache of document reads.
+
+A request often reads the same document more than once (the user for the
+credit check and again for the response, a job for validation and again
+for the handler). Inside read_scope() repository reads are memoized by
+document path, so each document costs one read per request. Writes through
+the repositories drop the path from the cache.
+
+Transactional reads never go through the cache: they must see the current
+document to be retried correctly.
+
+Each finished scope is added to read_cache_stats under its scope name
+(the route template for HTTP requests), so /metrics shows the reads saved
+per endpoint.
+"""
+import copy
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+_MISSING = object()
+
+
+class ReadCache:
+    """Document data by path for one request."""
+
+    def __init__(self, scope: str):
+        self.scope = scope
+        self._docs: Dict[str, Optional[Dict]] = {}
+        self.reads = 0
+        self.hits = 0
+
+    def lookup(self, path: str) -> Any:
+        """Cached data for ``path`` (None for a missing document), or _MISSING."""
+        if path not in self._docs:
+            return _MISSING
+        self.hits += 1
+        # Callers may mutate what they get back
+        return copy.deepcopy(self._docs[path])
+
+    def store(self, path: str, data: Optional[Dict]) -> None:
+        self.reads += 1
+        self._docs[path] = copy.deepcopy(data)
+
+    def invalidate(self, path: str) -> None:
+        self._docs.pop(path, None)
+
+
+_current: ContextVar[Optional[ReadCache]] = ContextVar("firestore_read_cache", default=None)
+
+
+def current_read_cache() -> Optional[ReadCache]:
+    """The cache of the enclosing read_scope(), if any."""
+    return _current.get()
+
+
+class ReadCacheStats:
+    """Reads and cache hits per scope name, aggregated over finished scopes."""
+
+    def __init__(self):
+        self._scopes: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, cache: ReadCache) -> None:
+        if not cache.reads and not cache.hits:
+            return
+        with self._lock:
+            entry = self._scopes.setdefault(cache.scope, {"scopes": 0, "reads": 0, "reads_saved": 0})
+            entry["scopes"] += 1
+            entry["reads"] += cache.reads
+            entry["reads_saved"] += cache.hits
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {scope: dict(entry) for scope, entry in sorted(self._scopes.items())}
+
+
+# Process-wide counters
+read_cache_stats = ReadCacheStats()
+
+
+@contextmanager
+def read_scope(scope: str) -> Iterator[ReadCache]:
+    """Memoize repository reads until the block exits.
+
+    ``scope`` names the unit of work in read_cache_stats; it can be changed
+    on the yielded cache before exit (e.g. once the route is known).
+    """
+    cache = ReadCache(scope)
+    token = _current.set(cache)
+    try:
+        yield cache
+    finally:
+        _current.reset(token)
+        read_cache_stats.record(cache)
+
+
+async def get_data(ref) -> Optional[Dict]:
+    """Data of the async document ``ref`` (None if missing), read through the cache."""
+    cache = _current.get()
+    if cache is not None:
+        data = cache.lookup(ref.path)
+        if data is not _MISSING:
+            return data
+
+    doc = await ref.get()
+    data = doc.to_dict() if doc.exists else None
+    if cache is not None:
+        cache.store(ref.path, data)
+    return data
+
+
+def invalidate_cached(path: str) -> None:
+    """Drop ``path`` from the current request's cache after a write."""
+    cache = _current.get()
+    if cache is not None:
+        cache.invalidate(path)
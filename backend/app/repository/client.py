@@ -0,0 +1,15 @@
+"""Native async Firestore client."""
+from firebase_admin import firestore_async
+from google.cloud import firestore
+
+from ..auth.firebase import initialize_firebase
+
+
+def get_async_firestore_client() -> firestore.AsyncClient:
+    """Get the AsyncClient of the default Firebase app.
+
+    firebase_admin caches one client per app. Its gRPC channel belongs to the
+    event loop that first uses it, which is the single uvicorn loop here.
+    """
+    initialize_firebase()
+    return firestore_async.client()
@@ -0,0 +1,88 @@
+"""Credit balance changes in async transactions."""
+import logging
+
+from google.cloud import firestore
+
+from .cache import invalidate_cached
+from .client import get_async_firestore_client
+from .errors import InsufficientCreditsError, UserNotFoundError
+
+logger = logging.getLogger(__name__)
+
+
+@firestore.async_transactional
+async def _charge(transaction, user_ref, amount: float, extra_writes) -> float:
+    user_doc = await user_ref.get(transaction=transaction)
+    if not user_doc.exists:
+        raise UserNotFoundError(user_ref.id)
+
+    current_balance = user_doc.to_dict().get("credits_balance", 0)
+    if current_balance < amount:
+        raise InsufficientCreditsError(amount, current_balance)
+
+    new_balance = current_balance - amount
+    transaction.update(user_ref, {
+        "credits_balance": new_balance,
+        "updated_at": firestore.SERVER_TIMESTAMP,
+    })
+    for ref, data in extra_writes:
+        transaction.set(ref, data)
+    return new_balance
+
+
+@firestore.async_transactional
+async def _refund(transaction, user_ref, amount: float) -> float:
+    user_doc = await user_ref.get(transaction=transaction)
+    if not user_doc.exists:
+        raise UserNotFoundError(user_ref.id)
+
+    new_balance = user_doc.to_dict().get("credits_balance", 0) + amount
+    transaction.update(user_ref, {
+        "credits_balance": new_balance,
+        "updated_at": firestore.SERVER_TIMESTAMP,
+    })
+    return new_balance
+
+
+class CreditRepository:
+    """Atomic changes to users/{uid}.credits_balance."""
+
+    def __init__(self, db: firestore.AsyncClient):
+        self.db = db
+
+    async def charge(self, user_id: str, amount: float, extra_writes=()) -> float:
+        """Deduct ``amount`` and apply ``extra_writes`` in one transaction.
+
+        Args:
+            user_id: User to charge
+            amount: Credits to deduct
+            extra_writes: (document ref, data) pairs set in the same
+                transaction, e.g. the job being paid for
+
+        Returns:
+            New balance
+
+        Raises:
+            UserNotFoundError: If the user doesn't exist
+            InsufficientCreditsError: If the balance is below ``amount``
+        """
+        user_ref = self.db.collection("users").document(user_id)
+        # Reads inside the transaction bypass the request cache
+        new_balance = await _charge(self.db.transaction(), user_ref, amount, list(extra_writes))
+        invalidate_cached(user_ref.path)
+        return new_balance
+
+    async def refund(self, user_id: str, amount: float) -> float:
+        """Add ``amount`` back to the user's balance. Returns the new balance.
+
+        Raises:
+            UserNotFoundError: If the user doesn't exist
+        """
+        user_ref = self.db.collection("users").document(user_id)
+        new_balance = await _refund(self.db.transaction(), user_ref, amount)
+        invalidate_cached(user_ref.path)
+        return new_balance
+
+
+def get_credit_repository() -> CreditRepository:
+    return CreditRepository(get_async_firestore_client())
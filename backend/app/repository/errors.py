@@ -0,0 +1,18 @@
+"""Repository errors (routes map them to HTTP responses)."""
+
+
+class UserNotFoundError(Exception):
+    """The user document does not exist."""
+
+    def __init__(self, user_id: str):
+        super().__init__(f"User {user_id} not found")
+        self.user_id = user_id
+
+
+class InsufficientCreditsError(Exception):
+    """The user's balance is below the amount to charge."""
+
+    def __init__(self, required: float, available: float):
+        super().__init__(f"Insufficient credits. Required: {required}, Available: {available}")
+        self.required = required
+        self.available = available
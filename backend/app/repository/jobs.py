@@ -0,0 +1,51 @@
+"""Job document access."""
+from typing import Dict, Optional
+
+from google.cloud import firestore
+
+from .cache import get_data, invalidate_cached
+from .client import get_async_firestore_client
+from .credits import CreditRepository
+
+
+class JobRepository:
+    """Reads and writes of jobs/{job_id}."""
+
+    def __init__(self, db: firestore.AsyncClient):
+        self.db = db
+        self.credits = CreditRepository(db)
+
+    def ref(self, job_id: str) -> firestore.AsyncDocumentReference:
+        return self.db.collection("jobs").document(job_id)
+
+    async def get(self, job_id: str) -> Optional[Dict]:
+        """Job document data, or None if it doesn't exist."""
+        return await get_data(self.ref(job_id))
+
+    async def create(self, job_id: str, job_data: Dict) -> None:
+        job_ref = self.ref(job_id)
+        await job_ref.set(job_data)
+        invalidate_cached(job_ref.path)
+
+    async def create_charged(self, user_id: str, job_id: str, job_data: Dict, credits: float) -> float:
+        """Create a job and deduct its credits in one transaction.
+
+        Returns:
+            The user's new balance
+
+        Raises:
+            UserNotFoundError, InsufficientCreditsError
+        """
+        job_ref = self.ref(job_id)
+        new_balance = await self.credits.charge(user_id, credits, [(job_ref, job_data)])
+        invalidate_cached(job_ref.path)
+        return new_balance
+
+    async def update(self, job_id: str, fields: Dict) -> None:
+        job_ref = self.ref(job_id)
+        await job_ref.update(fields)
+        invalidate_cached(job_ref.path)
+
+
+def get_job_repository() -> JobRepository:
+    return JobRepository(get_async_firestore_client())
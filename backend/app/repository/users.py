@@ -0,0 +1,25 @@
+"""User document access."""
+from typing import Dict, Optional
+
+from google.cloud import firestore
+
+from .cache import get_data
+from .client import get_async_firestore_client
+
+
+class UserRepository:
+    """Reads of users/{uid}."""
+
+    def __init__(self, db: firestore.AsyncClient):
+        self.db = db
+
+    def ref(self, user_id: str) -> firestore.AsyncDocumentReference:
+        return self.db.collection("users").document(user_id)
+
+    async def get(self, user_id: str) -> Optional[Dict]:
+        """User document data, or None if it doesn't exist."""
+        return await get_data(self.ref(user_id))
+
+
+def get_user_repository() -> UserRepository:
+    return UserRepository(get_async_firestore_client())
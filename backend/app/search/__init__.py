@@ -0,0 +1,24 @@
+"""Admin search indexes."""
+from .user_index import (
+    USER_SEARCH_COLLECTION,
+    USER_SEARCH_SHARDS,
+    UserSearchIndex,
+    IndexedUser,
+    user_search_index,
+    build_entry,
+    shard_for,
+    index_user,
+    remove_user,
+)
+
+__all__ = [
+    "USER_SEARCH_COLLECTION",
+    "USER_SEARCH_SHARDS",
+    "UserSearchIndex",
+    "IndexedUser",
+    "user_search_index",
+    "build_entry",
+    "shard_for",
+    "index_user",
+    "remove_user",
+]
@@ -0,0 +1,363 @@
+"""Self-hosted admin search over users.
+
+Searchable fields (email, display name, uid, Stripe customer id) are kept in
+a compact shard collection, ``user_search_index/shard_NN``. Each shard is a
+single document that maps uid -> {e, n, s, c}. Loading the whole index
+therefore costs USER_SEARCH_SHARDS reads instead of one read per user.
+
+Each API instance builds an in-memory trigram inverted index from the shards.
+Queries of 3+ characters intersect posting lists and then verify the
+substring; shorter queries are prefix lookups in a sorted term list. Matches
+are ranked as exact > email prefix > name/word prefix > id prefix >
+substring, with newest users first within a rank.
+
+User writes call index_user()/remove_user(), which update the shard document
+and the local index at once. Other instances pick the change up when they
+reload after USER_SEARCH_TTL_SECONDS. scripts/rebuild_user_search_index.py
+rebuilds every shard from the users collection.
+"""
+import base64
+import heapq
+import json
+import logging
+import os
+import threading
+import time
+import zlib
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+from google.cloud import firestore
+
+logger = logging.getLogger(__name__)
+
+USER_SEARCH_COLLECTION = "user_search_index"
+
+# Number of shard documents (changing it requires a rebuild)
+USER_SEARCH_SHARDS = int(os.getenv("USER_SEARCH_SHARDS", "32"))
+
+# How long an instance trusts its in-memory index before reloading shards
+USER_SEARCH_TTL_SECONDS = int(os.getenv("USER_SEARCH_TTL_SECONDS", "300"))
+
+GRAM_SIZE = 3
+
+# Rank scores
+SCORE_EXACT = 100
+SCORE_EMAIL_PREFIX = 80
+SCORE_NAME_PREFIX = 60
+SCORE_ID_PREFIX = 40
+SCORE_SUBSTRING = 20
+
+
+def shard_for(uid: str) -> str:
+    """Return the shard document id for a uid."""
+    return f"shard_{zlib.crc32(uid.encode()) % USER_SEARCH_SHARDS:02d}"
+
+
+def _grams(text: str) -> Set[str]:
+    return {text[i:i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}
+
+
+@dataclass(frozen=True)
+class IndexedUser:
+    """Searchable projection of a user document."""
+    uid: str
+    email: str
+    display_name: str
+    stripe_customer_id: str
+    created_ts: float
+
+    @property
+    def fields(self) -> Tuple[str, ...]:
+        return tuple(
+            value.lower()
+            for value in (self.email, self.display_name, self.uid, self.stripe_customer_id)
+            if value
+        )
+
+    def score(self, query: str) -> int:
+        """Rank this user against a lowercased query (0 = no match)."""
+        email = self.email.lower()
+        name = self.display_name.lower()
+        ids = (self.uid.lower(), self.stripe_customer_id.lower())
+
+        if query in (email, name) or query in ids:
+            return SCORE_EXACT
+        if email.startswith(query):
+            return SCORE_EMAIL_PREFIX
+        if name.startswith(query) or any(word.startswith(query) for word in name.split()):
+            return SCORE_NAME_PREFIX
+        if any(value and value.startswith(query) for value in ids):
+            return SCORE_ID_PREFIX
+        if any(query in value for value in self.fields):
+            return SCORE_SUBSTRING
+        return 0
+
+    def prefix_terms(self) -> List[Tuple[str, int, str]]:
+        """(term, score, uid) rows for the sorted prefix list."""
+        terms = []
+        if self.email:
+            terms.append((self.email.lower(), SCORE_EMAIL_PREFIX, self.uid))
+        name = self.display_name.lower()
+        if name:
+            terms.append((name, SCORE_NAME_PREFIX, self.uid))
+            terms.extend((word, SCORE_NAME_PREFIX, self.uid) for word in set(name.split()) if word != name)
+        terms.append((self.uid.lower(), SCORE_ID_PREFIX, self.uid))
+        if self.stripe_customer_id:
+            terms.append((self.stripe_customer_id.lower(), SCORE_ID_PREFIX, self.uid))
+        return terms
+
+    def to_entry(self) -> Dict:
+        return {
+            "e": self.email,
+            "n": self.display_name,
+            "s": self.stripe_customer_id,
+            "c": self.created_ts,
+        }
+
+    @classmethod
+    def from_entry(cls, uid: str, entry: Dict) -> "IndexedUser":
+        return cls(
+            uid=uid,
+            email=entry.get("e") or "",
+            display_name=entry.get("n") or "",
+            stripe_customer_id=entry.get("s") or "",
+            created_ts=float(entry.get("c") or 0),
+        )
+
+
+def _sort_key(score: int, user: IndexedUser) -> Tuple:
+    return (-score, -user.created_ts, user.uid)
+
+
+def encode_search_cursor(key: Tuple) -> str:
+    raw = json.dumps(list(key), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_search_cursor(cursor: str) -> Tuple:
+    """Decode a search cursor. Raises ValueError if malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        score, created, uid = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return (int(score), float(created), str(uid))
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+class UserSearchIndex:
+    """In-memory trigram index over the user_search_index shards."""
+
+    def __init__(self, ttl: int = USER_SEARCH_TTL_SECONDS):
+        self.ttl = ttl
+        self._users: Dict[str, IndexedUser] = {}
+        self._postings: Dict[str, Set[str]] = {}
+        self._terms: List[Tuple[str, int, str]] = []
+        self._lock = threading.RLock()
+        self._reload_lock = threading.Lock()
+        self._loaded_at = 0.0
+
+    @property
+    def size(self) -> int:
+        return len(self._users)
+
+    def _add_locked(self, user: IndexedUser) -> None:
+        self._remove_locked(user.uid)
+        self._users[user.uid] = user
+        for field in user.fields:
+            for gram in _grams(field):
+                self._postings.setdefault(gram, set()).add(user.uid)
+        for term in user.prefix_terms():
+            insort(self._terms, term)
+
+    def _remove_locked(self, uid: str) -> None:
+        user = self._users.pop(uid, None)
+        if user is None:
+            return
+        for field in user.fields:
+            for gram in _grams(field):
+                posting = self._postings.get(gram)
+                if posting is not None:
+                    posting.discard(uid)
+                    if not posting:
+                        del self._postings[gram]
+        for term in user.prefix_terms():
+            i = bisect_left(self._terms, term)
+            if i < len(self._terms) and self._terms[i] == term:
+                del self._terms[i]
+
+    def load(self, db) -> int:
+        """Rebuild the in-memory index from all shard documents."""
+        users = {}
+        for shard_doc in db.collection(USER_SEARCH_COLLECTION).stream():
+            for uid, entry in (shard_doc.to_dict() or {}).get("users", {}).items():
+                users[uid] = IndexedUser.from_entry(uid, entry)
+
+        postings: Dict[str, Set[str]] = {}
+        terms = []
+        for user in users.values():
+            for field in user.fields:
+                for gram in _grams(field):
+                    postings.setdefault(gram, set()).add(user.uid)
+            terms.extend(user.prefix_terms())
+        terms.sort()
+
+        with self._lock:
+            self._users = users
+            self._postings = postings
+            self._terms = terms
+            self._loaded_at = time.monotonic()
+        logger.info(f"Loaded user search index: {len(users)} users, {len(self._postings)} grams")
+        return len(users)
+
+    def _reload(self, db) -> None:
+        if not self._reload_lock.acquire(blocking=False):
+            return
+        try:
+            self.load(db)
+        except Exception as e:
+            logger.error(f"Failed to reload user search index: {e}")
+        finally:
+            self._reload_lock.release()
+
+    def ensure_fresh(self, db) -> None:
+        """Load the shards on first use; reload in the background after the TTL."""
+        if self._loaded_at == 0.0:
+            with self._reload_lock:
+                if self._loaded_at == 0.0:
+                    self.load(db)
+        elif time.monotonic() - self._loaded_at > self.ttl:
+            # Serve the current index while a fresh copy is built
+            self._loaded_at = time.monotonic()
+            threading.Thread(target=self._reload, args=(db,), name="user-search-reload", daemon=True).start()
+
+    def upsert(self, user: IndexedUser) -> None:
+        with self._lock:
+            self._add_locked(user)
+
+    def remove(self, uid: str) -> None:
+        with self._lock:
+            self._remove_locked(uid)
+
+    def get(self, uid: str) -> Optional[IndexedUser]:
+        return self._users.get(uid)
+
+    def search(self, query: str, limit: int = 25, cursor: Optional[str] = None, offset: int = 0) -> Dict:
+        """Return ranked matching uids with keyset cursor paging.
+
+        ``offset`` skips ranked matches (after the cursor, if any) for
+        page-number clients.
+
+        Returns:
+            Dict with uids (this page, in rank order), total (all matches)
+            and next_cursor (None on the last page)
+        """
+        query = query.strip().lower()
+        if not query:
+            return {"uids": [], "total": 0, "next_cursor": None}
+
+        with self._lock:
+            if len(query) >= GRAM_SIZE:
+                postings = [self._postings.get(gram, set()) for gram in _grams(query)]
+                postings.sort(key=len)
+                candidates = set(postings[0]).intersection(*postings[1:]) if postings else set()
+                best = {}
+                for uid in candidates:
+                    score = self._users[uid].score(query)
+                    if score:
+                        best[uid] = score
+            else:
+                best = self._prefix_matches_locked(query)
+
+            keys = (_sort_key(score, self._users[uid]) for uid, score in best.items())
+            if cursor:
+                after = decode_search_cursor(cursor)
+                keys = (key for key in keys if key > after)
+            page = heapq.nsmallest(offset + limit + 1, keys)[offset:]
+
+        has_more = len(page) > limit
+        page = page[:limit]
+        return {
+            "uids": [key[2] for key in page],
+            "total": len(best),
+            "next_cursor": encode_search_cursor(page[-1]) if has_more and page else None,
+        }
+
+    def _prefix_matches_locked(self, query: str) -> Dict[str, int]:
+        """uid -> best score for terms starting with ``query``."""
+        best: Dict[str, int] = {}
+        i = bisect_left(self._terms, (query,))
+        terms = self._terms
+        while i < len(terms) and terms[i][0].startswith(query):
+            term, score, uid = terms[i]
+            if term == query and score != SCORE_NAME_PREFIX:
+                score = SCORE_EXACT
+            if score > best.get(uid, 0):
+                best[uid] = score
+            i += 1
+        return best
+
+
+# Process-wide index
+user_search_index = UserSearchIndex()
+
+
+def _created_ts(value) -> float:
+    if value is None:
+        return 0.0
+    if hasattr(value, "timestamp"):
+        return value.timestamp()
+    return float(value)
+
+
+def build_entry(uid: str, data: Dict) -> IndexedUser:
+    """Build the index projection of a user document."""
+    return IndexedUser(
+        uid=uid,
+        email=data.get("email") or "",
+        display_name=data.get("display_name") or "",
+        stripe_customer_id=data.get("stripe_customer_id") or "",
+        created_ts=_created_ts(data.get("created_at")),
+    )
+
+
+def index_user(db, uid: str, data: Dict) -> None:
+    """Add or update a user in the search index.
+
+    ``data`` may be a partial user document; fields it doesn't contain keep
+    their indexed values. Failures are logged, never raised, so user writes
+    don't fail on index maintenance.
+    """
+    try:
+        fields = {}
+        if "email" in data:
+            fields["e"] = data.get("email") or ""
+        if "display_name" in data:
+            fields["n"] = data.get("display_name") or ""
+        if "stripe_customer_id" in data:
+            fields["s"] = data.get("stripe_customer_id") or ""
+        if "created_at" in data:
+            fields["c"] = _created_ts(data.get("created_at"))
+        if not fields:
+            return
+
+        shard_ref = db.collection(USER_SEARCH_COLLECTION).document(shard_for(uid))
+        shard_ref.set({"users": {uid: fields}}, merge=True)
+
+        existing = user_search_index.get(uid)
+        entry = existing.to_entry() if existing else {}
+        entry.update(fields)
+        user_search_index.upsert(IndexedUser.from_entry(uid, entry))
+    except Exception as e:
+        logger.warning(f"Failed to index user {uid}: {e}")
+
+
+def remove_user(db, uid: str) -> None:
+    """Remove a user from the search index (best-effort)."""
+    try:
+        shard_ref = db.collection(USER_SEARCH_COLLECTION).document(shard_for(uid))
+        shard_ref.set({"users": {uid: firestore.DELETE_FIELD}}, merge=True)
+        user_search_index.remove(uid)
+    except Exception as e:
+        logger.warning(f"Failed to remove user {uid} from search index: {e}")
@@ -25,6 +25,7 @@ from .models import (
 )
 from .services import StripeService, SubscriptionService
 from ..auth.firebase import get_firestore_client
+from ..search import index_user
 from ..middleware.auth import get_current_user_id
 
 logger = logging.getLogger(__name__)
@@ -121,6 +122,7 @@ async def create_subscription(
                 "stripe_customer_id": stripe_customer_id,
                 "updated_at": firestore.SERVER_TIMESTAMP,
             })
+            index_user(db, user_id, {"stripe_customer_id": stripe_customer_id})
         except stripe.error.StripeError as e:
             logger.error(f"Failed to create Stripe customer: {e}")
             raise HTTPException(status_code=500, detail="Failed to create payment customer")
@@ -678,6 +680,7 @@ async def sync_subscription_from_stripe(
             "credits_balance": current_balance + credits_to_add,
             "updated_at": now,
         })
+        index_user(db, user_id, {"stripe_customer_id": stripe_customer_id})
 
         return {
             "message": "Subscription synced successfully",
@@ -2,6 +2,7 @@
 import os
 import json
 import logging
+import time
 from typing import Optional
 
 from google.cloud import tasks_v2
@@ -39,12 +40,19 @@ def get_tasks_client() -> tasks_v2.CloudTasksClient:
     return _tasks_client
 
 
-def enqueue_job(job_id: str, delay_seconds: int = 0) -> str:
+def enqueue_job(
+    job_id: str,
+    delay_seconds: int = 0,
+    trace_id: Optional[str] = None,
+    profile: bool = False,
+) -> str:
     """Enqueue a video processing job.
 
     Args:
         job_id: Job document ID
         delay_seconds: Optional delay before task execution
+        trace_id: Job trace id, forwarded to the worker
+        profile: Ask the worker to profile this run
 
     Returns:
         Task name (full path)
@@ -54,8 +62,12 @@ def enqueue_job(job_id: str, delay_seconds: int = 0) -> str:
     # Construct the queue path
     queue_path = client.queue_path(PROJECT_ID, LOCATION, QUEUE_NAME)
 
-    # Build the task payload
-    payload = {"job_id": job_id}
+    # Build the task payload; enqueued_at lets the worker time the queue stage
+    payload = {"job_id": job_id, "enqueued_at": time.time() + max(0, delay_seconds)}
+    if trace_id:
+        payload["trace_id"] = trace_id
+    if profile:
+        payload["profile"] = True
 
     # Service account for OIDC authentication to Cloud Run
     service_account_email = os.environ.get(
@@ -124,17 +136,19 @@ def enqueue_ffmpeg_job(
     input_video_path: str,
     output_path: str,
     options: dict = None,
-    delay_seconds: int = 0
+    delay_seconds: int = 0,
+    profile: bool = False,
 ) -> str:
-    """Enqueue an FFmpeg post-processing job (subtitles/watermark).
+    """Enqueue an FFmpeg post-processing job (subtitles/watermark/chain).
 
     Args:
         job_id: Job document ID (for status updates)
-        job_type: Type of FFmpeg job ("subtitles" or "watermark")
+        job_type: Type of FFmpeg job ("subtitles", "watermark" or "post_process_chain")
         input_video_path: GCS path to input video
         output_path: GCS path for output video
         options: Job-specific options (e.g., subtitle_style for subtitles)
         delay_seconds: Optional delay before task execution
+        profile: Ask the FFmpeg worker to profile this run
 
     Returns:
         Task name (full path)
@@ -152,6 +166,8 @@ def enqueue_ffmpeg_job(
         "output_path": output_path,
         "options": options or {}
     }
+    if profile:
+        payload["profile"] = True
 
     # Service account for OIDC authentication to Cloud Run
     # Use the nuumee-api service account which has invoker permission on FFmpeg worker
@@ -49,7 +49,8 @@ class CreditTransaction(BaseModel):
 class TransactionListResponse(BaseModel):
     """Response for listing transactions."""
     transactions: List[CreditTransaction]
-    total: int
+    total: Optional[int] = None  # Omitted when include_total=false
     page: int
     page_size: int
+    next_cursor: Optional[str] = None  # Cursor for the next page (None on the last page)
     has_more: bool
@@ -11,6 +11,7 @@ from .models import (
     TransactionListResponse,
 )
 from ..auth.firebase import get_firestore_client
+from ..jobs.services.pagination import apply_cursor, count_query, encode_cursor
 from ..middleware.auth import get_current_user_id
 
 
@@ -22,11 +23,13 @@ router = APIRouter(prefix="/transactions", tags=["Transactions"])
 @router.get("", response_model=TransactionListResponse)
 async def list_transactions(
     user_id: str = Depends(get_current_user_id),
-    page: int = Query(1, ge=1, description="Page number"),
+    page: int = Query(1, ge=1, description="Page number (ignored when cursor is set)"),
     page_size: int = Query(20, ge=1, le=100, description="Items per page"),
     transaction_type: Optional[TransactionType] = Query(
         None, description="Filter by transaction type"
     ),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from next_cursor of the previous page"),
+    include_total: bool = Query(True, description="Include the total count (one count() aggregation)"),
 ):
     """
     List credit transactions for the authenticated user.
@@ -39,43 +42,43 @@ async def list_transactions(
     - Job usage (credit deductions)
 
     Results are sorted by creation date (newest first).
+
+    Prefer cursor pagination: pass next_cursor from the previous response.
+    Read cost at page_size=20 (count() bills one read per 1000 entries;
+    a page reads page_size + 1 documents):
+    - page 1: 22 reads, 1 count + 21 documents (previously up to 1022:
+      1001 streamed to count + 21)
+    - page 20 via cursor: 22 reads
+    - page 20 via page=20: 402 reads, 1 count + 380 skipped + 21 documents,
+      since Firestore bills every document an offset skips (previously up
+      to 1402: 1001 + 401)
     """
     db = get_firestore_client()
+    transactions_ref = db.collection("credit_transactions")
 
     # Build query
-    query = db.collection("credit_transactions").where("user_id", "==", user_id)
+    query = transactions_ref.where("user_id", "==", user_id)
 
     # Apply type filter if specified
     if transaction_type:
         query = query.where("type", "==", transaction_type.value)
 
-    # Order by creation date (newest first)
-    query = query.order_by("created_at", direction="DESCENDING")
-
-    # Get total count (we need to execute a separate query for this)
-    # For efficiency, we limit to a reasonable max
-    count_query = db.collection("credit_transactions").where("user_id", "==", user_id)
-    if transaction_type:
-        count_query = count_query.where("type", "==", transaction_type.value)
-
-    # Count documents (Firestore doesn't have a native count, so we stream and count)
-    total = 0
-    for _ in count_query.stream():
-        total += 1
-        if total > 1000:  # Cap at 1000 for performance
-            break
-
-    # Apply pagination
-    offset = (page - 1) * page_size
-    query = query.offset(offset).limit(page_size + 1)  # +1 to check if there's more
+    total = count_query(query) if include_total else None
 
-    # Execute query
-    docs = list(query.stream())
+    # Newest first, keyset on (created_at, document id)
+    page_query = apply_cursor(query, transactions_ref, cursor)
+    if not cursor and page > 1:
+        page_query = page_query.offset((page - 1) * page_size)
 
-    # Check if there are more results
+    # One extra document tells us whether another page exists
+    docs = list(page_query.limit(page_size + 1).stream())
     has_more = len(docs) > page_size
-    if has_more:
-        docs = docs[:page_size]
+    docs = docs[:page_size]
+
+    next_cursor = None
+    if has_more and docs:
+        last = docs[-1]
+        next_cursor = encode_cursor(last.to_dict().get("created_at"), last.id)
 
     # Convert to response models
     transactions = []
@@ -123,8 +126,9 @@ async def list_transactions(
 
     return TransactionListResponse(
         transactions=transactions,
-        total=min(total, 1000),  # Cap at 1000
+        total=total,
         page=page,
         page_size=page_size,
+        next_cursor=next_cursor,
         has_more=has_more,
     )
@@ -11,6 +11,7 @@ from ..auth.firebase import get_firestore_client
 from ..subscriptions.models import SubscriptionTier, SubscriptionStatus, get_subscription_tiers
 from ..notifications import send as notify
 from ..notifications.utils import build_referral_conversion_payload
+from ..search import index_user
 
 logger = logging.getLogger(__name__)
 
@@ -312,7 +313,7 @@ async def handle_subscription_created(session: dict):
     def create_subscription(transaction, user_ref, sub_ref, txn_ref):
         user_doc = user_ref.get(transaction=transaction)
         if not user_doc.exists:
-            return
+            return False
 
         user_data = user_doc.to_dict()
         current_balance = user_data.get("credits_balance", 0)
@@ -358,6 +359,7 @@ async def handle_subscription_created(session: dict):
         })
 
         print(f"Created subscription for user {user_id}, tier {tier}, +{monthly_credits} credits")
+        return True
 
     user_ref = db.collection("users").document(user_id)
     sub_ref = db.collection("subscriptions").document(subscription_id)
@@ -365,7 +367,8 @@ async def handle_subscription_created(session: dict):
     transaction = db.transaction()
 
     try:
-        create_subscription(transaction, user_ref, sub_ref, txn_ref)
+        if create_subscription(transaction, user_ref, sub_ref, txn_ref):
+            index_user(db, user_id, {"stripe_customer_id": stripe_customer_id})
     except Exception as e:
         print(f"Failed to create subscription: {e}")
 
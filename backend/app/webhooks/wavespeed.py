@@ -2,6 +2,7 @@
 import logging
 import os
 import json
+import time
 from typing import Optional
 
 from fastapi import APIRouter, Request, HTTPException, Query
@@ -42,7 +43,9 @@ def get_pubsub_publisher():
 @router.post("/wavespeed")
 async def handle_wavespeed_webhook(
     request: Request,
-    token: str = Query(..., description="Webhook authentication token")
+    token: str = Query(..., description="Webhook authentication token"),
+    job_id: Optional[str] = Query(None, description="Our job ID (set by the worker)"),
+    trace_id: Optional[str] = Query(None, description="Job trace id (set by the worker)"),
 ):
     """
     Handle WaveSpeed webhook callbacks.
@@ -52,10 +55,14 @@ async def handle_wavespeed_webhook(
 
     Query params:
         token: Secret token for authentication
+        job_id, trace_id: Forwarded to the completion processor as message
+            attributes, with the receive time, for the job stage timeline
 
     Body:
         WaveSpeed callback payload with request_id, status, outputs, etc.
     """
+    received_at = time.time()
+
     # Verify token
     try:
         expected_token = get_webhook_secret()
@@ -84,7 +91,7 @@ async def handle_wavespeed_webhook(
         logger.error(f"Webhook payload missing request_id: {payload}")
         raise HTTPException(status_code=400, detail="Missing request_id in payload")
 
-    logger.info(f"[WEBHOOK] WaveSpeed callback: request_id={request_id}, status={status}")
+    logger.info(f"[WEBHOOK] WaveSpeed callback: request_id={request_id}, status={status}, job_id={job_id}, trace_id={trace_id}")
 
     # Publish to Pub/Sub for async processing
     try:
@@ -98,7 +105,12 @@ async def handle_wavespeed_webhook(
         attributes = {
             "request_id": str(request_id),
             "status": str(status) if status else "unknown",
+            "received_at": f"{received_at:.3f}",
         }
+        if job_id:
+            attributes["job_id"] = job_id
+        if trace_id:
+            attributes["trace_id"] = trace_id
 
         future = publisher.publish(topic_path, message_data, **attributes)
         message_id = future.result(timeout=10)
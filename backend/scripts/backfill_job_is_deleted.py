@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Backfill script to add the indexed is_deleted flag to existing jobs.
+
+GET /jobs filters soft-deleted jobs server-side with is_deleted == False,
+which excludes documents that don't have the field yet. Run this before
+deploying the cursor-paginated job list.
+
+Run with:
+  GOOGLE_CLOUD_PROJECT=wanapi-prod python3 backend/scripts/backfill_job_is_deleted.py
+
+Or from the backend directory:
+  cd backend && GOOGLE_CLOUD_PROJECT=wanapi-prod python3 scripts/backfill_job_is_deleted.py
+"""
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.cloud import firestore
+
+# Firestore allows at most 500 writes per batch
+BATCH_SIZE = 500
+
+
+def backfill_is_deleted(dry_run: bool = True):
+    """
+    Set is_deleted on all jobs that don't have it, based on deleted_at.
+
+    Args:
+        dry_run: If True, only print what would be updated without making changes.
+    """
+    db = firestore.Client()
+
+    # Only the two fields we need
+    all_jobs = list(db.collection("jobs").select(["is_deleted", "deleted_at"]).stream())
+    print(f"Found {len(all_jobs)} total jobs")
+
+    jobs_to_update = []
+    for job_doc in all_jobs:
+        data = job_doc.to_dict()
+        if "is_deleted" not in data:
+            jobs_to_update.append((job_doc, bool(data.get("deleted_at"))))
+
+    deleted = sum(1 for _, is_deleted in jobs_to_update if is_deleted)
+    print(f"Found {len(jobs_to_update)} jobs without is_deleted ({deleted} soft-deleted)")
+
+    if not jobs_to_update:
+        print("Nothing to update!")
+        return
+
+    if dry_run:
+        print("\n[DRY RUN] Would update the following jobs:")
+        for job_doc, is_deleted in jobs_to_update[:10]:  # Show first 10
+            print(f"  - {job_doc.id} -> is_deleted={is_deleted}")
+        if len(jobs_to_update) > 10:
+            print(f"  ... and {len(jobs_to_update) - 10} more")
+        print("\nRun with --execute to apply changes")
+        return
+
+    # Execute updates in batches
+    print("\nUpdating jobs...")
+    success_count = 0
+    error_count = 0
+
+    for start in range(0, len(jobs_to_update), BATCH_SIZE):
+        chunk = jobs_to_update[start:start + BATCH_SIZE]
+        batch = db.batch()
+        for job_doc, is_deleted in chunk:
+            batch.update(job_doc.reference, {"is_deleted": is_deleted})
+        try:
+            batch.commit()
+            success_count += len(chunk)
+            print(f"  Updated {success_count}/{len(jobs_to_update)} jobs")
+        except Exception as e:
+            print(f"  ERROR updating batch starting at {start}: {e}")
+            error_count += len(chunk)
+
+    print(f"\nDone! Updated {success_count} jobs, {error_count} errors")
+
+
+if __name__ == "__main__":
+    dry_run = "--execute" not in sys.argv
+
+    if dry_run:
+        print("=" * 60)
+        print("DRY RUN MODE - No changes will be made")
+        print("=" * 60)
+    else:
+        print("=" * 60)
+        print("EXECUTE MODE - Changes will be applied!")
+        print("=" * 60)
+        response = input("Are you sure you want to continue? (yes/no): ")
+        if response.lower() != "yes":
+            print("Aborted.")
+            sys.exit(0)
+
+    backfill_is_deleted(dry_run=dry_run)
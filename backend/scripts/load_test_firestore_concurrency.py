@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Concurrency load test for routes that read Firestore.
+
+Fires N concurrent GET requests at an authenticated route and reports
+throughput and latency percentiles. Run it before and after moving a route
+onto the async repositories (app/repository) to compare.
+
+Run against a deployment (or a local uvicorn):
+  python3 backend/scripts/load_test_firestore_concurrency.py \\
+      --url http://localhost:8000 --path /api/v1/credits/balance \\
+      --token "$FIREBASE_ID_TOKEN" --requests 500 --concurrency 50
+
+Or compare both client styles locally against stub clients with injected
+read latency (no network; needs the backend requirements installed). The
+async side goes through app.repository.UserRepository and its read cache:
+  python3 backend/scripts/load_test_firestore_concurrency.py --simulate
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from typing import Awaitable, Callable, Dict, List
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def _report(label: str, latencies: List[float], elapsed: float, errors: int = 0):
+    count = len(latencies)
+    print(f"{label}:")
+    print(f"  requests:   {count} ({errors} errors)")
+    print(f"  elapsed:    {elapsed:.2f}s")
+    print(f"  throughput: {count / elapsed:.1f} req/s")
+    if latencies:
+        print(f"  p50:        {_percentile(latencies, 50) * 1000:.1f} ms")
+        print(f"  p95:        {_percentile(latencies, 95) * 1000:.1f} ms")
+        print(f"  mean:       {statistics.mean(latencies) * 1000:.1f} ms")
+
+
+async def _run(call: Callable[[], Awaitable[bool]], total: int, concurrency: int):
+    """Run ``call`` ``total`` times with at most ``concurrency`` in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def one(submitted: float):
+        nonlocal errors
+        async with semaphore:
+            ok = await call()
+            # Measured from submission, so time spent waiting for a blocked
+            # event loop (or a free slot) counts
+            latencies.append(time.perf_counter() - submitted)
+            if not ok:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(start) for _ in range(total)))
+    return latencies, time.perf_counter() - start, errors
+
+
+async def load_test_url(url: str, path: str, token: str, total: int, concurrency: int):
+    """Hit ``url + path`` with an authenticated GET."""
+    import httpx
+
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    async with httpx.AsyncClient(base_url=url, headers=headers, timeout=30) as client:
+        async def call() -> bool:
+            try:
+                response = await client.get(path)
+                return response.status_code < 400
+            except httpx.HTTPError:
+                return False
+
+        latencies, elapsed, errors = await _run(call, total, concurrency)
+    _report(f"GET {path}", latencies, elapsed, errors)
+
+
+class _StubSnapshot:
+    def __init__(self, data: Dict):
+        self.exists = True
+        self._data = data
+
+    def to_dict(self) -> Dict:
+        return dict(self._data)
+
+
+class _StubRef:
+    """Document reference whose get() takes ``latency`` seconds."""
+
+    def __init__(self, path: str, latency: float, blocking: bool):
+        self.path = path
+        self.id = path.rsplit("/", 1)[-1]
+        self._latency = latency
+        self._blocking = blocking
+
+    def _snapshot(self) -> _StubSnapshot:
+        return _StubSnapshot({"credits_balance": 100})
+
+    def get(self, transaction=None):
+        if self._blocking:
+            time.sleep(self._latency)
+            return self._snapshot()
+        return self._get_async()
+
+    async def _get_async(self) -> _StubSnapshot:
+        await asyncio.sleep(self._latency)
+        return self._snapshot()
+
+
+class _StubCollection:
+    def __init__(self, name: str, latency: float, blocking: bool):
+        self._name = name
+        self._latency = latency
+        self._blocking = blocking
+
+    def document(self, doc_id: str) -> _StubRef:
+        return _StubRef(f"{self._name}/{doc_id}", self._latency, self._blocking)
+
+
+class _StubClient:
+    """Just enough of firestore.Client / AsyncClient for document reads.
+
+    ``blocking`` stands in for the sync firebase_admin client (get() sleeps
+    on the calling thread), otherwise get() is awaitable like AsyncClient's.
+    """
+
+    def __init__(self, latency: float, blocking: bool):
+        self._latency = latency
+        self._blocking = blocking
+
+    def collection(self, name: str) -> _StubCollection:
+        return _StubCollection(name, self._latency, self._blocking)
+
+
+async def simulate(total: int, concurrency: int, read_ms: float):
+    """Compare the sync client with app.repository inside one event loop.
+
+    The sync variant reads users/{uid} the way routes did before the
+    repositories: a blocking get() from an async route holds the loop, so
+    requests run one after another no matter how many are in flight. The
+    async variant reads it through UserRepository.get() inside read_scope(),
+    as routes do now.
+    """
+    from app.repository import UserRepository, read_scope
+
+    read_seconds = read_ms / 1000
+    sync_db = _StubClient(read_seconds, blocking=True)
+    users = UserRepository(_StubClient(read_seconds, blocking=False))
+
+    async def sync_client_route() -> bool:
+        doc = sync_db.collection("users").document("loadtest-user").get()
+        return doc.exists
+
+    async def async_client_route() -> bool:
+        with read_scope("loadtest"):
+            return await users.get("loadtest-user") is not None
+
+    print(f"Simulating {total} requests, concurrency {concurrency}, {read_ms:.0f} ms per read\n")
+    for label, route in (("sync client", sync_client_route), ("UserRepository", async_client_route)):
+        latencies, elapsed, errors = await _run(route, total, concurrency)
+        _report(label, latencies, elapsed, errors)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Firestore route concurrency load test")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--path", default="/api/v1/credits/balance")
+    parser.add_argument("--token", default="", help="Firebase ID token")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--simulate", action="store_true", help="Compare client styles locally")
+    parser.add_argument("--read-ms", type=float, default=20, help="Simulated read latency")
+    args = parser.parse_args()
+
+    if args.simulate:
+        asyncio.run(simulate(args.requests, args.concurrency, args.read_ms))
+    else:
+        asyncio.run(load_test_url(args.url, args.path, args.token, args.requests, args.concurrency))
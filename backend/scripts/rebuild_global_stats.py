@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Rebuild the stats/global counters from the source collections.
+
+Uses count()/sum() aggregation queries, so it costs one read per 1000
+documents rather than one per document. The totals are written to
+stats/global and its increment shards are deleted in the same batch.
+Run once before relying on the counters, and again whenever they look off.
+
+Run with:
+  GOOGLE_CLOUD_PROJECT=wanapi-prod python3 backend/scripts/rebuild_global_stats.py
+
+Or from the backend directory:
+  cd backend && GOOGLE_CLOUD_PROJECT=wanapi-prod python3 scripts/rebuild_global_stats.py
+"""
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.cloud import firestore
+
+from app.counters import get_global_stats, global_stats_ref, global_stats_shards
+from app.jobs.services.pagination import count_query
+from app.promo.service import aggregate_promo_uses
+
+
+def rebuild_global_stats(dry_run: bool = True):
+    """
+    Recompute stats/global.
+
+    Args:
+        dry_run: If True, only print the computed values without writing them.
+    """
+    db = firestore.Client()
+    stats_ref = global_stats_ref(db)
+
+    computed = {
+        "users_total": count_query(db.collection("users")),
+        "jobs_total": count_query(db.collection("jobs")),
+        "promo_redemptions_total": aggregate_promo_uses(db),
+    }
+
+    current = get_global_stats(db)
+
+    for field, value in computed.items():
+        print(f"  {field}: {current.get(field, '-')} -> {value}")
+
+    if dry_run:
+        print("\nRun with --execute to apply changes")
+        return
+
+    batch = db.batch()
+    batch.set(stats_ref, {**computed, "rebuilt_at": firestore.SERVER_TIMESTAMP}, merge=True)
+    for shard in global_stats_shards.shards(stats_ref).list_documents():
+        batch.delete(shard)
+    batch.commit()
+    print("\nDone! stats/global rebuilt")
+
+
+if __name__ == "__main__":
+    dry_run = "--execute" not in sys.argv
+
+    if dry_run:
+        print("=" * 60)
+        print("DRY RUN MODE - No changes will be made")
+        print("=" * 60)
+    else:
+        print("=" * 60)
+        print("EXECUTE MODE - Changes will be applied!")
+        print("=" * 60)
+
+    rebuild_global_stats(dry_run=dry_run)
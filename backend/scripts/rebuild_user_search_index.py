@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Rebuild the admin user search index (user_search_index shard documents).
+
+Reads only the searchable fields of every user and rewrites each shard in
+full, so entries for deleted users disappear too. Run once before enabling
+admin search, after changing USER_SEARCH_SHARDS, or if results look stale.
+
+Run with:
+  GOOGLE_CLOUD_PROJECT=wanapi-prod python3 backend/scripts/rebuild_user_search_index.py
+
+Or from the backend directory:
+  cd backend && GOOGLE_CLOUD_PROJECT=wanapi-prod python3 scripts/rebuild_user_search_index.py
+"""
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.cloud import firestore
+
+from app.search import USER_SEARCH_COLLECTION, USER_SEARCH_SHARDS, build_entry, shard_for
+
+# Keep shard documents well under Firestore's 1 MiB document limit
+MAX_SHARD_BYTES = 900 * 1024
+
+
+def rebuild_user_search_index(dry_run: bool = True):
+    """
+    Rebuild all shard documents from the users collection.
+
+    Args:
+        dry_run: If True, only print shard sizes without writing.
+    """
+    db = firestore.Client()
+
+    fields = ["email", "display_name", "stripe_customer_id", "created_at"]
+    shards = {f"shard_{i:02d}": {} for i in range(USER_SEARCH_SHARDS)}
+    user_count = 0
+    for user_doc in db.collection("users").select(fields).stream():
+        entry = build_entry(user_doc.id, user_doc.to_dict() or {})
+        shards[shard_for(user_doc.id)][user_doc.id] = entry.to_entry()
+        user_count += 1
+
+    print(f"Indexed {user_count} users into {USER_SEARCH_SHARDS} shards")
+
+    # Rough size estimate: uid + values + map keys
+    oversized = []
+    for shard_id, users in shards.items():
+        size = sum(len(uid) + sum(len(str(v)) + 2 for v in entry.values()) for uid, entry in users.items())
+        if size > MAX_SHARD_BYTES:
+            oversized.append(shard_id)
+        print(f"  {shard_id}: {len(users)} users, ~{size // 1024} KiB")
+
+    if oversized:
+        print(f"\nERROR: {len(oversized)} shard(s) too large; raise USER_SEARCH_SHARDS and retry")
+        sys.exit(1)
+
+    if dry_run:
+        print("\nRun with --execute to apply changes")
+        return
+
+    for shard_id, users in shards.items():
+        db.collection(USER_SEARCH_COLLECTION).document(shard_id).set({
+            "users": users,
+            "rebuilt_at": firestore.SERVER_TIMESTAMP,
+        })
+    print(f"\nDone! Wrote {len(shards)} shards")
+
+
+if __name__ == "__main__":
+    dry_run = "--execute" not in sys.argv
+
+    if dry_run:
+        print("=" * 60)
+        print("DRY RUN MODE - No changes will be made")
+        print("=" * 60)
+    else:
+        print("=" * 60)
+        print("EXECUTE MODE - Changes will be applied!")
+        print("=" * 60)
+
+    rebuild_user_search_index(dry_run=dry_run)
@@ -0,0 +1,69 @@
+"""Unit tests for the metrics router."""
+import asyncio
+import os
+import sys
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.metrics.router import router
+from app.metrics.collector import metrics
+
+
+class Client:
+    """Minimal sync client over httpx.ASGITransport.
+
+    starlette's TestClient doesn't work with httpx>=0.28, which
+    requirements.txt allows.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def get(self, path: str) -> httpx.Response:
+        async def request():
+            transport = httpx.ASGITransport(app=self.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await client.get(path)
+
+        return asyncio.run(request())
+
+
+@pytest.fixture
+def client():
+    """Client for an app serving only the metrics router."""
+    app = FastAPI()
+    app.include_router(router)
+    return Client(app)
+
+
+class TestPrometheusEndpoint:
+    """Tests for GET /metrics/prometheus."""
+
+    def test_serves_text_exposition_format(self, client):
+        """Should answer with the Prometheus text content type."""
+        response = client.get("/metrics/prometheus")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+
+    def test_body_is_raw_text(self, client):
+        """Should return plain lines, not a JSON-quoted string."""
+        response = client.get("/metrics/prometheus")
+        body = response.text
+        assert not body.startswith('"')
+        assert "\\n" not in body
+        assert body.endswith("\n")
+        assert "# TYPE nuumee_requests_total counter\n" in body
+
+    def test_exposes_latency_histograms(self, client):
+        """Should render recorded request latencies as histogram series."""
+        metrics.track_latency("GET", "/api/v1/jobs", 200, 0.12)
+        body = client.get("/metrics/prometheus").text
+        lines = body.splitlines()
+        assert "# TYPE nuumee_request_duration_seconds histogram" in lines
+        labels = 'method="GET",route="/api/v1/jobs",status_class="2xx"'
+        assert any(line.startswith(f'nuumee_request_duration_seconds_bucket{{{labels},le="+Inf"}}') for line in lines)
+        assert any(line.startswith(f"nuumee_request_duration_seconds_count{{{labels}}}") for line in lines)
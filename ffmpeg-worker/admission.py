@@ -0,0 +1,185 @@
+"""Admission control for NuuMee FFmpeg Worker.
+
+Limits how many FFmpeg jobs run at once based on the CPUs actually available
+to the container. Requests over capacity are rejected quickly so Cloud Tasks
+backs off and retries instead of every encode on the instance slowing down.
+"""
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+logger = logging.getLogger(__name__)
+
+# CPUs one libx264 encode can keep busy before adding more jobs stops helping
+CPUS_PER_ENCODE = float(os.environ.get("FFMPEG_CPUS_PER_ENCODE", "2"))
+
+# Explicit override for the concurrency limit (0 = derive from CPUs)
+MAX_CONCURRENT_ENV = int(os.environ.get("FFMPEG_MAX_CONCURRENT", "0"))
+
+# How long a request may wait for a free slot before being rejected
+ADMISSION_WAIT_SECONDS = float(os.environ.get("FFMPEG_ADMISSION_WAIT_SECONDS", "2"))
+
+# Suggested Retry-After for rejected requests
+RETRY_AFTER_SECONDS = int(os.environ.get("FFMPEG_RETRY_AFTER_SECONDS", "30"))
+
+# Number of recent queue-wait samples kept for /capacity
+WAIT_SAMPLE_SIZE = 200
+
+
+class CapacityExceeded(Exception):
+    """Raised when no encode slot is free (or the worker is draining)."""
+
+    def __init__(self, message: str, draining: bool = False):
+        super().__init__(message)
+        self.draining = draining
+
+
+def available_cpus() -> float:
+    """Return the CPUs available to this container.
+
+    Reads the cgroup CPU quota (what Cloud Run actually enforces), falling back
+    to the scheduler affinity mask and finally os.cpu_count().
+    """
+    # cgroup v2
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+            if quota != "max":
+                return max(float(quota) / float(period), 1.0)
+    except (OSError, ValueError):
+        pass
+
+    # cgroup v1
+    try:
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+            quota = int(f.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+            period = int(f.read())
+        if quota > 0 and period > 0:
+            return max(quota / period, 1.0)
+    except (OSError, ValueError):
+        pass
+
+    try:
+        return float(len(os.sched_getaffinity(0)))
+    except AttributeError:
+        return float(os.cpu_count() or 1)
+
+
+def default_max_concurrent() -> int:
+    """Concurrency limit from FFMPEG_MAX_CONCURRENT or the CPU budget."""
+    if MAX_CONCURRENT_ENV > 0:
+        return MAX_CONCURRENT_ENV
+    return max(1, int(available_cpus() // CPUS_PER_ENCODE))
+
+
+class AdmissionController:
+    """Counting limiter for in-flight FFmpeg jobs with drain support."""
+
+    def __init__(self, max_concurrent: int, wait_seconds: float = ADMISSION_WAIT_SECONDS):
+        self.max_concurrent = max_concurrent
+        self.wait_seconds = wait_seconds
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._in_flight = 0
+        self._waiting = 0
+        self._admitted = 0
+        self._rejected = 0
+        self._draining = False
+        self._waits = deque(maxlen=WAIT_SAMPLE_SIZE)
+
+    @contextmanager
+    def admit(self) -> Iterator[None]:
+        """Hold an encode slot for the duration of the block.
+
+        Raises:
+            CapacityExceeded: If no slot frees up within wait_seconds, or the
+                worker is draining for shutdown
+        """
+        if self._draining:
+            raise CapacityExceeded("Worker is shutting down", draining=True)
+
+        start = time.monotonic()
+        with self._lock:
+            self._waiting += 1
+        try:
+            acquired = self._slots.acquire(timeout=self.wait_seconds)
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+        wait = time.monotonic() - start
+        if not acquired:
+            with self._lock:
+                self._rejected += 1
+            raise CapacityExceeded(f"All {self.max_concurrent} encode slots busy")
+
+        if self._draining:
+            self._slots.release()
+            raise CapacityExceeded("Worker is shutting down", draining=True)
+
+        with self._lock:
+            self._in_flight += 1
+            self._admitted += 1
+            self._waits.append(wait)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                if self._in_flight == 0:
+                    self._idle.notify_all()
+            self._slots.release()
+
+    def begin_drain(self) -> None:
+        """Stop admitting new jobs; in-flight jobs keep running."""
+        if not self._draining:
+            self._draining = True
+            logger.info(f"Draining: {self._in_flight} FFmpeg job(s) in flight")
+
+    def wait_for_drain(self, timeout: float) -> bool:
+        """Block until no jobs are in flight. Returns True if drained."""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._in_flight == 0, timeout=timeout)
+
+    def stats(self) -> Dict:
+        """Return current capacity figures for the /capacity endpoint."""
+        with self._lock:
+            waits = sorted(self._waits)
+            in_flight = self._in_flight
+            waiting = self._waiting
+            admitted = self._admitted
+            rejected = self._rejected
+
+        cpus = available_cpus()
+        try:
+            load_1m, load_5m, load_15m = os.getloadavg()
+        except OSError:
+            load_1m = load_5m = load_15m = None
+
+        return {
+            "max_concurrent": self.max_concurrent,
+            "in_flight": in_flight,
+            "available_slots": max(self.max_concurrent - in_flight, 0),
+            "waiting": waiting,
+            "draining": self._draining,
+            "admitted_total": admitted,
+            "rejected_total": rejected,
+            "queue_wait_seconds": {
+                "avg": round(sum(waits) / len(waits), 4) if waits else 0.0,
+                "p95": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 4) if waits else 0.0,
+                "max": round(waits[-1], 4) if waits else 0.0,
+            },
+            "cpus": cpus,
+            "load_average": {"1m": load_1m, "5m": load_5m, "15m": load_15m},
+            "load_per_cpu": round(load_1m / cpus, 2) if load_1m is not None else None,
+        }
+
+
+# Global admission controller
+admission = AdmissionController(default_max_concurrent())
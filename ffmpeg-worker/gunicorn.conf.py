@@ -0,0 +1,49 @@
+"""Gunicorn configuration for NuuMee FFmpeg Worker.
+
+One process with a thread pool: FFmpeg does the heavy lifting in child
+processes, and admission.py caps how many encodes run at once. Threads are
+sized above that cap so over-capacity requests are answered with a fast 429
+instead of sitting in the accept queue.
+"""
+import os
+import signal
+
+from admission import default_max_concurrent
+
+bind = f":{os.environ.get('PORT', '8080')}"
+workers = 1
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", str(default_max_concurrent() + 4)))
+
+# Worker heartbeat timeout (gthread keeps heartbeating while encodes run)
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "600"))
+
+# Cloud Run sends SIGKILL 10s after SIGTERM
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", "9"))
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.environ.get("GUNICORN_LOG_LEVEL", "info")
+
+
+def post_worker_init(worker):
+    """Start draining admission on SIGTERM before gunicorn's own shutdown."""
+    from admission import admission
+
+    def handle_term(signum, frame):
+        admission.begin_drain()
+        worker.handle_exit(signum, frame)
+
+    signal.signal(signal.SIGTERM, handle_term)
+
+
+def worker_exit(server, worker):
+    """Log any jobs still running when the worker exits."""
+    from admission import admission
+
+    drained = admission.wait_for_drain(timeout=0)
+    if not drained:
+        server.log.warning(
+            f"Exiting with {admission.stats()['in_flight']} FFmpeg job(s) in flight; "
+            "Cloud Tasks will retry them"
+        )
@@ -1,13 +1,14 @@
 """FFmpeg Worker for NuuMee.
 
 Handles post-processing jobs that require FFmpeg:
-- Subtitle generation (STT + ASS burn)
+- Subtitle generation (STT + ASS burn, or soft mov_text track)
 - Watermark overlay
+- Post-processing chains (subtitles + watermark in a single encode)
 """
 import os
 import logging
 import subprocess
-import tempfile
+from typing import Optional
 
 from flask import Flask, request, jsonify
 
@@ -21,29 +22,192 @@ from shared.worker_utils import (
     download_from_gcs, upload_to_gcs,
     update_job_status, refund_credits,
     OUTPUT_BUCKET, ASSETS_BUCKET,
+    staging, StagingBudgetExceeded,
+    firestore_ops, operation_scope, instrument_firestore,
+    setup_logging, log_context, bind_log_fields, lazy,
+    job_profile, profile_job_data, ffmpeg_benchmark, record_ffmpeg_benchmark,
 )
+from style_registry import registry as style_registry
+from admission import admission, CapacityExceeded, RETRY_AFTER_SECONDS
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
+# Configure logging (JSON lines with job_id/trace_id; STT helpers sampled)
+setup_logging(sampling={"stt": 10, "stt_correction": 10, "subtitles": 10})
 logger = logging.getLogger(__name__)
 
+# Count Firestore reads/writes per job type (see /health)
+instrument_firestore()
+
 # Initialize Flask app
 app = Flask(__name__)
 
+# Subtitle delivery modes
+SUBTITLE_MODE_BURN = "burn"
+SUBTITLE_MODE_SOFT = "soft"
+
+# CPU cost of a libx264 burn per second of video, used to report savings of
+# soft-subtitle jobs until this instance has measured a real burn
+BURN_CPU_SECONDS_PER_VIDEO_SECOND = float(os.environ.get("BURN_CPU_SECONDS_PER_VIDEO_SECOND", "1.5"))
+_burn_cpu_rate: Optional[float] = None
+
+# Operation types accepted in a post_process_chain job
+CHAIN_OPERATION_TYPES = ("subtitles", "watermark")
+
+# Staging reservation per byte of input video (input + encoded output + audio)
+STAGING_BYTES_PER_INPUT_BYTE = 2.5
+STAGING_RESERVATION_OVERHEAD = 16 * 1024 * 1024
+
+# Warm the subtitle style registry so the first subtitle job doesn't block on GCS
+style_registry.start_background_load()
+
+
+def probe_duration(local_path: str) -> float:
+    """Return media duration in seconds (0 if unknown)."""
+    probe_cmd = [
+        "ffprobe", "-v", "quiet",
+        "-show_entries", "format=duration",
+        "-of", "default=noprint_wrappers=1:nokey=1",
+        local_path
+    ]
+    result = subprocess.run(probe_cmd, capture_output=True, text=True)
+    return float(result.stdout.strip()) if result.stdout.strip() else 0
+
+
+def run_ffmpeg(cmd: list, error_label: str) -> float:
+    """Run an FFmpeg command and return the CPU seconds it consumed.
+
+    The child is reaped with os.wait4 so its CPU time is measured on its own,
+    even when other encodes run concurrently in the same worker.
+
+    Raises:
+        RuntimeError: If FFmpeg exits non-zero
+    """
+    proc = subprocess.Popen(ffmpeg_benchmark(cmd), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    stderr = proc.stderr.read()
+    proc.stderr.close()
+    _, wait_status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(wait_status)
+    record_ffmpeg_benchmark(error_label, stderr)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{error_label} failed: {stderr}")
+    return usage.ru_utime + usage.ru_stime
+
+
+def estimate_burn_cpu_seconds(video_duration: float) -> float:
+    """Estimate the CPU cost of a libx264 subtitle burn for a video.
+
+    Uses the rate observed on this instance's burn jobs when available,
+    falling back to BURN_CPU_SECONDS_PER_VIDEO_SECOND.
+    """
+    rate = _burn_cpu_rate if _burn_cpu_rate is not None else BURN_CPU_SECONDS_PER_VIDEO_SECOND
+    return video_duration * rate
+
+
+def record_burn_cpu_rate(cpu_seconds: float, video_duration: float) -> None:
+    """Fold a measured burn into the per-instance CPU rate (EWMA)."""
+    global _burn_cpu_rate
+    if video_duration <= 0:
+        return
+    rate = cpu_seconds / video_duration
+    _burn_cpu_rate = rate if _burn_cpu_rate is None else 0.8 * _burn_cpu_rate + 0.2 * rate
+
+
+def estimate_staging_bytes(input_video_path: str) -> Optional[int]:
+    """Estimate peak staging bytes for a job from the input video size.
+
+    Returns None (use the default reservation) if the size can't be read.
+    """
+    try:
+        blob = get_storage().bucket(OUTPUT_BUCKET).get_blob(input_video_path)
+    except Exception as e:
+        logger.warning(f"Could not read size of {input_video_path}: {e}")
+        return None
+    if blob is None or blob.size is None:
+        return None
+    return int(blob.size * STAGING_BYTES_PER_INPUT_BYTE) + STAGING_RESERVATION_OVERHEAD
+
+
+def transcribe_video(job_id: str, local_video: str, stage, script_content: Optional[str]) -> tuple:
+    """Extract audio from a video and transcribe it with Google STT.
+
+    The extracted audio is deleted from staging as soon as STT is done.
+
+    Returns:
+        Tuple of (words, audio_duration_seconds)
+    """
+    from stt import transcribe_audio_sync, transcribe_audio_async
+    from stt_correction import correct_stt_with_script
+
+    # Check if video has audio stream
+    probe_audio_cmd = [
+        "ffprobe", "-v", "quiet",
+        "-select_streams", "a",
+        "-show_entries", "stream=codec_type",
+        "-of", "csv=p=0",
+        local_video
+    ]
+    probe_result = subprocess.run(probe_audio_cmd, capture_output=True, text=True)
+    has_audio = bool(probe_result.stdout.strip())
+
+    if not has_audio:
+        raise ValueError("Video has no audio track. Subtitles require audio for speech-to-text transcription.")
+
+    # Extract audio
+    local_audio = stage.path("audio.wav")
+    extract_cmd = [
+        "ffmpeg", "-i", local_video,
+        "-vn", "-acodec", "pcm_s16le",
+        "-ar", "16000", "-ac", "1",
+        local_audio, "-y"
+    ]
+    logger.debug("Extracting audio: %s", lazy(" ".join, extract_cmd))
+    result = subprocess.run(ffmpeg_benchmark(extract_cmd), capture_output=True, text=True)
+    record_ffmpeg_benchmark("Audio extraction", result.stderr)
+    if result.returncode != 0:
+        raise RuntimeError(f"Audio extraction failed: {result.stderr}")
+    stage.track(local_audio)
+
+    # Check audio duration
+    audio_duration = probe_duration(local_audio)
+    logger.info("Audio duration: %ss", audio_duration)
+
+    # Transcribe audio
+    if audio_duration < 60:
+        words = transcribe_audio_sync(local_audio)
+    else:
+        audio_gcs_path = f"temp/{job_id}/audio.wav"
+        upload_to_gcs(local_audio, OUTPUT_BUCKET, audio_gcs_path, content_type="audio/wav")
+        audio_gcs_uri = f"gs://{OUTPUT_BUCKET}/{audio_gcs_path}"
+        words = transcribe_audio_async(audio_gcs_uri)
+    stage.release(local_audio)
+
+    if not words:
+        raise ValueError("No words transcribed from audio")
+
+    logger.info("Transcribed %d words", len(words))
+
+    # Apply script correction if provided
+    if script_content:
+        words = correct_stt_with_script(words, script_content)
+        logger.info("After script correction: %d words", len(words))
+
+    return words, audio_duration
+
 
 def process_subtitles_job(job_data: dict) -> str:
     """Process a subtitle generation job.
 
     Steps:
     1. Download source video from GCS
-    2. Extract audio (FFmpeg)
-    3. Transcribe audio (Google STT)
-    4. Generate ASS subtitle file
-    5. Burn subtitles onto video (FFmpeg)
-    6. Upload result to GCS
+    2. Extract audio and transcribe (Google STT), or reuse a stored ASS file
+    3. Generate ASS + WebVTT subtitle files
+    4. Burn subtitles (re-encode) or mux a mov_text track (stream copy)
+    5. Upload result and sidecar subtitle files to GCS
+
+    Options:
+        subtitle_mode: "burn" (default) renders styled subtitles into the
+            video; "soft" muxes a caption track with -c copy, no re-encode
+        ass_path: GCS path of an existing ASS sidecar (from an earlier soft
+            job) to burn without re-running STT
 
     Args:
         job_data: Job document data
@@ -51,109 +215,142 @@ def process_subtitles_job(job_data: dict) -> str:
     Returns:
         Output video GCS path
     """
-    from stt import transcribe_audio_sync, transcribe_audio_async
-    from subtitles import generate_ass
-    from stt_correction import correct_stt_with_script
+    from subtitles import generate_ass, generate_vtt
 
     job_id = job_data["id"]
     input_video_path = job_data.get("input_video_path")
     options = job_data.get("options", {})
     subtitle_style = options.get("subtitle_style", "simple")
+    subtitle_mode = options.get("subtitle_mode", SUBTITLE_MODE_BURN)
     script_content = options.get("script_content")
+    existing_ass_path = options.get("ass_path")
 
     if not input_video_path:
         raise ValueError("No input_video_path provided")
+    if subtitle_mode not in (SUBTITLE_MODE_BURN, SUBTITLE_MODE_SOFT):
+        raise ValueError(f"Unsupported subtitle_mode: {subtitle_mode}")
+
+    output_dir = f"processed/{job_id}"
+    ass_gcs_path = f"{output_dir}/subtitles.ass"
+    vtt_gcs_path = f"{output_dir}/subtitles.vtt"
 
-    with tempfile.TemporaryDirectory() as tmpdir:
+    with staging.job(job_id, estimate_staging_bytes(input_video_path)) as stage:
         # Step 1: Download source video
-        local_video = os.path.join(tmpdir, "input.mp4")
+        local_video = stage.path("input.mp4")
         download_from_gcs(OUTPUT_BUCKET, input_video_path, local_video)
-
-        # Step 2: Check if video has audio stream
-        probe_audio_cmd = [
-            "ffprobe", "-v", "quiet",
-            "-select_streams", "a",
-            "-show_entries", "stream=codec_type",
-            "-of", "csv=p=0",
-            local_video
-        ]
-        probe_result = subprocess.run(probe_audio_cmd, capture_output=True, text=True)
-        has_audio = bool(probe_result.stdout.strip())
-
-        if not has_audio:
-            raise ValueError("Video has no audio track. Subtitles require audio for speech-to-text transcription.")
-
-        # Step 3: Extract audio
-        local_audio = os.path.join(tmpdir, "audio.wav")
-        extract_cmd = [
-            "ffmpeg", "-i", local_video,
-            "-vn", "-acodec", "pcm_s16le",
-            "-ar", "16000", "-ac", "1",
-            local_audio, "-y"
-        ]
-        logger.info(f"Extracting audio: {' '.join(extract_cmd)}")
-        result = subprocess.run(extract_cmd, capture_output=True, text=True)
-        if result.returncode != 0:
-            raise RuntimeError(f"Audio extraction failed: {result.stderr}")
-
-        # Check audio duration
-        probe_cmd = [
-            "ffprobe", "-v", "quiet",
-            "-show_entries", "format=duration",
-            "-of", "default=noprint_wrappers=1:nokey=1",
-            local_audio
-        ]
-        duration_result = subprocess.run(probe_cmd, capture_output=True, text=True)
-        audio_duration = float(duration_result.stdout.strip()) if duration_result.stdout.strip() else 0
-        logger.info(f"Audio duration: {audio_duration}s")
-
-        # Step 3: Transcribe audio
-        if audio_duration < 60:
-            words = transcribe_audio_sync(local_audio)
+        stage.track(local_video)
+
+        local_ass = stage.path("subtitles.ass")
+        local_vtt = stage.path("subtitles.vtt")
+
+        if existing_ass_path:
+            # Step 2-3 (burn later): reuse the ASS file from the soft job
+            if subtitle_mode != SUBTITLE_MODE_BURN:
+                raise ValueError("ass_path can only be used with subtitle_mode=burn")
+            download_from_gcs(OUTPUT_BUCKET, existing_ass_path, local_ass)
+            video_duration = probe_duration(local_video)
+            ass_gcs_path = existing_ass_path
+            vtt_gcs_path = None
         else:
-            audio_gcs_path = f"temp/{job_id}/audio.wav"
-            upload_to_gcs(local_audio, OUTPUT_BUCKET, audio_gcs_path, content_type="audio/wav")
-            audio_gcs_uri = f"gs://{OUTPUT_BUCKET}/{audio_gcs_path}"
-            words = transcribe_audio_async(audio_gcs_uri)
-
-        if not words:
-            raise ValueError("No words transcribed from audio")
-
-        logger.info(f"Transcribed {len(words)} words")
-
-        # Step 3b: Apply script correction if provided
-        if script_content:
-            logger.info("Applying script-based STT correction")
-            words = correct_stt_with_script(words, script_content)
-            logger.info(f"After correction: {len(words)} words")
-
-        # Step 4: Generate ASS subtitle file
-        ass_content = generate_ass(words, style_id=subtitle_style)
-        local_ass = os.path.join(tmpdir, "subtitles.ass")
-        with open(local_ass, "w", encoding="utf-8") as f:
-            f.write(ass_content)
-
-        # Step 5: Burn subtitles onto video
-        local_output = os.path.join(tmpdir, "output.mp4")
-        burn_cmd = [
-            "ffmpeg", "-i", local_video,
-            "-vf", f"ass={local_ass}",
-            "-c:v", "libx264", "-crf", "18",
-            "-c:a", "copy",
-            local_output, "-y"
-        ]
-        logger.info(f"Burning subtitles: {' '.join(burn_cmd)}")
-        result = subprocess.run(burn_cmd, capture_output=True, text=True)
-        if result.returncode != 0:
-            raise RuntimeError(f"Subtitle burning failed: {result.stderr}")
-
-        # Step 6: Upload result to GCS
-        output_gcs_path = f"processed/{job_id}/subtitled.mp4"
+            # Step 2: Transcribe
+            words, video_duration = transcribe_video(job_id, local_video, stage, script_content)
+
+            # Step 3: Generate subtitle files
+            with open(local_ass, "w", encoding="utf-8") as f:
+                f.write(generate_ass(words, style_id=subtitle_style))
+            with open(local_vtt, "w", encoding="utf-8") as f:
+                f.write(generate_vtt(words))
+
+        # Step 4: Burn or mux subtitles
+        local_output = stage.path("output.mp4")
+        if subtitle_mode == SUBTITLE_MODE_SOFT:
+            mux_cmd = [
+                "ffmpeg", "-i", local_video, "-i", local_vtt,
+                "-map", "0:v", "-map", "0:a?", "-map", "1:0",
+                "-c", "copy", "-c:s", "mov_text",
+                "-metadata:s:s:0", "language=eng",
+                "-movflags", "+faststart",
+                local_output, "-y"
+            ]
+            logger.debug("Muxing soft subtitles: %s", lazy(" ".join, mux_cmd))
+            cpu_seconds = run_ffmpeg(mux_cmd, "Subtitle muxing")
+            estimated_burn = estimate_burn_cpu_seconds(video_duration)
+            cpu_stats = {
+                "cpu_seconds": round(cpu_seconds, 3),
+                "estimated_burn_cpu_seconds": round(estimated_burn, 3),
+                "cpu_seconds_saved": round(max(estimated_burn - cpu_seconds, 0.0), 3),
+            }
+        else:
+            burn_cmd = [
+                "ffmpeg", "-i", local_video,
+                "-vf", f"ass={local_ass}",
+                "-c:v", "libx264", "-crf", "18",
+                "-c:a", "copy",
+                local_output, "-y"
+            ]
+            logger.debug("Burning subtitles: %s", lazy(" ".join, burn_cmd))
+            cpu_seconds = run_ffmpeg(burn_cmd, "Subtitle burning")
+            record_burn_cpu_rate(cpu_seconds, video_duration)
+            cpu_stats = {
+                "cpu_seconds": round(cpu_seconds, 3),
+                "cpu_seconds_saved": 0.0,
+            }
+
+        logger.info("Subtitles encoded: mode=%s, cpu_stats=%s", subtitle_mode, cpu_stats)
+        stage.track(local_output)
+        stage.release(local_video)
+
+        # Step 5: Upload result and sidecars to GCS
+        output_gcs_path = f"{output_dir}/subtitled.mp4"
         upload_to_gcs(local_output, OUTPUT_BUCKET, output_gcs_path)
+        if not existing_ass_path:
+            upload_to_gcs(local_ass, OUTPUT_BUCKET, ass_gcs_path, content_type="text/x-ssa")
+            upload_to_gcs(local_vtt, OUTPUT_BUCKET, vtt_gcs_path, content_type="text/vtt")
+
+        get_firestore().collection("jobs").document(job_id).update({
+            "subtitle_mode": subtitle_mode,
+            "subtitle_ass_path": ass_gcs_path,
+            "subtitle_vtt_path": vtt_gcs_path,
+            "processing_stats": {
+                **cpu_stats,
+                "video_duration_seconds": round(video_duration, 3),
+            },
+        })
 
         return output_gcs_path
 
 
+def build_watermark_filter(
+    video_label: str,
+    watermark_label: str,
+    position: str = "bottom-right",
+    opacity: float = 0.7,
+    margin_percent: float = 5,
+    watermark_stream: str = "watermark",
+) -> str:
+    """Build the filter graph fragment that overlays a watermark on a video.
+
+    The fragment ends at the overlay output (unlabelled), so callers can
+    append further filters or an output label. ``watermark_stream`` names the
+    intermediate alpha-adjusted stream and must be unique within a graph.
+    """
+    margin = f"(W*{margin_percent}/100)"
+    positions = {
+        "bottom-right": f"W-w-{margin}:H-h-{margin}",
+        "bottom-left": f"{margin}:H-h-{margin}",
+        "top-right": f"W-w-{margin}:{margin}",
+        "top-left": f"{margin}:{margin}",
+    }
+    overlay_pos = positions.get(position, positions["bottom-right"])
+
+    return (
+        f"[{watermark_label}]format=rgba,"
+        f"geq=r='r(X,Y)':g='g(X,Y)':b='b(X,Y)':a='{opacity}*alpha(X,Y)'"
+        f"[{watermark_stream}];"
+        f"[{video_label}][{watermark_stream}]overlay={overlay_pos}:format=auto"
+    )
+
+
 def process_watermark_job(job_data: dict) -> str:
     """Process a watermark overlay job.
 
@@ -181,34 +378,25 @@ def process_watermark_job(job_data: dict) -> str:
     if not input_video_path:
         raise ValueError("No input_video_path provided")
 
-    with tempfile.TemporaryDirectory() as tmpdir:
+    with staging.job(job_id, estimate_staging_bytes(input_video_path)) as stage:
         # Step 1: Download source video
-        local_video = os.path.join(tmpdir, "input.mp4")
+        local_video = stage.path("input.mp4")
         download_from_gcs(OUTPUT_BUCKET, input_video_path, local_video)
+        stage.track(local_video)
 
         # Step 2: Download watermark image
-        local_watermark = os.path.join(tmpdir, "watermark.png")
+        local_watermark = stage.path("watermark.png")
         download_from_gcs(ASSETS_BUCKET, watermark_path, local_watermark)
+        stage.track(local_watermark)
 
         # Step 3: Build FFmpeg overlay filter
-        margin = f"(W*{margin_percent}/100)"
-        positions = {
-            "bottom-right": f"W-w-{margin}:H-h-{margin}",
-            "bottom-left": f"{margin}:H-h-{margin}",
-            "top-right": f"W-w-{margin}:{margin}",
-            "top-left": f"{margin}:{margin}",
-        }
-        overlay_pos = positions.get(position, positions["bottom-right"])
-
         filter_complex = (
-            f"[1:v]format=rgba,"
-            f"geq=r='r(X,Y)':g='g(X,Y)':b='b(X,Y)':a='{opacity}*alpha(X,Y)'"
-            f"[watermark];"
-            f"[0:v][watermark]overlay={overlay_pos}:format=auto,format=yuv420p"
+            build_watermark_filter("0:v", "1:v", position, opacity, margin_percent)
+            + ",format=yuv420p"
         )
 
         # Step 4: Apply watermark
-        local_output = os.path.join(tmpdir, "output.mp4")
+        local_output = stage.path("output.mp4")
         overlay_cmd = [
             "ffmpeg",
             "-i", local_video,
@@ -218,10 +406,13 @@ def process_watermark_job(job_data: dict) -> str:
             "-c:a", "copy",
             local_output, "-y"
         ]
-        logger.info(f"Applying watermark with opacity={opacity}, position={position}")
-        result = subprocess.run(overlay_cmd, capture_output=True, text=True)
+        logger.info("Applying watermark with opacity=%s, position=%s", opacity, position)
+        result = subprocess.run(ffmpeg_benchmark(overlay_cmd), capture_output=True, text=True)
+        record_ffmpeg_benchmark("Watermark overlay", result.stderr)
         if result.returncode != 0:
             raise RuntimeError(f"Watermark overlay failed: {result.stderr}")
+        stage.track(local_output)
+        stage.release(local_video, local_watermark)
 
         # Step 5: Upload result to GCS
         output_gcs_path = f"processed/{job_id}/watermarked.mp4"
@@ -230,27 +421,194 @@ def process_watermark_job(job_data: dict) -> str:
         return output_gcs_path
 
 
-def process_job(job_id: str):
-    """Process a single job."""
+def process_chain_job(job_data: dict) -> str:
+    """Process an ordered chain of post-processing operations in one encode.
+
+    options.operations is a list applied in order, e.g.
+    [{"type": "subtitles", "subtitle_style": "simple"}, {"type": "watermark"}].
+    Burned subtitles and watermarks become stages of a single filter graph
+    (ass -> overlay), so the video is decoded and encoded exactly once.
+    Soft subtitles are muxed as a mov_text track in the same pass.
+
+    Args:
+        job_data: Job document data
+
+    Returns:
+        Output video GCS path
+    """
+    from subtitles import generate_ass, generate_vtt
+
+    job_id = job_data["id"]
+    input_video_path = job_data.get("input_video_path")
+    operations = job_data.get("options", {}).get("operations", [])
+
+    if not input_video_path:
+        raise ValueError("No input_video_path provided")
+    if not operations:
+        raise ValueError("No post-processing operations provided")
+
+    for op in operations:
+        if op.get("type") not in CHAIN_OPERATION_TYPES:
+            raise ValueError(f"Unsupported post-processing operation: {op.get('type')}")
+    if sum(1 for op in operations if op["type"] == "subtitles") > 1:
+        raise ValueError("At most one subtitles operation is supported per chain")
+
+    output_dir = f"processed/{job_id}"
+    job_update = {}
+
+    with staging.job(job_id, estimate_staging_bytes(input_video_path)) as stage:
+        # Step 1: Download source video
+        local_video = stage.path("input.mp4")
+        download_from_gcs(OUTPUT_BUCKET, input_video_path, local_video)
+        stage.track(local_video)
+        video_duration = probe_duration(local_video)
+
+        inputs = ["-i", local_video]
+        filters = []
+        video_label = "0:v"
+        soft_subtitle_input = None
+
+        # Step 2: Build one filter graph from the ordered operations
+        for index, op in enumerate(operations):
+            out_label = f"v{index}"
+
+            if op["type"] == "subtitles":
+                words, _ = transcribe_video(job_id, local_video, stage, op.get("script_content"))
+                local_ass = stage.path("subtitles.ass")
+                local_vtt = stage.path("subtitles.vtt")
+                with open(local_ass, "w", encoding="utf-8") as f:
+                    f.write(generate_ass(words, style_id=op.get("subtitle_style", "simple")))
+                with open(local_vtt, "w", encoding="utf-8") as f:
+                    f.write(generate_vtt(words))
+
+                subtitle_mode = op.get("subtitle_mode", SUBTITLE_MODE_BURN)
+                if subtitle_mode == SUBTITLE_MODE_SOFT:
+                    soft_subtitle_input = len(inputs) // 2
+                    inputs += ["-i", local_vtt]
+                    continue
+
+                filters.append(f"[{video_label}]ass={local_ass}[{out_label}]")
+                upload_to_gcs(local_ass, OUTPUT_BUCKET, f"{output_dir}/subtitles.ass", content_type="text/x-ssa")
+                upload_to_gcs(local_vtt, OUTPUT_BUCKET, f"{output_dir}/subtitles.vtt", content_type="text/vtt")
+                job_update.update({
+                    "subtitle_mode": subtitle_mode,
+                    "subtitle_ass_path": f"{output_dir}/subtitles.ass",
+                    "subtitle_vtt_path": f"{output_dir}/subtitles.vtt",
+                })
+
+            elif op["type"] == "watermark":
+                local_watermark = stage.path(f"watermark{index}.png")
+                download_from_gcs(ASSETS_BUCKET, op.get("watermark_path", "assets/watermark.png"), local_watermark)
+                stage.track(local_watermark)
+                watermark_input = len(inputs) // 2
+                inputs += ["-i", local_watermark]
+                filters.append(
+                    build_watermark_filter(
+                        video_label,
+                        f"{watermark_input}:v",
+                        op.get("position", "bottom-right"),
+                        op.get("opacity", 0.7),
+                        op.get("margin_percent", 5),
+                        watermark_stream=f"wm{index}",
+                    )
+                    + f"[{out_label}]"
+                )
+
+            video_label = out_label
+
+        # Step 3: Encode exactly once
+        local_output = stage.path("output.mp4")
+        cmd = ["ffmpeg", *inputs]
+        if filters:
+            filters.append(f"[{video_label}]format=yuv420p[vout]")
+            cmd += [
+                "-filter_complex", ";".join(filters),
+                "-map", "[vout]", "-map", "0:a?",
+                "-c:v", "libx264", "-crf", "18",
+            ]
+        else:
+            cmd += ["-map", "0:v", "-map", "0:a?", "-c:v", "copy"]
+        cmd += ["-c:a", "copy"]
+        if soft_subtitle_input is not None:
+            cmd += [
+                "-map", f"{soft_subtitle_input}:0", "-c:s", "mov_text",
+                "-metadata:s:s:0", "language=eng",
+            ]
+        cmd += ["-movflags", "+faststart", local_output, "-y"]
+
+        logger.info("Running %d-operation chain in a single encode", len(operations))
+        cpu_seconds = run_ffmpeg(cmd, "Post-processing chain")
+        if filters:
+            record_burn_cpu_rate(cpu_seconds, video_duration)
+        stage.track(local_output)
+        stage.release(local_video)
+
+        if soft_subtitle_input is not None:
+            upload_to_gcs(local_ass, OUTPUT_BUCKET, f"{output_dir}/subtitles.ass", content_type="text/x-ssa")
+            upload_to_gcs(local_vtt, OUTPUT_BUCKET, f"{output_dir}/subtitles.vtt", content_type="text/vtt")
+            job_update.update({
+                "subtitle_mode": SUBTITLE_MODE_SOFT,
+                "subtitle_ass_path": f"{output_dir}/subtitles.ass",
+                "subtitle_vtt_path": f"{output_dir}/subtitles.vtt",
+            })
+
+        # Step 4: Upload result to GCS
+        output_gcs_path = f"{output_dir}/processed.mp4"
+        upload_to_gcs(local_output, OUTPUT_BUCKET, output_gcs_path)
+
+        # Each operation as its own job would have been a separate encode
+        encodes_saved = max(len(operations) - 1, 0) if filters else len(operations)
+        get_firestore().collection("jobs").document(job_id).update({
+            **job_update,
+            "processing_stats": {
+                "cpu_seconds": round(cpu_seconds, 3),
+                "encodes": 1 if filters else 0,
+                "encodes_saved": encodes_saved,
+                "cpu_seconds_saved": round(encodes_saved * estimate_burn_cpu_seconds(video_duration), 3),
+                "video_duration_seconds": round(video_duration, 3),
+            },
+        })
+
+        return output_gcs_path
+
+
+def process_job(job_id: str, profile: bool = False):
+    """Process a single job.
+
+    Args:
+        job_id: Job document ID
+        profile: Profile the job (task payload flag; see profiling.py)
+    """
+    with log_context(job_id=job_id), operation_scope("job") as ops, \
+            job_profile(job_id, "ffmpeg-worker", requested=profile):
+        _process_job(job_id, ops)
+
+
+def _process_job(job_id: str, ops):
     db = get_firestore()
     job_ref = db.collection("jobs").document(job_id)
     job_doc = job_ref.get()
 
     if not job_doc.exists:
-        logger.error(f"Job {job_id} not found")
+        logger.error("Job %s not found", job_id)
         return
 
     job_data = job_doc.to_dict()
     job_data["id"] = job_id
     job_type = job_data.get("job_type", "")
+    ops.name = f"job:{job_type}"
     user_id = job_data["user_id"]
     credits_charged = job_data.get("credits_charged", 0)
+    if job_data.get("trace_id"):
+        bind_log_fields(trace_id=job_data["trace_id"])
+    profile_job_data(job_data, job_ref)
 
-    logger.info(f"Processing job {job_id}: type={job_type}")
+    logger.info("Processing job %s: type=%s", job_id, job_type)
 
     JOB_HANDLERS = {
         "subtitles": process_subtitles_job,
         "watermark": process_watermark_job,
+        "post_process_chain": process_chain_job,
     }
 
     try:
@@ -262,10 +620,15 @@ def process_job(job_id: str):
 
         output_path = handler(job_data)
         update_job_status(job_id, "completed", output_video_path=output_path)
-        logger.info(f"Job {job_id} completed successfully")
+        logger.info("Job %s completed successfully", job_id)
+
+    except StagingBudgetExceeded:
+        # Not a job failure: put it back so the Cloud Tasks retry picks it up
+        update_job_status(job_id, "queued")
+        raise
 
     except Exception as e:
-        logger.exception(f"Error processing job {job_id}: {e}")
+        logger.exception("Error processing job %s: %s", job_id, e)
         update_job_status(job_id, "failed", error_message=str(e))
         if credits_charged > 0:
             refund_credits(user_id, credits_charged, job_id)
@@ -274,6 +637,7 @@ def process_job(job_id: str):
 @app.route("/", methods=["POST"])
 def handle_task():
     """Handle incoming Cloud Tasks request."""
+    job_id = None
     try:
         payload = request.get_json()
         if not payload:
@@ -283,11 +647,20 @@ def handle_task():
         if not job_id:
             return jsonify({"error": "Missing job_id"}), 400
 
-        logger.info(f"Received task for job: {job_id}")
-        process_job(job_id)
+        logger.info("Received task for job: %s", job_id)
+        with admission.admit():
+            process_job(job_id, profile=bool(payload.get("profile")))
 
         return jsonify({"status": "ok", "job_id": job_id}), 200
 
+    except (CapacityExceeded, StagingBudgetExceeded) as e:
+        # 429/503 make Cloud Tasks back off and retry later
+        logger.warning(f"Rejecting task for job {job_id}: {e}")
+        status_code = 503 if getattr(e, "draining", False) else 429
+        response = jsonify({"error": str(e), "job_id": job_id})
+        response.headers["Retry-After"] = str(RETRY_AFTER_SECONDS)
+        return response, status_code
+
     except Exception as e:
         logger.exception(f"Error handling task: {e}")
         return jsonify({"error": str(e)}), 500
@@ -296,7 +669,37 @@ def handle_task():
 @app.route("/health", methods=["GET"])
 def health():
     """Health check endpoint."""
-    return jsonify({"status": "healthy", "service": "nuumee-ffmpeg-worker"}), 200
+    return jsonify({
+        "status": "healthy",
+        "service": "nuumee-ffmpeg-worker",
+        "styles_version": style_registry.status()["version"],
+        "firestore": firestore_ops.stats(),
+    }), 200
+
+
+@app.route("/capacity", methods=["GET"])
+def capacity():
+    """Report in-flight encodes, queue wait, load and staging usage for this instance."""
+    return jsonify({**admission.stats(), "staging": staging.stats()}), 200
+
+
+@app.route("/styles", methods=["GET"])
+def styles_status():
+    """Return the loaded subtitle style config version and available styles."""
+    from subtitles import get_available_styles
+
+    return jsonify({
+        **style_registry.status(),
+        "styles": get_available_styles(),
+    }), 200
+
+
+@app.route("/styles/reload", methods=["POST"])
+def styles_reload():
+    """Force a reload of subtitle-styles.json from GCS."""
+    config = style_registry.refresh(force=True)
+    logger.info(f"Subtitle styles reloaded: version={config.version}")
+    return jsonify(style_registry.status()), 200
 
 
 @app.route("/ffmpeg-check", methods=["GET"])
@@ -8,6 +8,12 @@ and the FFmpeg worker, including:
 - Firestore operations (job status updates, credit refunds)
 - Stripe utilities (auto-refill)
 - Authentication utilities (service account, signing credentials)
+- Staging budget for per-job temp files on memory-backed /tmp
+- Job-scoped read cache for Firestore documents
+- Firestore operation accounting (reads, writes, queries, retries)
+- Job stage timeline (per-stage timings written with job status updates)
+- Structured JSON logging with job/trace context and sampling
+- On-demand per-job profiling (cProfile + FFmpeg -benchmark)
 """
 
 from .gcp import get_firestore, get_storage, get_secret, PROJECT_ID
@@ -33,6 +39,38 @@ from .config import (
     ASSETS_BUCKET,
     CREDIT_PACKAGES,
 )
+from .doc_cache import (
+    read_scope,
+    get_document,
+    read_stats,
+)
+from .firestore_metrics import (
+    firestore_ops,
+    operation_scope,
+    instrument_firestore,
+)
+from .timeline import (
+    JobTimeline,
+    job_timeline,
+    current_timeline,
+)
+from .logging_utils import (
+    setup_logging,
+    log_context,
+    bind_log_fields,
+    lazy,
+)
+from .profiling import (
+    job_profile,
+    profile_job_data,
+    ffmpeg_benchmark,
+    record_ffmpeg_benchmark,
+)
+from .staging import (
+    staging,
+    StagingManager,
+    StagingBudgetExceeded,
+)
 
 __all__ = [
     # GCP clients
@@ -58,4 +96,30 @@ __all__ = [
     "OUTPUT_BUCKET",
     "ASSETS_BUCKET",
     "CREDIT_PACKAGES",
+    # Document read cache
+    "read_scope",
+    "get_document",
+    "read_stats",
+    # Firestore operation accounting
+    "firestore_ops",
+    "operation_scope",
+    "instrument_firestore",
+    # Job stage timeline
+    "JobTimeline",
+    "job_timeline",
+    "current_timeline",
+    # Logging
+    "setup_logging",
+    "log_context",
+    "bind_log_fields",
+    "lazy",
+    # Profiling
+    "job_profile",
+    "profile_job_data",
+    "ffmpeg_benchmark",
+    "record_ffmpeg_benchmark",
+    # Staging
+    "staging",
+    "StagingManager",
+    "StagingBudgetExceeded",
 ]
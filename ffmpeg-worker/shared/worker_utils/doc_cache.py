@@ -0,0 +1,104 @@
+"""Job-scoped read-through cache of Firestore document reads.
+
+Processing one job reads the job document and the user document from
+several helpers (free tier check, auto-refill check). Inside read_scope()
+get_document() memoizes data by document path, so each document costs one
+read per job. Helpers that write a document call invalidate() so later
+reads in the same job see the change.
+
+Reads inside transactions must not use this cache; they call
+ref.get(transaction=...) directly.
+"""
+
+import copy
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class ReadCache:
+    """Document data by path for one unit of work."""
+
+    def __init__(self, scope: str):
+        self.scope = scope
+        self._docs: Dict[str, Optional[dict]] = {}
+        self.reads = 0
+        self.hits = 0
+
+    def lookup(self, path: str):
+        if path not in self._docs:
+            return _MISSING
+        self.hits += 1
+        return copy.deepcopy(self._docs[path])
+
+    def store(self, path: str, data: Optional[dict]) -> None:
+        self.reads += 1
+        self._docs[path] = copy.deepcopy(data)
+
+    def invalidate(self, path: str) -> None:
+        self._docs.pop(path, None)
+
+
+_current: ContextVar[Optional[ReadCache]] = ContextVar("firestore_read_cache", default=None)
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, Dict[str, int]] = {}
+
+
+@contextmanager
+def read_scope(scope: str) -> Iterator[ReadCache]:
+    """Memoize get_document() reads until the block exits.
+
+    Args:
+        scope: Name of the unit of work (e.g. "process_job") in read_stats()
+    """
+    cache = ReadCache(scope)
+    token = _current.set(cache)
+    try:
+        yield cache
+    finally:
+        _current.reset(token)
+        if cache.reads or cache.hits:
+            with _stats_lock:
+                entry = _stats.setdefault(scope, {"scopes": 0, "reads": 0, "reads_saved": 0})
+                entry["scopes"] += 1
+                entry["reads"] += cache.reads
+                entry["reads_saved"] += cache.hits
+            logger.debug(f"{scope}: {cache.reads} document reads, {cache.hits} saved")
+
+
+def get_document(ref) -> Optional[dict]:
+    """Data of document ``ref`` (None if missing), read through the scope cache.
+
+    Outside read_scope() this is a plain ref.get().
+    """
+    cache = _current.get()
+    if cache is not None:
+        data = cache.lookup(ref.path)
+        if data is not _MISSING:
+            return data
+
+    doc = ref.get()
+    data = doc.to_dict() if doc.exists else None
+    if cache is not None:
+        cache.store(ref.path, data)
+    return data
+
+
+def invalidate(ref) -> None:
+    """Drop ``ref`` from the current scope's cache after writing it."""
+    cache = _current.get()
+    if cache is not None:
+        cache.invalidate(ref.path)
+
+
+def read_stats() -> Dict[str, Dict[str, int]]:
+    """Reads and reads saved per scope name since startup."""
+    with _stats_lock:
+        return {scope: dict(entry) for scope, entry in sorted(_stats.items())}
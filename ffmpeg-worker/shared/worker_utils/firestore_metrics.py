@@ -0,0 +1,349 @@
+"""Firestore operation accounting.
+
+Counts document reads, writes, queries and transaction retries, with
+latency per call site, and attributes the counts to the current scope (a
+job type in the workers, a route in the API).
+
+instrument_firestore() wraps the public operations of the
+google-cloud-firestore document, query, batch, transaction and client
+classes (sync and async) once per process, so every client instance is
+covered without changing call sites. A call made inside another
+instrumented call (DocumentReference.set committing a batch, Query.get
+streaming) is counted once, by the outermost.
+
+Billing approximation: a document get is one read, a query one read per
+returned document (at least one), an aggregation one read, every written
+document one write.
+"""
+
+import importlib
+import inspect
+import logging
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+KINDS = ("reads", "writes", "queries", "transaction_retries")
+
+# Counts made outside any scope (background threads, startup)
+UNSCOPED = "background"
+
+_active: ContextVar[bool] = ContextVar("firestore_op_active", default=False)
+
+
+class OperationScope:
+    """Firestore totals of one unit of work (a job or a request)."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.reads = 0
+        self.writes = 0
+        self.queries = 0
+        self.transaction_retries = 0
+        self._lock = threading.Lock()
+
+    def add(self, kind: str, n: int) -> None:
+        with self._lock:
+            setattr(self, kind, getattr(self, kind) + n)
+
+    def totals(self) -> Dict[str, int]:
+        with self._lock:
+            return {kind: getattr(self, kind) for kind in KINDS}
+
+
+_scope: ContextVar[Optional[OperationScope]] = ContextVar("firestore_op_scope", default=None)
+
+
+class FirestoreOps:
+    """Process-wide Firestore counters by scope and latency by call site."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._scopes: Dict[str, Dict[str, int]] = {}
+        # (call site, op) -> [calls, seconds total, seconds max]
+        self._sites: Dict[Tuple[str, str], List[float]] = {}
+
+    def count(self, kind: str, n: int = 1) -> None:
+        """Add ``n`` to ``kind`` of the current scope."""
+        if not n:
+            return
+        scope = _scope.get()
+        if scope is not None:
+            scope.add(kind, n)
+        else:
+            self._add(UNSCOPED, {kind: n}, 0)
+
+    def record_scope(self, scope: OperationScope) -> None:
+        """Add a finished scope's totals under its name."""
+        self._add(scope.name, scope.totals(), 1)
+
+    def _add(self, name: str, totals: Dict[str, int], scopes: int) -> None:
+        with self._lock:
+            entry = self._scopes.get(name)
+            if entry is None:
+                entry = self._scopes[name] = {"scopes": 0, **{kind: 0 for kind in KINDS}}
+            entry["scopes"] += scopes
+            for kind, n in totals.items():
+                entry[kind] += n
+
+    def observe(self, site: str, op: str, seconds: float) -> None:
+        key = (site, op)
+        with self._lock:
+            entry = self._sites.get(key)
+            if entry is None:
+                entry = self._sites[key] = [0, 0.0, 0.0]
+            entry[0] += 1
+            entry[1] += seconds
+            if seconds > entry[2]:
+                entry[2] = seconds
+
+    def stats(self) -> Dict:
+        with self._lock:
+            scopes = {name: dict(entry) for name, entry in sorted(self._scopes.items())}
+            sites = [
+                {
+                    "site": site,
+                    "op": op,
+                    "calls": int(calls),
+                    "seconds_total": round(total, 6),
+                    "avg_ms": round(total / calls * 1000, 2) if calls else 0,
+                    "max_ms": round(peak * 1000, 2),
+                }
+                for (site, op), (calls, total, peak) in self._sites.items()
+            ]
+        sites.sort(key=lambda entry: entry["seconds_total"], reverse=True)
+        return {"scopes": scopes, "call_sites": sites}
+
+
+# Process-wide counters
+firestore_ops = FirestoreOps()
+
+
+@contextmanager
+def operation_scope(name: str) -> Iterator[OperationScope]:
+    """Attribute Firestore operations in the block to ``name``.
+
+    The name can be changed on the yielded scope before the block exits
+    (e.g. once the job type is known).
+    """
+    scope = OperationScope(name)
+    token = _scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _scope.reset(token)
+        firestore_ops.record_scope(scope)
+
+
+def current_scope() -> Optional[OperationScope]:
+    return _scope.get()
+
+
+# =============================================================================
+# Instrumentation
+# =============================================================================
+
+def _call_site() -> str:
+    """module.function of the first caller outside google.* and this module."""
+    frame = sys._getframe(2)
+    while frame is not None and frame.f_globals.get("__name__", "").startswith(("google.", __name__)):
+        frame = frame.f_back
+    if frame is None:
+        return "unknown"
+    return f"{frame.f_globals.get('__name__', '?')}.{frame.f_code.co_name}"
+
+
+def _pending_writes(instance) -> int:
+    return len(getattr(instance, "_write_pbs", None) or ())
+
+
+def _record(op: str, site: str, seconds: float, counts: Dict[str, int]) -> None:
+    firestore_ops.observe(site, op, seconds)
+    for kind, n in counts.items():
+        firestore_ops.count(kind, n)
+
+
+def _count_iter(iterator, op, site, start, counts_for):
+    yielded = 0
+    try:
+        while True:
+            token = _active.set(True)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                _active.reset(token)
+            yielded += 1
+            yield item
+    finally:
+        _record(op, site, time.perf_counter() - start, counts_for(yielded))
+
+
+async def _count_aiter(iterator, op, site, start, counts_for):
+    yielded = 0
+    try:
+        while True:
+            token = _active.set(True)
+            try:
+                item = await iterator.__anext__()
+            except StopAsyncIteration:
+                return
+            finally:
+                _active.reset(token)
+            yielded += 1
+            yield item
+    finally:
+        _record(op, site, time.perf_counter() - start, counts_for(yielded))
+
+
+# counts(instance, args, kwargs, pending_writes, result) -> {kind: n}; for
+# streaming results ``result`` is the number of items yielded.
+Counts = Callable[..., Dict[str, int]]
+
+
+def _one_read(instance, args, kwargs, pending, result):
+    return {"reads": 1}
+
+
+def _one_write(instance, args, kwargs, pending, result):
+    return {"writes": 1}
+
+
+def _query(instance, args, kwargs, pending, result):
+    returned = result if isinstance(result, int) else len(result)
+    return {"queries": 1, "reads": max(1, returned)}
+
+
+def _aggregation(instance, args, kwargs, pending, result):
+    return {"queries": 1, "reads": 1}
+
+
+def _get_all(instance, args, kwargs, pending, result):
+    return {"reads": result if isinstance(result, int) else len(result)}
+
+
+def _commit(instance, args, kwargs, pending, result):
+    return {"writes": pending}
+
+
+def _begin(instance, args, kwargs, pending, result):
+    retry_id = kwargs.get("retry_id", args[0] if args else None)
+    return {"transaction_retries": 1 if retry_id is not None else 0}
+
+
+def _wrap(cls, name: str, op: str, counts: Counts) -> None:
+    original = getattr(cls, name, None)
+    if original is None or getattr(original, "_firestore_ops", False):
+        return
+
+    if inspect.iscoroutinefunction(original):
+        async def wrapper(self, *args, **kwargs):
+            if _active.get():
+                return await original(self, *args, **kwargs)
+            pending = _pending_writes(self)
+            site = _call_site()
+            start = time.perf_counter()
+            token = _active.set(True)
+            try:
+                result = await original(self, *args, **kwargs)
+            except Exception:
+                firestore_ops.observe(site, op, time.perf_counter() - start)
+                raise
+            finally:
+                _active.reset(token)
+            _record(op, site, time.perf_counter() - start, counts(self, args, kwargs, pending, result))
+            return result
+    else:
+        def wrapper(self, *args, **kwargs):
+            if _active.get():
+                return original(self, *args, **kwargs)
+            pending = _pending_writes(self)
+            site = _call_site()
+            start = time.perf_counter()
+            token = _active.set(True)
+            try:
+                result = original(self, *args, **kwargs)
+            except Exception:
+                firestore_ops.observe(site, op, time.perf_counter() - start)
+                raise
+            finally:
+                _active.reset(token)
+
+            def counts_for(yielded):
+                return counts(self, args, kwargs, pending, yielded)
+
+            # Streams run when iterated; count and time them until exhausted
+            if hasattr(result, "__next__"):
+                return _count_iter(result, op, site, start, counts_for)
+            if hasattr(result, "__anext__"):
+                return _count_aiter(result, op, site, start, counts_for)
+            _record(op, site, time.perf_counter() - start, counts(self, args, kwargs, pending, result))
+            return result
+
+    wrapper.__name__ = getattr(original, "__name__", name)
+    wrapper.__doc__ = getattr(original, "__doc__", None)
+    wrapper.__wrapped__ = original
+    wrapper._firestore_ops = True
+    setattr(cls, name, wrapper)
+
+
+_DOCUMENT_OPS = [
+    ("get", "document.get", _one_read),
+    ("create", "document.create", _one_write),
+    ("set", "document.set", _one_write),
+    ("update", "document.update", _one_write),
+    ("delete", "document.delete", _one_write),
+]
+
+_QUERY_OPS = [
+    ("get", "query.get", _query),
+    ("stream", "query.stream", _query),
+]
+
+# (module, class, [(method, op, counts)])
+_TARGETS = [
+    ("google.cloud.firestore_v1.document", "DocumentReference", _DOCUMENT_OPS),
+    ("google.cloud.firestore_v1.async_document", "AsyncDocumentReference", _DOCUMENT_OPS),
+    ("google.cloud.firestore_v1.query", "Query", _QUERY_OPS),
+    ("google.cloud.firestore_v1.async_query", "AsyncQuery", _QUERY_OPS),
+    ("google.cloud.firestore_v1.aggregation", "AggregationQuery", [("get", "aggregation.get", _aggregation)]),
+    ("google.cloud.firestore_v1.async_aggregation", "AsyncAggregationQuery", [("get", "aggregation.get", _aggregation)]),
+    ("google.cloud.firestore_v1.client", "Client", [("get_all", "client.get_all", _get_all)]),
+    ("google.cloud.firestore_v1.async_client", "AsyncClient", [("get_all", "client.get_all", _get_all)]),
+    ("google.cloud.firestore_v1.batch", "WriteBatch", [("commit", "batch.commit", _commit)]),
+    ("google.cloud.firestore_v1.async_batch", "AsyncWriteBatch", [("commit", "batch.commit", _commit)]),
+    ("google.cloud.firestore_v1.transaction", "Transaction", [
+        ("_begin", "transaction.begin", _begin),
+        ("_commit", "transaction.commit", _commit),
+    ]),
+    ("google.cloud.firestore_v1.async_transaction", "AsyncTransaction", [
+        ("_begin", "transaction.begin", _begin),
+        ("_commit", "transaction.commit", _commit),
+    ]),
+]
+
+_installed = False
+_install_lock = threading.Lock()
+
+
+def instrument_firestore() -> None:
+    """Instrument the Firestore client classes (idempotent)."""
+    global _installed
+    with _install_lock:
+        if _installed:
+            return
+        for module_name, class_name, ops in _TARGETS:
+            try:
+                cls = getattr(importlib.import_module(module_name), class_name)
+            except (ImportError, AttributeError) as e:
+                logger.warning(f"Firestore instrumentation skipped {module_name}.{class_name}: {e}")
+                continue
+            for method, op, counts in ops:
+                _wrap(cls, method, op, counts)
+        _installed = True
@@ -0,0 +1,93 @@
+"""Job stage timeline.
+
+A job passes through the API, Cloud Tasks, a worker, WaveSpeed, the webhook,
+Pub/Sub and the completion processor. Each stage is stored on the job
+document as ``timeline.<stage> = {"started_at", "ended_at", "seconds"}``:
+durations measured inside one process use the monotonic clock, stages that
+span services (queue wait, WaveSpeed) use wall-clock epoch seconds from
+both ends.
+
+Stages are buffered on the JobTimeline of the current job and written with
+the next update_job_status() of that job, so timing adds no Firestore
+writes. The job's trace_id travels in the task payload and the WaveSpeed
+webhook URL so log lines of all services can be joined.
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class JobTimeline:
+    """Stage timings of one job, pending until the next job document write."""
+
+    def __init__(self, job_id: str, trace_id: Optional[str] = None):
+        self.job_id = job_id
+        self.trace_id = trace_id
+        self._pending: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, started_at: float, seconds: float) -> None:
+        """Record a stage that started at epoch ``started_at``."""
+        seconds = max(0.0, seconds)
+        with self._lock:
+            self._pending[stage] = {
+                "started_at": round(started_at, 3),
+                "ended_at": round(started_at + seconds, 3),
+                "seconds": round(seconds, 3),
+            }
+        logger.info(f"Job {self.job_id} stage {stage}: {seconds:.2f}s (trace_id={self.trace_id})")
+
+    def add_since(self, stage: str, started_at: Optional[float]) -> None:
+        """Record a stage from epoch ``started_at`` (another service's clock) until now."""
+        if started_at:
+            self.add(stage, started_at, time.time() - started_at)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time the block as stage ``name``."""
+        started_at = time.time()
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add(name, started_at, time.monotonic() - start)
+
+    def fields(self) -> Dict[str, dict]:
+        """Pending stages as job document update fields; clears them."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return {f"timeline.{stage}": entry for stage, entry in pending.items()}
+
+
+_current: ContextVar[Optional[JobTimeline]] = ContextVar("job_timeline", default=None)
+
+
+@contextmanager
+def job_timeline(job_id: str, trace_id: Optional[str] = None) -> Iterator[JobTimeline]:
+    """Make a JobTimeline current for the block (see update_job_status)."""
+    timeline = JobTimeline(job_id, trace_id)
+    token = _current.set(timeline)
+    try:
+        yield timeline
+    finally:
+        _current.reset(token)
+        if timeline._pending:
+            logger.warning(f"Job {job_id}: stages {sorted(timeline._pending)} were never written")
+
+
+def current_timeline() -> Optional[JobTimeline]:
+    return _current.get()
+
+
+def pending_timeline_fields(job_id: str) -> Dict[str, dict]:
+    """Pending stage fields of ``job_id``'s current timeline (cleared)."""
+    timeline = _current.get()
+    if timeline is None or timeline.job_id != job_id:
+        return {}
+    return timeline.fields()
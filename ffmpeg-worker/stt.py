@@ -46,7 +46,7 @@ def transcribe_audio_sync(audio_path: str, language_code: str = "en-US") -> List
         enable_automatic_punctuation=True,
     )
 
-    logger.info(f"Transcribing audio (sync): {audio_path}")
+    logger.info("Transcribing audio (sync): %s", audio_path)
     response = client.recognize(config=config, audio=audio)
 
     return extract_word_timestamps(response)
@@ -74,7 +74,7 @@ def transcribe_audio_async(audio_gcs_uri: str, language_code: str = "en-US") ->
         enable_automatic_punctuation=True,
     )
 
-    logger.info(f"Transcribing audio (async): {audio_gcs_uri}")
+    logger.info("Transcribing audio (async): %s", audio_gcs_uri)
     operation = client.long_running_recognize(config=config, audio=audio)
 
     logger.info("Waiting for STT operation to complete...")
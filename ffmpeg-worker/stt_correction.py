@@ -171,7 +171,7 @@ def correct_stt_with_script(
         logger.warning("Script produced no words after extraction")
         return stt_words
 
-    logger.info(f"Correcting {len(stt_words)} STT words against {len(script_words)} script words")
+    logger.info("Correcting %d STT words against %d script words", len(stt_words), len(script_words))
 
     # Configuration
     ANCHOR_SEARCH_WINDOW = 10
@@ -272,16 +272,19 @@ def correct_stt_with_script(
                 "start_time": last_timestamp,
                 "end_time": last_timestamp,
             })
-        logger.info(f"Added {len(remaining_words)} remaining script words at end")
-
-    # Log correction stats
-    original_text = " ".join(w.get("word", "") for w in stt_words)
-    corrected_text = " ".join(w["word"] for w in corrected_words)
-
-    if original_text != corrected_text:
-        logger.info(f"STT correction applied: {len(stt_words)} -> {len(corrected_words)} words")
-        logger.debug(f"Original: {original_text[:100]}...")
-        logger.debug(f"Corrected: {corrected_text[:100]}...")
+        logger.info("Added %d remaining script words at end", len(remaining_words))
+
+    # Log correction stats (compare word by word; the joined transcripts are
+    # only built when debug logging is on)
+    changed = len(stt_words) != len(corrected_words) or any(
+        stt.get("word", "") != corrected["word"] for stt, corrected in zip(stt_words, corrected_words)
+    )
+
+    if changed:
+        logger.info("STT correction applied: %d -> %d words", len(stt_words), len(corrected_words))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Original: %s...", " ".join(w.get("word", "") for w in stt_words[:40])[:100])
+            logger.debug("Corrected: %s...", " ".join(w["word"] for w in corrected_words[:40])[:100])
     else:
         logger.info("No corrections needed - STT matched script")
 
@@ -0,0 +1,280 @@
+"""Subtitle style registry for NuuMee FFmpeg Worker.
+
+Loads subtitle-styles.json from GCS in the background at startup and keeps it
+fresh by revalidating the blob generation on a TTL. Each style's ASS header
+and animation override tag are compiled once per config version, so
+generate_ass() only has to render dialogue lines.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from google.cloud import storage
+
+logger = logging.getLogger(__name__)
+
+# GCS config location
+CONFIG_BUCKET = os.environ.get("NUUMEE_ASSETS_BUCKET", "nuumee-assets")
+CONFIG_PATH = "config/subtitle-styles.json"
+
+# How long a loaded config is trusted before checking GCS for a newer generation
+STYLES_TTL_SECONDS = int(os.environ.get("SUBTITLE_STYLES_TTL_SECONDS", "300"))
+
+# How long a job waits for the startup load before falling back
+INITIAL_LOAD_TIMEOUT_SECONDS = 10
+
+DEFAULT_TITLE = "NuuMee Subtitles"
+DEFAULT_MIN_WORD_DURATION = 0.2
+
+# Override tags for the "animation" field of a style. Config may add or
+# replace entries via a top-level "animations" map. Tags are only rendered
+# when the config sets "apply_animations": true; existing configs name
+# animations for documentation and were always rendered without them.
+DEFAULT_ANIMATIONS = {
+    "none": "",
+    "fade": "{\\fad(200,0)}",
+    "pop": "{\\t(0,150,\\fscx130\\fscy130)\\t(150,300,\\fscx100\\fscy100)}",
+    "wiggle": "{\\t(0,100,\\frz3)\\t(100,200,\\frz-3)\\t(200,300,\\frz0)}",
+    "pulse": "{\\t(0,200,\\c&H0000FFFF&)\\t(200,400,\\c&HFFFFFF&)}",
+}
+
+# Fallback styles if GCS config fails to load
+FALLBACK_STYLES = {
+    "simple": {
+        "name": "Simple",
+        "description": "Clean white text with subtle glow",
+        "is_multi_style": False,
+        "animation": "fade",
+        "ass_styles": [
+            "Style: Default,Arial,72,&H00FFFFFF,&H000000FF,&H00000000,&H80000000,0,0,0,0,100,100,0,0,1,2,1,2,20,20,160,1"
+        ],
+        "style_names": ["Default"],
+    },
+}
+
+SCRIPT_INFO_TEMPLATE = """[Script Info]
+Title: {title}
+ScriptType: v4.00+
+PlayResX: 1920
+PlayResY: 1080
+WrapStyle: 0
+
+"""
+
+STYLES_SECTION_TEMPLATE = """[V4+ Styles]
+Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
+{ass_styles}
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+"""
+
+
+@dataclass(frozen=True)
+class CompiledStyle:
+    """A subtitle style with its ASS header and override tag prebuilt."""
+    style_id: str
+    name: str
+    description: str
+    style_names: List[str]
+    is_multi_style: bool
+    animation_tag: str
+    styles_section: str
+    default_header: str
+
+    def header(self, title: str = DEFAULT_TITLE) -> str:
+        """Return the full ASS header (Script Info + Styles + Events format)."""
+        if title == DEFAULT_TITLE:
+            return self.default_header
+        return SCRIPT_INFO_TEMPLATE.format(title=title) + self.styles_section
+
+    def style_name_for(self, index: int) -> str:
+        """Return the ASS style name for the word at ``index``."""
+        if self.is_multi_style and len(self.style_names) > 1:
+            return self.style_names[index % len(self.style_names)]
+        return self.style_names[0] if self.style_names else "Default"
+
+
+@dataclass(frozen=True)
+class StyleConfig:
+    """One immutable, compiled version of subtitle-styles.json."""
+    version: str
+    generation: Optional[int]
+    etag: Optional[str]
+    source: str
+    min_word_duration: float
+    apply_animations: bool
+    raw_styles: Dict
+    compiled: Dict[str, CompiledStyle]
+    loaded_at: float
+
+
+def compile_style(style_id: str, style: Dict, animations: Dict[str, str]) -> CompiledStyle:
+    """Compile a raw style definition into a CompiledStyle.
+
+    ``animations`` maps animation names to tags; pass an empty map to
+    render the style without animation.
+    """
+    ass_styles_lines = style.get("ass_styles", [])
+    if isinstance(ass_styles_lines, list):
+        ass_styles = "\n".join(ass_styles_lines)
+    else:
+        ass_styles = ass_styles_lines
+
+    styles_section = STYLES_SECTION_TEMPLATE.format(ass_styles=ass_styles)
+    animation = style.get("animation") or "none"
+
+    return CompiledStyle(
+        style_id=style_id,
+        name=style.get("name", style_id),
+        description=style.get("description", ""),
+        style_names=list(style.get("style_names", ["Default"])),
+        is_multi_style=style.get("is_multi_style", False),
+        animation_tag=animations.get(animation, ""),
+        styles_section=styles_section,
+        default_header=SCRIPT_INFO_TEMPLATE.format(title=DEFAULT_TITLE) + styles_section,
+    )
+
+
+def compile_config(
+    config: Dict,
+    source: str,
+    generation: Optional[int] = None,
+    etag: Optional[str] = None,
+) -> StyleConfig:
+    """Compile a parsed subtitle-styles.json document."""
+    raw_styles = config.get("styles") or FALLBACK_STYLES
+    apply_animations = bool(config.get("apply_animations", False))
+    animations = {**DEFAULT_ANIMATIONS, **config.get("animations", {})} if apply_animations else {}
+
+    compiled = {
+        style_id: compile_style(style_id, style, animations)
+        for style_id, style in raw_styles.items()
+    }
+
+    version = str(config.get("_version", "unversioned"))
+    if generation is not None:
+        version = f"{version}+g{generation}"
+
+    return StyleConfig(
+        version=version,
+        generation=generation,
+        etag=etag,
+        source=source,
+        min_word_duration=config.get("min_word_duration", DEFAULT_MIN_WORD_DURATION),
+        apply_animations=apply_animations,
+        raw_styles=raw_styles,
+        compiled=compiled,
+        loaded_at=time.time(),
+    )
+
+
+FALLBACK_CONFIG = compile_config({"_version": "fallback", "styles": FALLBACK_STYLES}, source="fallback")
+
+
+class StyleRegistry:
+    """Process-wide registry of compiled subtitle styles.
+
+    Readers always get a complete StyleConfig snapshot; refreshes build a new
+    snapshot and swap the reference, so no lock is held on the read path.
+    """
+
+    def __init__(self, bucket: str = CONFIG_BUCKET, path: str = CONFIG_PATH, ttl: int = STYLES_TTL_SECONDS):
+        self.bucket = bucket
+        self.path = path
+        self.ttl = ttl
+        self._config: StyleConfig = FALLBACK_CONFIG
+        self._loaded = threading.Event()
+        self._refresh_lock = threading.Lock()
+        self._last_checked = 0.0
+        self._client: Optional[storage.Client] = None
+
+    def _get_client(self) -> storage.Client:
+        if self._client is None:
+            self._client = storage.Client()
+        return self._client
+
+    def start_background_load(self) -> None:
+        """Kick off the initial GCS load without blocking startup."""
+        threading.Thread(target=self.refresh, name="subtitle-styles-load", daemon=True).start()
+
+    def refresh(self, force: bool = False) -> StyleConfig:
+        """Revalidate against GCS and recompile if the blob generation changed.
+
+        Args:
+            force: Re-download and recompile even if the generation is unchanged
+
+        Returns:
+            The current StyleConfig
+        """
+        with self._refresh_lock:
+            try:
+                bucket = self._get_client().bucket(self.bucket)
+                blob = bucket.get_blob(self.path)
+
+                if blob is None:
+                    logger.warning(f"Config file not found at gs://{self.bucket}/{self.path}, using fallback styles")
+                    self._config = FALLBACK_CONFIG
+                elif force or blob.generation != self._config.generation:
+                    content = blob.download_as_text(if_generation_match=blob.generation)
+                    self._config = compile_config(
+                        json.loads(content),
+                        source=f"gs://{self.bucket}/{self.path}",
+                        generation=blob.generation,
+                        etag=blob.etag,
+                    )
+                    logger.info(f"Loaded {len(self._config.compiled)} subtitle styles (version {self._config.version})")
+
+            except Exception as e:
+                # Keep serving whatever we had; a stale config beats no subtitles
+                logger.error(f"Failed to load styles from GCS: {e}, keeping version {self._config.version}")
+
+            self._last_checked = time.time()
+            self._loaded.set()
+            return self._config
+
+    def _refresh_in_background(self) -> None:
+        if self._refresh_lock.locked():
+            return
+        threading.Thread(target=self.refresh, name="subtitle-styles-revalidate", daemon=True).start()
+
+    def current(self) -> StyleConfig:
+        """Return the current config, revalidating in the background when stale."""
+        if not self._loaded.is_set():
+            if self._last_checked == 0.0 and not self._refresh_lock.locked():
+                # No startup load was scheduled (e.g. imported outside main.py)
+                return self.refresh()
+            self._loaded.wait(timeout=INITIAL_LOAD_TIMEOUT_SECONDS)
+        elif time.time() - self._last_checked > self.ttl:
+            self._last_checked = time.time()
+            self._refresh_in_background()
+        return self._config
+
+    def get(self, style_id: str) -> CompiledStyle:
+        """Return a compiled style, falling back to "simple"."""
+        config = self.current()
+        return config.compiled.get(style_id) or config.compiled.get("simple") or FALLBACK_CONFIG.compiled["simple"]
+
+    def status(self) -> Dict:
+        """Return registry state for the /styles endpoint."""
+        config = self._config
+        return {
+            "version": config.version,
+            "generation": config.generation,
+            "etag": config.etag,
+            "source": config.source,
+            "loaded": self._loaded.is_set(),
+            "loaded_at": config.loaded_at,
+            "last_checked": self._last_checked or None,
+            "ttl_seconds": self.ttl,
+            "style_count": len(config.compiled),
+            "apply_animations": config.apply_animations,
+        }
+
+
+# Global registry instance
+registry = StyleRegistry()
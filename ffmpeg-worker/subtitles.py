@@ -1,86 +1,35 @@
 """ASS Subtitle Generator for NuuMee FFmpeg Worker.
 
 Converts word timestamps to ASS subtitle format with various styles.
-Styles are loaded from GCS config file at runtime for easy customization.
+Styles come from the style registry (style_registry.py), which loads the GCS
+config file at startup and revalidates it on a TTL.
 """
-import json
 import logging
-import os
-from typing import Dict, List, Optional
+from typing import Dict, List
 
-from google.cloud import storage
+from style_registry import registry, DEFAULT_TITLE
 
 logger = logging.getLogger(__name__)
 
-# GCS config location
-CONFIG_BUCKET = os.environ.get("NUUMEE_ASSETS_BUCKET", "nuumee-assets")
-CONFIG_PATH = "config/subtitle-styles.json"
-
-# Cache for loaded styles (refreshed on worker restart or manual reload)
-_styles_cache: Optional[Dict] = None
-_min_word_duration: float = 0.2
-
-# Fallback styles if GCS config fails to load
-FALLBACK_STYLES = {
-    "simple": {
-        "name": "Simple",
-        "description": "Clean white text with subtle glow",
-        "is_multi_style": False,
-        "animation": "fade",
-        "ass_styles": [
-            "Style: Default,Arial,72,&H00FFFFFF,&H000000FF,&H00000000,&H80000000,0,0,0,0,100,100,0,0,1,2,1,2,20,20,160,1"
-        ],
-        "style_names": ["Default"],
-    },
-}
-
 
 def load_styles_from_gcs(force_reload: bool = False) -> Dict:
     """
-    Load subtitle styles from GCS config file.
+    Load subtitle styles from the style registry.
 
     Args:
-        force_reload: If True, bypass cache and reload from GCS
+        force_reload: If True, revalidate against GCS immediately
 
     Returns:
-        Dict of style configurations
+        Dict of raw style configurations
     """
-    global _styles_cache, _min_word_duration
-
-    if _styles_cache is not None and not force_reload:
-        return _styles_cache
-
-    try:
-        client = storage.Client()
-        bucket = client.bucket(CONFIG_BUCKET)
-        blob = bucket.blob(CONFIG_PATH)
-
-        if not blob.exists():
-            logger.warning(f"Config file not found at gs://{CONFIG_BUCKET}/{CONFIG_PATH}, using fallback styles")
-            _styles_cache = FALLBACK_STYLES
-            return _styles_cache
-
-        config_content = blob.download_as_text()
-        config = json.loads(config_content)
-
-        _styles_cache = config.get("styles", FALLBACK_STYLES)
-        _min_word_duration = config.get("min_word_duration", 0.2)
-
-        logger.info(f"Loaded {len(_styles_cache)} subtitle styles from GCS config")
-        return _styles_cache
-
-    except Exception as e:
-        logger.error(f"Failed to load styles from GCS: {e}, using fallback")
-        _styles_cache = FALLBACK_STYLES
-        return _styles_cache
+    if force_reload:
+        return registry.refresh(force=True).raw_styles
+    return registry.current().raw_styles
 
 
 def get_min_word_duration() -> float:
     """Get minimum word duration from config."""
-    global _min_word_duration
-    # Ensure styles are loaded (which also loads min_word_duration)
-    load_styles_from_gcs()
-    return _min_word_duration
+    return registry.current().min_word_duration
 
 
 def to_ass_time(seconds: float) -> str:
@@ -100,7 +49,7 @@ def to_ass_time(seconds: float) -> str:
     return f"{hours}:{minutes:02d}:{secs:02d}.{centiseconds:02d}"
 
 
-def generate_ass(words: List[Dict], style_id: str = "simple", title: str = "NuuMee Subtitles") -> str:
+def generate_ass(words: List[Dict], style_id: str = "simple", title: str = DEFAULT_TITLE) -> str:
     """
     Generate ASS subtitle content from word timestamps.
 
@@ -112,35 +61,10 @@ def generate_ass(words: List[Dict], style_id: str = "simple", title: str = "NuuM
     Returns:
         Complete ASS file content as string
     """
-    styles = load_styles_from_gcs()
-    min_duration = get_min_word_duration()
-
-    style = styles.get(style_id, styles.get("simple", FALLBACK_STYLES["simple"]))
-    is_multi_style = style.get("is_multi_style", False)
-    style_names = style.get("style_names", ["Default"])
-
-    # Build ASS styles section
-    ass_styles_lines = style.get("ass_styles", [])
-    if isinstance(ass_styles_lines, list):
-        ass_styles = "\n".join(ass_styles_lines)
-    else:
-        ass_styles = ass_styles_lines
-
-    # ASS file header
-    header = f"""[Script Info]
-Title: {title}
-ScriptType: v4.00+
-PlayResX: 1920
-PlayResY: 1080
-WrapStyle: 0
-
-[V4+ Styles]
-Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
-{ass_styles}
-
-[Events]
-Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
-"""
+    config = registry.current()
+    min_duration = config.min_word_duration
+    style = registry.get(style_id)
+    animation_tag = style.animation_tag
 
     # Generate dialogue lines for each word
     events = []
@@ -171,30 +95,113 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
         word = word_data.get("word", "")
 
         # Choose style (cycle for multi-style like rainbow)
-        if is_multi_style and len(style_names) > 1:
-            style_name = style_names[i % len(style_names)]
-        else:
-            style_name = style_names[0] if style_names else "Default"
+        style_name = style.style_name_for(i)
 
         # Create dialogue line
-        event = f"Dialogue: 0,{start_time},{end_time},{style_name},,0,0,0,,{word}"
+        event = f"Dialogue: 0,{start_time},{end_time},{style_name},,0,0,0,,{animation_tag}{word}"
         events.append(event)
 
-    return header + "\n".join(events) + "\n"
+    return style.header(title) + "\n".join(events) + "\n"
 
 
 def get_available_styles() -> Dict:
     """Return available subtitle styles with metadata."""
-    styles = load_styles_from_gcs()
+    config = registry.current()
     return {
         style_id: {
-            "name": style.get("name", style_id),
-            "description": style.get("description", ""),
+            "name": style.name,
+            "description": style.description,
         }
-        for style_id, style in styles.items()
+        for style_id, style in config.compiled.items()
     }
 
 
 def reload_styles() -> Dict:
     """Force reload styles from GCS. Call this to pick up config changes."""
     return load_styles_from_gcs(force_reload=True)
+
+
+def to_vtt_time(seconds: float) -> str:
+    """
+    Convert seconds to WebVTT time format (HH:MM:SS.mmm).
+
+    Args:
+        seconds: Time in seconds
+
+    Returns:
+        WebVTT formatted time string
+    """
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3_600_000)
+    minutes, millis = divmod(millis, 60_000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}.{millis:03d}"
+
+
+def _parse_seconds(value) -> float:
+    """Parse an STT timestamp ("1.234s" or float) to seconds."""
+    if isinstance(value, str):
+        value = value.rstrip("s")
+    return float(value)
+
+
+def generate_vtt(
+    words: List[Dict],
+    max_words_per_cue: int = 7,
+    max_cue_seconds: float = 3.5,
+    max_gap_seconds: float = 0.7,
+) -> str:
+    """
+    Generate WebVTT subtitle content from word timestamps.
+
+    Unlike the ASS output (one event per word for the animated styles), words
+    are grouped into readable cues for player-rendered captions. A cue breaks
+    on sentence punctuation, a pause, or when it gets too long.
+
+    Args:
+        words: List of {"word": str, "start_time": str, "end_time": str}
+        max_words_per_cue: Maximum words in a single cue
+        max_cue_seconds: Maximum duration of a single cue
+        max_gap_seconds: Silence that forces a new cue
+
+    Returns:
+        Complete WebVTT file content as string
+    """
+    min_duration = registry.current().min_word_duration
+    cues = []
+    current: List[str] = []
+    cue_start = cue_end = 0.0
+
+    for word_data in words:
+        start_sec = _parse_seconds(word_data.get("start_time", "0"))
+        end_sec = max(_parse_seconds(word_data.get("end_time", "0")), start_sec + min_duration)
+        word = word_data.get("word", "")
+
+        if current and (
+            len(current) >= max_words_per_cue
+            or end_sec - cue_start > max_cue_seconds
+            or start_sec - cue_end > max_gap_seconds
+        ):
+            cues.append((cue_start, cue_end, " ".join(current)))
+            current = []
+
+        if not current:
+            cue_start = start_sec
+        current.append(word)
+        cue_end = end_sec
+
+        if word.endswith((".", "!", "?")):
+            cues.append((cue_start, cue_end, " ".join(current)))
+            current = []
+
+    if current:
+        cues.append((cue_start, cue_end, " ".join(current)))
+
+    lines = ["WEBVTT", ""]
+    for index, (start, end, text) in enumerate(cues, start=1):
+        lines.append(str(index))
+        lines.append(f"{to_vtt_time(start)} --> {to_vtt_time(end)}")
+        lines.append(text)
+        lines.append("")
+
+    return "\n".join(lines)
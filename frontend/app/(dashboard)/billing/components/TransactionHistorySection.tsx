@@ -10,7 +10,7 @@ export interface TransactionHistorySectionProps {
   isLoading: boolean;
   error: string | null;
   page: number;
-  total: number;
+  total: number | null;
   hasMore: boolean;
   onPageChange: (page: number) => void;
   onRefresh: () => void;
@@ -110,7 +110,7 @@ export function TransactionHistorySection({
         <div className="flex items-center gap-2">
           <FileText className="w-5 h-5 text-[#00F0D9]" />
           <h2 className="text-[#F1F5F9]">Transaction History</h2>
-          {total > 0 && (
+          {total !== null && total > 0 && (
             <Badge variant="outline" className="border-[#334155] text-[#94A3B8]">
               {total} total
             </Badge>
@@ -9,7 +9,7 @@ export interface UseTransactionsReturn {
   error: string | null;
   page: number;
   setPage: (page: number | ((prev: number) => number)) => void;
-  total: number;
+  total: number | null;
   hasMore: boolean;
   pageSize: number;
   refresh: () => void;
@@ -22,7 +22,7 @@ export function useTransactions(userId: string | undefined): UseTransactionsRetu
   const [isLoading, setIsLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
   const [page, setPage] = useState(1);
-  const [total, setTotal] = useState(0);
+  const [total, setTotal] = useState<number | null>(null);
   const [hasMore, setHasMore] = useState(false);
 
   const fetchTransactions = useCallback(async () => {
@@ -42,7 +42,7 @@ import {
   DialogTitle,
 } from '@/components/ui/dialog';
 import { useAuth } from '@/components/AuthProvider';
-import { getJobs, getJobOutput, getJobThumbnails, deleteJob, createJob, JobResponse, JobStatus as ApiJobStatus, JobType, Resolution, JobThumbnailsResponse } from '@/lib/api';
+import { getJobs, listTotal, getJobOutput, getJobThumbnails, deleteJob, createJob, JobResponse, JobStatus as ApiJobStatus, JobType, Resolution, JobThumbnailsResponse } from '@/lib/api';
 import { toast } from 'sonner';
 
 type JobStatus = 'completed' | 'processing' | 'failed' | 'queued' | 'pending';
@@ -147,7 +147,7 @@ export default function JobsPage() {
       const statusFilter = activeFilter === 'all' ? undefined : activeFilter as ApiJobStatus;
       const response = await getJobs(currentPage, jobsPerPage, statusFilter);
       setJobs(response.jobs.map(convertApiJob));
-      setTotalJobs(response.total);
+      setTotalJobs(listTotal(response, response.jobs.length));
     } catch (err) {
       console.error('Failed to fetch jobs:', err);
       setError(err instanceof Error ? err.message : 'Failed to load jobs');
@@ -11,7 +11,7 @@ import {
 import { Input } from '@/components/ui/input';
 import { Button } from '@/components/ui/button';
 import { Skeleton } from '@/components/ui/skeleton';
-import { getJobs, getJobThumbnails, JobResponse, JobThumbnailsResponse } from '@/lib/api';
+import { getJobs, listTotal, getJobThumbnails, JobResponse, JobThumbnailsResponse } from '@/lib/api';
 
 interface JobPickerModalProps {
   open: boolean;
@@ -40,7 +40,7 @@ export function JobPickerModal({ open, onClose, onSelect }: JobPickerModalProps)
     try {
       const response = await getJobs(currentPage, JOBS_PER_PAGE, 'completed');
       setJobs(response.jobs);
-      setTotalJobs(response.total);
+      setTotalJobs(listTotal(response, response.jobs.length));
     } catch (err) {
       setError(err instanceof Error ? err.message : 'Failed to load jobs');
     } finally {
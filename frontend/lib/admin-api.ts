@@ -182,6 +182,9 @@ export interface PaginatedResponse<T> {
   page: number;
   pages: number;
   per_page: number;
+  next_cursor?: string | null;
+  has_more?: boolean;
+  took_ms?: number | null;
 }
 
 // ==================== API Functions ====================
@@ -210,12 +213,14 @@ export async function getDashboardStats(): Promise<DashboardStats> {
 export async function getUsers(params?: {
   page?: number;
   per_page?: number;
-  search?: string
+  search?: string;
+  cursor?: string;
 }): Promise<PaginatedResponse<AdminUser>> {
   const searchParams = new URLSearchParams();
   if (params?.page) searchParams.set('page', String(params.page));
   if (params?.per_page) searchParams.set('per_page', String(params.per_page));
   if (params?.search) searchParams.set('search', params.search);
+  if (params?.cursor) searchParams.set('cursor', params.cursor);
 
   const query = searchParams.toString();
   return adminRequest(`/admin/users${query ? `?${query}` : ''}`);
@@ -241,12 +246,14 @@ export async function getJobs(params?: {
   per_page?: number;
   status?: string;
   user_id?: string;
+  cursor?: string;
 }): Promise<PaginatedResponse<AdminJob>> {
   const searchParams = new URLSearchParams();
   if (params?.page) searchParams.set('page', String(params.page));
   if (params?.per_page) searchParams.set('per_page', String(params.per_page));
   if (params?.status) searchParams.set('status', params.status);
   if (params?.user_id) searchParams.set('user_id', params.user_id);
+  if (params?.cursor) searchParams.set('cursor', params.cursor);
 
   const query = searchParams.toString();
   return adminRequest(`/admin/jobs${query ? `?${query}` : ''}`);
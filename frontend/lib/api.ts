@@ -285,9 +285,11 @@ export interface JobResponse {
 
 export interface JobListResponse {
   jobs: JobResponse[];
-  total: number;
+  total: number | null; // null when the count was skipped (include_total=false)
   page: number;
   page_size: number;
+  next_cursor: string | null;
+  has_more: boolean;
 }
 
 export interface CreditCostResponse {
@@ -307,7 +309,8 @@ export async function createJob(request: CreateJobRequest): Promise<JobResponse>
 export async function getJobs(
   page: number = 1,
   pageSize: number = 20,
-  status?: JobStatus
+  status?: JobStatus,
+  cursor?: string
 ): Promise<JobListResponse> {
   const params = new URLSearchParams({
     page: page.toString(),
@@ -316,9 +319,24 @@ export async function getJobs(
   if (status) {
     params.append('status', status);
   }
+  if (cursor) {
+    params.append('cursor', cursor);
+  }
   return apiRequest<JobListResponse>(`/jobs?${params.toString()}`);
 }
 
+// Total of a paginated list, or a lower bound (everything up to this page,
+// plus one if there is more) when the response carries no count
+export function listTotal(
+  response: { total: number | null; page: number; page_size: number; has_more: boolean },
+  count: number
+): number {
+  if (response.total !== null) {
+    return response.total;
+  }
+  return (response.page - 1) * response.page_size + count + (response.has_more ? 1 : 0);
+}
+
 export async function getJob(jobId: string): Promise<JobResponse> {
   return apiRequest<JobResponse>(`/jobs/${jobId}`);
 }
@@ -685,16 +703,18 @@ export interface CreditTransaction {
 
 export interface TransactionListResponse {
   transactions: CreditTransaction[];
-  total: number;
+  total: number | null; // null when the count was skipped (include_total=false)
   page: number;
   page_size: number;
+  next_cursor: string | null;
   has_more: boolean;
 }
 
 export async function getTransactions(
   page: number = 1,
   pageSize: number = 20,
-  type?: TransactionType
+  type?: TransactionType,
+  cursor?: string
 ): Promise<TransactionListResponse> {
   const params = new URLSearchParams({
     page: page.toString(),
@@ -703,6 +723,9 @@ export async function getTransactions(
   if (type) {
     params.append('transaction_type', type);
   }
+  if (cursor) {
+    params.append('cursor', cursor);
+  }
   return apiRequest<TransactionListResponse>(`/transactions?${params.toString()}`);
 }
 
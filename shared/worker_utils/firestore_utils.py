@@ -6,7 +6,9 @@ from typing import Optional
 
 from google.cloud import firestore
 
+from .doc_cache import get_document, invalidate
 from .gcp import get_firestore
+from .timeline import pending_timeline_fields
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +23,9 @@ def update_job_status(
 ) -> None:
     """Update job document in Firestore.
 
+    Stage timings pending on the job's current timeline (see timeline.py)
+    are written in the same update.
+
     Args:
         job_id: Job document ID
         status: New status value
@@ -47,7 +52,12 @@ def update_job_status(
     if error_message:
         update_data["error_message"] = error_message
 
+    # Stage timings of this job recorded since the last write
+    if collection == "jobs":
+        update_data.update(pending_timeline_fields(job_id))
+
     job_ref.update(update_data)
+    invalidate(job_ref)
     logger.info(f"Updated job {job_id}: status={status}")
 
 
@@ -82,6 +92,7 @@ def refund_credits(user_id: str, credits: float, job_id: str) -> None:
 
     transaction = db.transaction()
     refund_transaction(transaction, user_ref, credits)
+    invalidate(user_ref)
     logger.info(f"Refunded {credits} credits to user {user_id} for job {job_id}")
 
 
@@ -95,13 +106,11 @@ def is_user_free_tier(user_id: str) -> bool:
         True if user is on free tier, False otherwise
     """
     db = get_firestore()
-    user_ref = db.collection("users").document(user_id)
-    user_doc = user_ref.get()
+    user_data = get_document(db.collection("users").document(user_id))
 
-    if not user_doc.exists:
+    if user_data is None:
         return True  # Assume free tier if user not found
 
-    user_data = user_doc.to_dict()
     subscription_tier = user_data.get("subscription_tier", "free")
 
     return subscription_tier == "free" or not subscription_tier
@@ -117,11 +126,9 @@ def get_user_subscription_tier(user_id: str) -> str:
         Subscription tier string (free, creator, pro, business, enterprise)
     """
     db = get_firestore()
-    user_ref = db.collection("users").document(user_id)
-    user_doc = user_ref.get()
+    user_data = get_document(db.collection("users").document(user_id))
 
-    if not user_doc.exists:
+    if user_data is None:
         return "free"
 
-    user_data = user_doc.to_dict()
     return user_data.get("subscription_tier", "free") or "free"
@@ -1,6 +1,7 @@
 """GCS (Google Cloud Storage) utilities."""
 
 import logging
+import os
 from datetime import timedelta
 from typing import Optional
 
@@ -11,6 +12,14 @@ from .auth_utils import get_signing_credentials
 
 logger = logging.getLogger(__name__)
 
+# Cache-Control stored on uploaded videos. GCS serves it with every download,
+# so the browser can reuse bytes fetched through a stable signed URL. Outputs
+# are per-user, so shared caches must not keep them; a stable URL lives for
+# two buckets (backend SIGNED_URL_BUCKET_SECONDS), and caching longer gains
+# nothing because the next bucket's URL is a new cache key.
+SIGNED_URL_BUCKET_SECONDS = int(os.getenv("SIGNED_URL_BUCKET_SECONDS", "3600"))
+VIDEO_CACHE_CONTROL = os.getenv("VIDEO_CACHE_CONTROL", f"private, max-age={2 * SIGNED_URL_BUCKET_SECONDS}")
+
 
 def generate_signed_url(
     bucket_name: str,
@@ -82,6 +91,8 @@ def upload_to_gcs(
     client = get_storage()
     bucket = client.bucket(bucket_name)
     blob = bucket.blob(blob_path)
+    if content_type.startswith("video/"):
+        blob.cache_control = VIDEO_CACHE_CONTROL
     blob.upload_from_filename(local_path, content_type=content_type)
     logger.info(f"Uploaded {local_path} to gs://{bucket_name}/{blob_path}")
     return f"gs://{bucket_name}/{blob_path}"
@@ -121,6 +132,8 @@ def upload_from_url(
 
     # Detect content type from response
     content_type = response.headers.get("content-type", "video/mp4")
+    if content_type.startswith("video/"):
+        blob.cache_control = VIDEO_CACHE_CONTROL
     blob.upload_from_string(content, content_type=content_type)
 
     return f"gs://{bucket_name}/{blob_path}"
@@ -0,0 +1,472 @@
+#!/usr/bin/env python3
+"""API load test for the hot user-facing endpoints, fully offline.
+
+Seeds the in-memory Firestore with thousands of users, jobs and credit
+transactions, then drives the backend's ASGI app in-process from
+``--concurrency`` clients, one scenario after another:
+
+    jobs_list         GET  /api/v1/jobs                  (first page)
+    jobs_scroll       GET  /api/v1/jobs?cursor=...       (next pages, like infinite scroll)
+    job_get           GET  /api/v1/jobs/{id}
+    job_create        POST /api/v1/jobs                  (Cloud Tasks held, no worker)
+    credits_balance   GET  /api/v1/credits/balance
+    public_video      GET  /v/{short_id}
+    transactions      GET  /api/v1/transactions
+    mixed             weighted mix of the above
+
+Each request runs in its own Firestore counting scope, so besides RPS and
+p50/p95/p99 latency the report shows the Firestore reads (and writes and
+RPCs) each request was billed for. Results can be saved as JSON to compare
+builds (async client, pagination, caching) run against the same seed.
+
+Client and app share one event loop, so RPS includes the client's own
+overhead; compare runs with each other, not with production.
+
+Usage:
+    python api.py
+    python api.py --users 5000 --jobs-per-user 20 --concurrency 100 --duration 20 --json results/api.json
+    python api.py --scenarios job_get,public_video --firestore-latency 0.01
+    python api.py --json results/after.json --baseline results/before.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import httpx
+
+import fakes
+import services
+from fakes import firestore as fake_firestore
+from fakes import tasks as fake_tasks
+from report import ResourceSampler, format_table, summarize, write_json
+
+
+class Request(NamedTuple):
+    """One request a scenario wants made."""
+    method: str
+    path: str
+    kwargs: dict
+    expected_status: int
+    # Called with the response (e.g. to keep a pagination cursor)
+    on_response: Optional[Callable[[httpx.Response], None]] = None
+
+
+MIXED_WEIGHTS = {
+    "job_get": 30,
+    "jobs_list": 20,
+    "credits_balance": 20,
+    "public_video": 15,
+    "jobs_scroll": 5,
+    "transactions": 5,
+    "job_create": 5,
+}
+
+TRANSACTION_TYPES = ["job_usage"] * 8 + ["purchase", "subscription_renewal"]
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=2000, help="Seeded users (default: 2000)")
+    parser.add_argument("--jobs-per-user", type=float, default=10, help="Mean seeded jobs per user (default: 10)")
+    parser.add_argument("--transactions-per-user", type=float, default=10, help="Mean seeded credit transactions per user (default: 10)")
+    parser.add_argument("--completed-percent", type=float, default=80.0, help="Seeded jobs that are completed (default: 80)")
+    parser.add_argument("--scenarios", default=",".join([*SCENARIOS, "mixed"]), help="Comma-separated scenarios to run (default: all)")
+    parser.add_argument("--concurrency", type=int, default=50, help="Concurrent clients (default: 50)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Measured seconds per scenario (default: 10)")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Unmeasured seconds before each scenario (default: 2)")
+    parser.add_argument("--page-size", type=int, default=20, help="page_size for list endpoints (default: 20)")
+    parser.add_argument("--firestore-latency", type=float, default=0.002, help="Seconds per Firestore RPC (default: 0.002)")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for the data and the request mix (default: 1)")
+    parser.add_argument("--json", metavar="PATH", help="Write the full results to PATH")
+    parser.add_argument("--baseline", metavar="PATH", help="Compare with the results of an earlier --json run")
+    return parser.parse_args(argv)
+
+
+# -- data ----------------------------------------------------------------------
+
+class Dataset:
+    """Seeded users, jobs and short ids the scenarios pick from."""
+
+    def __init__(self):
+        self.users: List[str] = []
+        self.jobs_by_user: Dict[str, List[str]] = {}
+        self.short_ids: List[str] = []
+        # Next-page cursor per user for jobs_scroll
+        self.cursors: Dict[str, Optional[str]] = {}
+        self.counts: Dict[str, int] = {}
+
+    def user(self, rng: random.Random) -> str:
+        return rng.choice(self.users)
+
+    def user_with_jobs(self, rng: random.Random) -> Tuple[str, List[str]]:
+        while True:
+            uid = rng.choice(self.users)
+            if self.jobs_by_user[uid]:
+                return uid, self.jobs_by_user[uid]
+
+
+def seed(args: argparse.Namespace) -> Dataset:
+    """Write users, jobs and transactions straight into the fake store."""
+    from app.jobs.services.validation import generate_job_id, generate_short_id
+
+    rng = random.Random(args.seed)
+    store = fake_firestore.store
+    now = datetime.now(timezone.utc)
+    data = Dataset()
+    writes: List[tuple] = []
+    counts = {"users": 0, "jobs": 0, "credit_transactions": 0}
+
+    def write(path: str, doc: dict) -> None:
+        writes.append(("set", path, doc, False))
+        counts[path.split("/", 1)[0]] += 1
+        if len(writes) >= 500:
+            store.commit(writes)
+            writes.clear()
+
+    for i in range(args.users):
+        uid = f"loadtest-user-{i:05d}"
+        created = now - timedelta(days=rng.uniform(30, 365))
+        balance = 1_000_000 + rng.randint(0, 500)
+        write(f"users/{uid}", {
+            "user_id": uid,
+            "email": f"{uid}@loadtest.invalid",
+            "email_verified": True,
+            "display_name": uid,
+            # Enough for every job_create request to be accepted
+            "credits_balance": balance,
+            "subscription_tier": rng.choice(["free", "free", "creator", "studio"]),
+            "created_at": created,
+            "updated_at": now - timedelta(days=rng.uniform(0, 30)),
+        })
+        data.users.append(uid)
+
+        job_ids = []
+        for _ in range(rng.randint(0, round(2 * args.jobs_per_user))):
+            job_id = generate_job_id()
+            short_id = generate_short_id()
+            created_at = now - timedelta(seconds=rng.uniform(0, 90 * 86400))
+            completed = rng.random() * 100 < args.completed_percent
+            failed = not completed and rng.random() < 0.5
+            deleted = rng.random() < 0.02
+            write(f"jobs/{job_id}", {
+                "id": job_id,
+                "short_id": short_id,
+                "user_id": uid,
+                "job_type": "animate",
+                "status": "completed" if completed else ("failed" if failed else "processing"),
+                "reference_image_path": f"uploads/{uid}/1700000000_reference.jpg",
+                "motion_video_path": f"uploads/{uid}/1700000000_motion.mp4",
+                "source_job_id": None,
+                "input_video_path": None,
+                "extension_prompt": None,
+                "resolution": rng.choice(["480p", "720p"]),
+                "seed": None,
+                "credits_charged": float(rng.choice([8, 12, 16, 24])),
+                "wavespeed_request_id": f"ws-{job_id}",
+                "output_video_path": f"outputs/{uid}/{job_id}.mp4" if completed else None,
+                "error_message": "Simulated failure" if failed else None,
+                "created_at": created_at,
+                "updated_at": created_at + timedelta(minutes=3),
+                "completed_at": created_at + timedelta(minutes=3) if completed else None,
+                "view_count": rng.randint(0, 50) if completed else 0,
+                "is_demo": False,
+                "is_deleted": deleted,
+            })
+            if not deleted:
+                job_ids.append(job_id)
+                if completed:
+                    data.short_ids.append(short_id)
+        data.jobs_by_user[uid] = job_ids
+
+        balance_after = balance
+        for _ in range(rng.randint(0, round(2 * args.transactions_per_user))):
+            kind = rng.choice(TRANSACTION_TYPES)
+            amount = -float(rng.choice([8, 12, 16, 24])) if kind == "job_usage" else float(rng.choice([100, 250, 500]))
+            transaction_id = f"txn_{rng.getrandbits(64):016x}"
+            write(f"credit_transactions/{transaction_id}", {
+                "transaction_id": transaction_id,
+                "user_id": uid,
+                "type": kind,
+                "amount": amount,
+                "status": "completed",
+                "balance_before": balance_after - amount,
+                "balance_after": balance_after,
+                "description": "Video generation" if kind == "job_usage" else "Credit purchase",
+                "created_at": now - timedelta(seconds=rng.uniform(0, 90 * 86400)),
+            })
+    if writes:
+        store.commit(writes)
+
+    data.counts = counts
+    return data
+
+
+# -- scenarios -----------------------------------------------------------------
+
+def _auth(uid: str) -> dict:
+    return {"headers": {"Authorization": f"Bearer {fakes.id_token_for(uid)}"}}
+
+
+def jobs_list(data: Dataset, rng: random.Random, args: argparse.Namespace) -> Request:
+    uid = data.user(rng)
+    return Request("GET", f"/api/v1/jobs?page_size={args.page_size}", _auth(uid), 200)
+
+
+def jobs_scroll(data: Dataset, rng: random.Random, args: argparse.Namespace) -> Request:
+    uid = data.user(rng)
+    cursor = data.cursors.get(uid)
+    url = f"/api/v1/jobs?page_size={args.page_size}&include_total=false"
+    if cursor:
+        url += f"&cursor={cursor}"
+
+    def keep_cursor(response: httpx.Response) -> None:
+        # Past the last page, start over from the first
+        data.cursors[uid] = response.json().get("next_cursor") if response.status_code == 200 else None
+
+    return Request("GET", url, _auth(uid), 200, keep_cursor)
+
+
+def job_get(data: Dataset, rng: random.Random, args: argparse.Namespace) -> Request:
+    uid, job_ids = data.user_with_jobs(rng)
+    return Request("GET", f"/api/v1/jobs/{rng.choice(job_ids)}", _auth(uid), 200)
+
+
+def job_create(data: Dataset, rng: random.Random, args: argparse.Namespace) -> Request:
+    uid = data.user(rng)
+    return Request("POST", "/api/v1/jobs", {**_auth(uid), "json": {
+        "job_type": "animate",
+        "reference_image_path": f"uploads/{uid}/1700000000_reference.jpg",
+        "motion_video_path": f"uploads/{uid}/1700000000_motion.mp4",
+        "motion_video_duration_seconds": 10,
+        "resolution": "480p",
+    }}, 200)
+
+
+def credits_balance(data: Dataset, rng: random.Random, args: argparse.Namespace) -> Request:
+    return Request("GET", "/api/v1/credits/balance", _auth(data.user(rng)), 200)
+
+
+def public_video(data: Dataset, rng: random.Random, args: argparse.Namespace) -> Request:
+    return Request("GET", f"/v/{rng.choice(data.short_ids)}", {}, 302)
+
+
+def transactions(data: Dataset, rng: random.Random, args: argparse.Namespace) -> Request:
+    uid = data.user(rng)
+    return Request("GET", f"/api/v1/transactions?page_size={args.page_size}", _auth(uid), 200)
+
+
+SCENARIOS: Dict[str, Callable[[Dataset, random.Random, argparse.Namespace], Request]] = {
+    "jobs_list": jobs_list,
+    "jobs_scroll": jobs_scroll,
+    "job_get": job_get,
+    "job_create": job_create,
+    "credits_balance": credits_balance,
+    "public_video": public_video,
+    "transactions": transactions,
+}
+
+
+def mixed(rng: random.Random) -> str:
+    return rng.choices(list(MIXED_WEIGHTS), weights=list(MIXED_WEIGHTS.values()))[0]
+
+
+# -- runner --------------------------------------------------------------------
+
+class Samples:
+    """Latency and Firestore operations of one endpoint's requests."""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.reads: List[int] = []
+        self.writes: List[int] = []
+        self.rpcs: List[int] = []
+        self.statuses: Dict[int, int] = {}
+        self.errors = 0
+
+    def add(self, seconds: float, status: int, expected: int, ops: fake_firestore.FirestoreStats) -> None:
+        self.latencies.append(seconds)
+        self.reads.append(ops.reads)
+        self.writes.append(ops.writes + ops.deletes)
+        self.rpcs.append(ops.rpcs)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if status != expected:
+            self.errors += 1
+
+    def result(self, wall: float) -> dict:
+        return {
+            "requests": len(self.latencies),
+            "errors": self.errors,
+            "statuses": {str(status): count for status, count in sorted(self.statuses.items())},
+            "rps": round(len(self.latencies) / wall, 1) if wall else None,
+            "latency_ms": summarize([s * 1000 for s in self.latencies], digits=2),
+            "firestore_reads": summarize(self.reads, digits=2),
+            "firestore_writes": summarize(self.writes, digits=2),
+            "firestore_rpcs": summarize(self.rpcs, digits=2),
+        }
+
+
+async def run_scenario(app, name: str, data: Dataset, args: argparse.Namespace) -> dict:
+    """Run one scenario for warmup + duration seconds from every client."""
+    samples: Dict[str, Samples] = {}
+    started = time.perf_counter()
+    measure_from = started + args.warmup
+    end = measure_from + args.duration
+
+    transport = httpx.ASGITransport(app=app)
+    limits = httpx.Limits(max_connections=None)
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", limits=limits, timeout=60) as client:
+        async def client_loop(i: int) -> None:
+            rng = random.Random(f"{args.seed}-{name}-{i}")
+            while time.perf_counter() < end:
+                label = mixed(rng) if name == "mixed" else name
+                request = SCENARIOS[label](data, rng, args)
+                with fake_firestore.count_operations() as ops:
+                    request_started = time.perf_counter()
+                    response = await client.request(request.method, request.path, **request.kwargs)
+                    elapsed = time.perf_counter() - request_started
+                if request.on_response:
+                    request.on_response(response)
+                if request_started >= measure_from:
+                    samples.setdefault(label, Samples()).add(elapsed, response.status_code, request.expected_status, ops)
+
+        await asyncio.gather(*(client_loop(i) for i in range(args.concurrency)))
+
+    wall = time.perf_counter() - measure_from
+    results = {label: s.result(wall) for label, s in sorted(samples.items())}
+    if name == "mixed":
+        total = Samples()
+        for s in samples.values():
+            total.latencies += s.latencies
+            total.reads += s.reads
+            total.writes += s.writes
+            total.rpcs += s.rpcs
+            total.errors += s.errors
+            for status, count in s.statuses.items():
+                total.statuses[status] = total.statuses.get(status, 0) + count
+        return {"total": total.result(wall), "endpoints": results}
+    return results.get(name, Samples().result(wall))
+
+
+def run(args: argparse.Namespace) -> dict:
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in scenarios if name not in SCENARIOS and name != "mixed"]
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(unknown)} (choose from {', '.join([*SCENARIOS, 'mixed'])})")
+
+    storage_root = tempfile.mkdtemp(prefix="nuumee-loadtest-api-")
+    try:
+        # No worker runs: created jobs' tasks stay queued
+        fake_tasks.queue_settings["nuumee-video-processing"] = {"max_concurrent": 0}
+        services.configure(
+            storage_root,
+            api_url="http://loadtest",
+            worker_url="http://loadtest-worker/",
+            ffmpeg_worker_url="http://loadtest-ffmpeg-worker/",
+            firestore_latency=args.firestore_latency,
+        )
+        app = services.load_api()
+
+        print(f"Seeding {args.users} users...", file=sys.stderr)
+        seed_started = time.time()
+        data = seed(args)
+        print(f"Seeded {data.counts} in {time.time() - seed_started:.1f}s", file=sys.stderr)
+
+        results = {}
+        for name in scenarios:
+            print(f"Running {name} ({args.concurrency} clients, {args.duration}s)...", file=sys.stderr)
+            sampler = ResourceSampler().start()
+            results[name] = asyncio.run(run_scenario(app, name, data, args))
+            results[name]["resources"] = sampler.stop()
+    finally:
+        shutil.rmtree(storage_root, ignore_errors=True)
+
+    return {
+        "settings": vars(args),
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "seeded": data.counts,
+        "firestore_total": fake_firestore.store.stats.as_dict(),
+        "scenarios": results,
+    }
+
+
+def print_report(results: dict) -> None:
+    rows = []
+    for name, result in results["scenarios"].items():
+        if name == "mixed":
+            rows.append(_row("mixed (total)", result["total"]))
+            rows += [_row(f"  {label}", endpoint) for label, endpoint in result["endpoints"].items()]
+        else:
+            rows.append(_row(name, result))
+    print()
+    print(format_table(rows, ["scenario", "requests", "errors", "rps", "p50_ms", "p95_ms", "p99_ms", "reads/req", "reads_p95", "rpcs/req"]))
+    print()
+    print(f"Seeded: {results['seeded']}")
+
+
+def print_comparison(results: dict, baseline: dict) -> None:
+    """RPS, p95 and reads/request against ``baseline`` for common scenarios."""
+    def flatten(scenarios: dict) -> Dict[str, dict]:
+        flat = {}
+        for name, result in scenarios.items():
+            if name == "mixed":
+                flat["mixed (total)"] = result["total"]
+                flat.update({f"mixed: {label}": endpoint for label, endpoint in result["endpoints"].items()})
+            else:
+                flat[name] = result
+        return flat
+
+    current, previous = flatten(results["scenarios"]), flatten(baseline["scenarios"])
+    rows = []
+    for name, result in current.items():
+        if name not in previous:
+            continue
+        before = previous[name]
+        rows.append([
+            name,
+            before["rps"], result["rps"], _change(before["rps"], result["rps"]),
+            before["latency_ms"]["p95"], result["latency_ms"]["p95"], _change(before["latency_ms"]["p95"], result["latency_ms"]["p95"]),
+            before["firestore_reads"]["mean"], result["firestore_reads"]["mean"],
+        ])
+    print()
+    print(format_table(rows, ["vs baseline", "rps_was", "rps", "change", "p95_was", "p95_ms", "change", "reads_was", "reads/req"]))
+
+
+def _change(before: Optional[float], after: Optional[float]) -> Optional[str]:
+    if not before or after is None:
+        return None
+    return f"{100 * (after - before) / before:+.1f}%"
+
+
+def _row(name: str, result: dict) -> list:
+    latency, reads, rpcs = result["latency_ms"], result["firestore_reads"], result["firestore_rpcs"]
+    return [name, result["requests"], result["errors"], result["rps"],
+            latency["p50"], latency["p95"], latency["p99"], reads["mean"], reads["p95"], rpcs["mean"]]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    results = run(args)
+    print_report(results)
+    if args.baseline:
+        with open(args.baseline) as f:
+            print_comparison(results, json.load(f))
+    if args.json:
+        write_json(args.json, results)
+        print(f"\nResults written to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
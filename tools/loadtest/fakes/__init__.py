@@ -0,0 +1,147 @@
+"""Offline stand-ins for the Google Cloud services NuuMee talks to.
+
+install() swaps the client classes on the real library modules (Firestore,
+Firebase Admin, Cloud Storage, Cloud Tasks, Pub/Sub, Secret Manager, Google
+auth), so it must run before the backend or worker modules are imported:
+several of them bind names like ``google.auth.default`` at import time.
+"""
+
+import os
+from types import SimpleNamespace
+from typing import Dict, Optional
+
+from . import firestore as fake_firestore
+from . import gcs as fake_gcs
+from . import pubsub as fake_pubsub
+from . import tasks as fake_tasks
+
+# Firebase ID tokens accepted by the fake auth: "loadtest:<uid>"
+TOKEN_PREFIX = "loadtest:"
+
+# Identity the fake OIDC verification reports for pushed messages
+PUBSUB_SERVICE_ACCOUNT = "service-0@gcp-sa-pubsub.iam.gserviceaccount.com"
+
+# Secret Manager contents, by secret id
+secrets: Dict[str, str] = {
+    "wavespeed-webhook-token": "loadtest-webhook-token",
+    "wavespeed-api-key": "loadtest-wavespeed-key",
+}
+
+
+def id_token_for(uid: str) -> str:
+    """Bearer token the fake Firebase auth maps back to ``uid``."""
+    return f"{TOKEN_PREFIX}{uid}"
+
+
+class SecretManagerServiceClient:
+    """Stands in for google.cloud.secretmanager.SecretManagerServiceClient."""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    @staticmethod
+    def secret_version_path(project: str, secret: str, secret_version: str) -> str:
+        return f"projects/{project}/secrets/{secret}/versions/{secret_version}"
+
+    def access_secret_version(self, request=None, *, name=None, **kwargs):
+        from google.api_core import exceptions
+
+        name = request["name"] if request is not None else name
+        secret_id = name.split("/")[3]
+        if secret_id not in secrets:
+            raise exceptions.NotFound(f"Secret {name} not found")
+        return SimpleNamespace(name=name, payload=SimpleNamespace(data=secrets[secret_id].encode("UTF-8")))
+
+
+class _ImpersonatedCredentials:
+    """Stands in for google.auth.impersonated_credentials.Credentials."""
+
+    def __init__(self, source_credentials=None, target_principal: str = "", **kwargs):
+        self.source_credentials = source_credentials
+        self.service_account_email = self.signer_email = target_principal
+        self.token = "loadtest"
+        self.valid = True
+        self.expired = False
+
+    def refresh(self, request) -> None:
+        pass
+
+    def sign_bytes(self, message: bytes) -> bytes:
+        return b"loadtest"
+
+
+def _verify_firebase_token(id_token: str, *args, **kwargs) -> dict:
+    from firebase_admin import auth
+
+    if not id_token or not id_token.startswith(TOKEN_PREFIX):
+        raise auth.InvalidIdTokenError("Invalid load test token", cause=None, http_response=None)
+    uid = id_token[len(TOKEN_PREFIX):]
+    return {"uid": uid, "user_id": uid, "email": f"{uid}@loadtest.invalid", "email_verified": True}
+
+
+def _verify_oauth2_token(id_token: str, request=None, audience=None, **kwargs) -> dict:
+    if id_token != fake_tasks.OIDC_TOKEN:
+        raise ValueError("Invalid load test OIDC token")
+    return {"email": PUBSUB_SERVICE_ACCOUNT, "email_verified": True, "aud": audience}
+
+
+def install(storage_root: str, firestore_latency: float = 0.0, project: str = "loadtest") -> None:
+    """Point every Google Cloud client at the in-process fakes.
+
+    Args:
+        storage_root: Directory holding the fake GCS buckets
+        firestore_latency: Seconds each Firestore RPC waits (network stand-in)
+        project: Project id the fake clients report
+    """
+    import firebase_admin
+    import google.auth
+    from firebase_admin import auth, credentials, firestore as admin_firestore, firestore_async
+    from google.auth import impersonated_credentials
+    from google.auth.credentials import AnonymousCredentials
+    from google.cloud import firestore, firestore_v1, pubsub_v1, secretmanager, storage, tasks_v2
+    from google.cloud.storage import _signing
+    from google.oauth2 import id_token
+
+    fake_firestore.store.latency = firestore_latency
+    fake_gcs.storage = fake_gcs.FakeStorage(storage_root)
+
+    for module in (firestore, firestore_v1):
+        module.Client = fake_firestore.Client
+        module.AsyncClient = fake_firestore.AsyncClient
+        module.transactional = fake_firestore.transactional
+        module.async_transactional = fake_firestore.async_transactional
+    admin_firestore.client = lambda app=None: fake_firestore.Client(project)
+    firestore_async.client = lambda app=None: fake_firestore.AsyncClient(project)
+
+    class _Credential(credentials.Base):
+        def get_credential(self):
+            return AnonymousCredentials()
+
+    if not firebase_admin._apps:
+        firebase_admin.initialize_app(_Credential(), {"projectId": project})
+    auth.verify_id_token = _verify_firebase_token
+
+    storage.Client = fake_gcs.Client
+    _signing.generate_signed_url_v4 = fake_gcs.generate_signed_url_v4
+
+    google.auth.default = lambda *args, **kwargs: (AnonymousCredentials(), project)
+    impersonated_credentials.Credentials = _ImpersonatedCredentials
+    id_token.verify_oauth2_token = _verify_oauth2_token
+
+    tasks_v2.CloudTasksClient = fake_tasks.CloudTasksClient
+    pubsub_v1.PublisherClient = fake_pubsub.PublisherClient
+    secretmanager.SecretManagerServiceClient = SecretManagerServiceClient
+
+    os.environ.setdefault("GCP_PROJECT", project)
+    os.environ.setdefault("GCP_PROJECT_ID", project)
+    os.environ.setdefault("GOOGLE_CLOUD_PROJECT", project)
+    os.environ.setdefault("SERVICE_ACCOUNT_EMAIL", f"loadtest@{project}.iam.gserviceaccount.com")
+
+
+def firestore_stats() -> Dict[str, int]:
+    """Operations billed by the fake Firestore since it was last reset."""
+    return fake_firestore.store.stats.as_dict()
+
+
+def gcs_stats() -> Optional[Dict[str, int]]:
+    return dict(fake_gcs.storage.stats) if fake_gcs.storage else None
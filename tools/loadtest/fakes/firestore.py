@@ -0,0 +1,1091 @@
+"""In-memory Firestore for load tests.
+
+Implements the part of the google-cloud-firestore API the services use:
+documents and (sub)collections, set/update/create/delete with field
+transforms (SERVER_TIMESTAMP, DELETE_FIELD, Increment, ArrayUnion,
+ArrayRemove, Maximum, Minimum), queries (where, order_by, cursors, limit,
+offset, select, collection groups), count/sum/avg aggregations, batches
+and optimistic transactions, in sync and async flavours.
+
+All clients share one FakeFirestore, so the API and both workers see the
+same data. Every RPC counts its billed reads/writes (see FirestoreStats),
+and can wait ``latency`` seconds to stand in for the network round trip
+(a blocking sleep for the sync client, an awaited one for the async one).
+"""
+
+import asyncio
+import random
+import string
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from google.api_core import exceptions
+from google.cloud.firestore_v1 import transforms
+from google.cloud.firestore_v1.base_aggregation import AggregationResult
+
+DOCUMENT_ID = "__name__"
+ASCENDING = "ASCENDING"
+DESCENDING = "DESCENDING"
+
+_MAXIMUM = getattr(transforms, "Maximum", None)
+_MINIMUM = getattr(transforms, "Minimum", None)
+
+
+class FirestoreStats:
+    """Billed reads, writes and deletes, and RPCs made."""
+
+    __slots__ = ("reads", "writes", "deletes", "rpcs")
+
+    def __init__(self):
+        self.reads = 0
+        self.writes = 0
+        self.deletes = 0
+        self.rpcs = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+_scope: ContextVar[Optional[FirestoreStats]] = ContextVar("firestore_stats", default=None)
+
+
+@contextmanager
+def count_operations() -> Iterator[FirestoreStats]:
+    """Count the operations made in the block (and threads it hands work to)."""
+    stats = FirestoreStats()
+    token = _scope.set(stats)
+    try:
+        yield stats
+    finally:
+        _scope.reset(token)
+
+
+class FakeFirestore:
+    """Shared document store behind every fake client.
+
+    Stored document dicts are replaced on every write, never changed in
+    place, so reads hand them out without copying; snapshots copy on
+    to_dict().
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.stats = FirestoreStats()
+        self._docs: Dict[str, dict] = {}
+        # Document paths by collection path, and by collection id (groups)
+        self._collections: Dict[str, Dict[str, None]] = {}
+        self._groups: Dict[str, Dict[str, None]] = {}
+        self._versions: Dict[str, int] = {}
+        self._created: Dict[str, datetime] = {}
+        self._updated: Dict[str, datetime] = {}
+        # Equality indexes on string fields, built on first use:
+        # (collection id, field path) -> value -> document paths
+        self._indexes: Dict[Tuple[str, str], Dict[str, Dict[str, None]]] = {}
+        self._seq = 0
+        self._lock = threading.RLock()
+        self._stats_lock = threading.Lock()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._docs.clear()
+            self._collections.clear()
+            self._groups.clear()
+            self._versions.clear()
+            self._created.clear()
+            self._updated.clear()
+            self._indexes.clear()
+        with self._stats_lock:
+            self.stats = FirestoreStats()
+
+    def count(self, reads: int = 0, writes: int = 0, deletes: int = 0) -> None:
+        """Record one RPC and what it is billed for."""
+        scope = _scope.get()
+        with self._stats_lock:
+            for stats in (self.stats, scope) if scope is not None else (self.stats,):
+                stats.rpcs += 1
+                stats.reads += reads
+                stats.writes += writes
+                stats.deletes += deletes
+
+    def wait(self) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+
+    async def wait_async(self) -> None:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    # -- reads ---------------------------------------------------------------
+
+    def read(self, path: str) -> Tuple[Optional[dict], int]:
+        """(data or None, version) of one document."""
+        with self._lock:
+            return self._docs.get(path), self._versions.get(path, 0)
+
+    def times(self, path: str) -> Tuple[Optional[datetime], Optional[datetime]]:
+        with self._lock:
+            return self._created.get(path), self._updated.get(path)
+
+    def scan(
+        self,
+        parent: Optional[str],
+        collection_id: str,
+        all_descendants: bool,
+        equals: Optional[Tuple[str, str]] = None,
+    ) -> List[Tuple[str, dict, int]]:
+        """(path, data, version) of every document of a collection (group).
+
+        With ``equals`` (field path, string value) only documents whose field
+        has that value, looked up in an index instead of scanned, the way
+        Firestore serves equality filters.
+        """
+        with self._lock:
+            if equals is not None:
+                paths = self._index(collection_id, equals[0]).get(equals[1], {})
+                if not all_descendants:
+                    prefix = f"{parent}/{collection_id}/" if parent else f"{collection_id}/"
+                    paths = [path for path in paths if path.startswith(prefix) and "/" not in path[len(prefix):]]
+            elif all_descendants:
+                paths = self._groups.get(collection_id, {})
+            else:
+                paths = self._collections.get(f"{parent}/{collection_id}" if parent else collection_id, {})
+            return [(path, self._docs[path], self._versions.get(path, 0)) for path in paths]
+
+    def _index(self, collection_id: str, field_path: str) -> Dict[str, Dict[str, None]]:
+        index = self._indexes.get((collection_id, field_path))
+        if index is None:
+            index = self._indexes[(collection_id, field_path)] = {}
+            for path in self._groups.get(collection_id, {}):
+                value = _get_field(self._docs[path], field_path)
+                if isinstance(value, str):
+                    index.setdefault(value, {})[path] = None
+        return index
+
+    def _reindex(self, group: str, path: str, old: Optional[dict], new: Optional[dict]) -> None:
+        for (collection_id, field_path), index in self._indexes.items():
+            if collection_id != group:
+                continue
+            before = _get_field(old, field_path) if old is not None else None
+            after = _get_field(new, field_path) if new is not None else None
+            if before == after:
+                continue
+            if isinstance(before, str):
+                index[before].pop(path, None)
+            if isinstance(after, str):
+                index.setdefault(after, {})[path] = None
+
+    def paths(self, prefix: str) -> List[str]:
+        with self._lock:
+            return [path for path in self._docs if path.startswith(prefix)]
+
+    # -- writes --------------------------------------------------------------
+
+    def commit(self, writes: List[tuple], reads: Optional[Dict[str, int]] = None) -> datetime:
+        """Apply ``writes`` atomically.
+
+        Raises Aborted if a document in ``reads`` changed since it was read
+        (at that version), NotFound/AlreadyExists for update/create
+        preconditions; nothing is applied then.
+        """
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            for path, version in (reads or {}).items():
+                if self._versions.get(path, 0) != version:
+                    raise exceptions.Aborted(f"Transaction contention on {path}")
+
+            staged: Dict[str, Optional[dict]] = {}
+            for op, path, *args in writes:
+                current = staged[path] if path in staged else self._docs.get(path)
+                if op == "delete":
+                    staged[path] = None
+                elif op == "create":
+                    if current is not None:
+                        raise exceptions.AlreadyExists(f"Document already exists: {path}")
+                    staged[path] = _apply_set({}, args[0], merge=False, now=now)
+                elif op == "set":
+                    data, merge = args
+                    base = _copy(current) if (merge and current is not None) else {}
+                    staged[path] = _apply_set(base, data, merge=merge, now=now)
+                elif op == "update":
+                    if current is None:
+                        raise exceptions.NotFound(f"No document to update: {path}")
+                    staged[path] = _apply_update(_copy(current), args[0], now=now)
+
+            for path, data in staged.items():
+                self._seq += 1
+                self._versions[path] = self._seq
+                collection = path.rsplit("/", 1)[0]
+                group = collection.rsplit("/", 1)[-1]
+                self._reindex(group, path, self._docs.get(path), data)
+                if data is None:
+                    if self._docs.pop(path, None) is not None:
+                        del self._collections[collection][path]
+                        del self._groups[group][path]
+                    self._created.pop(path, None)
+                    self._updated.pop(path, None)
+                else:
+                    if path not in self._docs:
+                        self._created[path] = now
+                        self._collections.setdefault(collection, {})[path] = None
+                        self._groups.setdefault(group, {})[path] = None
+                    self._docs[path] = data
+                    self._updated[path] = now
+
+        deletes = sum(1 for op, *_ in writes if op == "delete")
+        self.count(writes=len(writes) - deletes, deletes=deletes)
+        return now
+
+
+# Process-wide store used by clients created without one
+store = FakeFirestore()
+
+
+# -- values --------------------------------------------------------------------
+
+def _copy(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _copy(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_copy(item) for item in value]
+    return value
+
+
+def _encode(value: Any, now: datetime) -> Any:
+    """Stored form of a written value (sentinels resolved, datetimes in UTC)."""
+    if value is transforms.SERVER_TIMESTAMP:
+        return now
+    if isinstance(value, dict):
+        return {key: _encode(item, now) for key, item in value.items() if item is not transforms.DELETE_FIELD}
+    if isinstance(value, (list, tuple)):
+        return [_encode(item, now) for item in value]
+    if isinstance(value, datetime) and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _is_transform(value: Any) -> bool:
+    return value is transforms.SERVER_TIMESTAMP or isinstance(
+        value, (transforms.Increment, transforms.ArrayUnion, transforms.ArrayRemove)
+        + tuple(cls for cls in (_MAXIMUM, _MINIMUM) if cls is not None)
+    )
+
+
+def _transform(current: Any, value: Any, now: datetime) -> Any:
+    if value is transforms.SERVER_TIMESTAMP:
+        return now
+    if isinstance(value, transforms.Increment):
+        return (current if isinstance(current, (int, float)) and not isinstance(current, bool) else 0) + value.value
+    if _MAXIMUM is not None and isinstance(value, _MAXIMUM):
+        return value.value if not isinstance(current, (int, float)) else max(current, value.value)
+    if _MINIMUM is not None and isinstance(value, _MINIMUM):
+        return value.value if not isinstance(current, (int, float)) else min(current, value.value)
+    items = list(current) if isinstance(current, list) else []
+    if isinstance(value, transforms.ArrayUnion):
+        return items + [_encode(item, now) for item in value.values if item not in items]
+    return [item for item in items if item not in value.values]
+
+
+def _apply_set(target: dict, data: dict, merge: bool, now: datetime) -> dict:
+    for key, value in data.items():
+        if value is transforms.DELETE_FIELD:
+            target.pop(key, None)
+        elif _is_transform(value):
+            target[key] = _transform(target.get(key), value, now)
+        elif isinstance(value, dict) and merge:
+            nested = target.get(key)
+            target[key] = _apply_set(nested if isinstance(nested, dict) else {}, value, merge, now)
+        else:
+            target[key] = _encode(value, now)
+    return target
+
+
+def _apply_update(target: dict, data: dict, now: datetime) -> dict:
+    for field_path, value in data.items():
+        *parents, leaf = _split(field_path)
+        node = target
+        for segment in parents:
+            child = node.get(segment)
+            if not isinstance(child, dict):
+                if value is transforms.DELETE_FIELD:
+                    break
+                child = node[segment] = {}
+            node = child
+        else:
+            if value is transforms.DELETE_FIELD:
+                node.pop(leaf, None)
+            elif _is_transform(value):
+                node[leaf] = _transform(node.get(leaf), value, now)
+            else:
+                node[leaf] = _encode(value, now)
+    return target
+
+
+def _split(field_path: str) -> List[str]:
+    return [segment.strip("`") for segment in str(field_path).split(".")]
+
+
+_MISSING = object()
+
+
+def _get_field(data: dict, field_path: str) -> Any:
+    node: Any = data
+    for segment in _split(field_path):
+        if not isinstance(node, dict) or segment not in node:
+            return _MISSING
+        node = node[segment]
+    return node
+
+
+def _project(data: dict, field_paths: Optional[List[str]]) -> dict:
+    if field_paths is None:
+        return data
+    projected: dict = {}
+    for field_path in field_paths:
+        value = _get_field(data, field_path)
+        if value is _MISSING:
+            continue
+        *parents, leaf = _split(field_path)
+        node = projected
+        for segment in parents:
+            node = node.setdefault(segment, {})
+        node[leaf] = value
+    return projected
+
+
+# Firestore orders values of different types by type first
+def _rank(value: Any) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, bool):
+        return 1
+    if isinstance(value, (int, float)):
+        return 2
+    if isinstance(value, datetime):
+        return 3
+    if isinstance(value, str):
+        return 4
+    if isinstance(value, bytes):
+        return 5
+    if isinstance(value, DocumentReference):
+        return 6
+    if isinstance(value, list):
+        return 8
+    return 9
+
+
+def _compare(a: Any, b: Any) -> int:
+    rank_a, rank_b = _rank(a), _rank(b)
+    if rank_a != rank_b:
+        return -1 if rank_a < rank_b else 1
+    if isinstance(a, DocumentReference):
+        a, b = a.path, b.path
+    elif isinstance(a, datetime):
+        a = a if a.tzinfo else a.replace(tzinfo=timezone.utc)
+        b = b if b.tzinfo else b.replace(tzinfo=timezone.utc)
+    elif isinstance(a, list):
+        for x, y in zip(a, b):
+            result = _compare(x, y)
+            if result:
+                return result
+        a, b = len(a), len(b)
+    elif isinstance(a, dict):
+        return 0
+    try:
+        return (a > b) - (a < b)
+    except TypeError:
+        return 0
+
+
+def _matches(value: Any, op: str, expected: Any) -> bool:
+    if op == "==":
+        return value is not _MISSING and (value == expected if expected is not None else value is None)
+    if value is _MISSING:
+        return False
+    if op == "!=":
+        return value != expected and value is not None
+    if op == "in":
+        return any(value == item for item in expected)
+    if op == "not-in":
+        return value is not None and all(value != item for item in expected)
+    if op == "array_contains":
+        return isinstance(value, list) and expected in value
+    if op == "array_contains_any":
+        return isinstance(value, list) and any(item in value for item in expected)
+    if _rank(value) != _rank(expected):
+        return False
+    result = _compare(value, expected)
+    return {"<": result < 0, "<=": result <= 0, ">": result > 0, ">=": result >= 0}[op]
+
+
+def _auto_id() -> str:
+    return "".join(random.choices(string.ascii_letters + string.digits, k=20))
+
+
+# -- documents -----------------------------------------------------------------
+
+class DocumentSnapshot:
+    """A document as read at one moment."""
+
+    def __init__(self, reference: "DocumentReference", data: Optional[dict], read_time: datetime):
+        self.reference = reference
+        self._data = data
+        self.read_time = read_time
+        self.create_time, self.update_time = (
+            reference._client._store.times(reference.path) if data is not None else (None, None)
+        )
+
+    @property
+    def id(self) -> str:
+        return self.reference.id
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self) -> Optional[dict]:
+        return _copy(self._data) if self._data is not None else None
+
+    def get(self, field_path: str) -> Any:
+        if self._data is None:
+            return None
+        value = _get_field(self._data, field_path)
+        if value is _MISSING:
+            raise KeyError(field_path)
+        return _copy(value)
+
+
+class DocumentReference:
+    """Sync document reference."""
+
+    def __init__(self, client: "Client", path: str):
+        self._client = client
+        self.path = path
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, DocumentReference) and other.path == self.path
+
+    def __hash__(self) -> int:
+        return hash(self.path)
+
+    def __repr__(self) -> str:
+        return f"<DocumentReference {self.path}>"
+
+    @property
+    def id(self) -> str:
+        return self.path.rsplit("/", 1)[-1]
+
+    @property
+    def parent(self) -> "CollectionReference":
+        return self._client.collection(self.path.rsplit("/", 1)[0])
+
+    def collection(self, collection_id: str) -> "CollectionReference":
+        return self._client.collection(f"{self.path}/{collection_id}")
+
+    def _read(self, field_paths=None, transaction=None) -> DocumentSnapshot:
+        data, version = self._client._store.read(self.path)
+        if transaction is not None:
+            transaction._reads.setdefault(self.path, version)
+        self._client._store.count(reads=1)
+        return DocumentSnapshot(self, _project(data, field_paths) if data is not None else None, datetime.now(timezone.utc))
+
+    def _commit(self, op: str, *args) -> datetime:
+        return self._client._store.commit([(op, self.path, *args)])
+
+    def get(self, field_paths=None, transaction=None, **kwargs) -> DocumentSnapshot:
+        self._client._store.wait()
+        return self._read(field_paths, transaction)
+
+    def set(self, document_data: dict, merge: bool = False, **kwargs) -> datetime:
+        self._client._store.wait()
+        return self._commit("set", document_data, bool(merge))
+
+    def update(self, field_updates: dict, **kwargs) -> datetime:
+        self._client._store.wait()
+        return self._commit("update", field_updates)
+
+    def create(self, document_data: dict, **kwargs) -> datetime:
+        self._client._store.wait()
+        return self._commit("create", document_data)
+
+    def delete(self, **kwargs) -> datetime:
+        self._client._store.wait()
+        return self._commit("delete")
+
+    def collections(self, **kwargs) -> List["CollectionReference"]:
+        prefix = f"{self.path}/"
+        ids = {path[len(prefix):].split("/", 1)[0] for path in self._client._store.paths(prefix)}
+        return [self.collection(collection_id) for collection_id in sorted(ids)]
+
+
+class AsyncDocumentReference(DocumentReference):
+    """Async document reference."""
+
+    async def get(self, field_paths=None, transaction=None, **kwargs) -> DocumentSnapshot:
+        await self._client._store.wait_async()
+        return self._read(field_paths, transaction)
+
+    async def set(self, document_data: dict, merge: bool = False, **kwargs) -> datetime:
+        await self._client._store.wait_async()
+        return self._commit("set", document_data, bool(merge))
+
+    async def update(self, field_updates: dict, **kwargs) -> datetime:
+        await self._client._store.wait_async()
+        return self._commit("update", field_updates)
+
+    async def create(self, document_data: dict, **kwargs) -> datetime:
+        await self._client._store.wait_async()
+        return self._commit("create", document_data)
+
+    async def delete(self, **kwargs) -> datetime:
+        await self._client._store.wait_async()
+        return self._commit("delete")
+
+
+# -- queries -------------------------------------------------------------------
+
+class _Cursor:
+    def __init__(self, values, before: bool):
+        self.values = values
+        self.before = before
+
+
+class Query:
+    """Sync query over one collection or a collection group."""
+
+    ASCENDING = ASCENDING
+    DESCENDING = DESCENDING
+
+    def __init__(self, client: "Client", parent: Optional[str], collection_id: str, all_descendants: bool = False):
+        self._client = client
+        self._parent = parent
+        self._collection_id = collection_id
+        self._all_descendants = all_descendants
+        self._filters: List[Any] = []
+        self._orders: List[Tuple[str, str]] = []
+        self._limit: Optional[int] = None
+        self._limit_to_last = False
+        self._offset = 0
+        self._fields: Optional[List[str]] = None
+        self._start: Optional[_Cursor] = None
+        self._end: Optional[_Cursor] = None
+
+    def _copy(self, **changes) -> "Query":
+        query = self.__class__.__new__(self.__class__)
+        query.__dict__.update(self.__dict__)
+        query._filters = list(self._filters)
+        query._orders = list(self._orders)
+        query.__dict__.update(changes)
+        return query
+
+    def where(self, field_path=None, op_string=None, value=None, *, filter=None) -> "Query":
+        if filter is None and (hasattr(field_path, "field_path") or hasattr(field_path, "filters")):
+            field_path, filter = None, field_path
+        query = self._copy()
+        query._filters.append(filter if filter is not None else (field_path, op_string, value))
+        return query
+
+    def order_by(self, field_path: str, direction: str = ASCENDING) -> "Query":
+        query = self._copy()
+        query._orders.append((field_path, direction))
+        return query
+
+    def limit(self, count: int) -> "Query":
+        return self._copy(_limit=count, _limit_to_last=False)
+
+    def limit_to_last(self, count: int) -> "Query":
+        return self._copy(_limit=count, _limit_to_last=True)
+
+    def offset(self, num_to_skip: int) -> "Query":
+        return self._copy(_offset=num_to_skip)
+
+    def select(self, field_paths) -> "Query":
+        return self._copy(_fields=list(field_paths))
+
+    def start_at(self, document_fields_or_snapshot) -> "Query":
+        return self._copy(_start=_Cursor(document_fields_or_snapshot, before=True))
+
+    def start_after(self, document_fields_or_snapshot) -> "Query":
+        return self._copy(_start=_Cursor(document_fields_or_snapshot, before=False))
+
+    def end_before(self, document_fields_or_snapshot) -> "Query":
+        return self._copy(_end=_Cursor(document_fields_or_snapshot, before=True))
+
+    def end_at(self, document_fields_or_snapshot) -> "Query":
+        return self._copy(_end=_Cursor(document_fields_or_snapshot, before=False))
+
+    def count(self, alias: Optional[str] = None) -> "AggregationQuery":
+        return AggregationQuery(self).count(alias)
+
+    def sum(self, field_ref: str, alias: Optional[str] = None) -> "AggregationQuery":
+        return AggregationQuery(self).sum(field_ref, alias)
+
+    def avg(self, field_ref: str, alias: Optional[str] = None) -> "AggregationQuery":
+        return AggregationQuery(self).avg(field_ref, alias)
+
+    # -- evaluation --
+
+    def _filter_matches(self, flt, path: str, data: dict) -> bool:
+        if hasattr(flt, "filters"):
+            results = (self._filter_matches(child, path, data) for child in flt.filters)
+            return any(results) if type(flt).__name__ == "Or" else all(results)
+        if isinstance(flt, tuple):
+            field_path, op, expected = flt
+        else:
+            field_path, op, expected = flt.field_path, flt.op_string, flt.value
+            op = op if isinstance(op, str) else "=="
+        if field_path == DOCUMENT_ID:
+            value = self._client.document(path)
+            if isinstance(expected, str):
+                expected = self._client.document(expected) if "/" in expected else self._doc_ref(path, expected)
+            elif isinstance(expected, (list, tuple)):
+                expected = [self._doc_ref(path, item) if isinstance(item, str) else item for item in expected]
+        else:
+            value = _get_field(data, field_path)
+        return _matches(value, op, expected)
+
+    def _indexed_filter(self) -> Optional[Tuple[str, str]]:
+        """(field path, value) of the first string equality filter, if any."""
+        for flt in self._filters:
+            if isinstance(flt, tuple):
+                field_path, op, expected = flt
+            elif hasattr(flt, "field_path"):
+                field_path, op, expected = flt.field_path, flt.op_string, flt.value
+            else:
+                continue
+            if op == "==" and field_path != DOCUMENT_ID and isinstance(expected, str):
+                return field_path, expected
+        return None
+
+    def _doc_ref(self, path: str, doc_id: str) -> DocumentReference:
+        return self._client.document(f"{path.rsplit('/', 1)[0]}/{doc_id}")
+
+    def _order_values(self, path: str, data: dict) -> Optional[list]:
+        values = []
+        for field_path, _ in self._orders:
+            if field_path == DOCUMENT_ID:
+                values.append(self._client.document(path))
+                continue
+            value = _get_field(data, field_path)
+            if value is _MISSING:
+                return None
+            values.append(value)
+        values.append(self._client.document(path))
+        return values
+
+    def _directions(self) -> List[str]:
+        directions = [direction for _, direction in self._orders]
+        # Implicit document id order follows the last explicit direction
+        directions.append(directions[-1] if directions else ASCENDING)
+        return directions
+
+    def _cursor_values(self, cursor: _Cursor) -> list:
+        fields = cursor.values
+        if isinstance(fields, DocumentSnapshot):
+            data = fields._data or {}
+            values = [
+                fields.reference if field_path == DOCUMENT_ID else _get_field(data, field_path)
+                for field_path, _ in self._orders
+            ]
+            return values + [fields.reference]
+        if isinstance(fields, dict):
+            values = []
+            for field_path, _ in self._orders:
+                value = fields.get(field_path)
+                if field_path == DOCUMENT_ID and isinstance(value, str):
+                    value = self._client.document(f"{self._parent + '/' if self._parent else ''}{self._collection_id}/{value}")
+                values.append(value)
+            return values
+        return list(fields)
+
+    def _position(self, values: list, cursor_values: list, directions: List[str]) -> int:
+        for value, bound, direction in zip(values, cursor_values, directions):
+            result = _compare(value, bound)
+            if result:
+                return result if direction == ASCENDING else -result
+        return 0
+
+    def _matching(self, transaction=None) -> list:
+        """(order values, path, data, version) of the results, in order."""
+        rows = []
+        scan = self._client._store.scan(self._parent, self._collection_id, self._all_descendants, self._indexed_filter())
+        for path, data, version in scan:
+            if not all(self._filter_matches(flt, path, data) for flt in self._filters):
+                continue
+            values = self._order_values(path, data)
+            if values is None:
+                continue
+            rows.append((values, path, data, version))
+
+        directions = self._directions()
+
+        def key(row):
+            return _SortKey(row[0], directions)
+
+        rows.sort(key=key)
+
+        if self._start is not None:
+            bound = self._cursor_values(self._start)
+            rows = [
+                row for row in rows
+                if (position := self._position(row[0], bound, directions)) > 0
+                or (position == 0 and self._start.before)
+            ]
+        if self._end is not None:
+            bound = self._cursor_values(self._end)
+            rows = [
+                row for row in rows
+                if (position := self._position(row[0], bound, directions)) < 0
+                or (position == 0 and not self._end.before)
+            ]
+
+        rows = rows[self._offset:]
+        if self._limit is not None:
+            rows = rows[-self._limit:] if self._limit_to_last else rows[:self._limit]
+
+        if transaction is not None:
+            for _, path, _, version in rows:
+                transaction._reads.setdefault(path, version)
+        return rows
+
+    def _run(self, transaction=None) -> List[DocumentSnapshot]:
+        rows = self._matching(transaction)
+        # An empty result is still billed one read
+        self._client._store.count(reads=max(1, len(rows)))
+        read_time = datetime.now(timezone.utc)
+        return [
+            DocumentSnapshot(self._client.document(path), _project(data, self._fields), read_time)
+            for _, path, data, _ in rows
+        ]
+
+    def stream(self, transaction=None, **kwargs) -> Iterator[DocumentSnapshot]:
+        self._client._store.wait()
+        return iter(self._run(transaction))
+
+    def get(self, transaction=None, **kwargs) -> List[DocumentSnapshot]:
+        self._client._store.wait()
+        return self._run(transaction)
+
+
+class _SortKey:
+    __slots__ = ("values", "directions")
+
+    def __init__(self, values, directions):
+        self.values = values
+        self.directions = directions
+
+    def __lt__(self, other: "_SortKey") -> bool:
+        for a, b, direction in zip(self.values, other.values, self.directions):
+            result = _compare(a, b)
+            if result:
+                return result < 0 if direction == ASCENDING else result > 0
+        return False
+
+
+class AsyncQuery(Query):
+    """Async query: ``stream()`` is an async iterator, ``get()`` a coroutine."""
+
+    async def stream(self, transaction=None, **kwargs):
+        await self._client._store.wait_async()
+        for snapshot in self._run(transaction):
+            yield snapshot
+
+    async def get(self, transaction=None, **kwargs) -> List[DocumentSnapshot]:
+        await self._client._store.wait_async()
+        return self._run(transaction)
+
+    def count(self, alias: Optional[str] = None) -> "AsyncAggregationQuery":
+        return AsyncAggregationQuery(self).count(alias)
+
+    def sum(self, field_ref: str, alias: Optional[str] = None) -> "AsyncAggregationQuery":
+        return AsyncAggregationQuery(self).sum(field_ref, alias)
+
+    def avg(self, field_ref: str, alias: Optional[str] = None) -> "AsyncAggregationQuery":
+        return AsyncAggregationQuery(self).avg(field_ref, alias)
+
+
+class AggregationQuery:
+    """count/sum/avg over a query, billed one read per 1000 matches."""
+
+    def __init__(self, query: Query):
+        self._query = query
+        self._aggregations: List[Tuple[str, Optional[str], str]] = []
+
+    def count(self, alias: Optional[str] = None) -> "AggregationQuery":
+        self._aggregations.append(("count", None, alias or f"field_{len(self._aggregations) + 1}"))
+        return self
+
+    def sum(self, field_ref: str, alias: Optional[str] = None) -> "AggregationQuery":
+        self._aggregations.append(("sum", field_ref, alias or f"field_{len(self._aggregations) + 1}"))
+        return self
+
+    def avg(self, field_ref: str, alias: Optional[str] = None) -> "AggregationQuery":
+        self._aggregations.append(("avg", field_ref, alias or f"field_{len(self._aggregations) + 1}"))
+        return self
+
+    def _run(self, transaction=None) -> List[List[AggregationResult]]:
+        rows = [data for _, _, data, _ in self._query._matching(transaction)]
+        self._query._client._store.count(reads=max(1, (len(rows) + 999) // 1000))
+        read_time = datetime.now(timezone.utc)
+        results = []
+        for kind, field_path, alias in self._aggregations:
+            if kind == "count":
+                value: Any = len(rows)
+            else:
+                numbers = [
+                    value for value in (_get_field(data, field_path) for data in rows)
+                    if isinstance(value, (int, float)) and not isinstance(value, bool)
+                ]
+                if kind == "sum":
+                    value = sum(numbers)
+                else:
+                    value = sum(numbers) / len(numbers) if numbers else None
+            results.append(AggregationResult(alias, value, read_time))
+        return [results]
+
+    def get(self, transaction=None, **kwargs) -> List[List[AggregationResult]]:
+        self._query._client._store.wait()
+        return self._run(transaction)
+
+    def stream(self, transaction=None, **kwargs):
+        return iter(self.get(transaction))
+
+
+class AsyncAggregationQuery(AggregationQuery):
+
+    async def get(self, transaction=None, **kwargs) -> List[List[AggregationResult]]:
+        await self._query._client._store.wait_async()
+        return self._run(transaction)
+
+
+class CollectionReference(Query):
+    """Sync collection reference."""
+
+    _document_class = DocumentReference
+
+    def __init__(self, client: "Client", path: str):
+        parent, _, collection_id = path.rpartition("/")
+        super().__init__(client, parent or None, collection_id)
+        self.path = path
+
+    @property
+    def id(self) -> str:
+        return self._collection_id
+
+    @property
+    def parent(self) -> Optional[DocumentReference]:
+        return self._client.document(self._parent) if self._parent else None
+
+    def document(self, document_id: Optional[str] = None) -> DocumentReference:
+        return self._document_class(self._client, f"{self.path}/{document_id or _auto_id()}")
+
+    def add(self, document_data: dict, document_id: Optional[str] = None, **kwargs):
+        ref = self.document(document_id)
+        return ref.create(document_data), ref
+
+    def list_documents(self, page_size: Optional[int] = None, **kwargs) -> Iterator[DocumentReference]:
+        prefix = f"{self.path}/"
+        ids = sorted({path[len(prefix):].split("/", 1)[0] for path in self._client._store.paths(prefix)})
+        return iter([self.document(doc_id) for doc_id in ids])
+
+
+class AsyncCollectionReference(AsyncQuery, CollectionReference):
+    """Async collection reference."""
+
+    _document_class = AsyncDocumentReference
+
+    async def add(self, document_data: dict, document_id: Optional[str] = None, **kwargs):
+        ref = self.document(document_id)
+        return await ref.create(document_data), ref
+
+    async def list_documents(self, page_size: Optional[int] = None, **kwargs):
+        for ref in CollectionReference.list_documents(self):
+            yield ref
+
+
+# -- batches and transactions --------------------------------------------------
+
+class WriteBatch:
+    """Writes committed together."""
+
+    def __init__(self, client: "Client"):
+        self._client = client
+        self._writes: List[tuple] = []
+
+    def __len__(self) -> int:
+        return len(self._writes)
+
+    def set(self, reference: DocumentReference, document_data: dict, merge: bool = False) -> "WriteBatch":
+        self._writes.append(("set", reference.path, document_data, bool(merge)))
+        return self
+
+    def update(self, reference: DocumentReference, field_updates: dict, **kwargs) -> "WriteBatch":
+        self._writes.append(("update", reference.path, field_updates))
+        return self
+
+    def create(self, reference: DocumentReference, document_data: dict) -> "WriteBatch":
+        self._writes.append(("create", reference.path, document_data))
+        return self
+
+    def delete(self, reference: DocumentReference, **kwargs) -> "WriteBatch":
+        self._writes.append(("delete", reference.path))
+        return self
+
+    def commit(self, **kwargs) -> list:
+        self._client._store.wait()
+        writes, self._writes = self._writes, []
+        return [self._client._store.commit(writes)] if writes else []
+
+
+class AsyncWriteBatch(WriteBatch):
+
+    async def commit(self, **kwargs) -> list:
+        await self._client._store.wait_async()
+        writes, self._writes = self._writes, []
+        return [self._client._store.commit(writes)] if writes else []
+
+
+class Transaction(WriteBatch):
+    """Optimistic transaction: commit fails (Aborted) if a read document changed."""
+
+    def __init__(self, client: "Client", max_attempts: int = 5, read_only: bool = False):
+        super().__init__(client)
+        self._max_attempts = max_attempts
+        self._read_only = read_only
+        self._reads: Dict[str, int] = {}
+
+    def _reset(self) -> None:
+        self._writes = []
+        self._reads = {}
+
+    def _commit(self) -> None:
+        writes, self._writes = self._writes, []
+        self._client._store.commit(writes, reads=self._reads)
+
+    def get(self, ref_or_query, **kwargs):
+        if isinstance(ref_or_query, DocumentReference):
+            return iter([DocumentReference.get(ref_or_query, transaction=self)])
+        return iter(Query.get(ref_or_query, transaction=self))
+
+    def get_all(self, references, **kwargs):
+        return self._client.get_all(references, transaction=self)
+
+
+class AsyncTransaction(Transaction):
+    """Async transaction; reads go through ``await ref.get(transaction=...)``."""
+
+
+class _Transactional:
+    """Runs ``func(transaction, ...)`` and commits, retrying on contention."""
+
+    def __init__(self, func):
+        self.to_wrap = func
+
+    def __call__(self, transaction: Transaction, *args, **kwargs):
+        for attempt in range(transaction._max_attempts):
+            transaction._reset()
+            result = self.to_wrap(transaction, *args, **kwargs)
+            try:
+                transaction._client._store.wait()
+                transaction._commit()
+                return result
+            except exceptions.Aborted:
+                time.sleep(random.uniform(0, 0.01 * (attempt + 1)))
+        raise exceptions.Aborted("Transaction contention: too many attempts")
+
+
+class _AsyncTransactional(_Transactional):
+
+    async def __call__(self, transaction: AsyncTransaction, *args, **kwargs):
+        for attempt in range(transaction._max_attempts):
+            transaction._reset()
+            result = await self.to_wrap(transaction, *args, **kwargs)
+            try:
+                await transaction._client._store.wait_async()
+                transaction._commit()
+                return result
+            except exceptions.Aborted:
+                await asyncio.sleep(random.uniform(0, 0.01 * (attempt + 1)))
+        raise exceptions.Aborted("Transaction contention: too many attempts")
+
+
+def transactional(func) -> _Transactional:
+    return _Transactional(func)
+
+
+def async_transactional(func) -> _AsyncTransactional:
+    return _AsyncTransactional(func)
+
+
+# -- clients -------------------------------------------------------------------
+
+class Client:
+    """Sync client over a FakeFirestore (the process-wide ``store`` by default)."""
+
+    _collection_class = CollectionReference
+    _document_class = DocumentReference
+    _query_class = Query
+    _batch_class = WriteBatch
+    _transaction_class = Transaction
+
+    def __init__(self, project: Optional[str] = None, *args, fake_store: Optional[FakeFirestore] = None, **kwargs):
+        self.project = project or "loadtest"
+        self._store = fake_store or store
+
+    def collection(self, *path: str) -> CollectionReference:
+        return self._collection_class(self, "/".join(path))
+
+    def document(self, *path: str) -> DocumentReference:
+        return self._document_class(self, "/".join(path))
+
+    def collection_group(self, collection_id: str) -> Query:
+        return self._query_class(self, None, collection_id, all_descendants=True)
+
+    def collections(self, **kwargs) -> List[CollectionReference]:
+        ids = {path.split("/", 1)[0] for path in self._store.paths("")}
+        return [self.collection(collection_id) for collection_id in sorted(ids)]
+
+    def batch(self) -> WriteBatch:
+        return self._batch_class(self)
+
+    def bulk_writer(self, **kwargs) -> WriteBatch:
+        return self._batch_class(self)
+
+    def transaction(self, max_attempts: int = 5, read_only: bool = False, **kwargs) -> Transaction:
+        return self._transaction_class(self, max_attempts=max_attempts, read_only=read_only)
+
+    def _get_all(self, references, field_paths=None, transaction=None) -> List[DocumentSnapshot]:
+        snapshots = []
+        read_time = datetime.now(timezone.utc)
+        for reference in references:
+            data, version = self._store.read(reference.path)
+            if transaction is not None:
+                transaction._reads.setdefault(reference.path, version)
+            snapshots.append(DocumentSnapshot(reference, _project(data, field_paths) if data is not None else None, read_time))
+        self._store.count(reads=max(1, len(snapshots)))
+        return snapshots
+
+    def get_all(self, references, field_paths=None, transaction=None, **kwargs) -> Iterator[DocumentSnapshot]:
+        self._store.wait()
+        return iter(self._get_all(list(references), field_paths, transaction))
+
+    def close(self) -> None:
+        pass
+
+
+class AsyncClient(Client):
+    """Async client over a FakeFirestore."""
+
+    _collection_class = AsyncCollectionReference
+    _document_class = AsyncDocumentReference
+    _query_class = AsyncQuery
+    _batch_class = AsyncWriteBatch
+    _transaction_class = AsyncTransaction
+
+    async def get_all(self, references, field_paths=None, transaction=None, **kwargs):
+        await self._store.wait_async()
+        for snapshot in self._get_all(list(references), field_paths, transaction):
+            yield snapshot
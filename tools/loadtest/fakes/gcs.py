@@ -0,0 +1,305 @@
+"""Filesystem-backed Cloud Storage for load tests.
+
+Objects live under ``root/<bucket>/<path>``; content type, cache control
+and metadata are kept in memory. Signed URLs point at a local HTTP server
+(start_server()) that serves GET and accepts PUT for any object, so
+WaveSpeed (fake) and the services download/upload through real HTTP like
+they would against storage.googleapis.com.
+"""
+
+import mimetypes
+import os
+import shutil
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, Optional
+from urllib.parse import quote, unquote, urlsplit
+
+from google.api_core import exceptions
+
+
+class FakeStorage:
+    """Object store shared by every fake client."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.base_url = "http://127.0.0.1"
+        self.stats = {"uploads": 0, "downloads": 0, "bytes_uploaded": 0, "bytes_downloaded": 0, "signed_urls": 0}
+        self._meta: Dict[tuple, dict] = {}
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, bucket: str, name: str) -> str:
+        path = os.path.normpath(os.path.join(self.root, bucket, name))
+        if not path.startswith(os.path.join(self.root, bucket) + os.sep):
+            raise exceptions.BadRequest(f"Invalid object name: {name}")
+        return path
+
+    def count(self, key: str, size: int = 0) -> None:
+        with self._lock:
+            self.stats[f"{key}s"] += 1
+            if size:
+                self.stats[f"bytes_{key}ed"] += size
+
+    def meta(self, bucket: str, name: str) -> dict:
+        with self._lock:
+            return dict(self._meta.get((bucket, name), {}))
+
+    def set_meta(self, bucket: str, name: str, meta: dict) -> None:
+        with self._lock:
+            self._meta[(bucket, name)] = meta
+
+    def write(self, bucket: str, name: str, data: bytes, content_type: Optional[str] = None) -> None:
+        path = self.path(bucket, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename so concurrent readers never see a partial object
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        meta = self.meta(bucket, name)
+        meta["content_type"] = content_type or meta.get("content_type") or _guess_type(name)
+        self.set_meta(bucket, name, meta)
+        self.count("upload", len(data))
+
+    def signed_url(self, bucket: str, name: str) -> str:
+        self.count("signed_url")
+        return f"{self.base_url}/{quote(bucket)}/{quote(name, safe='/~')}?X-Goog-Signature=loadtest"
+
+    def start_server(self, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+        """Serve objects over HTTP; signed URLs point here afterwards."""
+        storage = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _object(self):
+                bucket, _, name = unquote(urlsplit(self.path).path).lstrip("/").partition("/")
+                return bucket, name
+
+            def do_GET(self):
+                bucket, name = self._object()
+                try:
+                    path = storage.path(bucket, name)
+                except exceptions.BadRequest:
+                    self.send_error(400)
+                    return
+                if not os.path.isfile(path):
+                    self.send_error(404)
+                    return
+                size = os.path.getsize(path)
+                meta = storage.meta(bucket, name)
+                self.send_response(200)
+                self.send_header("Content-Type", meta.get("content_type") or _guess_type(name))
+                self.send_header("Content-Length", str(size))
+                if meta.get("cache_control"):
+                    self.send_header("Cache-Control", meta["cache_control"])
+                self.end_headers()
+                with open(path, "rb") as f:
+                    shutil.copyfileobj(f, self.wfile)
+                storage.count("download", size)
+
+            def do_PUT(self):
+                bucket, name = self._object()
+                data = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                try:
+                    storage.write(bucket, name, data, self.headers.get("Content-Type"))
+                except exceptions.BadRequest:
+                    self.send_error(400)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        self.base_url = f"http://{host}:{server.server_address[1]}"
+        threading.Thread(target=server.serve_forever, name="fake-gcs", daemon=True).start()
+        return server
+
+
+def _guess_type(name: str) -> str:
+    return mimetypes.guess_type(name)[0] or "application/octet-stream"
+
+
+# Set by install(); clients created before then fail loudly
+storage: Optional[FakeStorage] = None
+
+
+def _store() -> FakeStorage:
+    if storage is None:
+        raise RuntimeError("fake GCS not configured (fakes.install() sets the root directory)")
+    return storage
+
+
+class Blob:
+    """An object (existing or not) in a fake bucket."""
+
+    def __init__(self, name: str, bucket: "Bucket", **kwargs):
+        self.name = name
+        self.bucket = bucket
+        meta = _store().meta(bucket.name, name)
+        self.content_type = meta.get("content_type")
+        self.cache_control = meta.get("cache_control")
+        self.metadata = meta.get("metadata")
+        self.size: Optional[int] = None
+        self.updated: Optional[datetime] = None
+        self.time_created: Optional[datetime] = None
+
+    @property
+    def _path(self) -> str:
+        return _store().path(self.bucket.name, self.name)
+
+    @property
+    def public_url(self) -> str:
+        return f"{_store().base_url}/{quote(self.bucket.name)}/{quote(self.name, safe='/~')}"
+
+    def _save_meta(self) -> None:
+        _store().set_meta(self.bucket.name, self.name, {
+            "content_type": self.content_type,
+            "cache_control": self.cache_control,
+            "metadata": self.metadata,
+        })
+
+    def exists(self, **kwargs) -> bool:
+        return os.path.isfile(self._path)
+
+    def reload(self, **kwargs) -> None:
+        try:
+            stat = os.stat(self._path)
+        except FileNotFoundError:
+            raise exceptions.NotFound(f"No such object: {self.bucket.name}/{self.name}")
+        self.size = stat.st_size
+        self.updated = self.time_created = datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc)
+        meta = _store().meta(self.bucket.name, self.name)
+        self.content_type = meta.get("content_type")
+        self.cache_control = meta.get("cache_control")
+        self.metadata = meta.get("metadata")
+
+    def patch(self, **kwargs) -> None:
+        self._save_meta()
+
+    def upload_from_string(self, data, content_type: Optional[str] = None, **kwargs) -> None:
+        if isinstance(data, str):
+            data = data.encode()
+        _store().write(self.bucket.name, self.name, data, content_type or self.content_type)
+        self.content_type = content_type or self.content_type or _guess_type(self.name)
+        self._save_meta()
+        self.reload()
+
+    def upload_from_filename(self, filename: str, content_type: Optional[str] = None, **kwargs) -> None:
+        with open(filename, "rb") as f:
+            self.upload_from_string(f.read(), content_type=content_type)
+
+    def upload_from_file(self, file_obj, content_type: Optional[str] = None, **kwargs) -> None:
+        self.upload_from_string(file_obj.read(), content_type=content_type)
+
+    def _read(self) -> bytes:
+        try:
+            with open(self._path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            raise exceptions.NotFound(f"No such object: {self.bucket.name}/{self.name}")
+        _store().count("download", len(data))
+        return data
+
+    def download_as_bytes(self, **kwargs) -> bytes:
+        return self._read()
+
+    def download_as_text(self, encoding: str = "utf-8", **kwargs) -> str:
+        return self._read().decode(encoding)
+
+    def download_to_filename(self, filename: str, **kwargs) -> None:
+        data = self._read()
+        with open(filename, "wb") as f:
+            f.write(data)
+
+    def delete(self, **kwargs) -> None:
+        try:
+            os.remove(self._path)
+        except FileNotFoundError:
+            raise exceptions.NotFound(f"No such object: {self.bucket.name}/{self.name}")
+
+    def generate_signed_url(self, *args, **kwargs) -> str:
+        return _store().signed_url(self.bucket.name, self.name)
+
+
+class Bucket:
+    """A fake bucket (a directory under the storage root)."""
+
+    def __init__(self, client: "Client", name: str, **kwargs):
+        self.client = client
+        self.name = name
+
+    def blob(self, blob_name: str, **kwargs) -> Blob:
+        return Blob(blob_name, self)
+
+    def get_blob(self, blob_name: str, **kwargs) -> Optional[Blob]:
+        blob = Blob(blob_name, self)
+        try:
+            blob.reload()
+        except exceptions.NotFound:
+            return None
+        return blob
+
+    def exists(self, **kwargs) -> bool:
+        return True
+
+    def list_blobs(self, prefix: Optional[str] = None, **kwargs) -> Iterator[Blob]:
+        return self.client.list_blobs(self, prefix=prefix, **kwargs)
+
+    def copy_blob(self, blob: Blob, destination_bucket: "Bucket", new_name: Optional[str] = None, **kwargs) -> Blob:
+        copy = destination_bucket.blob(new_name or blob.name)
+        copy.upload_from_string(blob.download_as_bytes(), content_type=blob.content_type)
+        return copy
+
+    def delete_blob(self, blob_name: str, **kwargs) -> None:
+        self.blob(blob_name).delete()
+
+    def delete_blobs(self, blobs, **kwargs) -> None:
+        for blob in blobs:
+            (blob if isinstance(blob, Blob) else self.blob(blob)).delete()
+
+
+class Client:
+    """Stands in for google.cloud.storage.Client."""
+
+    def __init__(self, project: Optional[str] = None, *args, **kwargs):
+        self.project = project or "loadtest"
+
+    def bucket(self, bucket_name: str, **kwargs) -> Bucket:
+        return Bucket(self, bucket_name)
+
+    def get_bucket(self, bucket_or_name, **kwargs) -> Bucket:
+        return bucket_or_name if isinstance(bucket_or_name, Bucket) else Bucket(self, bucket_or_name)
+
+    lookup_bucket = get_bucket
+
+    def list_blobs(self, bucket_or_name, prefix: Optional[str] = None, max_results: Optional[int] = None, **kwargs) -> Iterator[Blob]:
+        bucket = self.get_bucket(bucket_or_name)
+        root = os.path.join(_store().root, bucket.name)
+        names = []
+        for directory, _, files in os.walk(root):
+            for filename in files:
+                if filename.endswith(".tmp"):
+                    continue
+                name = os.path.relpath(os.path.join(directory, filename), root).replace(os.sep, "/")
+                if not prefix or name.startswith(prefix):
+                    names.append(name)
+        blobs = []
+        for name in sorted(names)[:max_results]:
+            blob = Blob(name, bucket)
+            try:
+                blob.reload()
+            except exceptions.NotFound:
+                continue
+            blobs.append(blob)
+        return iter(blobs)
+
+
+def generate_signed_url_v4(credentials, resource: str, *args, **kwargs) -> str:
+    """Stands in for google.cloud.storage._signing.generate_signed_url_v4."""
+    bucket, _, name = unquote(resource).lstrip("/").partition("/")
+    return _store().signed_url(bucket, name)
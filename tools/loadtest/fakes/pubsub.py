@@ -0,0 +1,72 @@
+"""In-process Pub/Sub push subscriptions for load tests.
+
+publish() wraps the message in a push envelope and hands it to the
+PushQueue of every subscription of the topic (subscribe()), which POSTs it
+to the push endpoint with the fake OIDC token and retries until it is
+acked with a 2xx, like a push subscription.
+"""
+
+import base64
+import itertools
+import json
+import threading
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from typing import Dict, List, Tuple
+
+from .push import PushQueue
+from .tasks import OIDC_TOKEN
+
+# Per topic id: (push endpoint, queue delivering to it)
+subscriptions: Dict[str, List[Tuple[str, PushQueue]]] = {}
+_lock = threading.Lock()
+_message_ids = itertools.count(1)
+stats = {"published": 0, "unrouted": 0}
+
+
+def subscribe(topic_id: str, push_endpoint: str, **queue_settings) -> PushQueue:
+    """Push messages of ``topic_id`` to ``push_endpoint``."""
+    queue = PushQueue(f"pubsub-{topic_id}", **queue_settings)
+    with _lock:
+        subscriptions.setdefault(topic_id, []).append((push_endpoint, queue))
+    return queue
+
+
+class PublisherClient:
+    """Stands in for google.cloud.pubsub_v1.PublisherClient."""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    @staticmethod
+    def topic_path(project: str, topic: str) -> str:
+        return f"projects/{project}/topics/{topic}"
+
+    def publish(self, topic: str, data: bytes, ordering_key: str = "", **attributes) -> Future:
+        topic_id = topic.rsplit("/", 1)[-1]
+        message_id = str(next(_message_ids))
+        with _lock:
+            targets = list(subscriptions.get(topic_id, ()))
+            stats["published"] += 1
+            if not targets:
+                stats["unrouted"] += 1
+
+        for endpoint, queue in targets:
+            envelope = {
+                "message": {
+                    "data": base64.b64encode(data).decode(),
+                    "attributes": {key: str(value) for key, value in attributes.items()},
+                    "messageId": message_id,
+                    "publishTime": datetime.now(timezone.utc).isoformat(),
+                },
+                "subscription": f"loadtest-{topic_id}-push",
+            }
+            queue.push(
+                endpoint,
+                json.dumps(envelope).encode(),
+                {"Content-Type": "application/json", "Authorization": f"Bearer {OIDC_TOKEN}"},
+            )
+
+        future: Future = Future()
+        future.set_result(message_id)
+        return future
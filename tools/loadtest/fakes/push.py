@@ -0,0 +1,153 @@
+"""HTTP push delivery with retries, shared by the Cloud Tasks and Pub/Sub fakes.
+
+A PushQueue POSTs each message to its URL from ``max_concurrent`` threads.
+Non-2xx responses and connection errors are retried with exponential
+backoff (a 429/503 Retry-After header is honoured, capped at
+``max_backoff``) until ``max_attempts``; the queue records how long
+messages waited for a free dispatcher and how many attempts they took.
+With ``max_concurrent=0`` messages are only queued, never delivered.
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class PushQueue:
+    """Delayed, concurrency-limited HTTP push with retries."""
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrent: int = 10,
+        max_attempts: int = 20,
+        min_backoff: float = 0.2,
+        max_backoff: float = 5.0,
+        timeout: float = 900.0,
+    ):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_attempts = max_attempts
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+
+        self.stats: Dict[str, int] = {
+            "enqueued": 0, "delivered": 0, "gave_up": 0,
+            "attempts": 0, "throttled": 0, "errors": 0,
+        }
+        # Seconds from due time to first dispatch, per message
+        self.waits: List[float] = []
+
+        self._heap: list = []
+        self._seq = itertools.count()
+        self._pending = 0
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._threads = [
+            threading.Thread(target=self._run, name=f"push-{name}-{i}", daemon=True)
+            for i in range(max_concurrent)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def push(self, url: str, body: bytes, headers: Optional[Dict[str, str]] = None, delay: float = 0.0) -> None:
+        due = time.time() + max(0.0, delay)
+        with self._cond:
+            heapq.heappush(self._heap, (due, next(self._seq), url, body, dict(headers or {}), 1, due))
+            self._pending += 1
+            self.stats["enqueued"] += 1
+            self._cond.notify()
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every message was delivered or given up on."""
+        deadline = time.time() + timeout if timeout is not None else None
+        with self._cond:
+            while self._pending:
+                remaining = deadline - time.time() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining if remaining is not None else 1.0)
+        return True
+
+    @property
+    def backlog(self) -> int:
+        with self._cond:
+            return self._pending
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    def _next(self):
+        with self._cond:
+            while not self._stopped:
+                now = time.time()
+                if self._heap and self._heap[0][0] <= now:
+                    return heapq.heappop(self._heap)
+                self._cond.wait(self._heap[0][0] - now if self._heap else None)
+        return None
+
+    def _done(self, delivered: bool) -> None:
+        with self._cond:
+            self._pending -= 1
+            self.stats["delivered" if delivered else "gave_up"] += 1
+            self._cond.notify_all()
+
+    def _retry(self, item, delay: float) -> None:
+        due, _, url, body, headers, attempt, first_due = item
+        with self._cond:
+            heapq.heappush(self._heap, (time.time() + delay, next(self._seq), url, body, headers, attempt + 1, first_due))
+            self._cond.notify()
+
+    def _run(self) -> None:
+        with httpx.Client(timeout=self.timeout) as client:
+            while True:
+                item = self._next()
+                if item is None:
+                    return
+                due, _, url, body, headers, attempt, first_due = item
+                if attempt == 1:
+                    with self._cond:
+                        self.waits.append(time.time() - first_due)
+                headers = {**headers, "X-Loadtest-Attempt": str(attempt)}
+
+                retry_after = None
+                try:
+                    response = client.post(url, content=body, headers=headers)
+                    status = response.status_code
+                    retry_after = response.headers.get("Retry-After")
+                except httpx.HTTPError as e:
+                    logger.warning("%s: delivery to %s failed: %s", self.name, url, e)
+                    status = None
+
+                with self._cond:
+                    self.stats["attempts"] += 1
+                    if status in (429, 503):
+                        self.stats["throttled"] += 1
+                    elif status is None or status >= 300:
+                        self.stats["errors"] += 1
+
+                if status is not None and 200 <= status < 300:
+                    self._done(True)
+                    continue
+                if attempt >= self.max_attempts:
+                    logger.error("%s: giving up on %s after %d attempts (last status %s)", self.name, url, attempt, status)
+                    self._done(False)
+                    continue
+
+                delay = min(self.max_backoff, self.min_backoff * 2 ** (attempt - 1))
+                if retry_after and status in (429, 503):
+                    try:
+                        delay = min(self.max_backoff, float(retry_after))
+                    except ValueError:
+                        pass
+                self._retry(item, delay)
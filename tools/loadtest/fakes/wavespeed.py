@@ -0,0 +1,166 @@
+"""Fake WaveSpeed API server for load tests.
+
+Accepts the submit calls the worker makes (POST /api/v3/<model>), answers
+result polls (GET /api/v3/predictions/<id>/result) and serves the output
+video. Each prediction completes after ``latency`` seconds (+/- ``jitter``)
+and fails with probability ``failure_rate``; ``throttle_rate`` of submits
+get a 429 like a saturated account. When the submit carried a ``webhook``
+query parameter the result is POSTed there (with retries), as WaveSpeed
+does.
+"""
+
+import heapq
+import itertools
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from .push import PushQueue
+
+logger = logging.getLogger(__name__)
+
+
+class FakeWaveSpeed:
+    """Predictions, their completion schedule and the HTTP server."""
+
+    def __init__(
+        self,
+        output_video: bytes,
+        latency: float = 5.0,
+        jitter: float = 0.5,
+        failure_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        webhook_concurrency: int = 20,
+    ):
+        self.output_video = output_video
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.throttle_rate = throttle_rate
+        self.base_url = "http://127.0.0.1"
+        self.webhooks = PushQueue("wavespeed-webhooks", max_concurrent=webhook_concurrency, max_attempts=5, min_backoff=1.0)
+
+        self.stats: Dict[str, int] = {"submitted": 0, "throttled": 0, "completed": 0, "failed": 0, "polls": 0}
+        self.running = 0
+        self.peak_running = 0
+        self._predictions: Dict[str, dict] = {}
+        self._webhook_urls: Dict[str, str] = {}
+        self._schedule: list = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        threading.Thread(target=self._complete_loop, name="fake-wavespeed", daemon=True).start()
+
+    def submit(self, model: str, body: dict, webhook_url: Optional[str]) -> Optional[dict]:
+        """Create a prediction; None when the submit is throttled."""
+        with self._cond:
+            if random.random() < self.throttle_rate:
+                self.stats["throttled"] += 1
+                return None
+            prediction_id = uuid.uuid4().hex
+            prediction = {
+                "id": prediction_id,
+                "model": model,
+                "status": "created",
+                "outputs": [],
+                "error": "",
+                "created_at": time.time(),
+                "urls": {"get": f"{self.base_url}/api/v3/predictions/{prediction_id}/result"},
+            }
+            self._predictions[prediction_id] = prediction
+            if webhook_url:
+                self._webhook_urls[prediction_id] = webhook_url
+            self.stats["submitted"] += 1
+            self.running += 1
+            self.peak_running = max(self.peak_running, self.running)
+            spread = self.latency * self.jitter
+            done_at = time.time() + max(0.0, random.uniform(self.latency - spread, self.latency + spread))
+            heapq.heappush(self._schedule, (done_at, next(self._seq), prediction_id))
+            self._cond.notify()
+            return dict(prediction)
+
+    def result(self, prediction_id: str) -> Optional[dict]:
+        with self._cond:
+            self.stats["polls"] += 1
+            prediction = self._predictions.get(prediction_id)
+            return dict(prediction) if prediction else None
+
+    def _complete_loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._schedule or self._schedule[0][0] > time.time():
+                    self._cond.wait(self._schedule[0][0] - time.time() if self._schedule else None)
+                _, _, prediction_id = heapq.heappop(self._schedule)
+                prediction = self._predictions[prediction_id]
+                if random.random() < self.failure_rate:
+                    prediction.update(status="failed", error="Simulated WaveSpeed failure")
+                    self.stats["failed"] += 1
+                else:
+                    prediction.update(status="completed", outputs=[f"{self.base_url}/outputs/{prediction_id}.mp4"])
+                    self.stats["completed"] += 1
+                self.running -= 1
+                webhook_url = self._webhook_urls.pop(prediction_id, None)
+                payload = json.dumps(prediction).encode()
+            if webhook_url:
+                self.webhooks.push(webhook_url, payload, {"Content-Type": "application/json"})
+
+    def start_server(self, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _json(self, status: int, body: dict):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                url = urlsplit(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if not self.headers.get("Authorization", "").startswith("Bearer "):
+                    self._json(401, {"code": 401, "message": "Unauthorized"})
+                    return
+                if not url.path.startswith("/api/v3/"):
+                    self._json(404, {"code": 404, "message": "Not found"})
+                    return
+                webhook_url = (parse_qs(url.query).get("webhook") or [None])[0]
+                prediction = api.submit(url.path[len("/api/v3/"):], body, webhook_url)
+                if prediction is None:
+                    self._json(429, {"code": 429, "message": "Too many requests"})
+                    return
+                self._json(200, {"code": 200, "message": "success", "data": prediction})
+
+            def do_GET(self):
+                path = urlsplit(self.path).path
+                if path.startswith("/outputs/"):
+                    self.send_response(200)
+                    self.send_header("Content-Type", "video/mp4")
+                    self.send_header("Content-Length", str(len(api.output_video)))
+                    self.end_headers()
+                    self.wfile.write(api.output_video)
+                    return
+                if path.startswith("/api/v3/predictions/") and path.endswith("/result"):
+                    prediction = api.result(path.split("/")[4])
+                    if prediction is None:
+                        self._json(404, {"code": 404, "message": "Prediction not found"})
+                    else:
+                        self._json(200, {"code": 200, "message": "success", "data": prediction})
+                    return
+                self._json(404, {"code": 404, "message": "Not found"})
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        self.base_url = f"http://{host}:{server.server_address[1]}"
+        threading.Thread(target=server.serve_forever, name="fake-wavespeed-http", daemon=True).start()
+        return server
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""End-to-end pipeline load test, fully offline.
+
+Boots the API, the worker and the FFmpeg worker in this process against
+in-memory Firestore, filesystem GCS, in-process Cloud Tasks/Pub/Sub and a
+fake WaveSpeed (see services.py), then pushes animate jobs through the
+whole path -- create, queue, submit, WaveSpeed, webhook, Pub/Sub push,
+download, watermark, upload, optional FFmpeg post-process -- from
+``--concurrency`` simulated clients that poll their job like the frontend.
+
+Reports jobs/min, end-to-end and per-stage (job timeline) latency
+percentiles, queue and fake-service counters, and CPU/RSS of the process.
+
+Usage:
+    python pipeline.py --jobs 200 --concurrency 20
+    python pipeline.py --jobs 100 --wavespeed-latency 2 --wavespeed-failure-rate 0.05 --json results/pipeline.json
+"""
+
+import argparse
+import logging
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import httpx
+
+import services
+from fakes import firestore as fake_firestore
+from fakes import gcs as fake_gcs
+from fakes import pubsub as fake_pubsub
+from report import ResourceSampler, format_table, summarize, write_json
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+# Job timeline stages in pipeline order (see shared/worker_utils/timeline.py)
+STAGES = ["api", "queue", "submit", "wavespeed", "pubsub", "download", "watermark", "upload"]
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--jobs", type=int, default=50, help="Jobs to run (default: 50)")
+    parser.add_argument("--concurrency", type=int, default=10, help="Simulated clients, one job in flight each (default: 10)")
+    parser.add_argument("--users", type=int, default=50, help="Seeded users jobs are spread over (default: 50)")
+    parser.add_argument("--free-tier-percent", type=float, default=50.0, help="Users on the free tier, whose outputs get watermarked (default: 50)")
+    parser.add_argument("--post-process-percent", type=float, default=0.0, help="Completed jobs that also request an FFmpeg watermark job (default: 0)")
+    parser.add_argument("--video-seconds", type=int, default=5, help="Length of the sample motion/output video (default: 5)")
+    parser.add_argument("--wavespeed-latency", type=float, default=5.0, help="Mean seconds a WaveSpeed prediction takes (default: 5)")
+    parser.add_argument("--wavespeed-jitter", type=float, default=0.5, help="Latency spread as a fraction of the mean (default: 0.5)")
+    parser.add_argument("--wavespeed-failure-rate", type=float, default=0.0, help="Fraction of predictions that fail (default: 0)")
+    parser.add_argument("--wavespeed-throttle-rate", type=float, default=0.0, help="Fraction of submits answered with 429 (default: 0)")
+    parser.add_argument("--firestore-latency", type=float, default=0.005, help="Seconds per Firestore RPC (default: 0.005)")
+    parser.add_argument("--worker-concurrency", type=int, default=20, help="Cloud Tasks max concurrent dispatches to the worker (default: 20)")
+    parser.add_argument("--ffmpeg-concurrency", type=int, default=4, help="Cloud Tasks max concurrent dispatches to the FFmpeg worker (default: 4)")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds between client status polls (default: 1)")
+    parser.add_argument("--job-timeout", type=float, default=600.0, help="Give up on a job after this many seconds (default: 600)")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for reproducible job mixes")
+    parser.add_argument("--json", metavar="PATH", help="Write the full results to PATH")
+    return parser.parse_args(argv)
+
+
+def wait_for_job(client: httpx.Client, token: str, job_id: str, poll_interval: float, deadline: float) -> dict:
+    """Poll GET /jobs/{id} until the job is terminal (or the deadline passes)."""
+    headers = {"Authorization": f"Bearer {token}"}
+    while True:
+        response = client.get(f"/api/v1/jobs/{job_id}", headers=headers)
+        if response.status_code == 200:
+            job = response.json()
+            if job["status"] in TERMINAL_STATUSES:
+                return job
+        if time.time() >= deadline:
+            return {"id": job_id, "status": "timeout"}
+        time.sleep(poll_interval)
+
+
+def run_job(client: httpx.Client, user: dict, args: argparse.Namespace, rng: random.Random) -> dict:
+    """Create one animate job, follow it (and its post-process job) to the end."""
+    started = time.time()
+    deadline = started + args.job_timeout
+    headers = {"Authorization": f"Bearer {user['token']}"}
+    result = {"user": user["uid"], "tier": user["tier"]}
+
+    response = client.post("/api/v1/jobs", headers=headers, json={
+        "job_type": "animate",
+        "reference_image_path": user["reference_image_path"],
+        "motion_video_path": user["motion_video_path"],
+        "motion_video_duration_seconds": args.video_seconds,
+        "resolution": "480p",
+    })
+    result["create_seconds"] = time.time() - started
+    if response.status_code != 200:
+        result.update(status=f"create_{response.status_code}", seconds=time.time() - started)
+        return result
+
+    job_id = result["job_id"] = response.json()["id"]
+    job = wait_for_job(client, user["token"], job_id, args.poll_interval, deadline)
+    result.update(status=job["status"], seconds=time.time() - started)
+
+    if job["status"] == "completed" and rng.random() * 100 < args.post_process_percent:
+        post_started = time.time()
+        response = client.post(f"/api/v1/jobs/{job_id}/post-process", headers=headers, json={
+            "post_process_type": "watermark",
+            "watermark_enabled": True,
+        })
+        if response.status_code != 200:
+            result["post_process_status"] = f"create_{response.status_code}"
+        else:
+            post_job_id = result["post_process_job_id"] = response.json()["job_id"]
+            post_job = wait_for_job(client, user["token"], post_job_id, args.poll_interval, deadline)
+            result["post_process_status"] = post_job["status"]
+            result["post_process_seconds"] = time.time() - post_started
+    return result
+
+
+def job_stages(job_ids: List[str]) -> Dict[str, List[float]]:
+    """Stage durations from the jobs' Firestore timelines (read unbilled)."""
+    stages: Dict[str, List[float]] = {}
+    for job_id in job_ids:
+        data, _ = fake_firestore.store.read(f"jobs/{job_id}")
+        for stage, timing in ((data or {}).get("timeline") or {}).items():
+            if isinstance(timing, dict) and timing.get("seconds") is not None:
+                stages.setdefault(stage, []).append(float(timing["seconds"]))
+    return stages
+
+
+def run(args: argparse.Namespace) -> dict:
+    settings = services.Settings(
+        users=args.users,
+        free_tier_percent=args.free_tier_percent,
+        video_seconds=args.video_seconds,
+        wavespeed_latency=args.wavespeed_latency,
+        wavespeed_jitter=args.wavespeed_jitter,
+        wavespeed_failure_rate=args.wavespeed_failure_rate,
+        wavespeed_throttle_rate=args.wavespeed_throttle_rate,
+        firestore_latency=args.firestore_latency,
+        worker_concurrency=args.worker_concurrency,
+        ffmpeg_concurrency=args.ffmpeg_concurrency,
+    )
+    print(f"Starting services ({args.users} users)...", file=sys.stderr)
+    stack = services.start(settings)
+    rng = random.Random(args.seed)
+    rng_lock = threading.Lock()
+    firestore_before = fake_firestore.store.stats.as_dict()
+    gcs_before = dict(fake_gcs.storage.stats)
+
+    def client_job(i: int) -> dict:
+        with rng_lock:
+            user = rng.choice(stack.users)
+            job_rng = random.Random(rng.random())
+        return run_job(client, user, args, job_rng)
+
+    print(f"Running {args.jobs} jobs at concurrency {args.concurrency}...", file=sys.stderr)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    client = httpx.Client(base_url=stack.api_url, timeout=60, limits=limits)
+    sampler = ResourceSampler().start()
+    started = time.time()
+    try:
+        with ThreadPoolExecutor(max_workers=args.concurrency, thread_name_prefix="client") as pool:
+            jobs = list(pool.map(client_job, range(args.jobs)))
+        wall = time.time() - started
+        resources = sampler.stop()
+        queues = {name: {**queue.stats, "wait": summarize(queue.waits), "backlog": queue.backlog}
+                  for name, queue in stack.queues().items()}
+        wavespeed = {**stack.wavespeed.stats, "peak_running": stack.wavespeed.peak_running}
+    finally:
+        sampler.stop()
+        client.close()
+        stack.stop()
+
+    firestore_after = fake_firestore.store.stats.as_dict()
+    completed = [job for job in jobs if job["status"] == "completed"]
+    statuses: Dict[str, int] = {}
+    for job in jobs:
+        statuses[job["status"]] = statuses.get(job["status"], 0) + 1
+
+    job_ids = [job["job_id"] for job in jobs if job.get("job_id")]
+    post_ids = [job["post_process_job_id"] for job in jobs if job.get("post_process_job_id")]
+    stages = job_stages(job_ids)
+    post_stages = job_stages(post_ids)
+
+    return {
+        "settings": vars(args),
+        "wall_seconds": round(wall, 2),
+        "jobs": len(jobs),
+        "statuses": statuses,
+        "jobs_per_minute": round(60 * len(completed) / wall, 2) if wall else None,
+        "end_to_end_seconds": summarize([job["seconds"] for job in completed]),
+        "end_to_end_seconds_by_tier": {
+            tier: summarize([job["seconds"] for job in completed if job["tier"] == tier])
+            for tier in sorted({job["tier"] for job in completed})
+        },
+        "create_seconds": summarize([job["create_seconds"] for job in jobs]),
+        "stages": {stage: summarize(stages[stage]) for stage in [*STAGES, *sorted(set(stages) - set(STAGES))] if stage in stages},
+        "post_process": {
+            "jobs": len(post_ids),
+            "statuses": {status: sum(1 for job in jobs if job.get("post_process_status") == status)
+                         for status in sorted({job["post_process_status"] for job in jobs if job.get("post_process_status")})},
+            "seconds": summarize([job["post_process_seconds"] for job in jobs if job.get("post_process_status") == "completed"]),
+            "stages": {stage: summarize(values) for stage, values in sorted(post_stages.items())},
+        },
+        "queues": queues,
+        "pubsub": dict(fake_pubsub.stats),
+        "wavespeed": wavespeed,
+        "firestore": {key: firestore_after[key] - firestore_before[key] for key in firestore_after},
+        "gcs": {key: value - gcs_before.get(key, 0) for key, value in fake_gcs.storage.stats.items()},
+        "resources": resources,
+    }
+
+
+def print_report(results: dict) -> None:
+    print()
+    print(f"Jobs: {results['jobs']}  statuses: {results['statuses']}")
+    print(f"Wall: {results['wall_seconds']}s  throughput: {results['jobs_per_minute']} completed jobs/min")
+    print()
+    rows = [["end-to-end", *_percentiles(results["end_to_end_seconds"])]]
+    rows += [[f"end-to-end ({tier})", *_percentiles(summary)] for tier, summary in results["end_to_end_seconds_by_tier"].items()]
+    rows += [[f"stage: {stage}", *_percentiles(summary)] for stage, summary in results["stages"].items()]
+    if results["post_process"]["jobs"]:
+        rows.append(["post-process", *_percentiles(results["post_process"]["seconds"])])
+    print(format_table(rows, ["seconds", "count", "p50", "p95", "p99", "max"]))
+    print()
+    queue_rows = [
+        [name, q["enqueued"], q["delivered"], q["gave_up"], q["attempts"], q["throttled"], q["errors"], q["wait"]["p95"]]
+        for name, q in results["queues"].items()
+    ]
+    print(format_table(queue_rows, ["queue", "enqueued", "delivered", "gave_up", "attempts", "throttled", "errors", "wait_p95"]))
+    print()
+    print(f"WaveSpeed: {results['wavespeed']}")
+    print(f"Firestore: {results['firestore']}")
+    print(f"GCS:       {results['gcs']}")
+    print(f"Resources: {results['resources']}")
+
+
+def _percentiles(summary: dict) -> list:
+    return [summary["count"], summary["p50"], summary["p95"], summary["p99"], summary["max"]]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+    results = run(args)
+    print_report(results)
+    if args.json:
+        write_json(args.json, results)
+        print(f"\nResults written to {args.json}")
+    return 0 if results["statuses"].get("completed") else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
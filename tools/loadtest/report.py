@@ -0,0 +1,143 @@
+"""Latency summaries, resource sampling and JSON output for the load tests."""
+
+import json
+import os
+import resource
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+try:
+    import psutil
+except ImportError:  # resource/proc fallback below
+    psutil = None
+
+
+def percentile(values: Sequence[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of ``values`` (None when empty)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, round(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(values: Sequence[float], digits: int = 3) -> Dict[str, Optional[float]]:
+    """count, mean, p50/p95/p99 and max of ``values``."""
+    def r(value):
+        return round(value, digits) if value is not None else None
+
+    return {
+        "count": len(values),
+        "mean": r(sum(values) / len(values)) if values else None,
+        "p50": r(percentile(values, 50)),
+        "p95": r(percentile(values, 95)),
+        "p99": r(percentile(values, 99)),
+        "max": r(max(values)) if values else None,
+    }
+
+
+class ResourceSampler:
+    """Samples this process' CPU, RSS and thread count in the background.
+
+    CPU comes from os.times(), including reaped children (the ffmpeg runs)
+    at stop(); RSS from psutil when installed, /proc otherwise.
+    """
+
+    def __init__(self, interval: float = 1.0):
+        self.interval = interval
+        self.samples: List[dict] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._process = psutil.Process() if psutil else None
+        self._start_times = None
+        self._started_at = 0.0
+        self._result: Optional[dict] = None
+
+    def _rss_mb(self) -> Optional[float]:
+        if self._process is not None:
+            return self._process.memory_info().rss / 2**20
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+        except (OSError, ValueError):
+            return None
+
+    def _run(self) -> None:
+        last_cpu, last_at = self._cpu(), time.time()
+        while not self._stop.wait(self.interval):
+            cpu, now = self._cpu(), time.time()
+            self.samples.append({
+                "t": round(now - self._started_at, 1),
+                "cpu_percent": round(100 * (cpu - last_cpu) / (now - last_at), 1),
+                "rss_mb": round(self._rss_mb() or 0, 1),
+                "threads": threading.active_count(),
+            })
+            last_cpu, last_at = cpu, now
+
+    @staticmethod
+    def _cpu() -> float:
+        times = os.times()
+        return times.user + times.system
+
+    def start(self) -> "ResourceSampler":
+        self._started_at = time.time()
+        self._start_times = os.times()
+        self._thread = threading.Thread(target=self._run, name="resource-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> dict:
+        if self._result is not None:
+            return self._result
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        end = os.times()
+        wall = max(1e-9, time.time() - self._started_at)
+        process_cpu = (end.user + end.system) - (self._start_times.user + self._start_times.system)
+        children_cpu = (end.children_user + end.children_system) - (
+            self._start_times.children_user + self._start_times.children_system
+        )
+        cpu = [s["cpu_percent"] for s in self.samples]
+        rss = [s["rss_mb"] for s in self.samples]
+        self._result = {
+            "wall_seconds": round(wall, 1),
+            "process_cpu_seconds": round(process_cpu, 1),
+            "children_cpu_seconds": round(children_cpu, 1),
+            "cpu_percent_avg": round(100 * process_cpu / wall, 1),
+            "cpu_percent_p95": percentile(cpu, 95),
+            "cores": os.cpu_count(),
+            "rss_mb_peak": round(max(rss), 1) if rss else None,
+            "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            "threads_peak": max((s["threads"] for s in self.samples), default=threading.active_count()),
+        }
+        return self._result
+
+
+def write_json(path: str, results: dict) -> None:
+    """Write ``results`` to ``path`` (parent directories created)."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, default=str)
+        f.write("\n")
+
+
+def format_table(rows: List[Sequence], headers: Sequence[str]) -> str:
+    """Plain-text table with right-aligned numeric columns."""
+    cells = [[_cell(value) for value in row] for row in rows]
+    widths = [max(len(h), *(len(row[i]) for row in cells)) if cells else len(h) for i, h in enumerate(headers)]
+    lines = ["  ".join(h.ljust(w) if i == 0 else h.rjust(w) for i, (h, w) in enumerate(zip(headers, widths)))]
+    for row in cells:
+        lines.append("  ".join(c.ljust(w) if i == 0 else c.rjust(w) for i, (c, w) in enumerate(zip(row, widths))))
+    return "\n".join(lines)
+
+
+def _cell(value) -> str:
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:.3f}" if abs(value) < 100 else f"{value:.1f}"
+    return str(value)
@@ -0,0 +1,306 @@
+"""Run the API, the worker and the FFmpeg worker in-process against the fakes.
+
+start() installs the fakes, imports the three services (the backend as the
+``app`` package, the two workers' ``main.py`` under distinct module names),
+serves each on a local port, wires Cloud Tasks and the Pub/Sub push
+subscription to them, and seeds the assets and users a job needs.
+
+The services share one interpreter, so they also share the GIL and
+module-level singletons (``shared.worker_utils`` is imported once, from
+worker/); numbers are for comparing builds and settings, not absolute
+Cloud Run capacity.
+"""
+
+import importlib.util
+import logging
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import fakes
+from fakes import firestore as fake_firestore
+from fakes import gcs as fake_gcs
+from fakes import pubsub as fake_pubsub
+from fakes import tasks as fake_tasks
+from fakes.push import PushQueue
+from fakes.wavespeed import FakeWaveSpeed
+
+logger = logging.getLogger(__name__)
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+HOST = "127.0.0.1"
+
+IMAGE_BUCKET = "nuumee-images"
+VIDEO_BUCKET = "nuumee-videos"
+OUTPUT_BUCKET = "nuumee-outputs"
+ASSETS_BUCKET = "nuumee-assets"
+
+
+@dataclass
+class Settings:
+    """Knobs of the simulated environment."""
+    users: int = 50
+    free_tier_percent: float = 50.0
+    video_seconds: int = 5
+    wavespeed_latency: float = 5.0
+    wavespeed_jitter: float = 0.5
+    wavespeed_failure_rate: float = 0.0
+    wavespeed_throttle_rate: float = 0.0
+    firestore_latency: float = 0.005
+    # Cloud Tasks max_concurrent_dispatches per queue
+    worker_concurrency: int = 20
+    ffmpeg_concurrency: int = 4
+    pubsub_concurrency: int = 20
+    storage_root: Optional[str] = None
+
+
+@dataclass
+class Stack:
+    """The running services and what the driver needs to talk to them."""
+    settings: Settings
+    api_url: str
+    worker_url: str
+    ffmpeg_worker_url: str
+    wavespeed: FakeWaveSpeed
+    users: List[dict] = field(default_factory=list)
+    storage_root: str = ""
+    _servers: list = field(default_factory=list)
+    _owns_root: bool = False
+
+    def queues(self) -> Dict[str, PushQueue]:
+        """Every push queue: Cloud Tasks queues, Pub/Sub and WaveSpeed webhooks."""
+        queues = {f"tasks:{name}": queue for name, queue in fake_tasks.queues.items()}
+        for topic, targets in fake_pubsub.subscriptions.items():
+            for _, queue in targets:
+                queues[f"pubsub:{topic}"] = queue
+        queues["wavespeed:webhooks"] = self.wavespeed.webhooks
+        return queues
+
+    def stop(self) -> None:
+        for stop in reversed(self._servers):
+            try:
+                stop()
+            except Exception as e:
+                logger.warning("Stopping a service failed: %s", e)
+        for queue in self.queues().values():
+            queue.stop()
+        if self._owns_root:
+            shutil.rmtree(self.storage_root, ignore_errors=True)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind((HOST, 0))
+        return s.getsockname()[1]
+
+
+def _ffmpeg(*args: str) -> None:
+    subprocess.run(["ffmpeg", "-y", "-loglevel", "error", *args], check=True)
+
+
+def make_media(directory: str, video_seconds: int) -> Dict[str, str]:
+    """Sample reference image, motion/output video and watermark PNG."""
+    paths = {
+        "image": os.path.join(directory, "reference.jpg"),
+        "video": os.path.join(directory, "motion.mp4"),
+        "watermark": os.path.join(directory, "watermark.png"),
+    }
+    _ffmpeg("-f", "lavfi", "-i", "testsrc=size=480x832", "-frames:v", "1", paths["image"])
+    _ffmpeg(
+        "-f", "lavfi", "-i", f"testsrc=size=480x832:rate=24:duration={video_seconds}",
+        "-f", "lavfi", "-i", f"sine=frequency=440:duration={video_seconds}",
+        "-c:v", "libx264", "-preset", "veryfast", "-pix_fmt", "yuv420p",
+        "-c:a", "aac", "-shortest", paths["video"],
+    )
+    _ffmpeg("-f", "lavfi", "-i", "color=c=white@0.6:size=240x80,format=rgba", "-frames:v", "1", paths["watermark"])
+    return paths
+
+
+def _load_module(name: str, path: str):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def _serve_asgi(app, port: int):
+    import uvicorn
+
+    config = uvicorn.Config(app, host=HOST, port=port, log_level="warning", lifespan="on", access_log=False)
+    server = uvicorn.Server(config)
+    # Signal handlers can only be installed from the main thread
+    server.install_signal_handlers = lambda: None
+    thread = threading.Thread(target=server.run, name="api", daemon=True)
+    thread.start()
+    deadline = time.time() + 30
+    while not server.started:
+        if not thread.is_alive() or time.time() > deadline:
+            raise RuntimeError("API server failed to start")
+        time.sleep(0.05)
+
+    def stop():
+        server.should_exit = True
+        thread.join(timeout=10)
+
+    return stop
+
+
+def _serve_wsgi(app, port: int, name: str):
+    from werkzeug.serving import make_server
+
+    server = make_server(HOST, port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name=name, daemon=True).start()
+    return server.shutdown
+
+
+def configure(
+    storage_root: str,
+    api_url: str,
+    worker_url: str,
+    ffmpeg_worker_url: str,
+    firestore_latency: float,
+) -> None:
+    """Point the services' environment at local URLs and install the fakes."""
+    os.environ.update({
+        "ENVIRONMENT": "loadtest",
+        "LOG_LEVEL": os.environ.get("LOG_LEVEL", "WARNING"),
+        "USE_WEBHOOK": "true",
+        "WEBHOOK_BASE_URL": api_url,
+        "WORKER_URL": worker_url,
+        "FFMPEG_WORKER_URL": ffmpeg_worker_url,
+        "WAVESPEED_API_KEY": fakes.secrets["wavespeed-api-key"],
+        "PUBSUB_AUDIENCE": f"{api_url}/internal/process-completion",
+        "IMAGE_BUCKET": IMAGE_BUCKET,
+        "GCS_IMAGE_BUCKET": IMAGE_BUCKET,
+        "VIDEO_BUCKET": VIDEO_BUCKET,
+        "GCS_VIDEO_BUCKET": VIDEO_BUCKET,
+        "OUTPUT_BUCKET": OUTPUT_BUCKET,
+        "ASSETS_BUCKET": ASSETS_BUCKET,
+        "NUUMEE_ASSETS_BUCKET": ASSETS_BUCKET,
+        "METRICS_ROLLUP_DIR": os.path.join(storage_root, "_metrics"),
+    })
+
+    fakes.install(storage_root, firestore_latency=firestore_latency)
+
+
+def _add_path(path: str) -> None:
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+def load_api():
+    """Import the backend and return its ASGI app (configure() first)."""
+    _add_path(os.path.join(REPO_ROOT, "backend"))
+    from app.main import app
+
+    return app
+
+
+def seed_users(settings: Settings, media: Dict[str, str]) -> List[dict]:
+    """Create users (free or paid tier) with credits and uploaded inputs."""
+    db = fake_firestore.Client()
+    client = fake_gcs.Client()
+    now = datetime.now(timezone.utc)
+    free_users = round(settings.users * settings.free_tier_percent / 100)
+    users = []
+    for i in range(settings.users):
+        uid = f"loadtest-user-{i:05d}"
+        tier = "free" if i < free_users else "creator"
+        image_path = f"uploads/{uid}/1700000000_reference.jpg"
+        video_path = f"uploads/{uid}/1700000000_motion.mp4"
+        client.bucket(IMAGE_BUCKET).blob(image_path).upload_from_filename(media["image"], content_type="image/jpeg")
+        client.bucket(VIDEO_BUCKET).blob(video_path).upload_from_filename(media["video"], content_type="video/mp4")
+        db.collection("users").document(uid).set({
+            "user_id": uid,
+            "email": f"{uid}@loadtest.invalid",
+            "email_verified": True,
+            "display_name": uid,
+            "credits_balance": 1_000_000,
+            "subscription_tier": tier,
+            "created_at": now,
+            "updated_at": now,
+        })
+        users.append({
+            "uid": uid,
+            "token": fakes.id_token_for(uid),
+            "tier": tier,
+            "reference_image_path": image_path,
+            "motion_video_path": video_path,
+        })
+    return users
+
+
+def start(settings: Settings) -> Stack:
+    """Install the fakes, start every service and seed the data."""
+    if shutil.which("ffmpeg") is None:
+        raise RuntimeError("ffmpeg is required (watermarking and sample media)")
+
+    owns_root = settings.storage_root is None
+    storage_root = settings.storage_root or tempfile.mkdtemp(prefix="nuumee-loadtest-")
+    api_port, worker_port, ffmpeg_port = _free_port(), _free_port(), _free_port()
+    api_url = f"http://{HOST}:{api_port}"
+    worker_url = f"http://{HOST}:{worker_port}/"
+    ffmpeg_worker_url = f"http://{HOST}:{ffmpeg_port}/"
+
+    configure(storage_root, api_url, worker_url, ffmpeg_worker_url, settings.firestore_latency)
+    storage = fake_gcs.storage
+    storage.start_server(HOST)
+
+    media_dir = os.path.join(storage_root, "_media")
+    os.makedirs(media_dir, exist_ok=True)
+    media = make_media(media_dir, settings.video_seconds)
+    with open(media["watermark"], "rb") as f:
+        watermark = f.read()
+    storage.write(ASSETS_BUCKET, "assets/nuumee-watermark.png", watermark, "image/png")
+    storage.write(ASSETS_BUCKET, "assets/watermark.png", watermark, "image/png")
+
+    with open(media["video"], "rb") as f:
+        wavespeed = FakeWaveSpeed(
+            f.read(),
+            latency=settings.wavespeed_latency,
+            jitter=settings.wavespeed_jitter,
+            failure_rate=settings.wavespeed_failure_rate,
+            throttle_rate=settings.wavespeed_throttle_rate,
+        )
+    wavespeed.start_server(HOST)
+
+    fake_tasks.queue_settings["nuumee-video-processing"] = {"max_concurrent": settings.worker_concurrency}
+    fake_tasks.queue_settings["nuumee-ffmpeg-jobs"] = {"max_concurrent": settings.ffmpeg_concurrency}
+    fake_pubsub.subscribe(
+        "wavespeed-completions", f"{api_url}/internal/process-completion",
+        max_concurrent=settings.pubsub_concurrency, min_backoff=1.0, max_backoff=60.0,
+    )
+
+    api_app = load_api()
+    for directory in ("worker", "ffmpeg-worker"):
+        _add_path(os.path.join(REPO_ROOT, directory))
+    worker = _load_module("nuumee_worker_main", os.path.join(REPO_ROOT, "worker", "main.py"))
+    ffmpeg_worker = _load_module("nuumee_ffmpeg_worker_main", os.path.join(REPO_ROOT, "ffmpeg-worker", "main.py"))
+    sys.modules["wavespeed"].WaveSpeedClient.BASE_URL = wavespeed.base_url
+    # One access log line per task delivery drowns the report
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+
+    stack = Stack(
+        settings=settings,
+        api_url=api_url,
+        worker_url=worker_url,
+        ffmpeg_worker_url=ffmpeg_worker_url,
+        wavespeed=wavespeed,
+        storage_root=storage_root,
+        _owns_root=owns_root,
+    )
+    stack._servers.append(_serve_asgi(api_app, api_port))
+    stack._servers.append(_serve_wsgi(worker.app, worker_port, "worker"))
+    stack._servers.append(_serve_wsgi(ffmpeg_worker.app, ffmpeg_port, "ffmpeg-worker"))
+    stack.users = seed_users(settings, media)
+    return stack
@@ -6,8 +6,9 @@ It runs as a Cloud Run service that handles HTTP requests from Cloud Tasks.
 import os
 import logging
 import subprocess
-import tempfile
+from contextlib import nullcontext
 from typing import Optional
+from urllib.parse import urlencode
 
 from flask import Flask, request, jsonify
 from google.cloud import firestore, secretmanager, tasks_v2
@@ -23,16 +24,22 @@ from shared.worker_utils import (
     update_job_status, refund_credits, is_user_free_tier,
     IMAGE_BUCKET, VIDEO_BUCKET, OUTPUT_BUCKET, ASSETS_BUCKET,
     PROJECT_ID,
+    staging, StagingBudgetExceeded,
+    read_scope, get_document, read_stats,
+    firestore_ops, operation_scope, instrument_firestore,
+    job_timeline, current_timeline,
+    setup_logging, log_context, bind_log_fields,
+    job_profile, profile_job_data, ffmpeg_benchmark, record_ffmpeg_benchmark,
 )
 from shared.worker_utils.stripe_utils import check_and_trigger_auto_refill
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
+# Configure logging (JSON lines with job_id/trace_id; WaveSpeed client sampled)
+setup_logging(sampling={"wavespeed": 10})
 logger = logging.getLogger(__name__)
 
+# Count Firestore reads/writes per job type (see /health)
+instrument_firestore()
+
 # Initialize Flask app
 app = Flask(__name__)
 
@@ -82,6 +89,27 @@ def get_webhook_url() -> Optional[str]:
         return None
 
 
+def get_job_webhook_url(job_data: dict) -> Optional[str]:
+    """Webhook URL for one job, carrying its job_id and trace_id.
+
+    The webhook handler forwards both to the completion processor, which
+    uses them to time the WaveSpeed stage and correlate logs.
+    """
+    webhook_url = get_webhook_url()
+    if not webhook_url:
+        return None
+    params = {"job_id": job_data["id"]}
+    if job_data.get("trace_id"):
+        params["trace_id"] = job_data["trace_id"]
+    return f"{webhook_url}&{urlencode(params)}"
+
+
+def stage_timer(name: str):
+    """Time a stage of the current job (written with its next status update)."""
+    timeline = current_timeline()
+    return timeline.stage(name) if timeline is not None else nullcontext()
+
+
 def get_wavespeed_api_key() -> str:
     """Get WaveSpeed API key from Secret Manager or environment."""
     api_key = os.environ.get("WAVESPEED_API_KEY")
@@ -129,10 +157,10 @@ def check_existing_wavespeed_request(request_id: str, job_id: str) -> Optional[s
     try:
         result = wavespeed.get_result(request_id)
         status = result.get("status") or result.get("data", {}).get("status")
-        logger.info(f"Job {job_id}: existing WaveSpeed request {request_id} has status={status}")
+        logger.info("Job %s: existing WaveSpeed request %s has status=%s", job_id, request_id, status)
 
         if status == JobStatus.FAILED.value:
-            logger.warning(f"Job {job_id}: WaveSpeed request {request_id} FAILED, will create new request")
+            logger.warning("Job %s: WaveSpeed request %s FAILED, will create new request", job_id, request_id)
             return None
 
         # Still valid - can resume (processing, completed, success, created)
@@ -140,7 +168,7 @@ def check_existing_wavespeed_request(request_id: str, job_id: str) -> Optional[s
 
     except WaveSpeedAPIError as e:
         # If we can't check status (e.g., request doesn't exist), create new
-        logger.warning(f"Job {job_id}: Could not check WaveSpeed request {request_id}: {e}")
+        logger.warning("Job %s: Could not check WaveSpeed request %s: %s", job_id, request_id, e)
         return None
 
 
@@ -157,7 +185,7 @@ def apply_free_tier_watermark(job_id: str, output_video_path: str) -> str:
     Returns:
         GCS path to the watermarked video (same as input path)
     """
-    logger.info(f"Applying free tier watermark to {output_video_path}")
+    logger.info("Applying free tier watermark to %s", output_video_path)
 
     watermark_gcs_path = "assets/nuumee-watermark.png"
     position = "bottom-right"
@@ -165,21 +193,27 @@ def apply_free_tier_watermark(job_id: str, output_video_path: str) -> str:
     margin_percent = 5
 
     storage_client = get_storage()
+    bucket = storage_client.bucket(OUTPUT_BUCKET)
+    blob = bucket.get_blob(output_video_path)
+    if blob is None:
+        raise FileNotFoundError(f"Output video not found: gs://{OUTPUT_BUCKET}/{output_video_path}")
 
-    with tempfile.TemporaryDirectory() as tmpdir:
+    # Input plus re-encoded output are on /tmp (RAM) at the same time
+    reserve_bytes = blob.size * 2 if blob.size else None
+
+    with staging.job(job_id, reserve_bytes) as stage:
         # Download the video from OUTPUT_BUCKET
-        local_video = os.path.join(tmpdir, "input.mp4")
-        bucket = storage_client.bucket(OUTPUT_BUCKET)
-        blob = bucket.blob(output_video_path)
+        local_video = stage.path("input.mp4")
         blob.download_to_filename(local_video)
-        logger.info(f"Downloaded video to {local_video}")
+        stage.track(local_video)
+        logger.debug("Downloaded video to %s", local_video)
 
         # Download watermark from ASSETS_BUCKET
-        local_watermark = os.path.join(tmpdir, "watermark.png")
+        local_watermark = stage.path("watermark.png")
         assets_bucket = storage_client.bucket(ASSETS_BUCKET)
         watermark_blob = assets_bucket.blob(watermark_gcs_path)
         watermark_blob.download_to_filename(local_watermark)
-        logger.info(f"Downloaded watermark to {local_watermark}")
+        logger.debug("Downloaded watermark to %s", local_watermark)
 
         # Build FFmpeg overlay filter
         margin = f"(W*{margin_percent}/100)"
@@ -199,7 +233,7 @@ def apply_free_tier_watermark(job_id: str, output_video_path: str) -> str:
         )
 
         # Apply watermark with FFmpeg
-        local_output = os.path.join(tmpdir, "output.mp4")
+        local_output = stage.path("output.mp4")
         ffmpeg_cmd = [
             "ffmpeg",
             "-i", local_video,
@@ -209,14 +243,17 @@ def apply_free_tier_watermark(job_id: str, output_video_path: str) -> str:
             "-c:a", "copy",
             local_output, "-y"
         ]
-        logger.info(f"Running FFmpeg watermark: opacity={opacity}, position={position}")
-        result = subprocess.run(ffmpeg_cmd, capture_output=True, text=True)
+        logger.info("Running FFmpeg watermark: opacity=%s, position=%s", opacity, position)
+        result = subprocess.run(ffmpeg_benchmark(ffmpeg_cmd), capture_output=True, text=True)
+        record_ffmpeg_benchmark("Watermark", result.stderr)
         if result.returncode != 0:
             raise RuntimeError(f"Watermark FFmpeg failed: {result.stderr}")
+        stage.track(local_output)
+        stage.release(local_video)
 
         # Upload watermarked video back to same path
         blob.upload_from_filename(local_output, content_type="video/mp4")
-        logger.info(f"Uploaded watermarked video to {output_video_path}")
+        logger.debug("Uploaded watermarked video to %s", output_video_path)
 
     return output_video_path
 
@@ -233,14 +270,14 @@ def process_animate_job(job_data: dict) -> Optional[str]:
     existing_request_id = job_data.get("wavespeed_request_id")
 
     wavespeed = get_wavespeed()
-    webhook_url = get_webhook_url()
+    webhook_url = get_job_webhook_url(job_data)
 
     # Idempotency: check if existing request is still valid (not failed)
     request_id = None
     if existing_request_id:
         request_id = check_existing_wavespeed_request(existing_request_id, job_id)
         if request_id:
-            logger.info(f"Job {job_id}: resuming existing WaveSpeed request {request_id}")
+            logger.info("Job %s: resuming existing WaveSpeed request %s", job_id, request_id)
 
     if not request_id:
         # No existing request - create a new one
@@ -251,32 +288,35 @@ def process_animate_job(job_data: dict) -> Optional[str]:
         video_bucket = OUTPUT_BUCKET if video_path.startswith(("outputs/", "demo/")) else VIDEO_BUCKET
         video_url = generate_signed_url(video_bucket, video_path, worker_type="worker")
 
-        logger.info(f"Processing animate job {job_id}: resolution={resolution}, webhook={'enabled' if webhook_url else 'disabled'}")
+        logger.info("Processing animate job %s: resolution=%s, webhook=%s", job_id, resolution, 'enabled' if webhook_url else 'disabled')
 
-        request_id = wavespeed.animate(
-            image_url=image_url,
-            video_url=video_url,
-            resolution=resolution,
-            seed=seed,
-            webhook_url=webhook_url,
-        )
+        with stage_timer("submit"):
+            request_id = wavespeed.animate(
+                image_url=image_url,
+                video_url=video_url,
+                resolution=resolution,
+                seed=seed,
+                webhook_url=webhook_url,
+            )
 
         update_job_status(job_id, "processing", wavespeed_request_id=request_id)
 
     # Webhook mode: return immediately, completion via Pub/Sub processor
     if webhook_url:
-        logger.info(f"Job {job_id}: submitted to WaveSpeed (request_id={request_id}), webhook will handle completion")
+        logger.info("Job %s: submitted to WaveSpeed (request_id=%s), webhook will handle completion", job_id, request_id)
         return None
 
     # Fallback: polling mode (when webhooks disabled or unavailable)
-    result = wavespeed.poll_result(request_id)
+    with stage_timer("wavespeed"):
+        result = wavespeed.poll_result(request_id)
     outputs = wavespeed.get_outputs(result)
     if not outputs:
         raise WaveSpeedAPIError("No output URL in result", response=result)
 
     output_url = outputs[0]
     output_path = f"outputs/{job_data['user_id']}/{job_id}.mp4"
-    upload_from_url(output_url, OUTPUT_BUCKET, output_path)
+    with stage_timer("upload"):
+        upload_from_url(output_url, OUTPUT_BUCKET, output_path)
 
     return output_path
 
@@ -295,46 +335,49 @@ def process_extend_job(job_data: dict) -> Optional[str]:
     existing_request_id = job_data.get("wavespeed_request_id")
 
     wavespeed = get_wavespeed()
-    webhook_url = get_webhook_url()
+    webhook_url = get_job_webhook_url(job_data)
 
     # Idempotency: check if existing request is still valid (not failed)
     request_id = None
     if existing_request_id:
         request_id = check_existing_wavespeed_request(existing_request_id, job_id)
         if request_id:
-            logger.info(f"Job {job_id}: resuming existing WaveSpeed request {request_id}")
+            logger.info("Job %s: resuming existing WaveSpeed request %s", job_id, request_id)
 
     if not request_id:
         video_path = job_data["input_video_path"]
         video_url = generate_signed_url(OUTPUT_BUCKET, video_path, worker_type="worker")
 
-        logger.info(f"Processing extend job {job_id}: duration={duration}, resolution={resolution}, webhook={'enabled' if webhook_url else 'disabled'}")
+        logger.info("Processing extend job %s: duration=%s, resolution=%s, webhook=%s", job_id, duration, resolution, 'enabled' if webhook_url else 'disabled')
 
-        request_id = wavespeed.extend(
-            video_url=video_url,
-            prompt=prompt,
-            duration=duration,
-            resolution=resolution,
-            seed=seed,
-            webhook_url=webhook_url,
-        )
+        with stage_timer("submit"):
+            request_id = wavespeed.extend(
+                video_url=video_url,
+                prompt=prompt,
+                duration=duration,
+                resolution=resolution,
+                seed=seed,
+                webhook_url=webhook_url,
+            )
 
         update_job_status(job_id, "processing", wavespeed_request_id=request_id)
 
     # Webhook mode: return immediately, completion via Pub/Sub processor
     if webhook_url:
-        logger.info(f"Job {job_id}: submitted to WaveSpeed (request_id={request_id}), webhook will handle completion")
+        logger.info("Job %s: submitted to WaveSpeed (request_id=%s), webhook will handle completion", job_id, request_id)
         return None
 
     # Fallback: polling mode (when webhooks disabled or unavailable)
-    result = wavespeed.poll_result(request_id)
+    with stage_timer("wavespeed"):
+        result = wavespeed.poll_result(request_id)
     outputs = wavespeed.get_outputs(result)
     if not outputs:
         raise WaveSpeedAPIError("No output URL in result", response=result)
 
     output_url = outputs[0]
     output_path = f"outputs/{job_data['user_id']}/{job_id}.mp4"
-    upload_from_url(output_url, OUTPUT_BUCKET, output_path)
+    with stage_timer("upload"):
+        upload_from_url(output_url, OUTPUT_BUCKET, output_path)
 
     return output_path
 
@@ -350,43 +393,46 @@ def process_upscale_job(job_data: dict) -> Optional[str]:
     existing_request_id = job_data.get("wavespeed_request_id")
 
     wavespeed = get_wavespeed()
-    webhook_url = get_webhook_url()
+    webhook_url = get_job_webhook_url(job_data)
 
     # Idempotency: check if existing request is still valid (not failed)
     request_id = None
     if existing_request_id:
         request_id = check_existing_wavespeed_request(existing_request_id, job_id)
         if request_id:
-            logger.info(f"Job {job_id}: resuming existing WaveSpeed request {request_id}")
+            logger.info("Job %s: resuming existing WaveSpeed request %s", job_id, request_id)
 
     if not request_id:
         video_path = job_data["input_video_path"]
         video_url = generate_signed_url(OUTPUT_BUCKET, video_path, worker_type="worker")
 
-        logger.info(f"Processing upscale job {job_id}: target={target_resolution}, webhook={'enabled' if webhook_url else 'disabled'}")
+        logger.info("Processing upscale job %s: target=%s, webhook=%s", job_id, target_resolution, 'enabled' if webhook_url else 'disabled')
 
-        request_id = wavespeed.upscale(
-            video_url=video_url,
-            target_resolution=target_resolution,
-            webhook_url=webhook_url,
-        )
+        with stage_timer("submit"):
+            request_id = wavespeed.upscale(
+                video_url=video_url,
+                target_resolution=target_resolution,
+                webhook_url=webhook_url,
+            )
 
         update_job_status(job_id, "processing", wavespeed_request_id=request_id)
 
     # Webhook mode: return immediately, completion via Pub/Sub processor
     if webhook_url:
-        logger.info(f"Job {job_id}: submitted to WaveSpeed (request_id={request_id}), webhook will handle completion")
+        logger.info("Job %s: submitted to WaveSpeed (request_id=%s), webhook will handle completion", job_id, request_id)
         return None
 
     # Fallback: polling mode (when webhooks disabled or unavailable)
-    result = wavespeed.poll_result(request_id)
+    with stage_timer("wavespeed"):
+        result = wavespeed.poll_result(request_id)
     outputs = wavespeed.get_outputs(result)
     if not outputs:
         raise WaveSpeedAPIError("No output URL in result", response=result)
 
     output_url = outputs[0]
     output_path = f"outputs/{job_data['user_id']}/{job_id}.mp4"
-    upload_from_url(output_url, OUTPUT_BUCKET, output_path)
+    with stage_timer("upload"):
+        upload_from_url(output_url, OUTPUT_BUCKET, output_path)
 
     return output_path
 
@@ -403,65 +449,96 @@ def process_foley_job(job_data: dict) -> Optional[str]:
     existing_request_id = job_data.get("wavespeed_request_id")
 
     wavespeed = get_wavespeed()
-    webhook_url = get_webhook_url()
+    webhook_url = get_job_webhook_url(job_data)
 
     # Idempotency: check if existing request is still valid (not failed)
     request_id = None
     if existing_request_id:
         request_id = check_existing_wavespeed_request(existing_request_id, job_id)
         if request_id:
-            logger.info(f"Job {job_id}: resuming existing WaveSpeed request {request_id}")
+            logger.info("Job %s: resuming existing WaveSpeed request %s", job_id, request_id)
 
     if not request_id:
         video_path = job_data["input_video_path"]
         video_url = generate_signed_url(OUTPUT_BUCKET, video_path, worker_type="worker")
 
-        logger.info(f"Processing foley job {job_id}, webhook={'enabled' if webhook_url else 'disabled'}")
+        logger.info("Processing foley job %s, webhook=%s", job_id, 'enabled' if webhook_url else 'disabled')
 
-        request_id = wavespeed.foley(
-            video_url=video_url,
-            prompt=prompt if prompt else None,
-            seed=seed,
-            webhook_url=webhook_url,
-        )
+        with stage_timer("submit"):
+            request_id = wavespeed.foley(
+                video_url=video_url,
+                prompt=prompt if prompt else None,
+                seed=seed,
+                webhook_url=webhook_url,
+            )
 
         update_job_status(job_id, "processing", wavespeed_request_id=request_id)
 
     # Webhook mode: return immediately, completion via Pub/Sub processor
     if webhook_url:
-        logger.info(f"Job {job_id}: submitted to WaveSpeed (request_id={request_id}), webhook will handle completion")
+        logger.info("Job %s: submitted to WaveSpeed (request_id=%s), webhook will handle completion", job_id, request_id)
         return None
 
     # Fallback: polling mode (when webhooks disabled or unavailable)
-    result = wavespeed.poll_result(request_id)
+    with stage_timer("wavespeed"):
+        result = wavespeed.poll_result(request_id)
     outputs = wavespeed.get_outputs(result)
     if not outputs:
         raise WaveSpeedAPIError("No output URL in result", response=result)
 
     output_url = outputs[0]
     output_path = f"outputs/{job_data['user_id']}/{job_id}.mp4"
-    upload_from_url(output_url, OUTPUT_BUCKET, output_path)
+    with stage_timer("upload"):
+        upload_from_url(output_url, OUTPUT_BUCKET, output_path)
 
     return output_path
 
 
-def process_job(job_id: str):
-    """Process a single job."""
+def process_job(
+    job_id: str,
+    trace_id: Optional[str] = None,
+    enqueued_at: Optional[float] = None,
+    profile: bool = False,
+):
+    """Process a single job.
+
+    Document reads made while processing (job, user) are memoized for the
+    job, so the free tier and auto-refill checks share one user read.
+
+    Args:
+        job_id: Job document ID
+        trace_id: Trace id from the task payload (falls back to the job's)
+        enqueued_at: Epoch seconds the API enqueued the task, for the
+            queue stage of the job timeline
+        profile: Profile the job (task payload flag; see profiling.py)
+    """
+    with log_context(job_id=job_id, trace_id=trace_id), read_scope("process_job"), \
+            operation_scope("job") as ops, job_timeline(job_id, trace_id) as timeline, \
+            job_profile(job_id, "worker", requested=profile):
+        timeline.add_since("queue", enqueued_at)
+        _process_job(job_id, ops, timeline)
+
+
+def _process_job(job_id: str, ops, timeline):
     db = get_firestore()
     job_ref = db.collection("jobs").document(job_id)
-    job_doc = job_ref.get()
+    job_data = get_document(job_ref)
 
-    if not job_doc.exists:
-        logger.error(f"Job {job_id} not found")
+    if job_data is None:
+        logger.error("Job %s not found", job_id)
         return
 
-    job_data = job_doc.to_dict()
     job_data["id"] = job_id
     job_type = job_data.get("job_type", "animate")
+    ops.name = f"job:{job_type}"
+    timeline.trace_id = timeline.trace_id or job_data.get("trace_id")
+    bind_log_fields(trace_id=timeline.trace_id)
+    job_data["trace_id"] = timeline.trace_id
+    profile_job_data(job_data, job_ref)
     user_id = job_data["user_id"]
     credits_charged = job_data.get("credits_charged", 0)
 
-    logger.info(f"Processing job {job_id}: type={job_type}")
+    logger.info("Processing job %s: type=%s", job_id, job_type)
 
     JOB_HANDLERS = {
         "animate": process_animate_job,
@@ -481,34 +558,39 @@ def process_job(job_id: str):
 
         # Webhook mode: handler returned None, completion will happen via Pub/Sub
         if output_path is None:
-            logger.info(f"Job {job_id}: webhook mode active, worker task complete (completion via Pub/Sub)")
+            logger.info("Job %s: webhook mode active, worker task complete (completion via Pub/Sub)", job_id)
             return
 
         # Polling mode: complete the job inline
         # Auto-apply NuuMee watermark inline for free tier users
         if is_user_free_tier(user_id):
-            logger.info(f"User {user_id} is on free tier, applying watermark inline")
+            logger.info("User %s is on free tier, applying watermark inline", user_id)
             update_job_status(job_id, "watermarking")
-            output_path = apply_free_tier_watermark(job_id, output_path)
+            with stage_timer("watermark"):
+                output_path = apply_free_tier_watermark(job_id, output_path)
 
         update_job_status(job_id, "completed", output_video_path=output_path)
-        logger.info(f"Job {job_id} completed successfully")
+        logger.info("Job %s completed successfully", job_id)
 
         # Check and trigger auto-refill if needed
         try:
             refill_result = check_and_trigger_auto_refill(user_id)
             if refill_result:
-                logger.info(f"Auto-refill triggered for user {user_id}: +{refill_result['credits_added']} credits")
+                logger.info("Auto-refill triggered for user %s: +%s credits", user_id, refill_result['credits_added'])
         except Exception as refill_error:
-            logger.error(f"Auto-refill check failed for user {user_id}: {refill_error}")
+            logger.error("Auto-refill check failed for user %s: %s", user_id, refill_error)
+
+    except StagingBudgetExceeded:
+        # Instance /tmp is full; the retried task resumes the WaveSpeed request
+        raise
 
     except WaveSpeedError as e:
-        logger.error(f"WaveSpeed error for job {job_id}: {e}")
+        logger.error("WaveSpeed error for job %s: %s", job_id, e)
         update_job_status(job_id, "failed", error_message=str(e))
         refund_credits(user_id, credits_charged, job_id)
 
     except Exception as e:
-        logger.exception(f"Unexpected error for job {job_id}: {e}")
+        logger.exception("Unexpected error for job %s: %s", job_id, e)
         update_job_status(job_id, "failed", error_message=f"Internal error: {str(e)}")
         refund_credits(user_id, credits_charged, job_id)
 
@@ -525,20 +607,37 @@ def handle_task():
         if not job_id:
             return jsonify({"error": "Missing job_id"}), 400
 
-        logger.info(f"Received task for job: {job_id}")
-        process_job(job_id)
+        trace_id = payload.get("trace_id")
+        logger.info("Received task for job: %s (trace_id=%s)", job_id, trace_id)
+        process_job(
+            job_id,
+            trace_id=trace_id,
+            enqueued_at=payload.get("enqueued_at"),
+            profile=bool(payload.get("profile")),
+        )
 
         return jsonify({"status": "ok", "job_id": job_id}), 200
 
+    except StagingBudgetExceeded as e:
+        # 429 makes Cloud Tasks back off and retry on a less loaded instance
+        logger.warning("Deferring task: %s", e)
+        return jsonify({"error": str(e)}), 429
+
     except Exception as e:
-        logger.exception(f"Error handling task: {e}")
+        logger.exception("Error handling task: %s", e)
         return jsonify({"error": str(e)}), 500
 
 
 @app.route("/health", methods=["GET"])
 def health():
     """Health check endpoint."""
-    return jsonify({"status": "healthy", "service": "nuumee-worker"}), 200
+    return jsonify({
+        "status": "healthy",
+        "service": "nuumee-worker",
+        "staging": staging.stats(),
+        "document_reads": read_stats(),
+        "firestore": firestore_ops.stats(),
+    }), 200
 
 
 if __name__ == "__main__":
@@ -0,0 +1,191 @@
+"""On-demand per-job profiling.
+
+A job is profiled when its task payload or job document sets
+``profile: true``, or at random for PROFILE_SAMPLE_PERCENT percent of jobs.
+A job document flag is deleted once a run it triggered has been profiled,
+so later runs of the job aren't profiled again.
+While a job is profiled the Python side runs under cProfile, and FFmpeg
+commands built with ffmpeg_benchmark() get ``-benchmark`` so their CPU/real
+time and peak memory are collected from stderr.
+
+When the job ends the artifacts are uploaded to
+gs://OUTPUT_BUCKET/temp/profiles/{job_id}/ (a rerun replaces them):
+
+- meta.json: job id and type, service, trace id, start time, wall seconds
+- python.pstats: cProfile data (load with pstats.Stats or snakeviz)
+- python.txt: top PROFILE_TOP_FUNCTIONS functions by cumulative time
+- ffmpeg.txt: -benchmark lines per FFmpeg command
+
+cProfile covers the thread that started it (the job's), and only one
+session runs per process: a job that should be profiled while another job
+is being profiled runs without it (logged).
+Profiling never fails a job: upload errors are only logged.
+"""
+
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional
+
+from google.cloud import firestore
+
+from .config import OUTPUT_BUCKET
+from .gcs_utils import upload_to_gcs
+
+logger = logging.getLogger(__name__)
+
+PROFILE_SAMPLE_PERCENT = float(os.environ.get("PROFILE_SAMPLE_PERCENT", "0"))
+PROFILE_TOP_FUNCTIONS = int(os.environ.get("PROFILE_TOP_FUNCTIONS", "60"))
+PROFILE_PREFIX = "temp/profiles"
+
+# One cProfile session per process
+_profiler_lock = threading.Lock()
+
+
+class JobProfile:
+    """Profile of one job; inactive until start()."""
+
+    def __init__(self, job_id: str, service: str):
+        self.job_id = job_id
+        self.meta: Dict = {"job_id": job_id, "service": service}
+        self.ffmpeg: List[str] = []
+        self._profiler: Optional[cProfile.Profile] = None
+        # Job document whose "profile" flag is cleared at finish()
+        self.flag_ref = None
+        self._started_at: Optional[float] = None
+        self._start: Optional[float] = None
+
+    @property
+    def active(self) -> bool:
+        return self._profiler is not None
+
+    def start(self, reason: str) -> None:
+        """Start profiling from here to the end of the job."""
+        if self.active:
+            return
+        if not _profiler_lock.acquire(blocking=False):
+            logger.warning(f"Job {self.job_id}: not profiled ({reason}), another job is being profiled")
+            return
+        self.meta["reason"] = reason
+        self._started_at = time.time()
+        self._start = time.perf_counter()
+        self._profiler = cProfile.Profile()
+        try:
+            self._profiler.enable()
+        except ValueError as e:
+            # Another profiler (e.g. a debugger) owns the interpreter hook
+            logger.warning(f"Job {self.job_id}: could not start profiler: {e}")
+            self._profiler = None
+            _profiler_lock.release()
+            return
+        logger.info(f"Job {self.job_id}: profiling ({reason})")
+
+    def finish(self) -> Optional[str]:
+        """Stop profiling and upload the artifacts. Returns the GCS prefix."""
+        if not self.active:
+            return None
+        profiler, self._profiler = self._profiler, None
+        try:
+            profiler.disable()
+        finally:
+            _profiler_lock.release()
+        if self.flag_ref is not None:
+            try:
+                self.flag_ref.update({"profile": firestore.DELETE_FIELD})
+            except Exception as e:
+                logger.warning(f"Job {self.job_id}: failed to clear profile flag: {e}")
+
+        self.meta["started_at"] = datetime.fromtimestamp(self._started_at, tz=timezone.utc).isoformat()
+        self.meta["wall_seconds"] = round(time.perf_counter() - self._start, 3)
+        prefix = f"{PROFILE_PREFIX}/{self.job_id}"
+        try:
+            with tempfile.TemporaryDirectory(prefix="profile-") as tmp:
+                stats_path = os.path.join(tmp, "python.pstats")
+                profiler.dump_stats(stats_path)
+
+                summary = io.StringIO()
+                stats = pstats.Stats(profiler, stream=summary)
+                stats.sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+                self.meta["python_calls"] = stats.total_calls
+
+                files = {
+                    "python.pstats": ("application/octet-stream", None),
+                    "python.txt": ("text/plain", summary.getvalue()),
+                    "ffmpeg.txt": ("text/plain", "\n".join(self.ffmpeg) + "\n"),
+                    "meta.json": ("application/json", json.dumps(self.meta, indent=2, default=str)),
+                }
+                for name, (content_type, content) in files.items():
+                    path = os.path.join(tmp, name)
+                    if content is not None:
+                        with open(path, "w") as f:
+                            f.write(content)
+                    upload_to_gcs(path, OUTPUT_BUCKET, f"{prefix}/{name}", content_type=content_type)
+        except Exception as e:
+            logger.warning(f"Job {self.job_id}: failed to upload profile: {e}")
+            return None
+        logger.info(f"Job {self.job_id}: profile uploaded to gs://{OUTPUT_BUCKET}/{prefix}/")
+        return prefix
+
+
+_current: ContextVar[Optional[JobProfile]] = ContextVar("job_profile", default=None)
+
+
+@contextmanager
+def job_profile(job_id: str, service: str, requested: bool = False) -> Iterator[JobProfile]:
+    """Profile the block if ``requested`` or sampled (see profile_job_data)."""
+    profile = JobProfile(job_id, service)
+    token = _current.set(profile)
+    try:
+        if requested:
+            profile.start("requested")
+        elif PROFILE_SAMPLE_PERCENT > 0 and random.uniform(0, 100) < PROFILE_SAMPLE_PERCENT:
+            profile.start("sampled")
+        yield profile
+    finally:
+        _current.reset(token)
+        profile.finish()
+
+
+def profile_job_data(job_data: dict, job_ref=None) -> None:
+    """Record the job type and trace id; start profiling if the job asks for it.
+
+    When the job document's flag is honoured, it is deleted from ``job_ref``
+    at the end of the profiled run.
+    """
+    profile = _current.get()
+    if profile is None:
+        return
+    profile.meta["job_type"] = job_data.get("job_type")
+    profile.meta["trace_id"] = job_data.get("trace_id")
+    if job_data.get("profile"):
+        profile.start("job document")
+        if profile.active:
+            profile.flag_ref = job_ref
+
+
+def ffmpeg_benchmark(cmd: List[str]) -> List[str]:
+    """``cmd`` with -benchmark added when the current job is profiled."""
+    profile = _current.get()
+    if profile is None or not profile.active or "-benchmark" in cmd:
+        return cmd
+    return [cmd[0], "-benchmark", *cmd[1:]]
+
+
+def record_ffmpeg_benchmark(label: str, stderr: Optional[str]) -> None:
+    """Keep the -benchmark lines of an FFmpeg run for the current profile."""
+    profile = _current.get()
+    if profile is None or not profile.active or not stderr:
+        return
+    lines = [line.strip() for line in stderr.splitlines() if line.startswith("bench:")]
+    profile.ffmpeg.append(f"[{label}]")
+    profile.ffmpeg.extend(lines or ["(no bench: output)"])
@@ -7,6 +7,7 @@ from typing import Optional
 from google.cloud import firestore
 import stripe
 
+from .doc_cache import get_document, invalidate
 from .gcp import get_firestore, get_secret, PROJECT_ID
 from .config import CREDIT_PACKAGES
 
@@ -51,12 +52,11 @@ def check_and_trigger_auto_refill(user_id: str) -> Optional[dict]:
     """
     db = get_firestore()
     user_ref = db.collection("users").document(user_id)
-    user_doc = user_ref.get()
+    user_data = get_document(user_ref)
 
-    if not user_doc.exists:
+    if user_data is None:
         return None
 
-    user_data = user_doc.to_dict()
     auto_refill = user_data.get("auto_refill", {})
 
     # Check if auto-refill is enabled
@@ -126,12 +126,15 @@ def check_and_trigger_auto_refill(user_id: str) -> Optional[dict]:
         )
 
         if payment_intent.status == "succeeded":
-            # Add credits to user's balance
+            # Add credits to user's balance. Increment rather than write
+            # current_balance + credits: the balance read above may be
+            # from earlier in the job (job-scoped read cache).
             new_balance = current_balance + package["credits"]
             user_ref.update({
-                "credits_balance": new_balance,
+                "credits_balance": firestore.Increment(package["credits"]),
                 "updated_at": firestore.SERVER_TIMESTAMP
             })
+            invalidate(user_ref)
 
             # Record transaction
             transaction_ref = db.collection("transactions").document()
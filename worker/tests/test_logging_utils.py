@@ -0,0 +1,52 @@
+"""Unit tests for structured logging helpers."""
+import logging
+
+import sys
+sys.path.insert(0, '/home/user/NuuMee02/worker')
+
+from shared.worker_utils.logging_utils import SamplingFilter
+
+
+def make_record(name: str, msg: str, lineno: int, level: int = logging.INFO) -> logging.LogRecord:
+    return logging.LogRecord(name, level, "/app/wavespeed.py", lineno, msg, None, None)
+
+
+class TestSamplingFilter:
+    """Tests for SamplingFilter."""
+
+    def test_samples_each_call_site_separately(self):
+        """Alternating lines of one logger should each keep one in N."""
+        sampler = SamplingFilter({"wavespeed": 10})
+        kept = []
+        for _ in range(30):
+            for msg, lineno in (("Starting animate job", 176), ("Animate job started: request_id=%s", 184)):
+                if sampler.filter(make_record("wavespeed", msg, lineno)):
+                    kept.append(msg)
+        assert kept.count("Starting animate job") == 3
+        assert kept.count("Animate job started: request_id=%s") == 3
+
+    def test_kept_records_carry_rate(self):
+        """Kept records should say how many lines they stand for."""
+        sampler = SamplingFilter({"wavespeed": 10})
+        record = make_record("wavespeed", "Starting animate job", 176)
+        assert sampler.filter(record)
+        assert record.sampled_1_in == 10
+
+    def test_child_loggers_use_parent_rate(self):
+        """A rate should apply to the logger's children."""
+        sampler = SamplingFilter({"wavespeed": 2})
+        results = [sampler.filter(make_record("wavespeed.client", "Polling", 356)) for _ in range(4)]
+        assert results == [True, False, True, False]
+
+    def test_warnings_never_sampled(self):
+        """Warnings and errors should always be kept."""
+        sampler = SamplingFilter({"wavespeed": 10})
+        assert all(
+            sampler.filter(make_record("wavespeed", "Retrying", 200, logging.WARNING))
+            for _ in range(20)
+        )
+
+    def test_unconfigured_loggers_kept(self):
+        """Loggers without a rate should not be sampled."""
+        sampler = SamplingFilter({"wavespeed": 10})
+        assert all(sampler.filter(make_record("main", "Processing job", 1)) for _ in range(20))
@@ -1,6 +1,6 @@
 """Unit tests for worker main module."""
 import pytest
-from unittest.mock import MagicMock, patch, PropertyMock
+from unittest.mock import ANY, MagicMock, call, patch, PropertyMock
 import json
 
 import sys
@@ -17,6 +17,7 @@ from main import (
     process_upscale_job,
     process_foley_job,
     process_job,
+    StagingBudgetExceeded,
 )
 
 
@@ -69,7 +70,18 @@ class TestHandleTask:
             content_type='application/json'
         )
         assert response.status_code == 200
-        mock_process.assert_called_once_with('test_job_123')
+        mock_process.assert_called_once_with('test_job_123', trace_id=None, enqueued_at=None, profile=False)
+
+    @patch('main.process_job')
+    def test_forwards_trace_context(self, mock_process, client):
+        """Should pass the task's trace_id, enqueue time and profile flag to the processor."""
+        response = client.post(
+            '/',
+            data=json.dumps({'job_id': 'test_job_123', 'trace_id': 'abc123', 'enqueued_at': 1700000000.0, 'profile': True}),
+            content_type='application/json'
+        )
+        assert response.status_code == 200
+        mock_process.assert_called_once_with('test_job_123', trace_id='abc123', enqueued_at=1700000000.0, profile=True)
 
     @patch('main.process_job')
     def test_exception_returns_500(self, mock_process, client):
@@ -82,6 +94,17 @@ class TestHandleTask:
         )
         assert response.status_code == 500
 
+    @patch('main.process_job')
+    def test_staging_budget_exceeded_returns_429(self, mock_process, client):
+        """Should defer the task when the instance staging budget is full."""
+        mock_process.side_effect = StagingBudgetExceeded("Staging budget exhausted")
+        response = client.post(
+            '/',
+            data=json.dumps({'job_id': 'test_job_123'}),
+            content_type='application/json'
+        )
+        assert response.status_code == 429
+
 
 class TestGenerateSignedUrl:
     """Tests for GCS signed URL generation."""
@@ -334,6 +357,41 @@ class TestProcessJob:
 
         mock_animate.assert_called_once()
 
+    @patch('shared.worker_utils.stripe_utils.get_firestore')
+    @patch('shared.worker_utils.firestore_utils.get_firestore')
+    @patch('main.update_job_status')
+    @patch('main.process_animate_job')
+    @patch('main.get_firestore')
+    def test_reads_user_once_per_job(self, mock_firestore, mock_animate, mock_status, mock_utils_db, mock_stripe_db):
+        """Free tier and auto-refill checks should share one user document read."""
+        documents = {
+            "jobs/job_123": {"job_type": "animate", "user_id": "user_123", "credits_charged": 5},
+            "users/user_123": {"subscription_tier": "pro", "auto_refill": {"enabled": True, "threshold": 1}, "credits_balance": 50},
+        }
+        refs = {}
+
+        def document(collection, doc_id):
+            path = f"{collection}/{doc_id}"
+            if path not in refs:
+                snapshot = MagicMock()
+                snapshot.exists = path in documents
+                snapshot.to_dict.return_value = dict(documents.get(path, {}))
+                refs[path] = MagicMock(path=path)
+                refs[path].get.return_value = snapshot
+            return refs[path]
+
+        db = MagicMock()
+        db.collection.side_effect = lambda name: MagicMock(document=lambda doc_id: document(name, doc_id))
+        mock_firestore.return_value = db
+        mock_utils_db.return_value = db
+        mock_stripe_db.return_value = db
+        mock_animate.return_value = "outputs/user_123/job_123.mp4"
+
+        process_job("job_123")
+
+        assert refs["users/user_123"].get.call_count == 1
+        assert call("job_123", "completed", output_video_path="outputs/user_123/job_123.mp4") in mock_status.call_args_list
+
     @patch('main.refund_credits')
     @patch('main.update_job_status')
     @patch('main.get_firestore')
@@ -384,3 +442,25 @@ class TestProcessJob:
         process_job("job_123")
 
         mock_refund.assert_called_once_with("user_123", 5, "job_123")
+
+    @patch('main.refund_credits')
+    @patch('main.update_job_status')
+    @patch('main.process_animate_job')
+    @patch('main.get_firestore')
+    def test_staging_budget_exceeded_does_not_fail_job(self, mock_firestore, mock_animate, mock_status, mock_refund):
+        """Should re-raise staging deferrals without failing or refunding the job."""
+        mock_doc = MagicMock()
+        mock_doc.exists = True
+        mock_doc.to_dict.return_value = {
+            "job_type": "animate",
+            "user_id": "user_123",
+            "credits_charged": 5,
+        }
+        mock_firestore.return_value.collection.return_value.document.return_value.get.return_value = mock_doc
+        mock_animate.side_effect = StagingBudgetExceeded("Staging budget exhausted")
+
+        with pytest.raises(StagingBudgetExceeded):
+            process_job("job_123")
+
+        mock_refund.assert_not_called()
+        assert call("job_123", "failed", error_message=ANY) not in mock_status.call_args_list
@@ -173,7 +173,7 @@ class WaveSpeedClient:
         # Webhook URL goes as query parameter per WaveSpeed API docs
         params = {"webhook": webhook_url} if webhook_url else None
 
-        logger.info(f"Starting animate job: resolution={resolution}, mode={mode}, webhook={'yes' if webhook_url else 'no'}")
+        logger.info("Starting animate job: resolution=%s, mode=%s, webhook=%s", resolution, mode, 'yes' if webhook_url else 'no')
 
         response = self._request("POST", endpoint, data, params=params)
         request_id = response.get("data", {}).get("id")
@@ -181,7 +181,7 @@ class WaveSpeedClient:
         if not request_id:
             raise WaveSpeedAPIError("No request ID in response", response=response)
 
-        logger.info(f"Animate job started: request_id={request_id}")
+        logger.info("Animate job started: request_id=%s", request_id)
         return request_id
 
     def extend(
@@ -229,7 +229,7 @@ class WaveSpeedClient:
         # Webhook URL goes as query parameter per WaveSpeed API docs
         params = {"webhook": webhook_url} if webhook_url else None
 
-        logger.info(f"Starting extend job: duration={duration}, resolution={resolution}, webhook={'yes' if webhook_url else 'no'}")
+        logger.info("Starting extend job: duration=%s, resolution=%s, webhook=%s", duration, resolution, 'yes' if webhook_url else 'no')
 
         response = self._request("POST", endpoint, data, params=params)
         request_id = response.get("data", {}).get("id") or response.get("id")
@@ -237,7 +237,7 @@ class WaveSpeedClient:
         if not request_id:
             raise WaveSpeedAPIError("No request ID in response", response=response)
 
-        logger.info(f"Extend job started: request_id={request_id}")
+        logger.info("Extend job started: request_id=%s", request_id)
         return request_id
 
     def upscale(
@@ -266,7 +266,7 @@ class WaveSpeedClient:
         # Webhook URL goes as query parameter per WaveSpeed API docs
         params = {"webhook": webhook_url} if webhook_url else None
 
-        logger.info(f"Starting upscale job: target={target_resolution}, webhook={'yes' if webhook_url else 'no'}")
+        logger.info("Starting upscale job: target=%s, webhook=%s", target_resolution, 'yes' if webhook_url else 'no')
 
         response = self._request("POST", endpoint, data, params=params)
         request_id = response.get("data", {}).get("id") or response.get("id")
@@ -274,7 +274,7 @@ class WaveSpeedClient:
         if not request_id:
             raise WaveSpeedAPIError("No request ID in response", response=response)
 
-        logger.info(f"Upscale job started: request_id={request_id}")
+        logger.info("Upscale job started: request_id=%s", request_id)
         return request_id
 
     def foley(
@@ -308,7 +308,7 @@ class WaveSpeedClient:
         # Webhook URL goes as query parameter per WaveSpeed API docs
         params = {"webhook": webhook_url} if webhook_url else None
 
-        logger.info(f"Starting foley job, webhook={'yes' if webhook_url else 'no'}")
+        logger.info("Starting foley job, webhook=%s", 'yes' if webhook_url else 'no')
 
         response = self._request("POST", endpoint, data, params=params)
         request_id = response.get("data", {}).get("id") or response.get("id")
@@ -316,7 +316,7 @@ class WaveSpeedClient:
         if not request_id:
             raise WaveSpeedAPIError("No request ID in response", response=response)
 
-        logger.info(f"Foley job started: request_id={request_id}")
+        logger.info("Foley job started: request_id=%s", request_id)
         return request_id
 
     def get_result(self, request_id: str) -> Dict[str, Any]:
@@ -353,7 +353,7 @@ class WaveSpeedClient:
         max_wait = max_wait or self.MAX_POLL_TIME
         start_time = time.time()
 
-        logger.info(f"Polling for result: request_id={request_id}, max_wait={max_wait}s")
+        logger.info("Polling for result: request_id=%s, max_wait=%ss", request_id, max_wait)
 
         while True:
             elapsed = time.time() - start_time
@@ -364,14 +364,14 @@ class WaveSpeedClient:
             result = self.get_result(request_id)
             status = result.get("status") or result.get("data", {}).get("status")
 
-            logger.debug(f"Poll result: status={status}, elapsed={elapsed:.1f}s")
+            logger.debug("Poll result: status=%s, elapsed=%.1fs", status, elapsed)
 
             if callback:
                 callback(status, elapsed)
 
             # Check for completion (WaveSpeed uses both "completed" and "success")
             if status in (JobStatus.COMPLETED.value, JobStatus.SUCCESS.value):
-                logger.info(f"Job completed after {elapsed:.1f}s (status={status})")
+                logger.info("Job completed after %.1fs (status=%s)", elapsed, status)
                 return result
 
             if status == JobStatus.FAILED.value: